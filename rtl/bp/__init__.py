@@ -1,5 +1,6 @@
 from .branch_predictor import BranchPredictor
 from .rsb32 import ReturnStackBuffer
-from .btb import BTB
+from .btb import BTB, SetAssocBTB
 from .tage import TAGEPredictor
 from .ibp import IBPPredictor
+from .ittage import ITTAGEPredictor
@@ -1,53 +1,112 @@
 class BranchPredictorTop:
-    """Simplified top level branch predictor used in unit tests."""
+    """Simplified top level branch predictor used in unit tests.
 
-    def __init__(self, entries=32, *, coverage=None):
+    By default calls push the RSB when predicted and returns pop it when
+    they update, so calls and returns fetched down a wrong path corrupt
+    it.  With ``spec_rsb=True`` returns pop at prediction as well and every
+    predicted branch leaves an RSB checkpoint in ``last_checkpoint``; pass
+    it to :py:meth:`recover` (or :py:meth:`resolve`) when the branch turns
+    out mispredicted to undo the wrong-path pushes and pops.
+    """
+
+    def __init__(self, entries=32, *, indirect="ibp", spec_rsb=False, coverage=None):
         from .btb import BTB
         from .tage import TAGEPredictor
         from .ibp import IBPPredictor
+        from .ittage import ITTAGEPredictor
         from .rsb32 import ReturnStackBuffer
+        indirect_predictors = {"ibp": IBPPredictor, "ittage": ITTAGEPredictor}
+        if indirect not in indirect_predictors:
+            raise ValueError(f"unknown indirect predictor {indirect!r}")
         self.coverage = coverage
         self.btb = BTB(entries=entries, coverage=coverage)
         self.tage = TAGEPredictor(coverage=coverage)
-        self.ibp = IBPPredictor(coverage=coverage)
+        self.ibp = indirect_predictors[indirect](coverage=coverage)
         self.rsb = ReturnStackBuffer(coverage=coverage)
         self.last_target = 0
+        self.spec_rsb = spec_rsb
+        self.last_checkpoint = None
 
     def predict(self, pc, is_call=False, is_ret=False,
                 is_cond_branch=False, is_uncond_branch=False,
                 is_indirect=False, last_target=None):
         """Return (taken, predicted_pc) for the given instruction."""
         if is_ret:
-            return True, self.rsb.top()
+            if not self.spec_rsb:
+                return True, self.rsb.top()
+            result = True, self.rsb.pop()
 
-        if is_uncond_branch:
+        elif is_uncond_branch:
             # Use BTB target; unconditional branches are always taken
             _, target = self.btb.predict(pc)
             if is_call:
                 self.rsb.push((pc + 4) & 0xFFFFFFFFFFFFFFFF)
-            return True, target
+            result = True, target
 
-        if is_cond_branch:
+        elif is_cond_branch:
             taken = self.tage.predict(pc)
             if taken:
                 _, target = self.btb.predict(pc)
-                return True, target
-            return False, (pc + 4) & 0xFFFFFFFFFFFFFFFF
+                result = True, target
+            else:
+                result = False, (pc + 4) & 0xFFFFFFFFFFFFFFFF
 
-        if is_indirect:
+        elif is_indirect:
             tgt = self.ibp.predict(pc, self.last_target if last_target is None else last_target)
-            return True, tgt
+            if is_call:
+                self.rsb.push((pc + 4) & 0xFFFFFFFFFFFFFFFF)
+            result = True, tgt
+
+        else:
+            return False, (pc + 4) & 0xFFFFFFFFFFFFFFFF
 
-        return False, (pc + 4) & 0xFFFFFFFFFFFFFFFF
+        if self.spec_rsb:
+            self.last_checkpoint = self.rsb.checkpoint()
+        return result
 
     def update(self, pc, actual_taken, actual_target,
-               is_branch=False, is_indirect=False, is_ret=False):
-        """Update predictor state with actual branch outcome."""
+               is_branch=False, is_indirect=False, is_ret=False, kind=None):
+        """Update predictor state with actual branch outcome.
+
+        *kind* is the branch class from :mod:`rtl.bp.branch_trace`; it is
+        passed to the BTB, which a :class:`SetAssocBTB` stores per entry.
+        """
         if is_branch:
-            self.btb.update(pc, actual_target, actual_taken)
+            self.btb.update(pc, actual_target, actual_taken, kind)
             self.tage.update(pc, actual_taken)
         if is_indirect:
             self.ibp.update(pc, self.last_target, actual_target)
-        if is_ret:
+        elif is_branch or is_ret:
+            # path-history predictors also see the other branches
+            self.ibp.track(pc, actual_taken, actual_target)
+        if is_ret and not self.spec_rsb:
             self.rsb.pop()
         self.last_target = actual_target & 0xFFFFFFFFFFFFFFFF
+
+    def recover(self, checkpoint):
+        """Repair the RSB from the *checkpoint* of a mispredicted branch.
+
+        Returns whether a repair was made; without ``spec_rsb`` there is
+        nothing to roll back and wrong-path pushes stay on the stack.
+        """
+        if not self.spec_rsb or checkpoint is None:
+            return False
+        self.rsb.restore(checkpoint)
+        return True
+
+    def resolve(self, result, checkpoint=None):
+        """Repair the RSB if *result* reports a mispredict.
+
+        *result* is the dictionary returned by ``BranchUnit.compute`` or an
+        entry returned by ``ROB.commit``; the checkpoint is taken from its
+        ``rsb_checkpoint`` key unless given.  With ``spec_rsb`` a mispredict
+        without a checkpoint raises ``ValueError`` rather than leaving the
+        RSB unrepaired.
+        """
+        if not result or not result.get("mispredict"):
+            return False
+        if checkpoint is None:
+            checkpoint = result.get("rsb_checkpoint")
+        if checkpoint is None and self.spec_rsb:
+            raise ValueError("mispredicted branch carries no RSB checkpoint")
+        return self.recover(checkpoint)
@@ -0,0 +1,458 @@
+"""Trace-driven evaluation of branch predictors.
+
+Branches are handled as plain tuples ``(pc, target, instrs, flags)``:
+``instrs`` counts the instructions retired since the previous record,
+this branch included, and ``flags`` packs the branch class in its low
+three bits and the taken bit above them (see :func:`pack_flags`).  The
+same layout is used by the compact binary branch trace written by
+:class:`BranchTraceWriter`, so a trace is streamed through a predictor
+without building a dictionary per branch.
+
+:func:`branch_records` produces such tuples from a binary branch trace, a
+binary scoreboard trace, a list of scoreboard entries or an iterable of
+tuples, and :class:`BranchEvaluator` runs them through a
+:class:`BranchPredictorTop` (or any object with the same ``predict`` and
+``update`` methods) and reports MPKI and accuracy per branch class.
+"""
+
+import os
+import struct
+import zlib
+from collections import deque
+from itertools import islice
+
+from .branch_predictor_top import BranchPredictorTop
+
+# branch classes stored in the low bits of the flags
+COND, JUMP, CALL, RET, INDIRECT, ICALL = range(6)
+# records that only carry instructions retired after the last branch
+OTHER = 7
+KINDS = ("cond", "jump", "call", "ret", "indirect", "icall")
+LINK_REGS = (1, 5)
+
+BRANCH_MAGIC = b"BRTR"
+BRANCH_VERSION = 1
+_COMPRESSION = {None: 0, "zlib": 1}
+_FILE_HEADER = struct.Struct("<4sHBx")
+_CHUNK_HEADER = struct.Struct("<II")
+BRANCH_RECORD = struct.Struct("<QQIB")
+
+
+def pack_flags(kind, taken):
+    """Return the flags byte of a branch record."""
+    return kind | (bool(taken) << 3)
+
+
+def classify(instr):
+    """Return the branch class of RISC-V instruction *instr*, else ``None``.
+
+    ``JAL``/``JALR`` writing ``x1`` or ``x5`` are calls and a ``JALR``
+    through one of them without linking is a return, following the
+    return-address-stack hints of the RISC-V specification.
+    """
+    opcode = instr & 0x7F
+    if opcode == 0x63:
+        return COND
+    rd = (instr >> 7) & 0x1F
+    if opcode == 0x6F:
+        return CALL if rd in LINK_REGS else JUMP
+    if opcode == 0x67:
+        if rd in LINK_REGS:
+            return ICALL
+        if (instr >> 15) & 0x1F in LINK_REGS:
+            return RET
+        return INDIRECT
+    return None
+
+
+# ----------------------------------------------------------------------
+# binary branch traces
+# ----------------------------------------------------------------------
+class BranchTraceWriter:
+    """Write branch records to a compact binary branch trace.
+
+    Each record takes ``BRANCH_RECORD.size`` (21) bytes; records are
+    written in chunks of ``chunk_records``, optionally zlib-compressed.
+    """
+
+    def __init__(self, path, compression=None, chunk_records=1 << 16):
+        if compression not in _COMPRESSION:
+            raise ValueError(f"unknown compression {compression!r}")
+        self.compression = compression
+        self.chunk_records = chunk_records
+        self.count = 0
+        self._buf = bytearray()
+        self._pending = 0
+        self._f = open(path, "wb")
+        self._f.write(_FILE_HEADER.pack(BRANCH_MAGIC, BRANCH_VERSION, _COMPRESSION[compression]))
+
+    def write(self, pc, kind, taken, target, instrs=1):
+        """Append one branch."""
+        self.write_record((pc, target, instrs, pack_flags(kind, taken)))
+
+    def write_record(self, record):
+        """Append one ``(pc, target, instrs, flags)`` tuple."""
+        pc, target, instrs, flags = record
+        self._buf += BRANCH_RECORD.pack(
+            pc & 0xFFFFFFFFFFFFFFFF, target & 0xFFFFFFFFFFFFFFFF, instrs, flags)
+        self._pending += 1
+        self.count += 1
+        if self._pending >= self.chunk_records:
+            self.flush()
+
+    def write_many(self, records):
+        """Append every tuple of the iterable *records*."""
+        for record in records:
+            self.write_record(record)
+
+    def flush(self):
+        if self._pending:
+            payload = bytes(self._buf)
+            if self.compression == "zlib":
+                payload = zlib.compress(payload)
+            self._f.write(_CHUNK_HEADER.pack(self._pending, len(payload)))
+            self._f.write(payload)
+            self._buf.clear()
+            self._pending = 0
+        self._f.flush()
+
+    def close(self):
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BranchTraceReader:
+    """Read a trace written by :class:`BranchTraceWriter`."""
+
+    def __init__(self, path):
+        self._f = open(path, "rb")
+        header = self._f.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size:
+            self._f.close()
+            raise ValueError("truncated branch trace header")
+        magic, version, comp = _FILE_HEADER.unpack(header)
+        if magic != BRANCH_MAGIC:
+            self._f.close()
+            raise ValueError("not a branch trace file")
+        if version != BRANCH_VERSION or comp not in _COMPRESSION.values():
+            self._f.close()
+            raise ValueError(f"unsupported branch trace version {version}")
+        self.compressed = comp != 0
+
+    def chunks(self):
+        """Yield the raw payload of every chunk."""
+        f = self._f
+        f.seek(_FILE_HEADER.size)
+        while True:
+            raw = f.read(_CHUNK_HEADER.size)
+            if not raw:
+                return
+            if len(raw) < _CHUNK_HEADER.size:
+                raise ValueError("truncated chunk header")
+            _, size = _CHUNK_HEADER.unpack(raw)
+            payload = f.read(size)
+            yield zlib.decompress(payload) if self.compressed else payload
+
+    def records(self):
+        """Yield ``(pc, target, instrs, flags)`` tuples."""
+        for payload in self.chunks():
+            yield from BRANCH_RECORD.iter_unpack(payload)
+
+    __iter__ = records
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ----------------------------------------------------------------------
+# record sources
+# ----------------------------------------------------------------------
+def _branch_of(instr, pc, taken, next_pc, cache):
+    """Return ``(kind, target, taken)`` for one retired instruction.
+
+    The classification is memoized per instruction word.  Only conditional
+    branches take *taken* from the trace; jumps, calls and returns are
+    always taken, even when they land on ``pc + 4``.
+    """
+    info = cache.get(instr)
+    if info is None:
+        from tb.uvm_components.coverage import instruction_immediate
+
+        kind = classify(instr)
+        # direct branches carry their offset; indirect ones need next_pc
+        offset = instruction_immediate(instr) if kind in (COND, JUMP, CALL) else None
+        info = cache[instr] = (kind, offset)
+    kind, offset = info
+    if kind is None:
+        return None, 0, False
+    taken = bool(taken) or kind != COND
+    if offset is not None:
+        return kind, (pc + offset) & 0xFFFFFFFFFFFFFFFF, taken
+    return kind, next_pc if taken else 0, taken
+
+
+def _from_scoreboard_binary(path):
+    from tb.uvm_components.trace_utils import HEADER, TraceReader
+
+    pc_col = HEADER.index("pc")
+    instr_col = HEADER.index("instr")
+    next_col = HEADER.index("next_pc")
+    taken_col = HEADER.index("branch_taken")
+    cache = {}
+    gap = 0
+    with TraceReader(path) as reader:
+        for rec in reader.records():
+            gap += 1
+            kind, target, taken = _branch_of(
+                rec[instr_col], rec[pc_col], rec[taken_col], rec[next_col], cache)
+            if kind is not None:
+                yield rec[pc_col], target, gap, kind | (taken << 3)
+                gap = 0
+    if gap:
+        yield 0, 0, gap, OTHER
+
+
+def _from_entries(entries):
+    cache = {}
+    gap = 0
+    for entry in entries:
+        gap += 1
+        instr = entry.get("instr")
+        if instr is None:
+            continue
+        pc = entry.get("pc") or 0
+        taken = bool(entry.get("branch_taken"))
+        next_pc = entry.get("next_pc")
+        if next_pc is None:
+            next_pc = entry.get("branch_target") or 0
+        kind, target, taken = _branch_of(instr, pc, taken, next_pc, cache)
+        if kind is not None:
+            yield pc, target, gap, kind | (taken << 3)
+            gap = 0
+    if gap:
+        yield 0, 0, gap, OTHER
+
+
+def branch_records(source):
+    """Yield ``(pc, target, instrs, flags)`` tuples from *source*.
+
+    *source* is the path of a binary branch trace or of a binary
+    scoreboard trace (:class:`TraceWriter`), an iterable of scoreboard
+    entries such as ``Scoreboard.get_trace()``, or an iterable of record
+    tuples, which is passed through.  Scoreboard instructions are
+    classified with :func:`classify`; every retired instruction counts
+    towards ``instrs``.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            magic = f.read(4)
+        if magic == BRANCH_MAGIC:
+            with BranchTraceReader(source) as reader:
+                yield from reader.records()
+        else:
+            yield from _from_scoreboard_binary(source)
+        return
+    it = iter(source)
+    for first in it:
+        if isinstance(first, dict):
+            yield from _from_entries(_chain(first, it))
+        else:
+            yield first
+            yield from it
+        return
+
+
+def _chain(first, rest):
+    yield first
+    yield from rest
+
+
+def save_branch_trace(source, path, compression=None):
+    """Write the branch records of *source* to *path* and return their count."""
+    with BranchTraceWriter(path, compression=compression) as writer:
+        writer.write_many(branch_records(source))
+        return writer.count
+
+
+# ----------------------------------------------------------------------
+# evaluation
+# ----------------------------------------------------------------------
+class BranchEvaluator:
+    """Stream branch records through a predictor and collect statistics.
+
+    *predictor* defaults to a :class:`BranchPredictorTop`; its components
+    (``btb``, ``tage``, ``ibp``, ``rsb``) can be replaced to evaluate other
+    configurations.  Each branch is predicted and then updated with its
+    outcome, as if it resolved before the next one was fetched.
+
+    A branch is mispredicted when the predicted direction is wrong or when
+    it was correctly predicted taken to a wrong target.  Wrong targets of
+    direct branches count as BTB target mispredicts, those of returns as
+    return mispredicts and those of indirect jumps and calls as indirect
+    target mispredicts.
+
+    Resolving every branch at once hides wrong-path fetch.  With
+    ``wrong_path=n`` each mispredicted branch is followed by *n* branch
+    predictions without updates before it resolves.  The real wrong path
+    is not in the trace, so the next *n* branches of the trace stand in
+    for it: their calls and returns disturb the RSB as wrong-path code
+    would.  Afterwards the predictor's ``recover`` method, if any, is given
+    the checkpoint of the mispredicted branch, so RSB corruption can be
+    compared with and without ``BranchPredictorTop(spec_rsb=True)``.
+
+    Without ``spec_rsb`` a predicted return only reads the top of the RSB
+    and pops when it updates, so wrong-path returns never pop.  That
+    baseline therefore measures the pollution from wrong-path calls only,
+    not the entries lost to wrong-path returns.
+    """
+
+    def __init__(self, predictor=None, *, wrong_path=0):
+        self.predictor = predictor if predictor is not None else BranchPredictorTop()
+        self.wrong_path = wrong_path
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.instructions = 0
+        self.counts = [0] * len(KINDS)
+        self.mispredicts = [0] * len(KINDS)
+        self.target_mispredicts = [0] * len(KINDS)
+        self.wrong_path_branches = 0
+        self.repairs = 0
+        rsb = getattr(self.predictor, "rsb", None)
+        self._rsb_base = (getattr(rsb, "overflows", 0), getattr(rsb, "underflows", 0))
+
+    def _speculate(self, records):
+        """Predict *records* as if fetched down a wrong path, then repair."""
+        predictor = self.predictor
+        checkpoint = getattr(predictor, "last_checkpoint", None)
+        predict = predictor.predict
+        for pc, _, _, flags in records:
+            kind = flags & 7
+            if kind == COND:
+                predict(pc, is_cond_branch=True)
+            elif kind == RET:
+                predict(pc, is_ret=True)
+            elif kind == JUMP or kind == CALL:
+                predict(pc, is_uncond_branch=True, is_call=kind == CALL)
+            elif kind != OTHER:
+                predict(pc, is_indirect=True, is_call=kind == ICALL)
+            else:
+                continue
+            self.wrong_path_branches += 1
+        recover = getattr(predictor, "recover", None)
+        if recover is not None and recover(checkpoint):
+            self.repairs += 1
+
+    def run(self, source):
+        """Evaluate every record of *source* (see :func:`branch_records`)."""
+        predict = self.predictor.predict
+        update = self.predictor.update
+        counts = self.counts
+        mispredicts = self.mispredicts
+        target_mispredicts = self.target_mispredicts
+        wrong_path = self.wrong_path
+        records = iter(branch_records(source))
+        ahead = deque()
+        instructions = 0
+        while True:
+            if ahead:
+                record = ahead.popleft()
+            else:
+                record = next(records, None)
+                if record is None:
+                    break
+            pc, target, instrs, flags = record
+            instructions += instrs
+            kind = flags & 7
+            taken = flags > 7
+            if kind == COND:
+                pred_taken, pred_target = predict(pc, is_cond_branch=True)
+                update(pc, taken, target, is_branch=True, kind=kind)
+            elif kind == RET:
+                pred_taken, pred_target = predict(pc, is_ret=True)
+                update(pc, taken, target, is_ret=True, kind=kind)
+            elif kind == JUMP or kind == CALL:
+                pred_taken, pred_target = predict(
+                    pc, is_uncond_branch=True, is_call=kind == CALL)
+                update(pc, taken, target, is_branch=True, kind=kind)
+            elif kind == OTHER:
+                continue
+            else:
+                pred_taken, pred_target = predict(
+                    pc, is_indirect=True, is_call=kind == ICALL)
+                update(pc, taken, target, is_indirect=True, kind=kind)
+            counts[kind] += 1
+            if bool(pred_taken) != taken:
+                mispredicts[kind] += 1
+            elif taken and pred_target != target:
+                mispredicts[kind] += 1
+                target_mispredicts[kind] += 1
+            else:
+                continue
+            if wrong_path:
+                ahead.extend(islice(records, wrong_path - len(ahead)))
+                self._speculate(islice(ahead, wrong_path))
+        self.instructions += instructions
+        return self.report()
+
+    def report(self):
+        """Return MPKI, per-class accuracy and RSB statistics."""
+        kilo = self.instructions / 1000 if self.instructions else 0
+        classes = {}
+        for kind, name in enumerate(KINDS):
+            n = self.counts[kind]
+            m = self.mispredicts[kind]
+            classes[name] = {
+                "branches": n,
+                "mispredicts": m,
+                "target_mispredicts": self.target_mispredicts[kind],
+                "accuracy": 1.0 - m / n if n else 0.0,
+                "mpki": m / kilo if kilo else 0.0,
+            }
+        branches = sum(self.counts)
+        missed = sum(self.mispredicts)
+        tmis = self.target_mispredicts
+        rsb = getattr(self.predictor, "rsb", None)
+        overflows = getattr(rsb, "overflows", 0) - self._rsb_base[0]
+        underflows = getattr(rsb, "underflows", 0) - self._rsb_base[1]
+        calls = self.counts[CALL] + self.counts[ICALL]
+        returns = self.counts[RET]
+        return {
+            "instructions": self.instructions,
+            "branches": branches,
+            "mispredicts": missed,
+            "mpki": missed / kilo if kilo else 0.0,
+            "accuracy": 1.0 - missed / branches if branches else 0.0,
+            "classes": classes,
+            "btb_target_mispredicts": tmis[COND] + tmis[JUMP] + tmis[CALL],
+            "indirect_target_mispredicts": tmis[INDIRECT] + tmis[ICALL],
+            "wrong_path_branches": self.wrong_path_branches,
+            "rsb": {
+                "calls": calls,
+                "returns": returns,
+                "return_mispredicts": self.mispredicts[RET],
+                "overflows": overflows,
+                "underflows": underflows,
+                "overflow_rate": overflows / calls if calls else 0.0,
+                "underflow_rate": underflows / returns if returns else 0.0,
+                "repairs": self.repairs,
+            },
+        }
+
+
+def evaluate(source, predictor=None, wrong_path=0):
+    """Run *source* through *predictor* and return the report."""
+    return BranchEvaluator(predictor, wrong_path=wrong_path).run(source)
@@ -1,24 +1,339 @@
+from array import array
+from collections import OrderedDict
+
+
 class BTB:
     """Simple Branch Target Buffer model with optional coverage hooks."""
 
     def __init__(self, entries=8, *, coverage=None):
         self.entries = entries
         self.table = {}
+        self.bind_coverage(coverage)
+
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
         self.coverage = coverage
+        self._record_btb = coverage.recorder("btb_event") if coverage else None
 
     def predict(self, pc):
         if pc in self.table:
             return True, self.table[pc]
         return False, pc + 4
 
-    def update(self, pc, target, taken):
+    def update(self, pc, target, taken, kind=None):
+        # *kind* is accepted for SetAssocBTB compatibility; no class is kept
         if taken:
             if len(self.table) >= self.entries:
                 self.table.pop(next(iter(self.table)))
             self.table[pc] = target
-            if self.coverage:
-                index = pc % self.entries
-                tag = pc >> 2
-                self.coverage.record_btb_event(index, tag)
+            if self._record_btb is not None:
+                self._record_btb(pc % self.entries, pc >> 2)
         elif pc in self.table:
             self.table[pc] = target
+
+
+class SetAssocBTB:
+    """Set-associative BTB model matching the ``btb4096_8w`` organisation.
+
+    The table is organised by fetch block: the aligned ``block_bytes``
+    block holding a PC selects one of ``entries // ways`` sets, and each
+    way holds one branch of a block, identified by a ``tag_bits`` partial
+    tag of the block address and the branch's instruction slot within the
+    block.  A way also stores the branch target and a branch-type code
+    (the classes of :mod:`rtl.bp.branch_trace`), so :py:meth:`lookup_block`
+    returns every known branch of a fetch block from a single set.
+
+    All state lives in preallocated arrays indexed by ``set * ways + way``;
+    replacement uses one tree-PLRU word per set, or one age stamp per way
+    with ``replacement="lru"``.
+
+    Partial tags let branches of different blocks alias.  Each way keeps
+    the full PC it was written by, used only for statistics: a hit on an
+    entry written by another branch counts as an alias hit.  Misses of
+    branches that were allocated before are classified as capacity or
+    conflict by comparison with a fully associative LRU BTB of the same
+    size; a branch's first miss is compulsory and repeated misses of a
+    never allocated branch are counted apart.  Evictions are counted
+    per set (see :py:meth:`hot_sets`).
+
+    ``predict``/``update`` take the same arguments as :class:`BTB`, so an
+    instance can replace ``BranchPredictorTop.btb``.
+    """
+
+    def __init__(
+        self,
+        entries=4096,
+        ways=8,
+        *,
+        block_bytes=32,
+        tag_bits=16,
+        replacement="plru",
+        coverage=None,
+    ):
+        if ways <= 0 or ways & (ways - 1):
+            raise ValueError("ways must be a power of two")
+        if entries <= 0 or entries % ways:
+            raise ValueError("entries must be a positive multiple of ways")
+        sets = entries // ways
+        if sets & (sets - 1):
+            raise ValueError("number of sets must be a power of two")
+        if block_bytes < 4 or block_bytes & (block_bytes - 1):
+            raise ValueError("block_bytes must be a power of two of at least 4")
+        if replacement not in ("lru", "plru"):
+            raise ValueError(f"unknown replacement policy {replacement!r}")
+        self.entries = entries
+        self.ways = ways
+        self.sets = sets
+        self.block_bytes = block_bytes
+        self.tag_bits = tag_bits
+        self.replacement = replacement
+        self.bind_coverage(coverage)
+        self._set_mask = sets - 1
+        self._set_bits = sets.bit_length() - 1
+        self._block_bits = block_bytes.bit_length() - 1
+        self._tag_mask = (1 << tag_bits) - 1
+        self._levels = ways.bit_length() - 1
+        self.reset()
+
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
+        self.coverage = coverage
+        self._record_btb = coverage.recorder("btb_event") if coverage else None
+
+    def reset(self):
+        """Invalidate every entry and clear the statistics."""
+        n = self.entries
+        self._valid = bytearray(n)
+        self._tags = array("I", [0]) * n
+        self._slots = bytearray(n)
+        self._kinds = bytearray(n)
+        self._targets = array("Q", [0]) * n
+        # full PC of the branch that last wrote each way, for statistics
+        self._pcs = array("Q", [0]) * n
+        if self.replacement == "plru":
+            self._plru = array("I", [0]) * self.sets
+        else:
+            self._age = array("Q", [0]) * n
+            self._clock = 0
+        # fully associative LRU reference used to classify misses
+        self._shadow = OrderedDict()
+        # branches allocated at least once, and branches that missed before
+        self._seen = set()
+        self._missed = set()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.alias_hits = 0
+        self.compulsory_misses = 0
+        self.capacity_misses = 0
+        self.conflict_misses = 0
+        self.unallocated_misses = 0
+        self.allocations = 0
+        self.evictions = 0
+        self.block_lookups = 0
+        self.block_branches = 0
+        self.set_evictions = array("I", [0]) * self.sets
+
+    # ------------------------------------------------------------------
+    # set helpers
+    # ------------------------------------------------------------------
+    def _locate(self, pc):
+        """Return ``(set, tag, slot)`` of the branch at *pc*."""
+        block = pc >> self._block_bits
+        upper = block >> self._set_bits
+        tag = 0
+        while upper:
+            tag ^= upper & self._tag_mask
+            upper >>= self.tag_bits
+        slot = (pc & (self.block_bytes - 1)) >> 2
+        return block & self._set_mask, tag, slot
+
+    def _find(self, base, tag, slot):
+        valid = self._valid
+        tags = self._tags
+        slots = self._slots
+        for i in range(base, base + self.ways):
+            if valid[i] and tags[i] == tag and slots[i] == slot:
+                return i
+        return -1
+
+    def _touch(self, index, way):
+        if self.replacement == "lru":
+            self._age[index * self.ways + way] = self._clock
+            self._clock += 1
+            return
+        # point every node on the path to the way away from it
+        bits = self._plru[index]
+        node = 1
+        for level in range(self._levels - 1, -1, -1):
+            bit = (way >> level) & 1
+            if bit:
+                bits &= ~(1 << node)
+            else:
+                bits |= 1 << node
+            node = 2 * node + bit
+        self._plru[index] = bits
+
+    def _victim(self, index):
+        base = index * self.ways
+        for way in range(self.ways):
+            if not self._valid[base + way]:
+                return way
+        if self.replacement == "lru":
+            ages = self._age[base:base + self.ways]
+            return ages.index(min(ages))
+        bits = self._plru[index]
+        node = 1
+        way = 0
+        for _ in range(self._levels):
+            bit = (bits >> node) & 1
+            way = (way << 1) | bit
+            node = 2 * node + bit
+        return way
+
+    def _reference(self, pc, allocate):
+        """Update the fully associative reference and return whether *pc* hit."""
+        shadow = self._shadow
+        if pc in shadow:
+            shadow.move_to_end(pc)
+            return True
+        if allocate:
+            shadow[pc] = None
+            if len(shadow) > self.entries:
+                shadow.popitem(last=False)
+        return False
+
+    # ------------------------------------------------------------------
+    # lookup
+    # ------------------------------------------------------------------
+    def lookup(self, pc):
+        """Return ``(hit, target, kind)`` for the branch at *pc*.
+
+        A miss returns the fall-through address and a ``kind`` of ``None``.
+        """
+        self.lookups += 1
+        index, tag, slot = self._locate(pc)
+        base = index * self.ways
+        i = self._find(base, tag, slot)
+        in_reference = self._reference(pc, False)
+        if i >= 0:
+            self.hits += 1
+            if self._pcs[i] != pc:
+                self.alias_hits += 1
+            self._touch(index, i - base)
+            return True, self._targets[i], self._kinds[i]
+        self.misses += 1
+        if pc not in self._seen:
+            # never allocated: the first miss is compulsory, later ones come
+            # from a branch that was never taken and say nothing of the size
+            if pc in self._missed:
+                self.unallocated_misses += 1
+            else:
+                self._missed.add(pc)
+                self.compulsory_misses += 1
+        elif in_reference:
+            self.conflict_misses += 1
+        else:
+            self.capacity_misses += 1
+        return False, pc + 4, None
+
+    def predict(self, pc):
+        """Return ``(hit, target)`` like :py:meth:`BTB.predict`."""
+        hit, target, _ = self.lookup(pc)
+        return hit, target
+
+    def lookup_block(self, pc):
+        """Return the known branches of the fetch block from *pc* onwards.
+
+        The result is a list of ``(branch_pc, target, kind)`` tuples in
+        program order, covering the branches at or after *pc* up to the end
+        of its ``block_bytes`` block, all read from one set.
+        """
+        index, tag, start = self._locate(pc)
+        base = index * self.ways
+        block = pc & ~(self.block_bytes - 1)
+        found = []
+        for i in range(base, base + self.ways):
+            if self._valid[i] and self._tags[i] == tag and self._slots[i] >= start:
+                found.append((block + 4 * self._slots[i], self._targets[i], self._kinds[i]))
+                self._touch(index, i - base)
+        found.sort()
+        self.block_lookups += 1
+        self.block_branches += len(found)
+        return found
+
+    # ------------------------------------------------------------------
+    # update
+    # ------------------------------------------------------------------
+    def update(self, pc, target, taken, kind=None):
+        """Record the outcome of the branch at *pc*.
+
+        Taken branches are allocated on a miss; a present entry gets the new
+        target, and *kind* when given, whatever the direction.  An entry
+        allocated without *kind* is stored as ``COND``.
+        """
+        index, tag, slot = self._locate(pc)
+        base = index * self.ways
+        i = self._find(base, tag, slot)
+        if taken:
+            self._reference(pc, True)
+        if i >= 0:
+            self._targets[i] = target
+            self._pcs[i] = pc
+            if kind is not None:
+                self._kinds[i] = kind
+            return
+        if not taken:
+            return
+        way = self._victim(index)
+        i = base + way
+        if self._valid[i]:
+            self.evictions += 1
+            self.set_evictions[index] += 1
+        self._valid[i] = 1
+        self._tags[i] = tag
+        self._slots[i] = slot
+        self._kinds[i] = kind or 0
+        self._targets[i] = target
+        self._pcs[i] = pc
+        self._touch(index, way)
+        self._seen.add(pc)
+        self.allocations += 1
+        if self._record_btb is not None:
+            self._record_btb(index, tag)
+
+    # ------------------------------------------------------------------
+    # statistics
+    # ------------------------------------------------------------------
+    def hot_sets(self, count=8):
+        """Return up to *count* ``(set, evictions)`` pairs, most evictions first."""
+        ranked = sorted(
+            ((n, index) for index, n in enumerate(self.set_evictions) if n),
+            key=lambda item: (-item[0], item[1]),
+        )
+        return [(index, n) for n, index in ranked[:count]]
+
+    def stats(self):
+        """Return lookup, miss classification and occupancy statistics."""
+        return {
+            "entries": self.entries,
+            "valid": sum(self._valid),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "alias_hits": self.alias_hits,
+            "alias_rate": self.alias_hits / self.hits if self.hits else 0.0,
+            "compulsory_misses": self.compulsory_misses,
+            "capacity_misses": self.capacity_misses,
+            "conflict_misses": self.conflict_misses,
+            "unallocated_misses": self.unallocated_misses,
+            "allocations": self.allocations,
+            "evictions": self.evictions,
+            "block_lookups": self.block_lookups,
+            "branches_per_block": (self.block_branches / self.block_lookups
+                                   if self.block_lookups else 0.0),
+        }
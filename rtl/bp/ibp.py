@@ -5,7 +5,12 @@ class IBPPredictor:
         self.entries = entries
         self.mask = entries - 1
         self.table = {}
+        self.bind_coverage(coverage)
+
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
         self.coverage = coverage
+        self._record_ibp = coverage.recorder("ibp_event") if coverage else None
 
     def _index(self, pc, last):
         return (pc ^ last) & self.mask
@@ -19,7 +24,10 @@ class IBPPredictor:
 
     def update(self, pc, last, target):
         idx = self._index(pc, last)
-        new_tag = pc
-        if self.table.get(idx) != (pc, target & 0xFFFFFFFFFFFFFFFF) and self.coverage:
-            self.coverage.record_ibp_event(idx, new_tag >> 2)
-        self.table[idx] = (pc, target & 0xFFFFFFFFFFFFFFFF)
+        entry = (pc, target & 0xFFFFFFFFFFFFFFFF)
+        if self._record_ibp is not None and self.table.get(idx) != entry:
+            self._record_ibp(idx, pc >> 2)
+        self.table[idx] = entry
+
+    def track(self, pc, taken, target):
+        """Ignore other branches; only the last target is hashed."""
@@ -0,0 +1,259 @@
+from array import array
+
+from .tage import _fold, history_lengths
+
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+class ITTAGEPredictor:
+    """ITTAGE-style indirect branch target predictor.
+
+    Table 0 is an untagged base table of ``base_entries`` targets indexed
+    by PC.  Tables ``1 .. tables-1`` are tagged tables of ``entries``
+    entries, each holding a target, a ``tag_bits`` partial tag, a 2-bit
+    confidence counter and a 2-bit useful counter, indexed by a hash of the
+    PC with a geometrically growing slice of the path history, from
+    ``min_history`` to ``max_history`` bits.
+
+    The path history records every branch, not only indirect ones: each
+    branch shifts in its direction and a taken branch also shifts in
+    ``target_bits`` bits of its target, so the targets of earlier indirect
+    jumps (the previous bytecode handler of an interpreter, say) select
+    the entry.  Branches other than indirect jumps are passed to
+    :py:meth:`track`; :py:meth:`update` shifts the indirect jump itself.
+    Like :class:`TAGEPredictor`, the slices are kept folded so a lookup
+    costs the same for any history length.
+
+    The longest matching table provides the target, unless its confidence
+    is zero and an alternate (the next match, or the base) exists.  A wrong
+    target lowers the confidence of the provider and replaces its target
+    once the confidence is zero; a misprediction also allocates an entry in
+    one longer table with a zero useful counter.  All useful counters are
+    halved every ``reset_period`` updates.
+
+    ``predict``/``update`` take the same arguments as :class:`IBPPredictor`
+    (the last target is ignored) so the predictor can replace it in
+    :class:`BranchPredictorTop`.  Allocations are recorded as IBP events in
+    the coverage model.
+    """
+
+    def __init__(
+        self,
+        tables=5,
+        entries=256,
+        *,
+        base_entries=256,
+        tag_bits=9,
+        min_history=4,
+        max_history=128,
+        target_bits=2,
+        reset_period=1 << 16,
+        coverage=None,
+    ):
+        if tables < 2:
+            raise ValueError("ITTAGE needs a base table and at least one tagged table")
+        for name, value in (("entries", entries), ("base_entries", base_entries)):
+            if value <= 0 or value & (value - 1):
+                raise ValueError(f"{name} must be a power of two")
+        if not 0 < min_history <= max_history:
+            raise ValueError("history lengths must satisfy 0 < min_history <= max_history")
+        self.tables = tables
+        self.entries = entries
+        self.mask = entries - 1
+        self.base_entries = base_entries
+        self.tag_bits = tag_bits
+        self.target_bits = target_bits
+        self.reset_period = reset_period
+        self.bind_coverage(coverage)
+        self.lengths = history_lengths(tables - 1, min_history, max_history)
+        self._index_bits = entries.bit_length() - 1
+        self._tag_mask = (1 << tag_bits) - 1
+        self._hist_size = 1 << max(self.lengths).bit_length()
+        self.reset()
+
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
+        self.coverage = coverage
+        self._record_ibp = coverage.recorder("ibp_event") if coverage else None
+
+    def reset(self):
+        """Return every table and the path history to the reset state."""
+        tagged = self.tables - 1
+        n = tagged * self.entries
+        self.base_target = array("Q", [0]) * self.base_entries
+        self.base_conf = bytearray(self.base_entries)
+        # tagged entries in flat arrays indexed by table * entries + index
+        self.target = array("Q", [0]) * n
+        self.tag = array("H", [0]) * n
+        self.valid = bytearray(n)
+        self.conf = bytearray(n)
+        self.useful = bytearray(n)
+        self._hist = bytearray(self._hist_size)
+        self._head = 0
+        self.shifts = 0
+        self._fold_index = array("I", [0]) * tagged
+        self._fold_tag0 = array("I", [0]) * tagged
+        self._fold_tag1 = array("I", [0]) * tagged
+        self.updates = 0
+        self._lfsr = 0xACE1
+        self._lookup_key = None
+        self._lookup = None
+
+    # ------------------------------------------------------------------
+    # lookup
+    # ------------------------------------------------------------------
+    def _compute(self, pc):
+        """Return the lookup state for *pc* under the current history."""
+        key = (pc, self.shifts)
+        if key == self._lookup_key:
+            return self._lookup
+        entries = self.entries
+        mask = self.mask
+        tag_mask = self._tag_mask
+        bits = self._index_bits
+        p = pc >> 2
+        slots = []
+        provider = alt = -1
+        for t in range(self.tables - 2, -1, -1):
+            index = (p ^ (p >> bits) ^ self._fold_index[t]) & mask
+            tag = (p ^ self._fold_tag0[t] ^ (self._fold_tag1[t] << 1)) & tag_mask
+            slot = t * entries + index
+            slots.append((slot, tag))
+            if self.valid[slot] and self.tag[slot] == tag:
+                if provider < 0:
+                    provider = t
+                elif alt < 0:
+                    alt = t
+        slots.reverse()
+        base_index = p & (self.base_entries - 1)
+        if alt >= 0:
+            alt_target = self.target[slots[alt][0]]
+        else:
+            alt_target = self.base_target[base_index]
+        if provider >= 0:
+            slot = slots[provider][0]
+            provider_target = self.target[slot]
+            if self.conf[slot] == 0 and (alt >= 0 or self.base_conf[base_index]):
+                target = alt_target
+            else:
+                target = provider_target
+        else:
+            provider_target = target = alt_target
+        result = (slots, provider, alt_target, provider_target, target, base_index)
+        self._lookup_key = key
+        self._lookup = result
+        return result
+
+    def predict(self, pc, last=None):
+        """Return the predicted target of the indirect jump at *pc*."""
+        return self._compute(pc)[4]
+
+    def provider(self, pc):
+        """Return the table providing the target for *pc* (0 = base)."""
+        return self._compute(pc)[1] + 1
+
+    def confidence(self, pc):
+        """Return the confidence counter behind the prediction for *pc*."""
+        slots, provider, _, _, _, base_index = self._compute(pc)
+        if provider >= 0:
+            return self.conf[slots[provider][0]]
+        return self.base_conf[base_index]
+
+    # ------------------------------------------------------------------
+    # update
+    # ------------------------------------------------------------------
+    def update(self, pc, last, target):
+        """Train the predictor with the *target* of the indirect jump at *pc*."""
+        target &= _MASK64
+        slots, provider, alt_target, provider_target, pred, base_index = self._compute(pc)
+        conf = self.conf
+        useful = self.useful
+        if provider >= 0:
+            slot = slots[provider][0]
+            if provider_target == target:
+                if conf[slot] < 3:
+                    conf[slot] += 1
+                if alt_target != target and useful[slot] < 3:
+                    useful[slot] += 1
+            else:
+                if alt_target == target and useful[slot]:
+                    useful[slot] -= 1
+                if conf[slot]:
+                    conf[slot] -= 1
+                else:
+                    self.target[slot] = target
+        else:
+            self._train_base(base_index, target)
+        if pred != target and provider < self.tables - 2:
+            self._allocate(slots, provider, target)
+        self.updates += 1
+        if self.updates % self.reset_period == 0:
+            for i, u in enumerate(useful):
+                if u:
+                    useful[i] = u >> 1
+        self.track(pc, True, target)
+
+    def _train_base(self, index, target):
+        if self.base_target[index] == target:
+            if self.base_conf[index] < 3:
+                self.base_conf[index] += 1
+        elif self.base_conf[index]:
+            self.base_conf[index] -= 1
+        else:
+            self.base_target[index] = target
+
+    def _allocate(self, slots, provider, target):
+        useful = self.useful
+        candidates = [t for t in range(provider + 1, self.tables - 1)
+                      if useful[slots[t][0]] == 0]
+        if not candidates:
+            for t in range(provider + 1, self.tables - 1):
+                slot = slots[t][0]
+                if useful[slot]:
+                    useful[slot] -= 1
+            return
+        t = candidates[0]
+        if len(candidates) > 1:
+            # 16-bit Galois LFSR, skipping the shortest table one time in four
+            lfsr = self._lfsr
+            self._lfsr = (lfsr >> 1) ^ (0xB400 if lfsr & 1 else 0)
+            if lfsr & 3 == 0:
+                t = candidates[1]
+        slot, tag = slots[t]
+        self.valid[slot] = 1
+        self.tag[slot] = tag
+        self.target[slot] = target
+        self.conf[slot] = 0
+        useful[slot] = 0
+        if self._record_ibp is not None:
+            self._record_ibp(slot, tag)
+
+    # ------------------------------------------------------------------
+    # path history
+    # ------------------------------------------------------------------
+    def track(self, pc, taken, target):
+        """Shift a branch at *pc* into the path history."""
+        self._shift(bool(taken))
+        if taken:
+            # top bits of a multiplicative hash, so aligned targets differ too
+            t = ((target >> 2) * 0x9E3779B97F4A7C15) & _MASK64
+            for i in range(1, self.target_bits + 1):
+                self._shift((t >> (64 - i)) & 1)
+
+    def _shift(self, bit):
+        size_mask = self._hist_size - 1
+        head = (self._head + 1) & size_mask
+        self._head = head
+        self.shifts += 1
+        hist = self._hist
+        hist[head] = bit
+        index_bits = self._index_bits
+        tag_bits = self.tag_bits
+        fold_index = self._fold_index
+        fold_tag0 = self._fold_tag0
+        fold_tag1 = self._fold_tag1
+        for t, length in enumerate(self.lengths):
+            out = hist[(head - length) & size_mask]
+            fold_index[t] = _fold(fold_index[t], bit, out, length, index_bits)
+            fold_tag0[t] = _fold(fold_tag0[t], bit, out, length, tag_bits)
+            fold_tag1[t] = _fold(fold_tag1[t], bit, out, length, tag_bits - 1)
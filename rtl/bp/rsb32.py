@@ -6,15 +6,29 @@ class ReturnStackBuffer:
         self.stack = [0] * depth
         self.sp = 0  # points to next free slot
         self.count = 0
-        self.coverage = coverage
+        self.bind_coverage(coverage)
         self.overflow_flag = False
         self.underflow_flag = False
+        # running totals, unlike the flags which stay set until cleared
+        self.overflows = 0
+        self.underflows = 0
+        self.repairs = 0
+
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
+        self.coverage = coverage
+        if coverage:
+            self._record_overflow = coverage.recorder("rsb_overflow")
+            self._record_underflow = coverage.recorder("rsb_underflow")
+        else:
+            self._record_overflow = self._record_underflow = None
 
     def push(self, addr):
         if self.count >= self.depth:
             self.overflow_flag = True
-            if self.coverage:
-                self.coverage.record_rsb_overflow()
+            self.overflows += 1
+            if self._record_overflow is not None:
+                self._record_overflow()
         else:
             self.count = min(self.count + 1, self.depth)
         self.stack[self.sp] = addr & 0xFFFFFFFFFFFFFFFF
@@ -23,8 +37,9 @@ class ReturnStackBuffer:
     def pop(self):
         if self.count == 0:
             self.underflow_flag = True
-            if self.coverage:
-                self.coverage.record_rsb_underflow()
+            self.underflows += 1
+            if self._record_underflow is not None:
+                self._record_underflow()
             return 0
         self.sp = (self.sp - 1) % self.depth
         self.count -= 1
@@ -38,3 +53,19 @@ class ReturnStackBuffer:
         if self.count == 0:
             return 0
         return self.stack[(self.sp - 1) % self.depth]
+
+    def checkpoint(self):
+        """Return the top-of-stack pointer, depth and entry for :py:meth:`restore`."""
+        return self.sp, self.count, self.stack[(self.sp - 1) % self.depth]
+
+    def restore(self, checkpoint):
+        """Roll back to *checkpoint* after wrong-path pushes and pops.
+
+        Only the pointer and the top entry are restored, as in hardware:
+        entries below the top that wrong-path calls overwrote stay corrupted.
+        """
+        sp, count, top = checkpoint
+        self.sp = sp
+        self.count = count
+        self.stack[(sp - 1) % self.depth] = top
+        self.repairs += 1
@@ -1,38 +1,267 @@
+from array import array
+
+
+def history_lengths(tagged, min_history, max_history):
+    """Return *tagged* geometric history lengths from *min_history* to *max_history*."""
+    if tagged == 1:
+        return [min_history]
+    ratio = (max_history / min_history) ** (1 / (tagged - 1))
+    return [int(min_history * ratio ** i + 0.5) for i in range(tagged)]
+
+
 class TAGEPredictor:
-    """Simplified TAGE branch predictor model with optional coverage."""
+    """Tagged geometric history length (TAGE) branch predictor.
+
+    Table 0 is a bimodal base predictor of ``base_entries`` 2-bit counters
+    indexed by PC.  Tables ``1 .. tables-1`` are tagged tables of
+    ``entries`` entries, each holding a 3-bit signed counter, a
+    ``tag_bits`` partial tag and a 2-bit useful counter, indexed by a hash
+    of the PC with a growing slice of the global history: the lengths
+    grow geometrically from ``min_history`` to ``max_history`` bits.
 
-    def __init__(self, tables=5, entries=1024, *, coverage=None):
+    The history slices are never hashed directly.  Each tagged table keeps
+    folded copies of its slice, one as wide as the index and two for the
+    tag, which are updated in constant time as each outcome is shifted in,
+    so a prediction costs the same with 8 or 640 bits of history.
+
+    The longest matching table provides the prediction, with the next
+    match (or the base) as alternate.  A misprediction allocates an entry
+    in one longer table whose useful counter is zero, or ages the useful
+    counters of those tables when none is free; all useful counters are
+    halved every ``reset_period`` updates.  Allocations are recorded as
+    ``(table, index, tag)`` events in the coverage model, as are the base
+    entries that get trained.
+    """
+
+    def __init__(
+        self,
+        tables=5,
+        entries=1024,
+        *,
+        base_entries=None,
+        tag_bits=11,
+        min_history=8,
+        max_history=640,
+        reset_period=1 << 18,
+        coverage=None,
+    ):
+        if tables < 2:
+            raise ValueError("TAGE needs a base table and at least one tagged table")
+        base_entries = 4 * entries if base_entries is None else base_entries
+        for name, value in (("entries", entries), ("base_entries", base_entries)):
+            if value <= 0 or value & (value - 1):
+                raise ValueError(f"{name} must be a power of two")
+        if not 0 < min_history <= max_history:
+            raise ValueError("history lengths must satisfy 0 < min_history <= max_history")
         self.tables = tables
         self.entries = entries
         self.mask = entries - 1
-        # Initialize 2-bit counters to weakly not taken (1)
-        self.table = [[1 for _ in range(entries)] for _ in range(tables)]
-        self.tags = [[None for _ in range(entries)] for _ in range(tables)]
-        self.history = 0
-        self.hist_mask = (1 << tables) - 1
+        self.base_entries = base_entries
+        self.tag_bits = tag_bits
+        self.reset_period = reset_period
+        self.bind_coverage(coverage)
+        self.lengths = history_lengths(tables - 1, min_history, max_history)
+        self._index_bits = entries.bit_length() - 1
+        self._tag_mask = (1 << tag_bits) - 1
+        self._hist_size = 1 << max(self.lengths).bit_length()
+        self.reset()
+
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
         self.coverage = coverage
+        self._record_tage = coverage.recorder("tage_event") if coverage else None
 
-    def _index(self, pc, t):
-        return (pc ^ (self.history >> t)) & self.mask
+    def reset(self):
+        """Return every table and history register to its reset state."""
+        tagged = self.tables - 1
+        n = tagged * self.entries
+        # 2-bit base counters, initialized weakly not taken
+        self.base = array("B", [1]) * self.base_entries
+        # tagged entries in flat arrays indexed by table * entries + index
+        self.ctr = array("b", [0]) * n
+        self.tag = array("H", [0]) * n
+        self.valid = bytearray(n)
+        self.useful = bytearray(n)
+        # global history as a ring of bits; _head is the newest bit
+        self._hist = bytearray(self._hist_size)
+        self._head = 0
+        self.path = 0
+        self._fold_index = array("I", [0]) * tagged
+        self._fold_tag0 = array("I", [0]) * tagged
+        self._fold_tag1 = array("I", [0]) * tagged
+        self.use_alt = 0
+        self.updates = 0
+        self._lfsr = 0xACE1
+        self._lookup_key = None
+        self._lookup = None
+
+    # ------------------------------------------------------------------
+    # lookup
+    # ------------------------------------------------------------------
+    def _compute(self, pc):
+        """Return the lookup state for *pc* under the current history."""
+        key = (pc, self.updates)
+        if key == self._lookup_key:
+            return self._lookup
+        entries = self.entries
+        mask = self.mask
+        tag_mask = self._tag_mask
+        bits = self._index_bits
+        p = pc >> 2
+        slots = []
+        provider = alt = -1
+        for t in range(self.tables - 2, -1, -1):
+            index = (p ^ (p >> bits) ^ self._fold_index[t] ^ (self.path >> t)) & mask
+            tag = (p ^ self._fold_tag0[t] ^ (self._fold_tag1[t] << 1)) & tag_mask
+            slot = t * entries + index
+            slots.append((slot, tag))
+            if self.valid[slot] and self.tag[slot] == tag:
+                if provider < 0:
+                    provider = t
+                elif alt < 0:
+                    alt = t
+        slots.reverse()
+        base_index = p & (self.base_entries - 1)
+        base_taken = self.base[base_index] >= 2
+        if alt >= 0:
+            alt_taken = self.ctr[slots[alt][0]] >= 0
+        else:
+            alt_taken = base_taken
+        if provider >= 0:
+            ctr = self.ctr[slots[provider][0]]
+            provider_taken = ctr >= 0
+            weak = ctr in (0, -1)
+            if weak and self.useful[slots[provider][0]] == 0 and self.use_alt >= 0:
+                taken = alt_taken
+            else:
+                taken = provider_taken
+        else:
+            provider_taken = taken = base_taken
+        result = (slots, provider, alt_taken, provider_taken, taken, base_index)
+        self._lookup_key = key
+        self._lookup = result
+        return result
 
     def predict(self, pc):
-        score = 0
-        for t in range(self.tables):
-            idx = self._index(pc, t)
-            score += self.table[t][idx] >> 1  # high bit
-        return score > self.tables // 2
+        """Return the predicted direction of the branch at *pc*."""
+        return self._compute(pc)[4]
 
+    def provider(self, pc):
+        """Return the table providing the prediction for *pc* (0 = base)."""
+        return self._compute(pc)[1] + 1
+
+    # ------------------------------------------------------------------
+    # update
+    # ------------------------------------------------------------------
     def update(self, pc, taken):
-        for t in range(self.tables):
-            idx = self._index(pc, t)
-            if self.tags[t][idx] != pc and self.coverage:
-                tag = pc >> 2
-                self.coverage.record_tage_event(t, idx, tag)
-            self.tags[t][idx] = pc
+        """Train the predictor with the outcome of the branch at *pc*."""
+        taken = bool(taken)
+        slots, provider, alt_taken, provider_taken, pred, base_index = self._compute(pc)
+        ctr = self.ctr
+        useful = self.useful
+        if provider >= 0:
+            slot = slots[provider][0]
+            if ctr[slot] in (0, -1) and useful[slot] == 0 and provider_taken != alt_taken:
+                # learn whether newly allocated entries should be trusted
+                if alt_taken == taken:
+                    self.use_alt = min(self.use_alt + 1, 7)
+                else:
+                    self.use_alt = max(self.use_alt - 1, -8)
             if taken:
-                if self.table[t][idx] < 3:
-                    self.table[t][idx] += 1
-            else:
-                if self.table[t][idx] > 0:
-                    self.table[t][idx] -= 1
-        self.history = ((self.history << 1) | int(bool(taken))) & self.hist_mask
+                if ctr[slot] < 3:
+                    ctr[slot] += 1
+            elif ctr[slot] > -4:
+                ctr[slot] -= 1
+            if provider_taken != alt_taken:
+                if provider_taken == taken:
+                    if useful[slot] < 3:
+                        useful[slot] += 1
+                elif useful[slot]:
+                    useful[slot] -= 1
+        else:
+            self._train_base(pc, base_index, taken)
+        if pred != taken and provider < self.tables - 2:
+            self._allocate(slots, provider, taken)
+        self.updates += 1
+        if self.updates % self.reset_period == 0:
+            for i, u in enumerate(useful):
+                if u:
+                    useful[i] = u >> 1
+        self._shift(pc, taken)
+
+    def _train_base(self, pc, index, taken):
+        value = self.base[index]
+        if taken:
+            if value < 3:
+                self.base[index] = value + 1
+        elif value > 0:
+            self.base[index] = value - 1
+        if self._record_tage is not None:
+            self._record_tage(0, index, pc >> 2)
+
+    def _allocate(self, slots, provider, taken):
+        useful = self.useful
+        candidates = [t for t in range(provider + 1, self.tables - 1)
+                      if useful[slots[t][0]] == 0]
+        if not candidates:
+            for t in range(provider + 1, self.tables - 1):
+                slot = slots[t][0]
+                if useful[slot]:
+                    useful[slot] -= 1
+            return
+        # prefer the shortest free table, but sometimes skip it so that
+        # longer histories get a chance as well
+        t = candidates[0]
+        if len(candidates) > 1:
+            # 16-bit Galois LFSR, skipping the shortest table one time in four
+            lfsr = self._lfsr
+            self._lfsr = (lfsr >> 1) ^ (0xB400 if lfsr & 1 else 0)
+            if lfsr & 3 == 0:
+                t = candidates[1]
+        slot, tag = slots[t]
+        self.valid[slot] = 1
+        self.tag[slot] = tag
+        self.ctr[slot] = 0 if taken else -1
+        useful[slot] = 0
+        if self._record_tage is not None:
+            self._record_tage(t + 1, slot - t * self.entries, tag)
+
+    def _shift(self, pc, taken):
+        """Shift *taken* into the global and path histories."""
+        size_mask = self._hist_size - 1
+        head = (self._head + 1) & size_mask
+        self._head = head
+        hist = self._hist
+        hist[head] = taken
+        self.path = ((self.path << 1) | ((pc >> 2) & 1)) & 0xFFFF
+        index_bits = self._index_bits
+        tag_bits = self.tag_bits
+        fold_index = self._fold_index
+        fold_tag0 = self._fold_tag0
+        fold_tag1 = self._fold_tag1
+        for t, length in enumerate(self.lengths):
+            out = hist[(head - length) & size_mask]
+            fold_index[t] = _fold(fold_index[t], taken, out, length, index_bits)
+            fold_tag0[t] = _fold(fold_tag0[t], taken, out, length, tag_bits)
+            fold_tag1[t] = _fold(fold_tag1[t], taken, out, length, tag_bits - 1)
+
+    def history(self, length=64):
+        """Return the newest *length* history bits, newest in bit 0."""
+        size_mask = self._hist_size - 1
+        value = 0
+        for age in range(min(length, self._hist_size) - 1, -1, -1):
+            value = (value << 1) | self._hist[(self._head - age) & size_mask]
+        return value
+
+
+def _fold(comp, new, out, length, width):
+    """Shift *new* into folded history *comp* and drop the bit *out*.
+
+    *comp* is the XOR of the newest *length* history bits cut into
+    *width*-bit pieces; the bit leaving the window is removed at the
+    position it had been folded to.
+    """
+    comp = (comp << 1) | new
+    comp ^= out << (length % width)
+    comp ^= comp >> width
+    return comp & ((1 << width) - 1)
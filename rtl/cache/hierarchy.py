@@ -0,0 +1,293 @@
+"""Trace-driven model of the cache hierarchy.
+
+:class:`CacheHierarchy` chains split L1 instruction and data caches over
+shared lower levels (L2 and L3 by default) and DRAM.  Only tags, dirty bits
+and replacement state are tracked, through the tag-only interface of
+:class:`SetAssocCache`, so the model answers *where* an access was serviced
+and *how long* it took without moving data.
+
+Timing is a simple in-order model: accesses are issued ``issue_interval``
+cycles apart (or at an explicit cycle) and each level adds its
+``hit_latency`` when it is looked up, with ``memory_latency`` for DRAM.
+Every level has a number of MSHRs; a miss waits for a free MSHR at each
+level it passes and a later access to a line still being fetched completes
+together with the first one instead of starting another fill.
+"""
+
+import heapq
+from array import array
+
+from rtl.cache.set_assoc_cache import SetAssocCache
+
+INCLUSION_POLICIES = ("inclusive", "exclusive", "nine")
+MEMORY = "DRAM"
+
+
+class CacheHierarchy:
+    """L1I/L1D, shared lower cache levels and DRAM.
+
+    Parameters
+    ----------
+    l1d, l1i : SetAssocCache or None
+        First-level caches; by default 64 KiB, 8-way, 4 cycles, matching
+        ``l1_dcache_64k_8w`` and ``l1_icache_64k_8w``.
+    lower : list[SetAssocCache] or None
+        Shared levels below L1, nearest first.  By default an L2 of
+        1 MiB/8-way/14 cycles and an L3 of 16 MiB/8-way/40 cycles; pass
+        ``[]`` for L1 plus DRAM only.
+    inclusion : str
+        ``"inclusive"`` back-invalidates lines above whenever a lower level
+        evicts them.  ``"exclusive"`` fills only L1 and moves lines
+        between levels: victims go one level down and a lower-level hit
+        removes the line there.  ``"nine"`` (non-inclusive non-exclusive)
+        fills every level that missed and never back-invalidates.
+    memory_latency : int
+        Cycles for a DRAM access.
+    mshrs : int, dict or None
+        Miss status holding registers per cache: one count for every
+        cache or a dictionary keyed by level name (``"L1"``, ``"L2"``,
+        ``"L3"``).  Both L1s report as level ``"L1"``, so ``"L1I"`` and
+        ``"L1D"`` select one of them and take precedence over ``"L1"``.
+        ``None`` means unlimited.
+    issue_interval : int
+        Cycles between consecutive accesses without an explicit cycle.
+    coverage : CoverageModel or None
+        Attached to every cache so hits and misses are recorded through
+        ``record_cache``.
+    """
+
+    def __init__(
+        self,
+        l1d=None,
+        lower=None,
+        *,
+        l1i=None,
+        inclusion="nine",
+        memory_latency=200,
+        mshrs=8,
+        issue_interval=1,
+        coverage=None,
+    ):
+        if inclusion not in INCLUSION_POLICIES:
+            raise ValueError(f"unknown inclusion policy {inclusion!r}")
+        if l1d is None:
+            l1d = SetAssocCache(64 * 1024, 8, 64, level="L1", hit_latency=4)
+        if l1i is None:
+            l1i = SetAssocCache(64 * 1024, 8, 64, level="L1", hit_latency=4)
+        if lower is None:
+            lower = [
+                SetAssocCache(1 << 20, 8, 64, level="L2", hit_latency=14),
+                SetAssocCache(16 << 20, 8, 64, level="L3", hit_latency=40),
+            ]
+        self.l1d = l1d
+        self.l1i = l1i
+        self.lower = list(lower)
+        self.inclusion = inclusion
+        self.memory_latency = memory_latency
+        self.issue_interval = issue_interval
+        self.line_bytes = l1d.line_bytes
+        for cache in [l1i] + self.lower:
+            if cache.line_bytes != self.line_bytes:
+                raise ValueError("all levels must use the same line size")
+        if coverage is not None:
+            for cache in [l1d, l1i] + self.lower:
+                cache.bind_coverage(coverage)
+        self.coverage = coverage
+        if not isinstance(mshrs, dict):
+            levels = ["L1I", "L1D"] + [cache.level for cache in self.lower]
+            mshrs = {level: mshrs for level in levels}
+        self.mshrs = mshrs
+        # MSHR count per cache, since the two L1s share one level name
+        self._mshr_limit = {
+            id(l1i): mshrs.get("L1I", mshrs.get(l1i.level)),
+            id(l1d): mshrs.get("L1D", mshrs.get(l1d.level)),
+        }
+        for cache in self.lower:
+            self._mshr_limit[id(cache)] = mshrs.get(cache.level)
+        # completion cycles of the misses holding an MSHR, per cache
+        self._busy = {id(cache): [] for cache in [l1d, l1i] + self.lower}
+        # lines being filled into each L1: line -> (done cycle, source)
+        self._pending = {id(l1d): {}, id(l1i): {}}
+        self.now = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Clear the hierarchy counters (the caches keep their own)."""
+        self.accesses = 0
+        self.total_latency = 0
+        self.serviced = {}
+        self.mshr_stalls = 0
+        self.memory_reads = 0
+        self.memory_writes = 0
+        self.back_invalidations = 0
+
+    # ------------------------------------------------------------------
+    # MSHRs
+    # ------------------------------------------------------------------
+    def _mshr_wait(self, cache, now):
+        """Return the cycle at which *cache* has a free MSHR."""
+        busy = self._busy[id(cache)]
+        while busy and busy[0] <= now:
+            heapq.heappop(busy)
+        limit = self._mshr_limit[id(cache)]
+        if limit is None or len(busy) < limit:
+            return now
+        self.mshr_stalls += 1
+        return heapq.heappop(busy)
+
+    # ------------------------------------------------------------------
+    # fills and victims
+    # ------------------------------------------------------------------
+    def _uppers(self, level):
+        """Return the caches above lower level *level*."""
+        return [self.l1d, self.l1i] + self.lower[:level]
+
+    def _write_back(self, level, addr):
+        """Send a dirty line evicted from lower level *level* further down."""
+        if level + 1 < len(self.lower):
+            self._install(level + 1, addr, True)
+        else:
+            self.memory_writes += 1
+
+    def _install(self, level, addr, dirty):
+        """Insert *addr* into lower level *level* and handle its victim."""
+        victim = self.lower[level].insert(addr, dirty)
+        if victim is None:
+            return
+        vaddr, vdirty = victim
+        if self.inclusion == "inclusive":
+            # keep the levels above a subset of this one
+            for cache in self._uppers(level):
+                upper_dirty = cache.remove(vaddr)
+                if upper_dirty is not None:
+                    self.back_invalidations += 1
+                    vdirty = vdirty or upper_dirty
+        if vdirty:
+            self.lower[level].writebacks += 1
+            self._write_back(level, vaddr)
+        elif self.inclusion == "exclusive":
+            # clean victims also move down to keep the line on chip
+            if level + 1 < len(self.lower):
+                self._install(level + 1, vaddr, False)
+
+    def _fill_l1(self, l1, addr, dirty):
+        victim = l1.insert(addr, dirty)
+        if victim is None:
+            return
+        vaddr, vdirty = victim
+        if vdirty:
+            l1.writebacks += 1
+        if not self.lower:
+            if vdirty:
+                self.memory_writes += 1
+        elif vdirty or self.inclusion == "exclusive":
+            self._install(0, vaddr, vdirty)
+
+    # ------------------------------------------------------------------
+    # accesses
+    # ------------------------------------------------------------------
+    def access(self, addr, is_write=False, *, instr=False, cycle=None):
+        """Perform one access and return ``(latency, level)``.
+
+        *level* is the name of the level that serviced the access
+        (``"L1"``, ``"L2"``, ``"L3"``) or ``"DRAM"``.  Instruction fetches
+        (``instr=True``) use the L1I.  *cycle* sets the issue time, by
+        default ``issue_interval`` after the previous access.
+        """
+        if cycle is None:
+            cycle = self.now + (self.issue_interval if self.accesses else 0)
+        self.now = cycle
+        l1 = self.l1i if instr else self.l1d
+        line = addr & ~(self.line_bytes - 1)
+
+        t = cycle + l1.hit_latency
+        pending = self._pending[id(l1)].get(line)
+        hit = l1.probe(addr, write=is_write)
+        if hit:
+            source = l1.level
+            if pending is not None and pending[0] > cycle:
+                # hit under miss: complete with the outstanding fill
+                t = max(t, pending[0])
+                source = pending[1]
+            return self._finish(cycle, t, source)
+
+        t = self._mshr_wait(l1, t)
+        if t > cycle + l1.hit_latency:
+            # an in-order core cannot issue past a miss waiting for an MSHR
+            self.now = t - l1.hit_latency
+        used = [l1]
+        missed = []
+        source = MEMORY
+        for level, cache in enumerate(self.lower):
+            t += cache.hit_latency
+            if cache.probe(addr):
+                source = cache.level
+                if self.inclusion == "exclusive":
+                    dirty = cache.remove(addr)
+                    is_write = is_write or dirty
+                break
+            missed.append(level)
+            used.append(cache)
+            t = self._mshr_wait(cache, t)
+        if source == MEMORY:
+            t += self.memory_latency
+            self.memory_reads += 1
+
+        if self.inclusion != "exclusive":
+            # fill the missed levels bottom-up so victims flow downwards
+            for level in reversed(missed):
+                self._install(level, addr, False)
+        self._fill_l1(l1, addr, is_write)
+        for cache in used:
+            heapq.heappush(self._busy[id(cache)], t)
+        pending = self._pending[id(l1)]
+        if len(pending) > 1024:
+            for old in [a for a, fill in pending.items() if fill[0] <= cycle]:
+                del pending[old]
+        pending[line] = (t, source)
+        return self._finish(cycle, t, source)
+
+    def _finish(self, cycle, done, source):
+        latency = done - cycle
+        self.accesses += 1
+        self.total_latency += latency
+        self.serviced[source] = self.serviced.get(source, 0) + 1
+        return latency, source
+
+    def access_many(self, addresses, is_write=False, *, instr=False):
+        """Run a trace of accesses and return their latencies.
+
+        *is_write* is one flag for the whole trace or a sequence with one
+        flag per address.  The result is an ``array('I')`` of latencies;
+        :py:meth:`stats` summarizes where the accesses were serviced.
+        """
+        out = array("I")
+        access = self.access
+        if isinstance(is_write, bool):
+            for addr in addresses:
+                out.append(access(addr, is_write, instr=instr)[0])
+        else:
+            for addr, write in zip(addresses, is_write):
+                out.append(access(addr, bool(write), instr=instr)[0])
+        return out
+
+    # ------------------------------------------------------------------
+    def amat(self):
+        """Return the average memory access time in cycles."""
+        return self.total_latency / self.accesses if self.accesses else 0.0
+
+    def stats(self):
+        """Return per-level counters and the hierarchy totals."""
+        levels = {"L1I": self.l1i.stats(), "L1D": self.l1d.stats()}
+        for cache in self.lower:
+            levels[cache.level] = cache.stats()
+        return {
+            "accesses": self.accesses,
+            "amat": self.amat(),
+            "serviced": dict(self.serviced),
+            "mshr_stalls": self.mshr_stalls,
+            "memory_reads": self.memory_reads,
+            "memory_writes": self.memory_writes,
+            "back_invalidations": self.back_invalidations,
+            "levels": levels,
+        }
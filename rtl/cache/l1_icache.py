@@ -8,7 +8,12 @@ class L1ICache:
         self.tlb_l1 = tlb_l1 if tlb_l1 is not None else TlbL1(coverage=coverage)
         self.tlb_l2 = tlb_l2 if tlb_l2 is not None else TlbL2(coverage=coverage)
         self.walker = walker if walker is not None else PageWalker8()
+        self.bind_coverage(coverage)
+
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
         self.coverage = coverage
+        self._record_cache = coverage.recorder("cache", "L1") if coverage else None
 
     def _translate(self, va):
         hit, pa, fault = self.tlb_l1.lookup(va, perm='x')
@@ -32,10 +37,10 @@ class L1ICache:
         """Translate *addr* and return the instruction word or 0."""
         pa, fault = self._translate(addr)
         if fault:
-            if self.coverage:
-                self.coverage.record_cache('L1', False)
+            if self._record_cache is not None:
+                self._record_cache(False)
             return 0
         hit = (pa & ~0x3) in self.mem
-        if self.coverage:
-            self.coverage.record_cache('L1', hit)
+        if self._record_cache is not None:
+            self._record_cache(hit)
         return self.mem.get(pa & ~0x3, 0)
@@ -0,0 +1,213 @@
+"""Hardware prefetcher models for :class:`SetAssocCache`.
+
+A prefetcher is attached with ``SetAssocCache(prefetcher=...)``.  After
+every demand access the cache calls ``on_access(addr, pc, hit,
+prefetched)`` and queues the line addresses it returns; ``prefetched`` is
+``True`` when a hit was the first use of a prefetched line, which lets the
+simple prefetchers keep running ahead of a stream they predicted well.
+Prefetchers only predict addresses: the cache decides whether a request is
+needed, tracks when it completes and accounts for useful, late and useless
+prefetches (see :py:meth:`SetAssocCache.prefetch_stats`).
+
+* :class:`NextLinePrefetcher` fetches the next ``degree`` lines.
+* :class:`StridePrefetcher` is a PC-indexed reference prediction table.
+* :class:`StreamBufferPrefetcher` follows ascending miss streams.
+* :class:`SpatialRegionPrefetcher` replays the lines used in a region the
+  last time the same PC and offset opened it.
+"""
+
+from collections import OrderedDict
+
+
+class Prefetcher:
+    """Base class; subclasses implement :py:meth:`on_access`."""
+
+    line_bytes = 64
+
+    def bind(self, line_bytes):
+        """Called by the cache the prefetcher is attached to."""
+        self.line_bytes = line_bytes
+
+    def on_access(self, addr, pc, hit, prefetched):
+        """Return the byte addresses to prefetch after an access to *addr*."""
+        raise NotImplementedError
+
+    def reset(self):
+        """Forget every piece of training state."""
+
+
+class NextLinePrefetcher(Prefetcher):
+    """Tagged next-line prefetcher.
+
+    A miss, or the first hit on a prefetched line, requests the following
+    ``degree`` lines.
+    """
+
+    def __init__(self, degree=1):
+        if degree < 1:
+            raise ValueError("degree must be at least 1")
+        self.degree = degree
+
+    def on_access(self, addr, pc, hit, prefetched):
+        if hit and not prefetched:
+            return []
+        line = addr & ~(self.line_bytes - 1)
+        return [line + i * self.line_bytes for i in range(1, self.degree + 1)]
+
+
+class StridePrefetcher(Prefetcher):
+    """PC-indexed stride prefetcher (reference prediction table).
+
+    Each of the ``entries`` direct-mapped entries is tagged with a load PC
+    and remembers its last address, last stride and a 2-bit confidence.
+    Once the same non-zero stride was seen ``threshold`` times in a row the
+    next ``degree`` addresses along it are prefetched; strides shorter than
+    a line prefetch the next ``degree`` lines instead.  Accesses without a
+    PC do not train the table.
+    """
+
+    def __init__(self, entries=64, degree=2, threshold=2):
+        if entries <= 0 or entries & (entries - 1):
+            raise ValueError("entries must be a power of two")
+        if degree < 1:
+            raise ValueError("degree must be at least 1")
+        self.entries = entries
+        self.degree = degree
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self):
+        # index -> [pc, last address, stride, confidence]
+        self.table = {}
+
+    def on_access(self, addr, pc, hit, prefetched):
+        if pc is None:
+            return []
+        index = (pc >> 2) & (self.entries - 1)
+        entry = self.table.get(index)
+        if entry is None or entry[0] != pc:
+            self.table[index] = [pc, addr, 0, 0]
+            return []
+        stride = addr - entry[1]
+        if stride == 0:
+            return []
+        if stride == entry[2]:
+            entry[3] = min(entry[3] + 1, 3)
+        else:
+            entry[3] = max(entry[3] - 1, 0)
+            if entry[3] == 0:
+                entry[2] = stride
+        entry[1] = addr
+        if entry[3] < self.threshold:
+            return []
+        stride = entry[2]
+        if abs(stride) < self.line_bytes:
+            # small strides: run ahead by whole lines in the same direction
+            stride = self.line_bytes if stride > 0 else -self.line_bytes
+        return [addr + i * stride for i in range(1, self.degree + 1)]
+
+
+class StreamBufferPrefetcher(Prefetcher):
+    """Jouppi-style stream buffers prefetching into the cache.
+
+    A miss that is not the next line of a tracked stream allocates one of
+    ``buffers`` streams (least recently used first) and fetches the
+    ``depth`` lines after it.  A miss or first prefetched hit on a line a
+    stream is waiting for advances that stream and tops it up to ``depth``
+    lines ahead.  Only ascending streams are followed.
+    """
+
+    def __init__(self, buffers=4, depth=4):
+        if buffers < 1 or depth < 1:
+            raise ValueError("buffers and depth must be at least 1")
+        self.buffers = buffers
+        self.depth = depth
+        self.reset()
+
+    def reset(self):
+        # stream id -> (next expected line, last line requested)
+        self.streams = OrderedDict()
+        self._next_id = 0
+
+    def on_access(self, addr, pc, hit, prefetched):
+        if hit and not prefetched:
+            return []
+        lb = self.line_bytes
+        line = addr & ~(lb - 1)
+        for sid, (head, tail) in self.streams.items():
+            if head <= line <= tail:
+                self.streams.move_to_end(sid)
+                end = line + self.depth * lb
+                self.streams[sid] = (line + lb, max(tail, end))
+                return list(range(tail + lb, end + lb, lb))
+        if hit:
+            return []
+        if len(self.streams) >= self.buffers:
+            self.streams.popitem(last=False)
+        end = line + self.depth * lb
+        self.streams[self._next_id] = (line + lb, end)
+        self._next_id += 1
+        return list(range(line + lb, end + lb, lb))
+
+
+class SpatialRegionPrefetcher(Prefetcher):
+    """Spatial pattern prefetcher in the style of SMS.
+
+    Memory is split into regions of ``region_bytes``.  The first access to
+    a region starts a generation keyed by the triggering PC and the line
+    offset within the region; later accesses set bits in the generation's
+    footprint.  When one of the ``active`` generations is retired to make
+    room, its footprint is stored in a pattern table of ``patterns``
+    entries.  A new generation whose key is in that table prefetches every
+    line of the stored footprint at once.
+    """
+
+    def __init__(self, region_bytes=2048, active=32, patterns=256):
+        if region_bytes <= 0 or region_bytes & (region_bytes - 1):
+            raise ValueError("region_bytes must be a power of two")
+        self.region_bytes = region_bytes
+        self.active = active
+        self.patterns = patterns
+        self.reset()
+
+    def reset(self):
+        # region -> [key, footprint bitmap]
+        self.generations = OrderedDict()
+        # key -> footprint bitmap
+        self.history = OrderedDict()
+
+    def _retire(self):
+        _, (key, bits) = self.generations.popitem(last=False)
+        self.history[key] = bits
+        self.history.move_to_end(key)
+        if len(self.history) > self.patterns:
+            self.history.popitem(last=False)
+
+    def on_access(self, addr, pc, hit, prefetched):
+        region = addr // self.region_bytes
+        offset = (addr % self.region_bytes) // self.line_bytes
+        gen = self.generations.get(region)
+        if gen is not None:
+            gen[1] |= 1 << offset
+            return []
+        if len(self.generations) >= self.active:
+            self._retire()
+        key = (pc, offset)
+        self.generations[region] = [key, 1 << offset]
+        bits = self.history.get(key)
+        if not bits:
+            return []
+        base = region * self.region_bytes
+        return [
+            base + i * self.line_bytes
+            for i in range(self.region_bytes // self.line_bytes)
+            if (bits >> i) & 1 and i != offset
+        ]
+
+
+PREFETCHERS = {
+    "next_line": NextLinePrefetcher,
+    "stride": StridePrefetcher,
+    "stream": StreamBufferPrefetcher,
+    "spatial": SpatialRegionPrefetcher,
+}
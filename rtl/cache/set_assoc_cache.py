@@ -0,0 +1,528 @@
+import random
+from array import array
+from collections import deque
+
+REPLACEMENT_POLICIES = ("lru", "plru", "random")
+
+
+class LineMemory:
+    """Line-granular backing store used below the last cache level.
+
+    Lines are kept as ``bytes`` keyed by line address; untouched lines
+    read as zero.  Every access takes ``latency`` cycles.
+    """
+
+    def __init__(self, latency=100):
+        self.lines = {}
+        self.latency = latency
+        self.last_latency = 0
+        self.reads = 0
+        self.writes = 0
+
+    def read_line(self, addr, size):
+        self.reads += 1
+        self.last_latency = self.latency
+        return self.lines.get(addr, bytes(size))
+
+    def write_line(self, addr, data):
+        self.writes += 1
+        self.last_latency = self.latency
+        self.lines[addr] = bytes(data)
+
+
+class SetAssocCache:
+    """Set-associative write-back, write-allocate cache with real lines.
+
+    The geometry is ``size`` bytes of ``line_bytes`` lines in ``ways``-way
+    sets.  State is kept in flat arrays indexed by ``set * ways + way``:
+    tags in an ``array('q')`` (``-1`` for invalid), dirty flags in a
+    ``bytearray`` and the line data in one ``bytearray`` of ``size``
+    bytes, so a lookup scans at most ``ways`` tags.
+
+    ``replacement`` is ``"lru"`` (age stamps), ``"plru"`` (tree PLRU, one
+    bit per internal node) or ``"random"`` (seeded by ``seed``).  Invalid
+    ways are always filled first.
+
+    Misses fetch the line from ``next_level`` and dirty victims are
+    written back to it.  Any object with ``read_line(addr, size)`` and
+    ``write_line(addr, data)`` works, including another ``SetAssocCache``;
+    by default a :class:`LineMemory` is used.  ``last_latency`` holds the
+    cycles of the latest access: ``hit_latency`` plus, on a miss, the
+    latency the next level reported.
+
+    A ``prefetcher`` from :mod:`rtl.cache.prefetch` is consulted after
+    every demand access.  Its requests are filled from the next level
+    ``prefetch_delay`` demand accesses later, with at most
+    ``prefetch_queue`` of them outstanding; see :py:meth:`prefetch_stats`.
+    """
+
+    def __init__(
+        self,
+        size=64 * 1024,
+        ways=8,
+        line_bytes=64,
+        *,
+        replacement="plru",
+        next_level=None,
+        level="L1",
+        hit_latency=4,
+        seed=0,
+        coverage=None,
+        prefetcher=None,
+        prefetch_delay=4,
+        prefetch_queue=16,
+    ):
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(f"unknown replacement policy {replacement!r}")
+        for name, value in (("size", size), ("ways", ways), ("line_bytes", line_bytes)):
+            if value <= 0 or value & (value - 1):
+                raise ValueError(f"{name} must be a power of two")
+        if line_bytes < 8 or size < ways * line_bytes:
+            raise ValueError("cache must hold at least one set of 8-byte lines")
+        self.size = size
+        self.ways = ways
+        self.line_bytes = line_bytes
+        self.sets = size // (ways * line_bytes)
+        self.replacement = replacement
+        self.next_level = next_level if next_level is not None else LineMemory()
+        self.level = level
+        self.hit_latency = hit_latency
+        self.bind_coverage(coverage)
+        self.prefetcher = prefetcher
+        self.prefetch_delay = prefetch_delay
+        self.prefetch_queue = prefetch_queue
+        if prefetcher is not None:
+            prefetcher.bind(line_bytes)
+        # a lower SetAssocCache also gets the PC, for its own prefetcher
+        self._pc_below = isinstance(self.next_level, SetAssocCache)
+        self._offset_bits = line_bytes.bit_length() - 1
+        self._set_mask = self.sets - 1
+        self._tag_shift = self._offset_bits + self.sets.bit_length() - 1
+        self._rng = random.Random(seed)
+        self.last_latency = 0
+        # address of the line evicted by the latest fill, or None
+        self.last_victim = None
+        self.reset_stats()
+        self.invalidate()
+
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
+        self.coverage = coverage
+        if coverage:
+            self._record_cache = coverage.recorder("cache", self.level)
+            self._record_prefetch = coverage.recorder("prefetch", self.level)
+        else:
+            self._record_cache = self._record_prefetch = None
+
+    # ------------------------------------------------------------------
+    # state
+    # ------------------------------------------------------------------
+    def invalidate(self):
+        """Drop every line without writing dirty data back."""
+        n = self.sets * self.ways
+        self._tags = array("q", [-1]) * n
+        self._dirty = bytearray(n)
+        self._data = bytearray(self.size)
+        self._age = array("Q", [0]) * n
+        self._plru = array("Q", [0]) * self.sets
+        self._clock = 0
+        # lines filled by a prefetch and not used yet
+        self._prefetched = bytearray(n)
+        # outstanding prefetches: line -> due access count, in issue order
+        self._pending = {}
+        self._pf_order = deque()
+        self._tick = 0
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.writebacks = 0
+        self.pf_issued = 0
+        self.pf_fills = 0
+        self.pf_useful = 0
+        self.pf_late = 0
+        self.pf_useless = 0
+        self.pf_dropped = 0
+
+    def _split(self, addr):
+        return (addr >> self._offset_bits) & self._set_mask, addr >> self._tag_shift
+
+    def _find(self, index, tag):
+        base = index * self.ways
+        try:
+            return self._tags.index(tag, base, base + self.ways) - base
+        except ValueError:
+            return -1
+
+    def _touch(self, index, way):
+        if self.replacement == "lru":
+            self._clock += 1
+            self._age[index * self.ways + way] = self._clock
+        elif self.replacement == "plru":
+            # point every node on the path to *way* away from it
+            state = self._plru[index]
+            node = 1
+            for bit in range(self.ways.bit_length() - 2, -1, -1):
+                right = (way >> bit) & 1
+                if right:
+                    state &= ~(1 << node)
+                else:
+                    state |= 1 << node
+                node = 2 * node + right
+            self._plru[index] = state
+
+    def _victim(self, index):
+        base = index * self.ways
+        try:
+            return self._tags.index(-1, base, base + self.ways) - base
+        except ValueError:
+            pass
+        if self.replacement == "lru":
+            ages = self._age[base:base + self.ways]
+            return ages.index(min(ages))
+        if self.replacement == "plru":
+            state = self._plru[index]
+            node = 1
+            while node < self.ways:
+                node = 2 * node + ((state >> node) & 1)
+            return node - self.ways
+        return self._rng.randrange(self.ways)
+
+    def _line_addr(self, slot):
+        index = slot // self.ways
+        return (self._tags[slot] << self._tag_shift) | (index << self._offset_bits)
+
+    def _replace(self, index, tag, dirty):
+        """Claim a way for *tag*; return ``(slot, victim, victim_dirty)``.
+
+        The victim is ``None`` when an invalid way was used.  Nothing is
+        written back here.
+        """
+        way = self._victim(index)
+        slot = index * self.ways + way
+        victim = victim_dirty = None
+        if self._tags[slot] != -1:
+            self.evictions += 1
+            victim = self._line_addr(slot)
+            victim_dirty = bool(self._dirty[slot])
+            if self._prefetched[slot]:
+                self._prefetched[slot] = 0
+                self._prefetch_event("useless")
+        self.last_victim = victim
+        self._tags[slot] = tag
+        self._dirty[slot] = dirty
+        return slot, victim, victim_dirty
+
+    def _fill(self, index, tag, data, dirty):
+        """Install a line, writing back the victim, and return its way."""
+        slot, victim, victim_dirty = self._replace(index, tag, dirty)
+        start = slot * self.line_bytes
+        if victim_dirty:
+            self.writebacks += 1
+            self.next_level.write_line(victim, bytes(self._data[start:start + self.line_bytes]))
+        self._data[start:start + self.line_bytes] = data
+        return slot - index * self.ways
+
+    def _access(self, addr, pc=None):
+        """Return the slot of the line holding *addr*, filling it on a miss."""
+        self._tick += 1
+        if self._pf_order:
+            self._complete_prefetches()
+        index, tag = self._split(addr)
+        way = self._find(index, tag)
+        hit = way >= 0
+        prefetched = False
+        if hit:
+            self.hits += 1
+            self.last_latency = self.hit_latency
+            slot = index * self.ways + way
+            if self._prefetched[slot]:
+                self._prefetched[slot] = 0
+                prefetched = True
+                self._prefetch_event("useful")
+        else:
+            self.misses += 1
+            line = addr & ~(self.line_bytes - 1)
+            if self._pending.pop(line, None) is not None:
+                # the prefetch is still in flight; the demand miss takes over
+                self._prefetch_event("late")
+            if self._pc_below:
+                data = self.next_level.read_line(line, self.line_bytes, pc)
+            else:
+                data = self.next_level.read_line(line, self.line_bytes)
+            self.last_latency = self.hit_latency + getattr(self.next_level, "last_latency", 0)
+            way = self._fill(index, tag, data, 0)
+        self._touch(index, way)
+        if self._record_cache is not None:
+            self._record_cache(hit)
+        if self.prefetcher is not None:
+            self._issue_prefetches(addr, pc, hit, prefetched)
+        return index * self.ways + way
+
+    # ------------------------------------------------------------------
+    # prefetching
+    # ------------------------------------------------------------------
+    _PF_COUNTERS = {
+        "issued": "pf_issued",
+        "useful": "pf_useful",
+        "late": "pf_late",
+        "useless": "pf_useless",
+    }
+
+    def _prefetch_event(self, event):
+        name = self._PF_COUNTERS[event]
+        setattr(self, name, getattr(self, name) + 1)
+        if self._record_prefetch is not None:
+            self._record_prefetch(event)
+
+    def _issue_prefetches(self, addr, pc, hit, prefetched):
+        mask = ~(self.line_bytes - 1) & 0xFFFFFFFFFFFFFFFF
+        for target in self.prefetcher.on_access(addr, pc, hit, prefetched):
+            if target < 0:
+                continue
+            line = target & mask
+            if line in self._pending or self.contains(line):
+                continue
+            if len(self._pending) >= self.prefetch_queue:
+                self.pf_dropped += 1
+                continue
+            self._pending[line] = self._tick + self.prefetch_delay
+            self._pf_order.append(line)
+            self._prefetch_event("issued")
+
+    def _complete_prefetches(self):
+        """Fill every outstanding prefetch that is due."""
+        order = self._pf_order
+        pending = self._pending
+        while order:
+            line = order[0]
+            due = pending.get(line)
+            if due is None:
+                # cancelled by a demand miss
+                order.popleft()
+                continue
+            if due > self._tick:
+                break
+            order.popleft()
+            del pending[line]
+            index, tag = self._split(line)
+            if self._find(index, tag) >= 0:
+                continue
+            data = self.next_level.read_line(line, self.line_bytes)
+            self.pf_fills += 1
+            if self._record_prefetch is not None:
+                self._record_prefetch("bytes", self.line_bytes)
+            way = self._fill(index, tag, data, 0)
+            self._touch(index, way)
+            self._prefetched[index * self.ways + way] = 1
+
+    def prefetch_stats(self):
+        """Return prefetch counters and the metrics derived from them.
+
+        ``useful`` counts demand hits on prefetched lines, ``late`` demand
+        misses on lines whose prefetch was still outstanding and
+        ``useless`` prefetched lines evicted before any use.  ``accuracy``
+        is the fraction of issued prefetches that were useful or late,
+        ``coverage`` the fraction of demand misses the prefetcher removed
+        and ``bandwidth_overhead`` the extra next-level traffic relative to
+        the misses the cache would have had without prefetching.
+        """
+        issued = self.pf_issued
+        avoided = self.misses + self.pf_useful
+        return {
+            "issued": issued,
+            "fills": self.pf_fills,
+            "useful": self.pf_useful,
+            "late": self.pf_late,
+            "useless": self.pf_useless,
+            "dropped": self.pf_dropped,
+            "bytes": self.pf_fills * self.line_bytes,
+            "accuracy": (self.pf_useful + self.pf_late) / issued if issued else 0.0,
+            "coverage": self.pf_useful / avoided if avoided else 0.0,
+            "bandwidth_overhead": (
+                (self.pf_fills - self.pf_useful) / avoided if avoided else 0.0
+            ),
+        }
+
+    # ------------------------------------------------------------------
+    # word interface
+    # ------------------------------------------------------------------
+    def read(self, addr, pc=None):
+        """Return the 64-bit value stored at *addr* (aligned down to 8 bytes).
+
+        *pc* is the address of the load, used to train the prefetcher.
+        """
+        slot = self._access(addr, pc)
+        start = slot * self.line_bytes + (addr & (self.line_bytes - 8))
+        return int.from_bytes(self._data[start:start + 8], "little")
+
+    def write(self, addr, data, wstrb=0xFF, pc=None):
+        """Write 64-bit *data* to *addr* with byte strobe mask *wstrb*."""
+        slot = self._access(addr, pc)
+        start = slot * self.line_bytes + (addr & (self.line_bytes - 8))
+        raw = (data & 0xFFFFFFFFFFFFFFFF).to_bytes(8, "little")
+        if wstrb & 0xFF == 0xFF:
+            self._data[start:start + 8] = raw
+        else:
+            for i in range(8):
+                if (wstrb >> i) & 1:
+                    self._data[start + i] = raw[i]
+        self._dirty[slot] = 1
+
+    def run_trace(self, entries):
+        """Replay the loads and stores of scoreboard trace *entries*.
+
+        Entries are dictionaries as returned by ``Scoreboard.get_trace()``
+        or ``TraceReader``; their ``pc`` trains the prefetcher.
+        """
+        for entry in entries:
+            pc = entry.get("pc")
+            if entry.get("load_addr") is not None:
+                self.read(entry["load_addr"], pc)
+            if entry.get("store_addr") is not None:
+                self.write(entry["store_addr"], entry.get("store_data") or 0, pc=pc)
+
+    # ------------------------------------------------------------------
+    # line interface used by the level above
+    # ------------------------------------------------------------------
+    def read_line(self, addr, size, pc=None):
+        """Return *size* bytes at *addr*, filling the lines they touch."""
+        out = bytearray()
+        end = addr + size
+        latency = 0
+        while addr < end:
+            slot = self._access(addr, pc)
+            latency = max(latency, self.last_latency)
+            off = addr & (self.line_bytes - 1)
+            n = min(self.line_bytes - off, end - addr)
+            start = slot * self.line_bytes + off
+            out += self._data[start:start + n]
+            addr += n
+        self.last_latency = latency
+        return bytes(out)
+
+    def write_line(self, addr, data):
+        """Accept data written back by the level above.
+
+        A miss on a whole line installs it without reading the next level;
+        a partial line is merged into the line fetched from below.
+        """
+        data = bytes(data)
+        end = addr + len(data)
+        pos = 0
+        while addr < end:
+            off = addr & (self.line_bytes - 1)
+            n = min(self.line_bytes - off, end - addr)
+            index, tag = self._split(addr)
+            way = self._find(index, tag)
+            hit = way >= 0
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+                if n == self.line_bytes:
+                    line = data[pos:pos + n]
+                else:
+                    line = self.next_level.read_line(addr - off, self.line_bytes)
+                way = self._fill(index, tag, line, 1)
+            slot = index * self.ways + way
+            start = slot * self.line_bytes + off
+            self._data[start:start + n] = data[pos:pos + n]
+            self._dirty[slot] = 1
+            self._touch(index, way)
+            if self._record_cache is not None:
+                self._record_cache(hit)
+            addr += n
+            pos += n
+        self.last_latency = self.hit_latency
+
+    # ------------------------------------------------------------------
+    # tag-only interface used by CacheHierarchy
+    # ------------------------------------------------------------------
+    # These methods track which lines are present without moving any data
+    # or talking to the next level; the caller decides where fills come
+    # from and where victims go.
+    def probe(self, addr, write=False):
+        """Look up *addr* without filling it and return ``True`` on a hit.
+
+        Hits update the replacement state and, for writes, the dirty bit.
+        Hits and misses are counted and recorded in the coverage model.
+        """
+        index, tag = self._split(addr)
+        way = self._find(index, tag)
+        hit = way >= 0
+        if hit:
+            self.hits += 1
+            self._touch(index, way)
+            if write:
+                self._dirty[index * self.ways + way] = 1
+        else:
+            self.misses += 1
+        if self._record_cache is not None:
+            self._record_cache(hit)
+        return hit
+
+    def insert(self, addr, dirty=False):
+        """Install the line holding *addr* and return the evicted line.
+
+        The result is ``(victim_addr, victim_dirty)`` or ``None`` when no
+        valid line was replaced.  A line already present is only touched
+        and, with *dirty*, marked dirty.
+        """
+        index, tag = self._split(addr)
+        way = self._find(index, tag)
+        if way >= 0:
+            if dirty:
+                self._dirty[index * self.ways + way] = 1
+            self._touch(index, way)
+            return None
+        slot, victim, victim_dirty = self._replace(index, tag, int(dirty))
+        self._touch(index, slot - index * self.ways)
+        return None if victim is None else (victim, victim_dirty)
+
+    def remove(self, addr):
+        """Invalidate the line holding *addr*.
+
+        Returns ``None`` when it was not present, else its dirty flag.
+        """
+        index, tag = self._split(addr)
+        way = self._find(index, tag)
+        if way < 0:
+            return None
+        slot = index * self.ways + way
+        self._tags[slot] = -1
+        self._prefetched[slot] = 0
+        dirty = bool(self._dirty[slot])
+        self._dirty[slot] = 0
+        return dirty
+
+    # ------------------------------------------------------------------
+    def contains(self, addr):
+        """Return ``True`` when the line holding *addr* is cached."""
+        return self._find(*self._split(addr)) >= 0
+
+    def flush(self):
+        """Write every dirty line back to the next level and clean it."""
+        for slot, dirty in enumerate(self._dirty):
+            if dirty:
+                start = slot * self.line_bytes
+                self.next_level.write_line(
+                    self._line_addr(slot), bytes(self._data[start:start + self.line_bytes]))
+                self._dirty[slot] = 0
+                self.writebacks += 1
+
+    def hit_rate(self):
+        """Return the fraction of accesses that hit, ``0.0`` before any."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """Return hit, miss, eviction and write-back counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "writebacks": self.writebacks,
+            "hit_rate": self.hit_rate(),
+        }
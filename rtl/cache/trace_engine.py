@@ -0,0 +1,252 @@
+"""Trace-driven cache simulation with LRU stack distances.
+
+:class:`TraceEngine` reads memory references in chunks, from a binary
+trace file, a list of scoreboard trace entries or plain addresses, and
+evaluates many LRU cache configurations in a single pass.
+
+Configurations are grouped by their number of sets.  For each group the
+engine keeps Mattson LRU stacks, one per set, and a histogram of stack
+distances: a reference at distance ``d`` hits in every cache of that group
+with more than ``d`` ways.  One pass therefore gives the miss ratio of
+every associativity up to the largest one requested, and every group is
+fed from the same chunk of addresses.  With NumPy installed the line, set
+and tag arithmetic for a chunk is done on whole arrays.
+
+The trace is read once, but each distinct set count walks its own stacks,
+so the cost grows with the number of set counts rather than the number of
+configurations.  A sweep over associativity at a fixed set count costs a
+single stack walk, while a sweep over sizes at a fixed associativity costs
+one walk per size.
+"""
+
+import os
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is missing
+    np = None
+
+DEFAULT_CHUNK = 1 << 16
+# distinct lines tracked for cold misses: 256 MiB of 64-byte lines
+DEFAULT_MAX_SEEN = 1 << 22
+KINDS = ("load", "store")
+
+
+def _check_kinds(kinds):
+    kinds = tuple(kinds)
+    if not kinds or any(k not in KINDS for k in kinds):
+        raise ValueError(f"kinds must select 'load' and/or 'store', not {kinds!r}")
+    return kinds
+
+
+def _entry_addresses(entries, kinds):
+    for entry in entries:
+        if isinstance(entry, int):
+            yield entry
+            continue
+        if "load" in kinds and entry.get("load_addr") is not None:
+            yield entry["load_addr"]
+        if "store" in kinds and entry.get("store_addr") is not None:
+            yield entry["store_addr"]
+
+
+def _binary_chunks(path, kinds):
+    from tb.uvm_components.trace_utils import TraceReader
+
+    with TraceReader(path) as reader:
+        for (loads, stores), (has_load, has_store) in reader.column_chunks(
+            "load_addr", "store_addr"
+        ):
+            if np is not None:
+                parts = []
+                order = []
+                if "load" in kinds:
+                    idx = np.flatnonzero(has_load)
+                    parts.append(loads[idx])
+                    order.append(2 * idx)
+                if "store" in kinds:
+                    idx = np.flatnonzero(has_store)
+                    parts.append(stores[idx])
+                    order.append(2 * idx + 1)
+                addrs = np.concatenate(parts)
+                # keep program order, loads before stores of one record
+                yield addrs[np.argsort(np.concatenate(order), kind="stable")]
+            else:
+                out = array("Q")
+                for i in range(len(loads)):
+                    if "load" in kinds and has_load[i]:
+                        out.append(loads[i])
+                    if "store" in kinds and has_store[i]:
+                        out.append(stores[i])
+                yield out
+
+
+def address_chunks(source, *, chunk=DEFAULT_CHUNK, kinds=KINDS):
+    """Return an iterator over the memory addresses of *source* in chunks.
+
+    *source* is the path of a binary trace (see :class:`TraceWriter`), an
+    iterable of trace entries such as ``Scoreboard.get_trace()`` whose
+    ``load_addr``/``store_addr`` fields are used, or an iterable of
+    integer addresses.  *kinds* selects loads, stores or both; anything
+    else raises ``ValueError`` before the source is read.  Chunks are
+    ``uint64`` NumPy arrays when NumPy is installed, else ``array('Q')``.
+    """
+    return _address_chunks(source, chunk, _check_kinds(kinds))
+
+
+def _address_chunks(source, chunk, kinds):
+    if isinstance(source, (str, os.PathLike)):
+        yield from _binary_chunks(source, kinds)
+        return
+    buf = array("Q")
+    for addr in _entry_addresses(source, kinds):
+        buf.append(addr & 0xFFFFFFFFFFFFFFFF)
+        if len(buf) >= chunk:
+            yield np.frombuffer(buf, dtype=np.uint64) if np is not None else buf
+            buf = array("Q")
+    if buf:
+        yield np.frombuffer(buf, dtype=np.uint64) if np is not None else buf
+
+
+class StackDistanceProfile:
+    """LRU stack distance histogram for caches with *sets* sets.
+
+    Each set keeps its most recent *depth* tags, most recent first.
+    ``hist[d]`` counts references found at distance ``d``; references
+    not found within *depth* count as misses for every associativity.
+    """
+
+    def __init__(self, sets, depth):
+        self.sets = sets
+        self.depth = depth
+        self.set_bits = sets.bit_length() - 1
+        self.hist = [0] * depth
+        self.accesses = 0
+        self._stacks = [[] for _ in range(sets)]
+
+    def feed(self, set_idx, tags):
+        """Process one chunk of set indices and tags."""
+        stacks = self._stacks
+        hist = self.hist
+        depth = self.depth
+        for s, tag in zip(set_idx, tags):
+            stack = stacks[s]
+            try:
+                d = stack.index(tag)
+            except ValueError:
+                stack.insert(0, tag)
+                if len(stack) > depth:
+                    stack.pop()
+                continue
+            hist[d] += 1
+            if d:
+                del stack[d]
+                stack.insert(0, tag)
+        self.accesses += len(tags)
+
+    def hits(self, ways):
+        """Return the number of hits of a *ways*-way LRU cache."""
+        return sum(self.hist[:ways])
+
+    def miss_ratio(self, ways):
+        """Return the miss ratio of a *ways*-way LRU cache."""
+        if not self.accesses:
+            return 0.0
+        return (self.accesses - self.hits(ways)) / self.accesses
+
+
+class TraceEngine:
+    """Evaluate LRU caches of several sizes and associativities in one pass.
+
+    *configs* is a list of ``(size, ways)`` pairs in bytes and ways; every
+    size must give a power-of-two number of sets.  ``results()`` returns
+    the misses and miss ratio per configuration and ``curve()`` the
+    miss-ratio curve of every set count over all associativities up to
+    the largest one requested for it.
+
+    ``cold_misses`` counts the distinct lines referenced.  Tracking stops
+    once *max_seen* lines have been seen, after which ``cold_misses`` is a
+    lower bound and ``cold_exact`` is ``False``; ``max_seen=None`` never
+    stops.
+    """
+
+    def __init__(self, configs, *, line_bytes=64, max_seen=DEFAULT_MAX_SEEN):
+        if line_bytes <= 0 or line_bytes & (line_bytes - 1):
+            raise ValueError("line_bytes must be a power of two")
+        self.line_bytes = line_bytes
+        self.line_bits = line_bytes.bit_length() - 1
+        self.configs = []
+        depth = {}
+        for size, ways in configs:
+            sets = size // (ways * line_bytes)
+            if sets <= 0 or sets & (sets - 1) or sets * ways * line_bytes != size:
+                raise ValueError(f"{size} bytes in {ways} ways is not a power-of-two set count")
+            self.configs.append((size, ways, sets))
+            depth[sets] = max(depth.get(sets, 0), ways)
+        self.profiles = {sets: StackDistanceProfile(sets, d) for sets, d in sorted(depth.items())}
+        self.accesses = 0
+        self.cold_misses = 0
+        self.max_seen = max_seen
+        self._seen = set()
+
+    @property
+    def cold_exact(self):
+        """``True`` while ``cold_misses`` counts every distinct line."""
+        return self._seen is not None
+
+    def feed(self, addrs):
+        """Process one chunk of byte addresses."""
+        if np is not None:
+            lines = np.asarray(addrs, dtype=np.uint64) >> np.uint64(self.line_bits)
+            line_list = lines.tolist()
+            for sets, prof in self.profiles.items():
+                set_idx = (lines & np.uint64(sets - 1)).tolist()
+                tags = (lines >> np.uint64(prof.set_bits)).tolist()
+                prof.feed(set_idx, tags)
+        else:
+            shift = self.line_bits
+            line_list = [a >> shift for a in addrs]
+            for sets, prof in self.profiles.items():
+                mask = sets - 1
+                set_bits = prof.set_bits
+                prof.feed([x & mask for x in line_list], [x >> set_bits for x in line_list])
+        seen = self._seen
+        if seen is not None:
+            before = len(seen)
+            seen.update(line_list)
+            self.cold_misses += len(seen) - before
+            if self.max_seen is not None and len(seen) >= self.max_seen:
+                self._seen = None
+        self.accesses += len(line_list)
+
+    def run(self, source, *, chunk=DEFAULT_CHUNK, kinds=KINDS):
+        """Feed every address of *source* (see :func:`address_chunks`)."""
+        for addrs in address_chunks(source, chunk=chunk, kinds=kinds):
+            self.feed(addrs)
+        return self
+
+    def results(self):
+        """Return one dictionary per configuration, in the given order."""
+        out = []
+        for size, ways, sets in self.configs:
+            prof = self.profiles[sets]
+            misses = self.accesses - prof.hits(ways)
+            out.append({
+                "size": size,
+                "ways": ways,
+                "sets": sets,
+                "accesses": self.accesses,
+                "misses": misses,
+                "miss_ratio": misses / self.accesses if self.accesses else 0.0,
+            })
+        return out
+
+    def curve(self):
+        """Return ``[(size, ways, sets, miss_ratio)]`` sorted by size."""
+        points = []
+        for sets, prof in self.profiles.items():
+            for ways in range(1, prof.depth + 1):
+                points.append((sets * ways * self.line_bytes, ways, sets, prof.miss_ratio(ways)))
+        return sorted(points)
+
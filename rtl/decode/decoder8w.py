@@ -12,6 +12,11 @@ class Decoder8W:
         When *coverage* is provided, opcodes and immediate values are recorded
         using the :class:`CoverageModel` interface.
         """
+        if coverage:
+            record_opcode = coverage.recorder("opcode")
+            record_immediate = coverage.recorder("immediate")
+        else:
+            record_opcode = record_immediate = None
         results = []
         for instr in instructions:
             opcode = instr & 0x7F
@@ -41,9 +46,9 @@ class Decoder8W:
                 imm |= (instr >> 31) << 19
                 imm = self._sign_extend(imm << 1, 21)
 
-            if coverage:
-                coverage.record_opcode(opcode)
-                coverage.record_immediate(imm)
+            if record_opcode is not None:
+                record_opcode(opcode)
+                record_immediate(imm)
 
             results.append({
                 "opcode": opcode,
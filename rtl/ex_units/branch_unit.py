@@ -18,8 +18,13 @@ class BranchUnit:
         return val if val < (1 << 63) else val - (1 << 64)
 
     def compute(self, branch_ctrl, rs1_val, rs2_val, pc, imm,
-                predicted_taken=False, predicted_target=0):
-        """Resolve a branch and report misprediction."""
+                predicted_taken=False, predicted_target=0, rsb_checkpoint=None):
+        """Resolve a branch and report misprediction.
+
+        *rsb_checkpoint* is the predictor's checkpoint for the branch; it is
+        returned unchanged so the result can be handed straight to
+        ``BranchPredictorTop.resolve``.
+        """
         imm = imm & 0xFFFFFFFF
         if imm & (1 << 31):
             imm -= 1 << 32
@@ -49,4 +54,5 @@ class BranchUnit:
             "taken": taken,
             "target": actual_target,
             "mispredict": mispredict,
+            "rsb_checkpoint": rsb_checkpoint,
         }
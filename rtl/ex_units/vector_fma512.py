@@ -1,3 +1,6 @@
+from rtl.ex_units.vector_lanes import merge, vfma
+
+
 class VectorFMA512:
     """Simple 5-cycle 512-bit fused multiply-add unit model."""
 
@@ -15,17 +18,8 @@ class VectorFMA512:
         # compute new stage 0
         if valid:
             self.val_pipe[0] = True
-            res = 0
-            for lane in range(8):
-                a = (src1 >> (lane * 64)) & ((1 << 64) - 1)
-                b = (src2 >> (lane * 64)) & ((1 << 64) - 1)
-                c = (src3 >> (lane * 64)) & ((1 << 64) - 1)
-                prod = (a * b + c) & ((1 << 64) - 1)
-                if (mask >> lane) & 1:
-                    res |= prod << (lane * 64)
-                else:
-                    res |= c << (lane * 64)
-            self.res_pipe[0] = res
+            # disabled lanes keep the addend
+            self.res_pipe[0] = merge(mask, vfma(src1, src2, src3), src3)
         else:
             self.val_pipe[0] = False
             self.res_pipe[0] = 0
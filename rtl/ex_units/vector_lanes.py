@@ -0,0 +1,102 @@
+"""Lane-packed helpers for 512-bit vectors of eight 64-bit lanes.
+
+Vector registers are kept as plain 512-bit Python integers with lane 0 in
+the least significant bits. The helpers here convert between that form and
+eight-lane tuples/arrays in one ``to_bytes``/``struct`` call and implement
+the lane-wise integer operations without per-lane shifting and masking.
+All arithmetic wraps modulo 2**64 in every lane.
+"""
+
+import struct
+import sys
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is missing
+    np = None
+
+LANES = 8
+MASK64 = (1 << 64) - 1
+MASK512 = (1 << 512) - 1
+
+_PACK = struct.Struct("<8Q")
+# top bit of every lane and everything below it
+_HIGH = sum(1 << (64 * lane + 63) for lane in range(LANES))
+_LOW = MASK512 ^ _HIGH
+# 512-bit masks selecting the lanes enabled in an 8-bit lane mask
+LANE_MASKS = tuple(
+    sum(MASK64 << (64 * lane) for lane in range(LANES) if (m >> lane) & 1)
+    for m in range(1 << LANES)
+)
+
+
+def unpack(vec):
+    """Return the eight lanes of *vec* as a tuple, lane 0 first."""
+    return _PACK.unpack((vec & MASK512).to_bytes(64, "little"))
+
+
+def pack(lanes):
+    """Return the 512-bit integer holding *lanes*, each masked to 64 bits."""
+    return int.from_bytes(_PACK.pack(*[x & MASK64 for x in lanes]), "little")
+
+
+def to_array(vec):
+    """Return *vec* as a ``uint64[8]`` NumPy array or ``array('Q')``."""
+    raw = (vec & MASK512).to_bytes(64, "little")
+    if np is not None:
+        return np.frombuffer(raw, dtype="<u8").copy()
+    lanes = array("Q", raw)
+    if sys.byteorder == "big":
+        lanes.byteswap()
+    return lanes
+
+
+def from_array(lanes):
+    """Inverse of :func:`to_array`."""
+    if np is not None and isinstance(lanes, np.ndarray):
+        return int.from_bytes(lanes.astype("<u8").tobytes(), "little")
+    if sys.byteorder == "big":
+        lanes = array("Q", lanes)
+        lanes.byteswap()
+    return int.from_bytes(lanes.tobytes(), "little")
+
+
+def vadd(a, b):
+    """Lane-wise ``a + b``.
+
+    The low 63 bits of each lane are added directly, which cannot carry
+    into the next lane, and the top bit of each lane is fixed up with XOR.
+    """
+    return ((a & _LOW) + (b & _LOW)) ^ ((a ^ b) & _HIGH)
+
+
+def vmul(a, b):
+    """Lane-wise ``a * b``."""
+    a0, a1, a2, a3, a4, a5, a6, a7 = unpack(a)
+    b0, b1, b2, b3, b4, b5, b6, b7 = unpack(b)
+    m = MASK64
+    return int.from_bytes(_PACK.pack(
+        (a0 * b0) & m, (a1 * b1) & m, (a2 * b2) & m, (a3 * b3) & m,
+        (a4 * b4) & m, (a5 * b5) & m, (a6 * b6) & m, (a7 * b7) & m,
+    ), "little")
+
+
+def vfma(a, b, c):
+    """Lane-wise ``a * b + c``."""
+    a0, a1, a2, a3, a4, a5, a6, a7 = unpack(a)
+    b0, b1, b2, b3, b4, b5, b6, b7 = unpack(b)
+    c0, c1, c2, c3, c4, c5, c6, c7 = unpack(c)
+    m = MASK64
+    return int.from_bytes(_PACK.pack(
+        (a0 * b0 + c0) & m, (a1 * b1 + c1) & m,
+        (a2 * b2 + c2) & m, (a3 * b3 + c3) & m,
+        (a4 * b4 + c4) & m, (a5 * b5 + c5) & m,
+        (a6 * b6 + c6) & m, (a7 * b7 + c7) & m,
+    ), "little")
+
+
+def merge(mask, new, old):
+    """Take lanes enabled in the 8-bit *mask* from *new*, the rest from *old*."""
+    sel = LANE_MASKS[mask & 0xFF]
+    return (new & sel) | (old & (MASK512 ^ sel))
@@ -1,21 +1,272 @@
+import heapq
+from collections import OrderedDict
+
+# message and request counters kept by DirectoryMESI.stats()
+COUNTERS = (
+    "requests",
+    "reads",
+    "writes",
+    "invalidations",
+    "forwards",
+    "writebacks",
+    "memory_reads",
+    "back_invalidations",
+    "evictions",
+)
+
+
 class DirectoryMESI:
-    """Tiny MESI directory model."""
-    def __init__(self):
-        self.entries = {}
+    """Coherence directory for the private caches of a multi-core SoC.
+
+    Each tracked line has a state, a bit-vector of the cores holding it and
+    an owner.  ``E`` is granted to the first reader; ``M`` to a writer.
+    With ``owned=True`` (MOESI) a read of a modified line leaves the dirty
+    data with its owner in ``O`` instead of writing it back, and the owner
+    keeps supplying the data to later readers.  ``owned=False`` gives plain
+    MESI.
+
+    ``capacity`` limits the directory to that many lines in ``ways``-way
+    sets with LRU replacement.  Allocating a line in a full set evicts the
+    least recently used one: every core holding it is back-invalidated and
+    dirty data is written back.  ``None`` tracks any number of lines.
+
+    :py:meth:`access` returns the resulting state together with the
+    messages the request caused; the same counts accumulate in
+    :py:meth:`stats`.
+    """
+
+    def __init__(self, capacity=None, ways=8, *, cores=4, line_bytes=64, owned=True):
+        if line_bytes <= 0 or line_bytes & (line_bytes - 1):
+            raise ValueError("line_bytes must be a power of two")
+        if capacity is None:
+            sets = 1
+            ways = None
+        else:
+            if ways <= 0 or capacity <= 0 or capacity % ways:
+                raise ValueError("capacity must be a positive multiple of ways")
+            sets = capacity // ways
+            if sets & (sets - 1):
+                raise ValueError("capacity / ways must be a power of two")
+        self.capacity = capacity
+        self.ways = ways
+        self.cores = cores
+        self.line_bytes = line_bytes
+        self.owned = owned
+        self._offset_bits = line_bytes.bit_length() - 1
+        self._set_mask = sets - 1
+        # per set: line -> [state, sharer mask, owner or None], LRU first
+        self._sets = [OrderedDict() for _ in range(sets)]
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def _set(self, line):
+        return self._sets[(line >> self._offset_bits) & self._set_mask]
+
+    def lookup(self, addr):
+        """Return ``(state, mask, owner)`` of the line holding *addr*."""
+        line = addr & ~(self.line_bytes - 1)
+        entry = self._set(line).get(line)
+        return tuple(entry) if entry is not None else ("I", 0, None)
+
+    def __len__(self):
+        return sum(len(s) for s in self._sets)
+
+    # ------------------------------------------------------------------
+    # requests
+    # ------------------------------------------------------------------
+    def _make_room(self, entries):
+        """Evict the LRU line of a full set; return ``(line, mask, dirty)``."""
+        if self.ways is None or len(entries) < self.ways:
+            return None
+        line, (state, mask, _) = entries.popitem(last=False)
+        sharers = mask.bit_count()
+        dirty = int(state in ("M", "O"))
+        c = self.counters
+        c["evictions"] += 1
+        c["back_invalidations"] += sharers
+        c["invalidations"] += sharers
+        c["writebacks"] += dirty
+        return line, mask, dirty
 
     def access(self, addr, src, write=False):
-        state, mask = self.entries.get(addr, ('I', 0))
-        need_inval = False
-        if write:
-            need_inval = mask & ~(1 << src) != 0 and state != 'I'
-            state = 'M'
-            mask = 1 << src
+        """Handle a read or write miss of core *src* and return the outcome.
+
+        The result holds the new ``state``, sharer ``mask`` and ``owner``,
+        ``inval_mask`` with the other cores that must drop the line,
+        ``need_inval`` when there is any, and the message counts
+        ``invalidations``, ``forwards`` (cache-to-cache transfers from the
+        owner), ``writebacks`` and ``memory_read``.  ``evicted`` is the
+        line the directory evicted to make room, or ``None``, with the
+        cores back-invalidated for it in ``evicted_mask``; its messages are
+        included in the counts.
+        """
+        line = addr & ~(self.line_bytes - 1)
+        entries = self._set(line)
+        entry = entries.get(line)
+        bit = 1 << src
+        inval_mask = forwards = writebacks = memory_read = 0
+        evicted = None
+        evicted_mask = evicted_dirty = 0
+        if entry is None:
+            victim = self._make_room(entries)
+            if victim is not None:
+                evicted, evicted_mask, evicted_dirty = victim
+            memory_read = 1
+            entry = entries[line] = ["M" if write else "E", bit, src]
+        else:
+            entries.move_to_end(line)
+            state, mask, owner = entry
+            if write:
+                inval_mask = mask & ~bit
+                if mask & bit:
+                    pass  # upgrade: the requester already has the data
+                elif owner is not None:
+                    # the owner supplies the data and drops its copy
+                    forwards = 1
+                else:
+                    memory_read = 1
+                entry[:] = ["M", bit, src]
+            elif not mask & bit:
+                if owner is None:
+                    memory_read = 1
+                else:
+                    forwards = 1
+                    if state == "E":
+                        entry[0] = "S"
+                        entry[2] = None
+                    elif state == "M":
+                        if self.owned:
+                            entry[0] = "O"
+                        else:
+                            writebacks += 1
+                            entry[0] = "S"
+                            entry[2] = None
+                entry[1] |= bit
+        invalidations = inval_mask.bit_count()
+        if forwards and write:
+            # the forwarded request invalidates the owner itself
+            invalidations -= 1
+        c = self.counters
+        c["requests"] += 1
+        c["writes" if write else "reads"] += 1
+        c["invalidations"] += invalidations
+        c["forwards"] += forwards
+        c["writebacks"] += writebacks
+        c["memory_reads"] += memory_read
+        return {
+            "state": entry[0],
+            "mask": entry[1],
+            "owner": entry[2],
+            "need_inval": inval_mask != 0,
+            "inval_mask": inval_mask,
+            "invalidations": invalidations + evicted_mask.bit_count(),
+            "forwards": forwards,
+            "writebacks": writebacks + evicted_dirty,
+            "memory_read": bool(memory_read),
+            "evicted": evicted,
+            "evicted_mask": evicted_mask,
+        }
+
+    def evict(self, addr, src):
+        """Record that core *src* dropped the line holding *addr*.
+
+        An owner of an ``M`` or ``O`` line writes it back; returns the
+        number of write-backs (0 or 1).  A line no core holds any more is
+        removed from the directory.
+        """
+        line = addr & ~(self.line_bytes - 1)
+        entries = self._set(line)
+        entry = entries.get(line)
+        bit = 1 << src
+        if entry is None or not entry[1] & bit:
+            return 0
+        state, mask, owner = entry
+        mask &= ~bit
+        writeback = 0
+        if owner == src:
+            writeback = int(state in ("M", "O"))
+            state = "S"
+            owner = None
+        if not mask:
+            del entries[line]
         else:
-            if state == 'I':
-                state = 'S'
-                mask = 1 << src
-            else:
-                mask |= 1 << src
-                state = 'S'
-        self.entries[addr] = (state, mask)
-        return {'state': state, 'need_inval': need_inval, 'mask': mask}
+            entry[:] = [state, mask, owner]
+        self.counters["writebacks"] += writeback
+        return writeback
+
+    # ------------------------------------------------------------------
+    # trace replay
+    # ------------------------------------------------------------------
+    def replay(self, accesses, caches=None):
+        """Run ``(core, addr, write)`` *accesses* and return :py:meth:`stats`.
+
+        Without *caches* every access is sent to the directory, so each
+        core behaves as if its private cache never evicted anything and
+        only coherence misses cause traffic.  *caches* is a list of one
+        :class:`SetAssocCache` per core, driven through its tag-only
+        interface: hits stay local, misses and upgrades go to the
+        directory, invalidations remove lines from the other caches and
+        private evictions are reported with :py:meth:`evict`.
+        """
+        access = self.access
+        for core, addr, write in accesses:
+            if caches is None:
+                access(addr, core, write)
+                continue
+            cache = caches[core]
+            hit = cache.probe(addr, write)
+            if hit:
+                if not write:
+                    continue
+                line = addr & ~(self.line_bytes - 1)
+                entry = self._set(line)[line]
+                if entry[2] == core and entry[0] in ("E", "M"):
+                    # silent E -> M upgrade
+                    entry[0] = "M"
+                    continue
+            resp = access(addr, core, write)
+            for mask, target in ((resp["inval_mask"], addr),
+                                 (resp["evicted_mask"], resp["evicted"])):
+                other = 0
+                while mask:
+                    if mask & 1:
+                        caches[other].remove(target)
+                    mask >>= 1
+                    other += 1
+            if not hit:
+                victim = cache.insert(addr, write)
+                if victim is not None:
+                    self.evict(victim[0], core)
+        return self.stats()
+
+    def stats(self):
+        """Return request and message counters and lines tracked."""
+        c = dict(self.counters)
+        c["messages"] = c["invalidations"] + c["forwards"] + c["writebacks"]
+        c["messages_per_request"] = c["messages"] / c["requests"] if c["requests"] else 0.0
+        c["entries"] = len(self)
+        return c
+
+
+def interleave_traces(traces, kinds=("load", "store")):
+    """Merge per-core scoreboard traces into ``(core, addr, write)`` tuples.
+
+    *traces* holds one list of trace entries per core, such as
+    ``Scoreboard.get_trace()``; entries are ordered by ``cycle`` and then
+    by core.  A record with both a load and a store yields the load first.
+    """
+
+    def accesses(core, entries):
+        for i, entry in enumerate(entries):
+            key = (entry.get("cycle") or 0, core, i)
+            if "load" in kinds and entry.get("load_addr") is not None:
+                yield key, (core, entry["load_addr"], False)
+            if "store" in kinds and entry.get("store_addr") is not None:
+                yield key, (core, entry["store_addr"], True)
+
+    merged = heapq.merge(*(accesses(core, t) for core, t in enumerate(traces)),
+                         key=lambda item: item[0])
+    for _, access in merged:
+        yield access
@@ -4,17 +4,22 @@ class L3Cache16M8W:
 
     def __init__(self, *, coverage=None):
         self.mem = {}
+        self.bind_coverage(coverage)
+
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
         self.coverage = coverage
+        self._record_cache = coverage.recorder("cache", "L3") if coverage else None
 
     def read(self, addr):
         hit = addr in self.mem
         val = self.mem.get(addr, 0)
-        if self.coverage:
-            self.coverage.record_cache('L3', hit)
+        if self._record_cache is not None:
+            self._record_cache(hit)
         return val
 
     def write(self, addr, data):
         hit = addr in self.mem
         self.mem[addr] = data
-        if self.coverage:
-            self.coverage.record_cache('L3', hit)
+        if self._record_cache is not None:
+            self._record_cache(hit)
@@ -0,0 +1,495 @@
+"""Lockstep golden model for many independent harts.
+
+:class:`BatchGoldenModel` keeps the integer registers of ``N`` harts in a
+structure-of-arrays layout (a ``(32, N)`` ``uint64`` NumPy array when NumPy
+is available, 32 Python lists otherwise). Each call to :meth:`step` retires
+one instruction on every hart. Harts are grouped by instruction word and
+integer ALU, shift, compare, ``LUI``/``AUIPC`` and branch/jump instructions
+execute for a whole group at once. Everything else (loads, stores, M/A/F/V
+extensions, fences and system instructions) runs through a per-hart scalar
+:class:`~rtl.isa.golden_model.GoldenModel`, which is created on first use
+and also owns that hart's memory, CSRs and page table.
+"""
+
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is missing
+    np = None
+
+from rtl.isa.golden_model import GoldenModel
+from rtl.isa.predecode import (
+    MASK64, _BRANCH_CONDS, _OP32_FUNCS, _OP_FUNCS, _sext, _signed, _w,
+)
+
+# ----------------------------------------------------------------------
+# Vectorizable operations
+# ----------------------------------------------------------------------
+# An op is a tuple ``(kind, rd, rs1, rs2, imm, py_fn, np_fn)``. ``py_fn`` is
+# the scalar function from rtl.isa.predecode applied per hart in list mode,
+# ``np_fn`` the equivalent whole-array function.
+if np is not None:
+    _U64 = np.uint64
+    _I64 = np.int64
+    _M63 = np.uint64(0x3F)
+    _M31 = np.uint64(0x1F)
+
+    def _np_w(a):
+        """Sign-extend the low 32 bits of every lane."""
+        return a.astype(np.uint32).view(np.int32).astype(_I64).view(_U64)
+
+    def _np_sext32(a):
+        return a.astype(np.uint32).view(np.int32).astype(_I64)
+
+    _NP_OP_FUNCS = {
+        (0x00, 0x0): lambda a, b: a + b,  # ADD
+        (0x20, 0x0): lambda a, b: a - b,  # SUB
+        (0x00, 0x2): lambda a, b: (a.view(_I64) < b.view(_I64)).astype(_U64),
+        (0x00, 0x3): lambda a, b: (a < b).astype(_U64),
+        (0x00, 0x7): lambda a, b: a & b,
+        (0x00, 0x6): lambda a, b: a | b,
+        (0x00, 0x4): lambda a, b: a ^ b,
+        (0x00, 0x1): lambda a, b: a << (b & _M63),
+        (0x00, 0x5): lambda a, b: a >> (b & _M63),
+        (0x20, 0x5): lambda a, b: (
+            a.view(_I64) >> (b & _M63).astype(_I64)
+        ).view(_U64),
+    }
+
+    _NP_OP32_FUNCS = {
+        (0x00, 0x0): lambda a, b: _np_w(a + b),
+        (0x20, 0x0): lambda a, b: _np_w(a - b),
+        (0x00, 0x1): lambda a, b: _np_w(a << (b & _M31)),
+        (0x00, 0x5): lambda a, b: _np_w(a >> (b & _M31)),
+        (0x20, 0x5): lambda a, b: (
+            _np_sext32(a) >> (b & _M31).astype(_I64)
+        ).view(_U64),
+    }
+
+    _NP_BRANCH_CONDS = {
+        0x0: lambda a, b: a == b,
+        0x1: lambda a, b: a != b,
+        0x4: lambda a, b: a.view(_I64) < b.view(_I64),
+        0x5: lambda a, b: a.view(_I64) >= b.view(_I64),
+        0x6: lambda a, b: a < b,
+        0x7: lambda a, b: a >= b,
+    }
+else:
+    # the NumPy variants below are only called when NumPy is present
+    _U64 = _I64 = _np_w = _np_sext32 = None
+    _NP_OP_FUNCS = _NP_OP32_FUNCS = _NP_BRANCH_CONDS = {}
+
+
+def _opimm(funct3, funct7, imm, shamt):
+    """Return ``(py_fn, np_fn)`` for an OP-IMM instruction or ``None``."""
+    imm_u = imm & MASK64
+    if funct3 == 0x0:  # ADDI
+        return (lambda a: (a + imm) & MASK64, lambda a: a + _U64(imm_u))
+    if funct3 == 0x7:  # ANDI
+        return (lambda a: a & imm_u, lambda a: a & _U64(imm_u))
+    if funct3 == 0x6:  # ORI
+        return (lambda a: a | imm_u, lambda a: a | _U64(imm_u))
+    if funct3 == 0x4:  # XORI
+        return (lambda a: a ^ imm_u, lambda a: a ^ _U64(imm_u))
+    if funct3 == 0x2:  # SLTI
+        return (lambda a: 1 if _signed(a) < imm else 0,
+                lambda a: (a.view(_I64) < _I64(imm)).astype(_U64))
+    if funct3 == 0x3:  # SLTIU
+        return (lambda a: 1 if a < imm_u else 0,
+                lambda a: (a < _U64(imm_u)).astype(_U64))
+    if funct3 == 0x1 and funct7 == 0x00:  # SLLI
+        return (lambda a: (a << shamt) & MASK64, lambda a: a << _U64(shamt))
+    if funct3 == 0x5 and funct7 == 0x00:  # SRLI
+        return (lambda a: a >> shamt, lambda a: a >> _U64(shamt))
+    if funct3 == 0x5 and funct7 == 0x20:  # SRAI
+        return (lambda a: (_signed(a) >> shamt) & MASK64,
+                lambda a: (a.view(_I64) >> _I64(shamt)).view(_U64))
+    return None
+
+
+def _opimm32(funct3, funct7, imm, shamt):
+    """Return ``(py_fn, np_fn)`` for an OP-IMM-32 instruction or ``None``."""
+    if funct3 == 0x0:  # ADDIW
+        return (lambda a: _w(a + imm),
+                lambda a: _np_w(a + _U64(imm & MASK64)))
+    if funct3 == 0x1 and funct7 == 0x00:  # SLLIW
+        return (lambda a: _w(a << shamt), lambda a: _np_w(a << _U64(shamt)))
+    if funct3 == 0x5 and funct7 == 0x00:  # SRLIW
+        return (lambda a: _w(a >> shamt), lambda a: _np_w(a >> _U64(shamt)))
+    if funct3 == 0x5 and funct7 == 0x20:  # SRAIW
+        return (lambda a: _w(_sext(a & 0xFFFFFFFF, 32) >> shamt),
+                lambda a: (_np_sext32(a) >> _I64(shamt)).view(_U64))
+    return None
+
+
+def vector_op(instr):
+    """Decode *instr* into a vectorizable op tuple or ``None``.
+
+    ``None`` means the instruction must run on the scalar model. The
+    semantics mirror :mod:`rtl.isa.predecode` exactly, including writes to
+    ``x0`` and unmatched R-type encodings retiring as no-ops.
+    """
+    opcode = instr & 0x7F
+    rd = (instr >> 7) & 0x1F
+    funct3 = (instr >> 12) & 0x7
+    rs1 = (instr >> 15) & 0x1F
+    rs2 = (instr >> 20) & 0x1F
+    funct7 = (instr >> 25) & 0x7F
+    if opcode == 0x33:
+        if funct7 == 0x01:
+            return None  # RV64M runs on the scalar model
+        key = (funct7, funct3)
+        if key not in _OP_FUNCS and key not in ((0x00, 0x0), (0x20, 0x0)):
+            return ("nop", 0, 0, 0, 0, None, None)
+        if key == (0x00, 0x0):
+            py_fn = lambda a, b: (a + b) & MASK64  # noqa: E731
+        elif key == (0x20, 0x0):
+            py_fn = lambda a, b: (a - b) & MASK64  # noqa: E731
+        else:
+            py_fn = _OP_FUNCS[key]
+        return ("rr", rd, rs1, rs2, 0, py_fn, _NP_OP_FUNCS.get(key))
+    if opcode == 0x3B:
+        key = (funct7, funct3)
+        if key not in _OP32_FUNCS:
+            return ("nop", 0, 0, 0, 0, None, None)
+        return ("rr", rd, rs1, rs2, 0, _OP32_FUNCS[key], _NP_OP32_FUNCS.get(key))
+    if opcode in (0x13, 0x1B):
+        imm = _sext(instr >> 20, 12)
+        if opcode == 0x13:
+            fns = _opimm(funct3, funct7, imm, (instr >> 20) & 0x3F)
+        else:
+            fns = _opimm32(funct3, funct7, imm, (instr >> 20) & 0x1F)
+        if fns is None:
+            return None  # illegal encodings raise on the scalar model
+        return ("ri", rd, rs1, 0, imm, fns[0], fns[1])
+    if opcode == 0x37:
+        return ("lui", rd, 0, 0, instr & 0xFFFFF000, None, None)
+    if opcode == 0x17:
+        return ("auipc", rd, 0, 0, instr & 0xFFFFF000, None, None)
+    if opcode == 0x6F:
+        imm = ((instr >> 21) & 0x3FF) | ((instr >> 20) & 0x1) << 10
+        imm |= ((instr >> 12) & 0xFF) << 11
+        imm |= (instr >> 31) << 19
+        return ("jal", rd, 0, 0, _sext(imm << 1, 21), None, None)
+    if opcode == 0x67:
+        return ("jalr", rd, rs1, 0, _sext(instr >> 20, 12), None, None)
+    if opcode == 0x63:
+        imm = ((instr >> 7) & 0x1E) | ((instr >> 20) & 0x7E0)
+        imm |= ((instr >> 7) & 0x1) << 11
+        imm |= (instr >> 31) << 12
+        imm = _sext(imm, 13)
+        if funct3 not in _BRANCH_CONDS:
+            # never taken, but still retires a pending fetch fence
+            return ("brnop", 0, 0, 0, 0, None, None)
+        return ("br", 0, rs1, rs2, imm, _BRANCH_CONDS[funct3],
+                _NP_BRANCH_CONDS.get(funct3))
+    return None
+
+
+# branches and jumps retire a pending speculative fetch fence
+_BRANCH_KINDS = frozenset(("br", "brnop", "jal", "jalr"))
+
+
+class BatchGoldenModel:
+    """``N`` independent harts stepped in lockstep.
+
+    ``regs`` holds the integer registers as ``regs[reg][hart]`` and ``pc``,
+    ``cycle`` and ``instret`` hold one entry per hart. Everything else
+    about a hart lives in its scalar model, see :meth:`model`.
+    """
+
+    def __init__(self, harts, pc=0, *, use_numpy=None):
+        if use_numpy is None:
+            use_numpy = np is not None
+        if use_numpy and np is None:
+            raise ImportError("NumPy is required for use_numpy=True")
+        self.harts = harts
+        self.use_numpy = use_numpy
+        if use_numpy:
+            self.regs = np.zeros((32, harts), dtype=np.uint64)
+            self.pc = np.full(harts, pc & MASK64, dtype=np.uint64)
+            self.cycle = np.zeros(harts, dtype=np.uint64)
+            self.instret = np.zeros(harts, dtype=np.uint64)
+        else:
+            self.regs = [[0] * harts for _ in range(32)]
+            self.pc = [pc & MASK64] * harts
+            self.cycle = [0] * harts
+            self.instret = [0] * harts
+        self.last_exception = [None] * harts
+        self._ops = {}
+        # scalar models created on demand, keyed by hart index
+        self._models = {}
+        # harts that have each virtual address in their page table; a
+        # mapped PC is fetch-checked by GoldenModel.step so those harts
+        # take the scalar path
+        self._mapped = {}
+        self._mapped_seen = {}
+        # harts with a pending speculative fetch fence
+        self._fenced = set()
+        self._dirty = set()
+        self.vector_retired = 0
+        self.scalar_retired = 0
+
+    # ------------------------------------------------------------------
+    # scalar model access
+    # ------------------------------------------------------------------
+    def model(self, hart):
+        """Return the scalar model of *hart* with its integer state synced.
+
+        The model owns the hart's memory, CSRs, FP/vector registers and page
+        table and may be used to set those up. Integer registers and the PC
+        are copied in from the batch arrays; write those through ``regs``
+        and ``pc`` instead of the returned model.
+        """
+        gm = self._models.get(hart)
+        if gm is None:
+            gm = self._models[hart] = GoldenModel()
+            self._mapped_seen[hart] = 0
+        self._sync_in(hart, gm)
+        self._dirty.add(hart)
+        return gm
+
+    def load_memory(self, addr, data, *, hart=None, map_va=None, perm="rw"):
+        """Call ``load_memory`` on one hart's model or, by default, all."""
+        targets = range(self.harts) if hart is None else (hart,)
+        for h in targets:
+            self.model(h).load_memory(addr, data, map_va=map_va, perm=perm)
+
+    def _sync_in(self, hart, gm):
+        if self.use_numpy:
+            gm.regs = self.regs[:, hart].tolist()
+        else:
+            gm.regs = [col[hart] for col in self.regs]
+        gm.pc = int(self.pc[hart])
+        gm.csrs[0xC00] = int(self.cycle[hart])
+        gm.csrs[0xC02] = int(self.instret[hart])
+        gm.last_exception = self.last_exception[hart]
+
+    def _sync_out(self, hart, gm):
+        if self.use_numpy:
+            self.regs[:, hart] = gm.regs
+        else:
+            for col, val in zip(self.regs, gm.regs):
+                col[hart] = val
+        # the scalar model does not wrap pc + 4, the uint64 arrays do
+        self.pc[hart] = gm.pc & MASK64
+        self.cycle[hart] = gm.csrs.get(0xC00, 0)
+        self.instret[hart] = gm.csrs.get(0xC02, 0)
+        self.last_exception[hart] = gm.last_exception
+        self._track(hart, gm)
+
+    def _track(self, hart, gm):
+        """Record new page table entries and fence state of *hart*."""
+        table = gm.page_table
+        new = len(table) - self._mapped_seen[hart]
+        if new:
+            # mappings are only ever added, so new ones sit at the end
+            for va in islice(reversed(table), new):
+                self._mapped.setdefault(va, set()).add(hart)
+            self._mapped_seen[hart] = len(table)
+        if gm.spec_fence.pending:
+            self._fenced.add(hart)
+        else:
+            self._fenced.discard(hart)
+
+    def to_model(self, hart):
+        """Return an independent scalar model holding *hart*'s full state."""
+        return self.model(hart).fork()
+
+    # ------------------------------------------------------------------
+    # execution
+    # ------------------------------------------------------------------
+    def step(self, instrs):
+        """Retire one instruction on every hart.
+
+        *instrs* is either a single instruction word executed by all harts
+        or a sequence with one word per hart.
+        """
+        for hart in self._dirty:
+            self._track(hart, self._models[hart])
+        self._dirty.clear()
+        forced = self._forced_harts()
+        for instr, idx in self._groups(instrs):
+            op = self._ops.get(instr, False)
+            if op is False:
+                op = self._ops[instr] = vector_op(instr)
+            if op is None:
+                self._scalar(instr, self._hart_list(idx))
+                continue
+            if forced:
+                harts = self._hart_list(idx)
+                slow = [h for h in harts if h in forced]
+                if op[0] in _BRANCH_KINDS:
+                    slow += [h for h in harts if h in self._fenced and h not in forced]
+                if slow:
+                    self._scalar(instr, slow)
+                    skip = set(slow)
+                    idx = [h for h in harts if h not in skip]
+                    if not idx:
+                        continue
+                    if self.use_numpy:
+                        idx = np.array(idx, dtype=np.intp)
+            self._vector(op, idx)
+
+    def run(self, program, steps=None):
+        """Step through *program*, a list of per-step instruction words.
+
+        Each entry is passed to :meth:`step`. ``steps`` limits the number of
+        entries executed.
+        """
+        for instrs in islice(program, steps):
+            self.step(instrs)
+
+    def _forced_harts(self):
+        """Return harts that must take the scalar path this step."""
+        forced = set(self._fenced)
+        if self._mapped:
+            pcs = np.unique(self.pc).tolist() if self.use_numpy else set(self.pc)
+            mapped = self._mapped
+            for pc in pcs:
+                harts = mapped.get(pc)
+                if harts:
+                    for h in harts:
+                        if self.pc[h] == pc:
+                            forced.add(h)
+        return forced
+
+    def _groups(self, instrs):
+        """Yield ``(instr, idx)`` pairs where *idx* selects the harts."""
+        if isinstance(instrs, int):
+            yield instrs, slice(None)
+            return
+        if self.use_numpy:
+            words = np.asarray(instrs, dtype=np.uint32)
+            uniq, inverse = np.unique(words, return_inverse=True)
+            if len(uniq) == 1:
+                yield int(uniq[0]), slice(None)
+                return
+            order = np.argsort(inverse, kind="stable")
+            bounds = np.searchsorted(inverse[order], np.arange(len(uniq) + 1))
+            for k, word in enumerate(uniq.tolist()):
+                yield word, order[bounds[k]:bounds[k + 1]]
+            return
+        groups = {}
+        for h, word in enumerate(instrs):
+            groups.setdefault(word, []).append(h)
+        if len(groups) == 1:
+            yield next(iter(groups)), slice(None)
+            return
+        yield from groups.items()
+
+    def _hart_list(self, idx):
+        if isinstance(idx, slice):
+            return list(range(self.harts))
+        if self.use_numpy:
+            return idx.tolist()
+        return idx
+
+    def _scalar(self, instr, harts):
+        models = self._models
+        for h in harts:
+            gm = models.get(h)
+            if gm is None:
+                gm = models[h] = GoldenModel()
+                self._mapped_seen[h] = 0
+            self._sync_in(h, gm)
+            gm.step(instr)
+            self._sync_out(h, gm)
+        self.scalar_retired += len(harts)
+
+    def _vector(self, op, idx):
+        if self.use_numpy:
+            self._vector_np(op, idx)
+            count = self.harts if isinstance(idx, slice) else len(idx)
+        else:
+            harts = range(self.harts) if isinstance(idx, slice) else idx
+            self._vector_py(op, harts)
+            count = len(harts)
+        if any(self.last_exception):
+            for h in self._hart_list(idx):
+                self.last_exception[h] = None
+        self.vector_retired += count
+
+    def _vector_np(self, op, idx):
+        kind, rd, rs1, rs2, imm, _, fn = op
+        regs = self.regs
+        pc = self.pc[idx]
+        four = np.uint64(4)
+        if kind == "rr":
+            regs[rd][idx] = fn(regs[rs1][idx], regs[rs2][idx])
+            next_pc = pc + four
+        elif kind == "ri":
+            regs[rd][idx] = fn(regs[rs1][idx])
+            next_pc = pc + four
+        elif kind == "lui":
+            regs[rd][idx] = imm
+            next_pc = pc + four
+        elif kind == "auipc":
+            regs[rd][idx] = pc + np.uint64(imm)
+            next_pc = pc + four
+        elif kind == "jal":
+            regs[rd][idx] = pc + four
+            next_pc = pc + np.uint64(imm & MASK64)
+        elif kind == "jalr":
+            regs[rd][idx] = pc + four
+            next_pc = (regs[rs1][idx] + np.uint64(imm & MASK64)) & np.uint64(
+                0xFFFFFFFFFFFFFFFE
+            )
+        elif kind == "br":
+            taken = fn(regs[rs1][idx], regs[rs2][idx])
+            next_pc = np.where(taken, pc + np.uint64(imm & MASK64), pc + four)
+        else:  # nop, brnop
+            next_pc = pc + four
+        self.pc[idx] = next_pc
+        one = np.uint64(1)
+        self.cycle[idx] += one
+        self.instret[idx] += one
+
+    def _vector_py(self, op, harts):
+        kind, rd, rs1, rs2, imm, fn, _ = op
+        regs = self.regs
+        pc = self.pc
+        dst = regs[rd]
+        a = regs[rs1]
+        if kind == "rr":
+            b = regs[rs2]
+            for h in harts:
+                dst[h] = fn(a[h], b[h])
+                pc[h] = (pc[h] + 4) & MASK64
+        elif kind == "ri":
+            for h in harts:
+                dst[h] = fn(a[h])
+                pc[h] = (pc[h] + 4) & MASK64
+        elif kind == "lui":
+            for h in harts:
+                dst[h] = imm
+                pc[h] = (pc[h] + 4) & MASK64
+        elif kind == "auipc":
+            for h in harts:
+                dst[h] = (pc[h] + imm) & MASK64
+                pc[h] = (pc[h] + 4) & MASK64
+        elif kind == "jal":
+            for h in harts:
+                dst[h] = (pc[h] + 4) & MASK64
+                pc[h] = (pc[h] + imm) & MASK64
+        elif kind == "jalr":
+            for h in harts:
+                dst[h] = (pc[h] + 4) & MASK64
+                # rs1 is read after the link write, matching GoldenModel
+                pc[h] = (a[h] + imm) & 0xFFFFFFFFFFFFFFFE
+        elif kind == "br":
+            b = regs[rs2]
+            for h in harts:
+                if fn(a[h], b[h]):
+                    pc[h] = (pc[h] + imm) & MASK64
+                else:
+                    pc[h] = (pc[h] + 4) & MASK64
+        else:  # nop, brnop
+            for h in harts:
+                pc[h] = (pc[h] + 4) & MASK64
+        cycle = self.cycle
+        instret = self.instret
+        for h in harts:
+            cycle[h] = (cycle[h] + 1) & MASK64
+            instret[h] = (instret[h] + 1) & MASK64
@@ -1,19 +1,35 @@
+import copy
+
 from rtl.decode.decoder8w import Decoder8W
 from rtl.vm import VMCS, EPT
 from rtl.security.sgx_enclave import SGXEnclave
 from rtl.security.sev_memory import SEVMemory
 from rtl.security.spec_fetch_fence import SpecFetchFence
-from rtl.mmu import TlbL1, TlbL2, PageWalker8
+from rtl.mmu import TlbL1, TlbL2, PageWalker8, RadixPageWalker
+from rtl.ex_units import vector_lanes
+from rtl.isa.predecode import _HANDLERS, handler_for
+from rtl.isa.paged_memory import PagedMemory
 
 
 class GoldenModel:
-    """Minimal RISC-V golden reference supporting a small subset of RV64I."""
+    """Minimal RISC-V golden reference supporting a small subset of RV64I.
+
+    By default each mapped virtual address translates through a flat table.
+    With ``paging="sv39"`` or ``"sv48"`` mappings cover whole 4 KiB pages
+    and the page walker reads them from radix page tables kept in ``mem``.
+    """
+
+    # memoized translations kept before translate() starts over
+    XLATE_ENTRIES = 4096
 
-    def __init__(self, pc=0, *, coverage=None):
+    def __init__(self, pc=0, *, coverage=None, predecode=True, memory=None, paging=None):
         self.regs = [0] * 32
         self.fregs = [0] * 32  # store double precision bits
         self.vregs = [0] * 32  # 512-bit vector registers
-        self.mem = {}
+        # one 64-bit word per SEV-scrambled address; any mutable mapping
+        # works, PagedMemory trades that for byte-addressed pages and bulk
+        # access, so overlapping words share their bytes
+        self.mem = memory if memory is not None else {}
         self.csrs = {0xC00: 0, 0xC02: 0}  # cycle and instret counters
         self.pc = pc
         self._reservation = None
@@ -24,7 +40,15 @@ class GoldenModel:
         self.page_table = {}
         self.tlb_l1 = TlbL1(coverage=coverage)
         self.tlb_l2 = TlbL2(coverage=coverage)
-        self.walker = PageWalker8(coverage=coverage)
+        self.paging = paging
+        if paging is None:
+            self.walker = PageWalker8(coverage=coverage)
+            # page_table keys are exact virtual addresses
+            self._page_mask = self.MASK64
+        else:
+            radix = RadixPageWalker(self.mem, mode=paging)
+            self.walker = PageWalker8(coverage=coverage, radix=radix)
+            self._page_mask = self.MASK64 & ~0xFFF
         self.vmcs = VMCS()
         self.ept = EPT()
         self.sgx = SGXEnclave()
@@ -35,6 +59,17 @@ class GoldenModel:
         self.smap = 0
         self.smap_override = 0
         self.meltdown_protect = True
+        # execute through cached predecoded handlers instead of the
+        # field-by-field interpreter
+        self.predecode = predecode
+        # translated basic blocks keyed by start PC and the pages they cover
+        self._blocks = {}
+        self._block_pages = {}
+        self._block_gen = 0
+        # memoized translations and the keys cached for each VPN
+        self._xlate = {}
+        self._xlate_pages = {}
+        self._xlate_ctx = None
 
     def load_memory(self, addr, data, *, map_va=None, perm="rw"):
         """Load 64-bit word at *addr*.
@@ -46,7 +81,7 @@ class GoldenModel:
         """
         self._mem_store(addr, data & 0xFFFFFFFFFFFFFFFF)
         va = map_va if map_va is not None else addr
-        if va not in self.page_table:
+        if (va & self._page_mask) not in self.page_table:
             self.map_page(va, addr, perm=perm)
 
     def fetch(self, addr):
@@ -76,9 +111,17 @@ class GoldenModel:
         return int.from_bytes(struct.pack('<d', fval), 'little') & 0xFFFFFFFFFFFFFFFF
 
     def map_page(self, va, pa, perm="rw"):
-        """Map *va* to *pa* with the given permissions."""
-        self.page_table[va] = (pa, perm)
+        """Map *va* to *pa* with the given permissions.
+
+        With paging the whole 4 KiB page holding *va* is mapped to the
+        page holding *pa*.
+        """
+        self.page_table[va & self._page_mask] = (pa, perm)
         self.walker.set_entry(va, pa, perm=perm)
+        if self._xlate_pages:
+            self._invalidate_translations(va >> 12)
+        if self._block_pages:
+            self._invalidate_code_page(va >> 12)
 
     # ------------------------------------------------------------------
     # SEV memory helpers
@@ -99,12 +142,134 @@ class GoldenModel:
         enc = self.mem.get(self._sev_addr(pa), 0)
         return self.sev.decrypt(enc)
 
-    def _mem_store(self, pa: int, value: int):
-        self.mem[self._sev_addr(pa)] = self.sev.encrypt(value & self.MASK64)
+    def _mem_store(self, pa: int, value: int, size: int = 8):
+        enc = self.sev.encrypt(value & self.MASK64)
+        if size == 8 or not isinstance(self.mem, PagedMemory):
+            # word-keyed memory stores the whole register at the address
+            self.mem[self._sev_addr(pa)] = enc
+        else:
+            self.mem.write_word(self._sev_addr(pa), enc, size)
+        if self._block_pages:
+            self._invalidate_code_page(pa >> 12)
+            if (pa & 0xFFF) > 0xFF8:
+                self._invalidate_code_page((pa + 7) >> 12)
+
+    def _bulk_memory(self):
+        """Return ``self.mem`` if byte ranges can be moved directly."""
+        if self.sev.key == 0 and isinstance(self.mem, PagedMemory):
+            return self.mem
+        return None
+
+    def load_image(self, addr, data, *, map_va=None, perm="rw"):
+        """Copy the byte string *data* into memory starting at *addr*.
+
+        Words become present at every 4-byte offset of the image so both
+        instruction fetches and aligned data loads find them, and each of
+        those addresses is mapped the way :meth:`load_memory` maps a word.
+        """
+        data = bytes(data)
+        bulk = self._bulk_memory()
+        if bulk is not None:
+            bulk.write_bytes(addr, data, stride=4)
+            if self._block_pages:
+                last = (addr + max(len(data), 1) - 1) >> 12
+                for page in range(addr >> 12, last + 1):
+                    self._invalidate_code_page(page)
+        else:
+            for off in range(0, len(data), 4):
+                word = int.from_bytes(data[off:off + 8], "little")
+                self._mem_store(addr + off, word)
+        base = map_va if map_va is not None else addr
+        for off in range(0, len(data), 4):
+            if ((base + off) & self._page_mask) not in self.page_table:
+                self.map_page(base + off, addr + off, perm=perm)
 
     def reset(self, pc=0):
         """Reset architectural state and optionally set a new PC."""
-        self.__init__(pc=pc, coverage=self.coverage)
+        self.__init__(pc=pc, coverage=self.coverage, predecode=self.predecode,
+                      memory=type(self.mem)(), paging=self.paging)
+
+    # ------------------------------------------------------------------
+    # Checkpointing
+    # ------------------------------------------------------------------
+    # attributes captured by snapshot(); caches are rebuilt on restore
+    _SNAPSHOT_STATE = (
+        "regs", "fregs", "vregs", "mem", "csrs", "pc", "_reservation",
+        "last_exception", "page_table", "tlb_l1", "tlb_l2", "walker", "vmcs",
+        "ept", "sgx", "sev", "spec_fence", "priv_level", "smep", "smap",
+        "smap_override", "meltdown_protect", "paging", "_page_mask",
+    )
+
+    def _copy_state(self, state, coverage):
+        """Return a deep copy of *state* safe to hand to another model.
+
+        Memory is cloned copy-on-write when the backend supports it and the
+        page tables, whose entries are immutable tuples, are copied shallowly.
+        Components holding a coverage model are attached to *coverage*
+        instead, whether or not the snapshot had one, and their bound
+        recorders are rebuilt rather than copied.
+        """
+        mem = state["mem"]
+        memo = {
+            id(mem): mem.clone() if hasattr(mem, "clone") else copy.copy(mem),
+            id(state["page_table"]): dict(state["page_table"]),
+            id(state["walker"].table): dict(state["walker"].table),
+        }
+        # deepcopy consults the memo for None as well, so only redirect a
+        # real coverage model
+        if state["coverage"] is not None:
+            memo[id(state["coverage"])] = coverage
+        for value in state.values():
+            if hasattr(value, "bind_coverage"):
+                for name, attr in vars(value).items():
+                    if name.startswith("_record_") and attr is not None:
+                        memo[id(attr)] = None
+        copied = copy.deepcopy(state, memo)
+        for value in copied.values():
+            if hasattr(value, "bind_coverage"):
+                value.bind_coverage(coverage)
+            elif hasattr(value, "coverage"):
+                value.coverage = coverage
+        return copied
+
+    def snapshot(self):
+        """Return a checkpoint of the complete architectural and MMU state.
+
+        The checkpoint covers registers, CSRs, memory, the page table, TLBs,
+        the page walker, VMCS/EPT/SGX/SEV and the speculative fetch fence.
+        It is not affected by later execution and can be restored any
+        number of times.
+        """
+        state = {name: getattr(self, name) for name in self._SNAPSHOT_STATE}
+        state["coverage"] = self.coverage
+        return self._copy_state(state, self.coverage)
+
+    def restore(self, snapshot):
+        """Return the model to the state captured by :meth:`snapshot`.
+
+        The model keeps its own coverage model and execution mode.
+        """
+        state = self._copy_state(snapshot, self.coverage)
+        for name in self._SNAPSHOT_STATE:
+            setattr(self, name, state[name])
+        self._blocks = {}
+        self._block_pages = {}
+        self._block_gen += 1
+        self.flush_translations()
+        self._xlate_ctx = None
+
+    def fork(self):
+        """Return an independent model starting from the current state.
+
+        Memory pages are shared copy-on-write, so forking a model with a
+        large memory image is cheap.
+        """
+        model = type(self)(coverage=self.coverage, predecode=self.predecode,
+                           memory=type(self.mem)())
+        state = {name: getattr(self, name) for name in self._SNAPSHOT_STATE}
+        state["coverage"] = self.coverage
+        model.restore(state)
+        return model
 
     def translate(self, va, perm, *, is_exec=False, override=False):
         """Translate a virtual address returning ``(pa, fault)``.
@@ -117,9 +282,73 @@ class GoldenModel:
         The method returns ``(pa, fault_code)`` where ``fault_code`` is a
         string like ``"page"``, ``"nx"``, ``"smep"`` or ``"smap"`` or ``None``
         if the translation succeeds.
+
+        Results of translations that hit in the L1 TLB are memoized per
+        page with paging (per address without it), up to ``XLATE_ENTRIES``
+        of them, and reused while the privilege, SMEP/SMAP, VM, EPT and
+        enclave state match and ``tlb_l1.peek()`` still returns the same
+        entry, so repeated accesses skip the L2 TLB, the walker and the permission
+        checks.  A reused result still looks up the L1 TLB, which keeps its
+        replacement state and statistics current, and with a coverage model
+        attached records the same page walk event the full lookup would
+        have.
         """
-        if va not in self.page_table:
-            self.map_page(va, va, perm="rwx")
+        vmcs = self.vmcs
+        sgx = self.sgx
+        ctx = (
+            self.priv_level, self.smep, self.smap, vmcs.running, vmcs.vmid,
+            self.ept.key, sgx.active, len(sgx.epcm),
+        )
+        if ctx != self._xlate_ctx:
+            self.flush_translations()
+            self._xlate_ctx = ctx
+        # one result per page with paging, per mapped address without it
+        page = va & self._page_mask
+        offset = va ^ page
+        key = (page, perm, is_exec, override)
+        entry = self.tlb_l1.peek(va)
+        hit = self._xlate.get(key)
+        if hit is not None and entry is hit[2]:
+            self.tlb_l1.lookup(va, perm=perm)
+            # the walk records its outcome before the per-address enclave check
+            pa = hit[0] ^ offset
+            fault = hit[1]
+            if self.coverage is not None:
+                self.coverage.record_page_walk(fault is not None)
+            if fault is None and sgx.access(pa):
+                fault = "sgx"
+            return pa, fault
+        pa, fault = self._translate_walk(va, perm, is_exec, override)
+        # only lookups that hit in the L1 TLB are replayed, a miss refills
+        # the TLBs and records different events
+        if entry is not None:
+            if len(self._xlate) >= self.XLATE_ENTRIES:
+                self.flush_translations()
+            self._xlate[key] = (pa ^ offset, None if fault == "sgx" else fault, entry)
+            keys = self._xlate_pages.get(va >> 12)
+            if keys is None:
+                keys = self._xlate_pages[va >> 12] = set()
+            keys.add(key)
+        return pa, fault
+
+    def flush_translations(self):
+        """Drop all memoized translations."""
+        self._xlate.clear()
+        self._xlate_pages.clear()
+
+    def _invalidate_translations(self, vpn):
+        for key in self._xlate_pages.pop(vpn, ()):
+            self._xlate.pop(key, None)
+
+    def _translate_walk(self, va, perm, is_exec, override):
+        """Translate through the TLBs, page walker and permission checks."""
+        key = va & self._page_mask
+        if key not in self.page_table:
+            radix = self.walker.radix
+            # a non-canonical address cannot be identity mapped; leave it
+            # unmapped so the walk below reports a page fault
+            if radix is None or radix.is_canonical(va):
+                self.map_page(va, va, perm="rwx")
 
         hit, pa, flt = self.tlb_l1.lookup(va, perm=perm)
         fault = "page" if flt else None
@@ -139,8 +368,8 @@ class GoldenModel:
                     self.tlb_l2.refill(va, pa, perm="rwx")
                     self.tlb_l1.refill(va, pa, perm="rwx")
 
-        if va in self.page_table:
-            _, permissions = self.page_table[va]
+        if key in self.page_table:
+            _, permissions = self.page_table[key]
             user = "u" in permissions
             if fault is None and perm not in permissions:
                 fault = "page"
@@ -166,12 +395,31 @@ class GoldenModel:
 
     def step(self, instr):
         self.last_exception = None
-        if self.pc in self.page_table:
+        if (self.pc & self._page_mask) in self.page_table:
             pa, fault = self.translate(self.pc, 'x', is_exec=True)
             if fault:
                 self.last_exception = fault
                 self.pc = (self.pc + 4) & self.MASK64
                 return
+
+        # update cycle and instret counters
+        self.csrs[0xC00] = (self.csrs.get(0xC00, 0) + 1) & 0xFFFFFFFFFFFFFFFF
+        self.csrs[0xC02] = (self.csrs.get(0xC02, 0) + 1) & 0xFFFFFFFFFFFFFFFF
+
+        if self.predecode:
+            handler = _HANDLERS.get(instr) or handler_for(instr)
+            next_pc = handler(self)
+        else:
+            next_pc = self._execute_interp(instr)
+        self.pc = next_pc
+        return next_pc
+
+    def _execute_interp(self, instr):
+        """Decode and execute *instr* field by field returning the next PC.
+
+        This is the original interpreter kept as the reference for the
+        predecoded handlers in :mod:`rtl.isa.predecode`.
+        """
         opcode = instr & 0x7F
         rd = (instr >> 7) & 0x1F
         funct3 = (instr >> 12) & 0x7
@@ -179,10 +427,6 @@ class GoldenModel:
         rs2 = (instr >> 20) & 0x1F
         funct7 = (instr >> 25) & 0x7F
 
-        # update cycle and instret counters
-        self.csrs[0xC00] = (self.csrs.get(0xC00, 0) + 1) & 0xFFFFFFFFFFFFFFFF
-        self.csrs[0xC02] = (self.csrs.get(0xC02, 0) + 1) & 0xFFFFFFFFFFFFFFFF
-
         next_pc = self.pc + 4
         taken = False
 
@@ -211,58 +455,7 @@ class GoldenModel:
                 shamt = self.regs[rs2] & 0x3F
                 self.regs[rd] = (self._to_signed(self.regs[rs1]) >> shamt) & 0xFFFFFFFFFFFFFFFF
             elif funct7 == 0x01:  # RV64M extension
-                if funct3 == 0x0:  # MUL
-                    self.regs[rd] = (self.regs[rs1] * self.regs[rs2]) & 0xFFFFFFFFFFFFFFFF
-                elif funct3 == 0x1:  # MULH
-                    a = self.regs[rs1]
-                    b = self.regs[rs2]
-                    a_s = a if a < 2**63 else a - 2**64
-                    b_s = b if b < 2**63 else b - 2**64
-                    res = (a_s * b_s) >> 64
-                    self.regs[rd] = res & 0xFFFFFFFFFFFFFFFF
-                elif funct3 == 0x2:  # MULHSU
-                    a = self.regs[rs1]
-                    b = self.regs[rs2]
-                    a_s = a if a < 2**63 else a - 2**64
-                    res = (a_s * b) >> 64
-                    self.regs[rd] = res & 0xFFFFFFFFFFFFFFFF
-                elif funct3 == 0x3:  # MULHU
-                    a = self.regs[rs1]
-                    b = self.regs[rs2]
-                    res = (a * b) >> 64
-                    self.regs[rd] = res & 0xFFFFFFFFFFFFFFFF
-                elif funct3 == 0x4:  # DIV
-                    dividend = self.regs[rs1]
-                    divisor = self.regs[rs2]
-                    if divisor == 0:
-                        self.regs[rd] = 0xFFFFFFFFFFFFFFFF
-                    else:
-                        dividend_s = dividend if dividend < 2**63 else dividend - 2**64
-                        divisor_s = divisor if divisor < 2**63 else divisor - 2**64
-                        self.regs[rd] = (int(dividend_s / divisor_s) & 0xFFFFFFFFFFFFFFFF)
-                elif funct3 == 0x5:  # DIVU
-                    dividend = self.regs[rs1]
-                    divisor = self.regs[rs2]
-                    if divisor == 0:
-                        self.regs[rd] = 0xFFFFFFFFFFFFFFFF
-                    else:
-                        self.regs[rd] = (dividend // divisor) & 0xFFFFFFFFFFFFFFFF
-                elif funct3 == 0x6:  # REM
-                    dividend = self.regs[rs1]
-                    divisor = self.regs[rs2]
-                    if divisor == 0:
-                        self.regs[rd] = dividend & 0xFFFFFFFFFFFFFFFF
-                    else:
-                        dividend_s = dividend if dividend < 2**63 else dividend - 2**64
-                        divisor_s = divisor if divisor < 2**63 else divisor - 2**64
-                        self.regs[rd] = (int(dividend_s % divisor_s) & 0xFFFFFFFFFFFFFFFF)
-                elif funct3 == 0x7:  # REMU
-                    dividend = self.regs[rs1]
-                    divisor = self.regs[rs2]
-                    if divisor == 0:
-                        self.regs[rd] = dividend & 0xFFFFFFFFFFFFFFFF
-                    else:
-                        self.regs[rd] = (dividend % divisor) & 0xFFFFFFFFFFFFFFFF
+                self._exec_muldiv(funct3, rd, rs1, rs2)
         elif opcode == 0x3B:  # R-type 32-bit
             if funct7 == 0x00 and funct3 == 0x0:  # ADDW
                 res = (self.regs[rs1] + self.regs[rs2]) & 0xFFFFFFFF
@@ -330,75 +523,10 @@ class GoldenModel:
             else:
                 self.last_exception = "illegal"
         elif opcode == 0x03:  # Loads
-            if not self.spec_fence.allow_load():
-                self.last_exception = "spec"
-            else:
-                imm = self._sign_extend(instr >> 20, 12)
-                va = (self.regs[rs1] + imm) & 0xFFFFFFFFFFFFFFFF
-                pa, fault = self.translate(
-                    va, 'r', is_exec=False, override=self.smap_override
-                )
-                align_tbl = {0x1: 2, 0x2: 4, 0x3: 8, 0x5: 2, 0x6: 4}
-                align = align_tbl.get(funct3, 1)
-                data = self._mem_load(pa) if (not self.meltdown_protect and self._sev_addr(pa) in self.mem) else None
-                if va % align != 0:
-                    self.last_exception = "misalign" if align > 1 else None
-                elif fault:
-                    self.last_exception = fault
-                elif self._sev_addr(pa) not in self.mem:
-                    self.last_exception = "page"
-                if self.last_exception is None or not self.meltdown_protect:
-                    if data is None:
-                        data = self._mem_load(pa)
-                    if funct3 == 0x0:  # LB
-                        val = self._sign_extend(data & 0xFF, 8)
-                    elif funct3 == 0x1:  # LH
-                        val = self._sign_extend(data & 0xFFFF, 16)
-                    elif funct3 == 0x2:  # LW
-                        val = self._sign_extend(data & 0xFFFFFFFF, 32)
-                    elif funct3 == 0x3:  # LD
-                        val = data & 0xFFFFFFFFFFFFFFFF
-                    elif funct3 == 0x4:  # LBU
-                        val = data & 0xFF
-                    elif funct3 == 0x5:  # LHU
-                        val = data & 0xFFFF
-                    elif funct3 == 0x6:  # LWU
-                        val = data & 0xFFFFFFFF
-                    else:
-                        self.last_exception = "illegal"
-                        val = None
-                    if val is not None:
-                        self.regs[rd] = val & 0xFFFFFFFFFFFFFFFF
+            self._exec_load(funct3, rd, rs1, self._sign_extend(instr >> 20, 12))
         elif opcode == 0x23:  # Stores
             imm = ((instr >> 7) & 0x1F) | (((instr >> 25) & 0x7F) << 5)
-            imm = self._sign_extend(imm, 12)
-            va = (self.regs[rs1] + imm) & 0xFFFFFFFFFFFFFFFF
-            pa, fault = self.translate(va, 'w', is_exec=False, override=self.smap_override)
-            misalign = False
-            case_align = {
-                0x1: 2,
-                0x2: 4,
-                0x3: 8,
-            }
-            align = case_align.get(funct3, 1)
-            if va % align != 0:
-                misalign = align > 1
-            if misalign:
-                self.last_exception = "misalign"
-            elif fault:
-                self.last_exception = fault
-            elif self._sev_addr(pa) not in self.mem:
-                self.last_exception = "page"
-            elif funct3 == 0x0:  # SB
-                self._mem_store(pa, self.regs[rs2] & 0xFF)
-            elif funct3 == 0x1:  # SH
-                self._mem_store(pa, self.regs[rs2] & 0xFFFF)
-            elif funct3 == 0x2:  # SW
-                self._mem_store(pa, self.regs[rs2] & 0xFFFFFFFF)
-            elif funct3 == 0x3:  # SD
-                self._mem_store(pa, self.regs[rs2] & 0xFFFFFFFFFFFFFFFF)
-            else:
-                self.last_exception = "illegal"
+            self._exec_store(funct3, rs1, rs2, self._sign_extend(imm, 12))
         elif opcode == 0x63:  # Branches
             imm = ((instr >> 7) & 0x1E) | ((instr >> 20) & 0x7E0)
             imm |= ((instr >> 7) & 0x1) << 11
@@ -442,223 +570,464 @@ class GoldenModel:
             if funct3 == 0x0:  # FENCE
                 pass  # no operation in the model
             elif funct3 == 0x1:  # FENCE.I
-                pass
+                self.flush_blocks()
             elif funct3 == 0x2:  # SpecFetchFence
                 self.spec_fence.fence()
             else:
                 self.last_exception = "illegal"
         elif opcode == 0x73:  # SYSTEM / CSR ops
-            csr = (instr >> 20) & 0xFFF
-            uimm = (instr >> 15) & 0x1F
-            csr_val = self.csrs.get(csr, 0)
-            if funct3 == 0x0:  # ECALL/EBREAK
-                if instr >> 20 == 0:
-                    self.last_exception = "ecall"
-                elif instr >> 20 == 1:
-                    self.last_exception = "ebreak"
-                else:
-                    self.last_exception = "illegal"
-            elif funct3 == 0x1:  # CSRRW
-                self.csrs[csr] = self.regs[rs1]
-                self.regs[rd] = csr_val
-            elif funct3 == 0x2:  # CSRRS
-                self.csrs[csr] = csr_val | self.regs[rs1]
-                self.regs[rd] = csr_val
-            elif funct3 == 0x3:  # CSRRC
-                self.csrs[csr] = csr_val & (~self.regs[rs1] & 0xFFFFFFFFFFFFFFFF)
-                self.regs[rd] = csr_val
-            elif funct3 == 0x5:  # CSRRWI
-                self.csrs[csr] = uimm
-                self.regs[rd] = csr_val
-            elif funct3 == 0x6:  # CSRRSI
-                self.csrs[csr] = csr_val | uimm
-                self.regs[rd] = csr_val
-            elif funct3 == 0x7:  # CSRRCI
-                self.csrs[csr] = csr_val & (~uimm & 0xFFFFFFFFFFFFFFFF)
-                self.regs[rd] = csr_val
-            else:
-                self.last_exception = "illegal"
+            self._exec_system(instr, funct3, rd, rs1)
         elif opcode == 0x53:  # Floating point
-            if funct7 == 0x01 and funct3 == 0x0:  # FADD.D
-                a = self._bits_to_double(self.fregs[rs1])
-                b = self._bits_to_double(self.fregs[rs2])
-                res = a + b
-                self.fregs[rd] = self._double_to_bits(res)
-            elif funct7 == 0x05 and funct3 == 0x0:  # FSUB.D
-                a = self._bits_to_double(self.fregs[rs1])
-                b = self._bits_to_double(self.fregs[rs2])
-                res = a - b
-                self.fregs[rd] = self._double_to_bits(res)
-            elif funct7 == 0x09 and funct3 == 0x0:  # FMUL.D
-                a = self._bits_to_double(self.fregs[rs1])
-                b = self._bits_to_double(self.fregs[rs2])
-                res = a * b
-                self.fregs[rd] = self._double_to_bits(res)
-            elif funct7 == 0x0D and funct3 == 0x0:  # FDIV.D
-                a = self._bits_to_double(self.fregs[rs1])
-                b = self._bits_to_double(self.fregs[rs2])
-                try:
-                    res = a / b
-                except ZeroDivisionError:
-                    res = float('inf') if a >= 0 else float('-inf')
-                self.fregs[rd] = self._double_to_bits(res)
-            elif funct7 == 0x15:  # FMIN.D/FMAX.D
-                a = self._bits_to_double(self.fregs[rs1])
-                b = self._bits_to_double(self.fregs[rs2])
-                if ((instr >> 12) & 7) & 1:
-                    res = max(a, b)
-                else:
-                    res = min(a, b)
-                self.fregs[rd] = self._double_to_bits(res)
+            self._exec_fp(instr, funct3, funct7, rd, rs1, rs2)
+        elif opcode in (0x43, 0x47, 0x4B, 0x4F):  # FMADD.D/FMSUB.D/FNMSUB.D/FNMADD.D
+            self._exec_fma(opcode, (instr >> 25) & 0x3, funct3, rd, rs1, rs2, (instr >> 27) & 0x1F)
+        elif opcode == 0x07 and funct3 == 0x0:  # Vector load (VLE64.V)
+            self._exec_vle64(rd, rs1, self._sign_extend(instr >> 20, 12))
+        elif opcode == 0x07 and funct3 == 0x1:  # Gather load (VLUXEI64.V)
+            self._exec_vluxei64(rd, rs1, (instr >> 20) & 0x1F, (instr >> 29) & 0x7)
+        elif opcode == 0x27 and funct3 == 0x0:  # Vector store (VSE64.V)
+            imm = ((instr >> 7) & 0x1F) | (((instr >> 25) & 0x7F) << 5)
+            self._exec_vse64(rs1, rs2, self._sign_extend(imm, 12))
+        elif opcode == 0x27 and funct3 == 0x1:  # Scatter store (VSUXEI64.V)
+            self._exec_vsuxei64(rs1, (instr >> 20) & 0x1F, (instr >> 7) & 0x1F, (instr >> 29) & 0x7)
+        elif opcode == 0x57:  # Vector arithmetic
+            self._exec_varith((instr >> 26) & 0x3F, funct3, rd, rs1, rs2)
+        elif opcode == 0x2F:  # Atomic memory ops
+            self._exec_amo((instr >> 27) & 0x1F, rd, rs1, rs2)
+        else:
+            self.last_exception = "illegal"
+        return next_pc
+
+    # ------------------------------------------------------------------
+    # Execution helpers shared by the interpreter and predecoded handlers
+    # ------------------------------------------------------------------
+    def _exec_muldiv(self, funct3, rd, rs1, rs2):
+        if funct3 == 0x0:  # MUL
+            self.regs[rd] = (self.regs[rs1] * self.regs[rs2]) & 0xFFFFFFFFFFFFFFFF
+        elif funct3 == 0x1:  # MULH
+            a = self.regs[rs1]
+            b = self.regs[rs2]
+            a_s = a if a < 2**63 else a - 2**64
+            b_s = b if b < 2**63 else b - 2**64
+            res = (a_s * b_s) >> 64
+            self.regs[rd] = res & 0xFFFFFFFFFFFFFFFF
+        elif funct3 == 0x2:  # MULHSU
+            a = self.regs[rs1]
+            b = self.regs[rs2]
+            a_s = a if a < 2**63 else a - 2**64
+            res = (a_s * b) >> 64
+            self.regs[rd] = res & 0xFFFFFFFFFFFFFFFF
+        elif funct3 == 0x3:  # MULHU
+            a = self.regs[rs1]
+            b = self.regs[rs2]
+            res = (a * b) >> 64
+            self.regs[rd] = res & 0xFFFFFFFFFFFFFFFF
+        elif funct3 == 0x4:  # DIV
+            dividend = self.regs[rs1]
+            divisor = self.regs[rs2]
+            if divisor == 0:
+                self.regs[rd] = 0xFFFFFFFFFFFFFFFF
+            else:
+                dividend_s = dividend if dividend < 2**63 else dividend - 2**64
+                divisor_s = divisor if divisor < 2**63 else divisor - 2**64
+                self.regs[rd] = (int(dividend_s / divisor_s) & 0xFFFFFFFFFFFFFFFF)
+        elif funct3 == 0x5:  # DIVU
+            dividend = self.regs[rs1]
+            divisor = self.regs[rs2]
+            if divisor == 0:
+                self.regs[rd] = 0xFFFFFFFFFFFFFFFF
+            else:
+                self.regs[rd] = (dividend // divisor) & 0xFFFFFFFFFFFFFFFF
+        elif funct3 == 0x6:  # REM
+            dividend = self.regs[rs1]
+            divisor = self.regs[rs2]
+            if divisor == 0:
+                self.regs[rd] = dividend & 0xFFFFFFFFFFFFFFFF
+            else:
+                dividend_s = dividend if dividend < 2**63 else dividend - 2**64
+                divisor_s = divisor if divisor < 2**63 else divisor - 2**64
+                self.regs[rd] = (int(dividend_s % divisor_s) & 0xFFFFFFFFFFFFFFFF)
+        elif funct3 == 0x7:  # REMU
+            dividend = self.regs[rs1]
+            divisor = self.regs[rs2]
+            if divisor == 0:
+                self.regs[rd] = dividend & 0xFFFFFFFFFFFFFFFF
+            else:
+                self.regs[rd] = (dividend % divisor) & 0xFFFFFFFFFFFFFFFF
+
+    def _exec_load(self, funct3, rd, rs1, imm):
+        if not self.spec_fence.allow_load():
+            self.last_exception = "spec"
+            return
+        va = (self.regs[rs1] + imm) & 0xFFFFFFFFFFFFFFFF
+        pa, fault = self.translate(
+            va, 'r', is_exec=False, override=self.smap_override
+        )
+        align_tbl = {0x1: 2, 0x2: 4, 0x3: 8, 0x5: 2, 0x6: 4}
+        align = align_tbl.get(funct3, 1)
+        data = self._mem_load(pa) if (not self.meltdown_protect and self._sev_addr(pa) in self.mem) else None
+        if va % align != 0:
+            self.last_exception = "misalign" if align > 1 else None
+        elif fault:
+            self.last_exception = fault
+        elif self._sev_addr(pa) not in self.mem:
+            self.last_exception = "page"
+        if self.last_exception is None or not self.meltdown_protect:
+            if data is None:
+                data = self._mem_load(pa)
+            if funct3 == 0x0:  # LB
+                val = self._sign_extend(data & 0xFF, 8)
+            elif funct3 == 0x1:  # LH
+                val = self._sign_extend(data & 0xFFFF, 16)
+            elif funct3 == 0x2:  # LW
+                val = self._sign_extend(data & 0xFFFFFFFF, 32)
+            elif funct3 == 0x3:  # LD
+                val = data & 0xFFFFFFFFFFFFFFFF
+            elif funct3 == 0x4:  # LBU
+                val = data & 0xFF
+            elif funct3 == 0x5:  # LHU
+                val = data & 0xFFFF
+            elif funct3 == 0x6:  # LWU
+                val = data & 0xFFFFFFFF
             else:
                 self.last_exception = "illegal"
-        elif opcode in (0x43, 0x47, 0x4B, 0x4F):  # FMADD.D/FMSUB.D/FNMSUB.D/FNMADD.D
-            fmt = (instr >> 25) & 0x3
-            rs3 = (instr >> 27) & 0x1F
-            if fmt == 0x1 and funct3 == 0x0:
-                a = self._bits_to_double(self.fregs[rs1])
-                b = self._bits_to_double(self.fregs[rs2])
-                c = self._bits_to_double(self.fregs[rs3])
-                res = a * b
-                if opcode == 0x43:  # FMADD.D
-                    res = res + c
-                elif opcode == 0x47:  # FMSUB.D
-                    res = res - c
-                elif opcode == 0x4B:  # FNMSUB.D
-                    res = -res - c
-                else:  # 0x4F FNMADD.D
-                    res = -res + c
-                self.fregs[rd] = self._double_to_bits(res)
+                val = None
+            if val is not None:
+                self.regs[rd] = val & 0xFFFFFFFFFFFFFFFF
+
+    def _exec_store(self, funct3, rs1, rs2, imm):
+        va = (self.regs[rs1] + imm) & 0xFFFFFFFFFFFFFFFF
+        pa, fault = self.translate(va, 'w', is_exec=False, override=self.smap_override)
+        misalign = False
+        case_align = {
+            0x1: 2,
+            0x2: 4,
+            0x3: 8,
+        }
+        align = case_align.get(funct3, 1)
+        if va % align != 0:
+            misalign = align > 1
+        if misalign:
+            self.last_exception = "misalign"
+        elif fault:
+            self.last_exception = fault
+        elif self._sev_addr(pa) not in self.mem:
+            self.last_exception = "page"
+        elif funct3 == 0x0:  # SB
+            self._mem_store(pa, self.regs[rs2] & 0xFF, 1)
+        elif funct3 == 0x1:  # SH
+            self._mem_store(pa, self.regs[rs2] & 0xFFFF, 2)
+        elif funct3 == 0x2:  # SW
+            self._mem_store(pa, self.regs[rs2] & 0xFFFFFFFF, 4)
+        elif funct3 == 0x3:  # SD
+            self._mem_store(pa, self.regs[rs2] & 0xFFFFFFFFFFFFFFFF)
+        else:
+            self.last_exception = "illegal"
+
+    def _exec_system(self, instr, funct3, rd, rs1):
+        csr = (instr >> 20) & 0xFFF
+        uimm = (instr >> 15) & 0x1F
+        csr_val = self.csrs.get(csr, 0)
+        if funct3 == 0x0:  # ECALL/EBREAK
+            if instr >> 20 == 0:
+                self.last_exception = "ecall"
+            elif instr >> 20 == 1:
+                self.last_exception = "ebreak"
             else:
                 self.last_exception = "illegal"
-        elif opcode == 0x07 and funct3 == 0x0:  # Vector load (VLE64.V)
-            imm = self._sign_extend(instr >> 20, 12)
-            addr = (self.regs[rs1] + imm) & self.MASK64
-            misalign = addr % 8 != 0
-            if misalign:
-                self.last_exception = "misalign"
+        elif funct3 == 0x1:  # CSRRW
+            self.csrs[csr] = self.regs[rs1]
+            self.regs[rd] = csr_val
+        elif funct3 == 0x2:  # CSRRS
+            self.csrs[csr] = csr_val | self.regs[rs1]
+            self.regs[rd] = csr_val
+        elif funct3 == 0x3:  # CSRRC
+            self.csrs[csr] = csr_val & (~self.regs[rs1] & 0xFFFFFFFFFFFFFFFF)
+            self.regs[rd] = csr_val
+        elif funct3 == 0x5:  # CSRRWI
+            self.csrs[csr] = uimm
+            self.regs[rd] = csr_val
+        elif funct3 == 0x6:  # CSRRSI
+            self.csrs[csr] = csr_val | uimm
+            self.regs[rd] = csr_val
+        elif funct3 == 0x7:  # CSRRCI
+            self.csrs[csr] = csr_val & (~uimm & 0xFFFFFFFFFFFFFFFF)
+            self.regs[rd] = csr_val
+        else:
+            self.last_exception = "illegal"
+
+    def _exec_fp(self, instr, funct3, funct7, rd, rs1, rs2):
+        if funct7 == 0x01 and funct3 == 0x0:  # FADD.D
+            a = self._bits_to_double(self.fregs[rs1])
+            b = self._bits_to_double(self.fregs[rs2])
+            res = a + b
+            self.fregs[rd] = self._double_to_bits(res)
+        elif funct7 == 0x05 and funct3 == 0x0:  # FSUB.D
+            a = self._bits_to_double(self.fregs[rs1])
+            b = self._bits_to_double(self.fregs[rs2])
+            res = a - b
+            self.fregs[rd] = self._double_to_bits(res)
+        elif funct7 == 0x09 and funct3 == 0x0:  # FMUL.D
+            a = self._bits_to_double(self.fregs[rs1])
+            b = self._bits_to_double(self.fregs[rs2])
+            res = a * b
+            self.fregs[rd] = self._double_to_bits(res)
+        elif funct7 == 0x0D and funct3 == 0x0:  # FDIV.D
+            a = self._bits_to_double(self.fregs[rs1])
+            b = self._bits_to_double(self.fregs[rs2])
+            try:
+                res = a / b
+            except ZeroDivisionError:
+                res = float('inf') if a >= 0 else float('-inf')
+            self.fregs[rd] = self._double_to_bits(res)
+        elif funct7 == 0x15:  # FMIN.D/FMAX.D
+            a = self._bits_to_double(self.fregs[rs1])
+            b = self._bits_to_double(self.fregs[rs2])
+            if ((instr >> 12) & 7) & 1:
+                res = max(a, b)
+            else:
+                res = min(a, b)
+            self.fregs[rd] = self._double_to_bits(res)
+        else:
+            self.last_exception = "illegal"
+
+    def _exec_fma(self, opcode, fmt, funct3, rd, rs1, rs2, rs3):
+        if fmt == 0x1 and funct3 == 0x0:
+            a = self._bits_to_double(self.fregs[rs1])
+            b = self._bits_to_double(self.fregs[rs2])
+            c = self._bits_to_double(self.fregs[rs3])
+            res = a * b
+            if opcode == 0x43:  # FMADD.D
+                res = res + c
+            elif opcode == 0x47:  # FMSUB.D
+                res = res - c
+            elif opcode == 0x4B:  # FNMSUB.D
+                res = -res - c
+            else:  # 0x4F FNMADD.D
+                res = -res + c
+            self.fregs[rd] = self._double_to_bits(res)
+        else:
+            self.last_exception = "illegal"
+
+    def _exec_vle64(self, rd, rs1, imm):
+        addr = (self.regs[rs1] + imm) & self.MASK64
+        misalign = addr % 8 != 0
+        if misalign:
+            self.last_exception = "misalign"
+        else:
+            bulk = self._bulk_memory()
+            if bulk is not None:
+                vec = int.from_bytes(bulk.read_bytes(addr, 64), "little")
             else:
                 vec = 0
                 for i in range(8):
                     pa = addr + i * 8
                     vec |= (self._mem_load(pa) & self.MASK64) << (64 * i)
-                if self.last_exception is None:
-                    self.vregs[rd] = vec & self.MASK512
-        elif opcode == 0x07 and funct3 == 0x1:  # Gather load (VLUXEI64.V)
-            scale = (instr >> 29) & 0x7
-            vs2 = (instr >> 20) & 0x1F
-            indices = [
-                (self.vregs[vs2] >> (64 * i)) & self.MASK64 for i in range(8)
-            ]
-            vec = self.gather(self.regs[rs1], indices, scale)
             if self.last_exception is None:
-                self.vregs[rd] = vec
+                self.vregs[rd] = vec & self.MASK512
 
-        elif opcode == 0x27 and funct3 == 0x0:  # Vector store (VSE64.V)
-            imm = ((instr >> 7) & 0x1F) | (((instr >> 25) & 0x7F) << 5)
-            imm = self._sign_extend(imm, 12)
-            addr = (self.regs[rs1] + imm) & self.MASK64
-            misalign = addr % 8 != 0
-            if misalign:
-                self.last_exception = "misalign"
-            else:
-                for i in range(8):
-                    pa = addr + i * 8
-                    self._mem_store(pa, (self.vregs[rs2] >> (64 * i)) & self.MASK64)
+    def _exec_vluxei64(self, rd, rs1, vs2, scale):
+        indices = [
+            (self.vregs[vs2] >> (64 * i)) & self.MASK64 for i in range(8)
+        ]
+        vec = self.gather(self.regs[rs1], indices, scale)
+        if self.last_exception is None:
+            self.vregs[rd] = vec
 
-        elif opcode == 0x27 and funct3 == 0x1:  # Scatter store (VSUXEI64.V)
-            scale = (instr >> 29) & 0x7
-            vs3 = (instr >> 20) & 0x1F
-            vs2 = (instr >> 7) & 0x1F
-            indices = [
-                (self.vregs[vs2] >> (64 * i)) & self.MASK64 for i in range(8)
-            ]
-            self.scatter(self.regs[rs1], indices, scale, self.vregs[vs3])
-        elif opcode == 0x57:  # Vector arithmetic
-            funct6 = (instr >> 26) & 0x3F
-            if funct6 == 0x00 and funct3 == 0x0:  # VADD.VV
-                res = 0
-                for i in range(8):
-                    a = (self.vregs[rs1] >> (64 * i)) & self.MASK64
-                    b = (self.vregs[rs2] >> (64 * i)) & self.MASK64
-                    res |= ((a + b) & self.MASK64) << (64 * i)
-                self.vregs[rd] = res
-            elif funct6 == 0x01 and funct3 == 0x0:  # VFMA.VV (vd += vs1*vs2)
-                res = 0
-                for i in range(8):
-                    a = (self.vregs[rs1] >> (64 * i)) & self.MASK64
-                    b = (self.vregs[rs2] >> (64 * i)) & self.MASK64
-                    c = (self.vregs[rd] >> (64 * i)) & self.MASK64
-                    res |= ((a * b + c) & self.MASK64) << (64 * i)
-                self.vregs[rd] = res
-            elif funct6 == 0x02 and funct3 == 0x0:  # VMUL.VV
-                res = 0
-                for i in range(8):
-                    a = (self.vregs[rs1] >> (64 * i)) & self.MASK64
-                    b = (self.vregs[rs2] >> (64 * i)) & self.MASK64
-                    res |= ((a * b) & self.MASK64) << (64 * i)
-                self.vregs[rd] = res
-            else:
-                self.last_exception = "illegal"
-        elif opcode == 0x2F:  # Atomic memory ops
-            funct5 = (instr >> 27) & 0x1F
-            aq    = (instr >> 26) & 1
-            rl    = (instr >> 25) & 1
-            addr = self.regs[rs1]
-            if funct5 == 0x02:  # LR.D
-                self.regs[rd] = self._mem_load(addr)
-                self._reservation = addr
-            elif funct5 == 0x03:  # SC.D
-                if self._reservation == addr:
-                    self._mem_store(addr, self.regs[rs2] & 0xFFFFFFFFFFFFFFFF)
-                    self.regs[rd] = 0
-                else:
-                    self.regs[rd] = 1
-                self._reservation = None
-            elif funct5 == 0x00:  # AMOADD.D
-                tmp = self._mem_load(addr)
-                self._mem_store(addr, (tmp + self.regs[rs2]) & 0xFFFFFFFFFFFFFFFF)
-                self.regs[rd] = tmp
-            elif funct5 == 0x01:  # AMOSWAP.D
-                tmp = self._mem_load(addr)
-                self._mem_store(addr, self.regs[rs2] & 0xFFFFFFFFFFFFFFFF)
-                self.regs[rd] = tmp
-            elif funct5 == 0x04:  # AMOXOR.D
-                tmp = self._mem_load(addr)
-                self._mem_store(addr, (tmp ^ self.regs[rs2]) & 0xFFFFFFFFFFFFFFFF)
-                self.regs[rd] = tmp
-            elif funct5 == 0x08:  # AMOOR.D
-                tmp = self._mem_load(addr)
-                self._mem_store(addr, (tmp | self.regs[rs2]) & 0xFFFFFFFFFFFFFFFF)
-                self.regs[rd] = tmp
-            elif funct5 == 0x0C:  # AMOAND.D
-                tmp = self._mem_load(addr)
-                self._mem_store(addr, (tmp & self.regs[rs2]) & 0xFFFFFFFFFFFFFFFF)
-                self.regs[rd] = tmp
-            elif funct5 == 0x10:  # AMOMIN.D
-                tmp = self._mem_load(addr)
-                a = tmp if tmp < 2**63 else tmp - 2**64
-                b = self.regs[rs2] if self.regs[rs2] < 2**63 else self.regs[rs2] - 2**64
-                self._mem_store(addr, tmp if a < b else self.regs[rs2])
-                self.regs[rd] = tmp
-            elif funct5 == 0x14:  # AMOMAX.D
-                tmp = self._mem_load(addr)
-                a = tmp if tmp < 2**63 else tmp - 2**64
-                b = self.regs[rs2] if self.regs[rs2] < 2**63 else self.regs[rs2] - 2**64
-                self._mem_store(addr, tmp if a > b else self.regs[rs2])
-                self.regs[rd] = tmp
-            elif funct5 == 0x18:  # AMOMINU.D
-                tmp = self._mem_load(addr)
-                self._mem_store(addr, tmp if tmp < self.regs[rs2] else self.regs[rs2])
-                self.regs[rd] = tmp
-            elif funct5 == 0x1C:  # AMOMAXU.D
-                tmp = self._mem_load(addr)
-                self._mem_store(addr, tmp if tmp > self.regs[rs2] else self.regs[rs2])
-                self.regs[rd] = tmp
+    def _exec_vse64(self, rs1, rs2, imm):
+        addr = (self.regs[rs1] + imm) & self.MASK64
+        misalign = addr % 8 != 0
+        if misalign:
+            self.last_exception = "misalign"
+        else:
+            bulk = self._bulk_memory()
+            if bulk is not None:
+                bulk.write_bytes(
+                    addr, (self.vregs[rs2] & self.MASK512).to_bytes(64, "little")
+                )
+                if self._block_pages:
+                    self._invalidate_code_page(addr >> 12)
+                    self._invalidate_code_page((addr + 63) >> 12)
+                return
+            for i in range(8):
+                pa = addr + i * 8
+                self._mem_store(pa, (self.vregs[rs2] >> (64 * i)) & self.MASK64)
+
+    def _exec_vsuxei64(self, rs1, vs3, vs2, scale):
+        indices = [
+            (self.vregs[vs2] >> (64 * i)) & self.MASK64 for i in range(8)
+        ]
+        self.scatter(self.regs[rs1], indices, scale, self.vregs[vs3])
+
+    def _exec_varith(self, funct6, funct3, rd, rs1, rs2):
+        if funct6 == 0x00 and funct3 == 0x0:  # VADD.VV
+            self.vregs[rd] = vector_lanes.vadd(self.vregs[rs1], self.vregs[rs2])
+        elif funct6 == 0x01 and funct3 == 0x0:  # VFMA.VV (vd += vs1*vs2)
+            self.vregs[rd] = vector_lanes.vfma(
+                self.vregs[rs1], self.vregs[rs2], self.vregs[rd]
+            )
+        elif funct6 == 0x02 and funct3 == 0x0:  # VMUL.VV
+            self.vregs[rd] = vector_lanes.vmul(self.vregs[rs1], self.vregs[rs2])
         else:
             self.last_exception = "illegal"
-        self.pc = next_pc
-        return next_pc
+
+    def _exec_amo(self, funct5, rd, rs1, rs2):
+        addr = self.regs[rs1]
+        if funct5 == 0x02:  # LR.D
+            self.regs[rd] = self._mem_load(addr)
+            self._reservation = addr
+        elif funct5 == 0x03:  # SC.D
+            if self._reservation == addr:
+                self._mem_store(addr, self.regs[rs2] & 0xFFFFFFFFFFFFFFFF)
+                self.regs[rd] = 0
+            else:
+                self.regs[rd] = 1
+            self._reservation = None
+        elif funct5 == 0x00:  # AMOADD.D
+            tmp = self._mem_load(addr)
+            self._mem_store(addr, (tmp + self.regs[rs2]) & 0xFFFFFFFFFFFFFFFF)
+            self.regs[rd] = tmp
+        elif funct5 == 0x01:  # AMOSWAP.D
+            tmp = self._mem_load(addr)
+            self._mem_store(addr, self.regs[rs2] & 0xFFFFFFFFFFFFFFFF)
+            self.regs[rd] = tmp
+        elif funct5 == 0x04:  # AMOXOR.D
+            tmp = self._mem_load(addr)
+            self._mem_store(addr, (tmp ^ self.regs[rs2]) & 0xFFFFFFFFFFFFFFFF)
+            self.regs[rd] = tmp
+        elif funct5 == 0x08:  # AMOOR.D
+            tmp = self._mem_load(addr)
+            self._mem_store(addr, (tmp | self.regs[rs2]) & 0xFFFFFFFFFFFFFFFF)
+            self.regs[rd] = tmp
+        elif funct5 == 0x0C:  # AMOAND.D
+            tmp = self._mem_load(addr)
+            self._mem_store(addr, (tmp & self.regs[rs2]) & 0xFFFFFFFFFFFFFFFF)
+            self.regs[rd] = tmp
+        elif funct5 == 0x10:  # AMOMIN.D
+            tmp = self._mem_load(addr)
+            a = tmp if tmp < 2**63 else tmp - 2**64
+            b = self.regs[rs2] if self.regs[rs2] < 2**63 else self.regs[rs2] - 2**64
+            self._mem_store(addr, tmp if a < b else self.regs[rs2])
+            self.regs[rd] = tmp
+        elif funct5 == 0x14:  # AMOMAX.D
+            tmp = self._mem_load(addr)
+            a = tmp if tmp < 2**63 else tmp - 2**64
+            b = self.regs[rs2] if self.regs[rs2] < 2**63 else self.regs[rs2] - 2**64
+            self._mem_store(addr, tmp if a > b else self.regs[rs2])
+            self.regs[rd] = tmp
+        elif funct5 == 0x18:  # AMOMINU.D
+            tmp = self._mem_load(addr)
+            self._mem_store(addr, tmp if tmp < self.regs[rs2] else self.regs[rs2])
+            self.regs[rd] = tmp
+        elif funct5 == 0x1C:  # AMOMAXU.D
+            tmp = self._mem_load(addr)
+            self._mem_store(addr, tmp if tmp > self.regs[rs2] else self.regs[rs2])
+            self.regs[rd] = tmp
+
+    # ------------------------------------------------------------------
+    # Basic-block execution
+    # ------------------------------------------------------------------
+    BLOCK_LIMIT = 64
+    # control transfers, fences and system instructions end a block
+    _BLOCK_END_OPCODES = frozenset((0x63, 0x6F, 0x67, 0x0F, 0x73))
+
+    def flush_blocks(self):
+        """Discard all translated basic blocks."""
+        self._blocks.clear()
+        self._block_pages.clear()
+        self._block_gen += 1
+
+    def _invalidate_code_page(self, page):
+        starts = self._block_pages.pop(page, None)
+        if starts:
+            for start in starts:
+                self._blocks.pop(start, None)
+            self._block_gen += 1
+
+    def _fetch_context(self):
+        """Return the state a translated block's fetches depend on."""
+        return (
+            self.priv_level, self.smep, self.vmcs.running, self.vmcs.vmid,
+            self.ept.key, self.sev.key, self.sgx.active,
+        )
+
+    def _translate_block(self, pc, ctx):
+        """Fetch straight-line code at *pc* and cache it as a block.
+
+        Returns ``None`` when the first instruction cannot be fetched, in
+        which case ``last_exception`` holds the fetch fault and ``pc`` has
+        moved past it, as :py:meth:`step` does.
+        """
+        handlers = []
+        pages = {pc >> 12}
+        addr = pc
+        while len(handlers) < self.BLOCK_LIMIT:
+            pa = addr
+            if (addr & self._page_mask) in self.page_table:
+                pa, fault = self.translate(addr, 'x', is_exec=True)
+                if fault:
+                    if not handlers:
+                        self.last_exception = fault
+                        self.pc = (pc + 4) & self.MASK64
+                        return None
+                    break
+            if self._sev_addr(pa) not in self.mem:
+                if not handlers:
+                    self.last_exception = "page"
+                    self.pc = (pc + 4) & self.MASK64
+                    return None
+                break
+            instr = self._mem_load(pa) & 0xFFFFFFFF
+            handlers.append(_HANDLERS.get(instr) or handler_for(instr))
+            pages.add(pa >> 12)
+            if instr & 0x7F in self._BLOCK_END_OPCODES:
+                break
+            addr += 4
+            if addr & 0xFFF == 0:
+                break
+        block = (ctx, handlers)
+        self._blocks[pc] = block
+        for page in pages:
+            self._block_pages.setdefault(page, set()).add(pc)
+        return block
+
+    def run(self, max_instrs, until_pc=None):
+        """Fetch and execute up to *max_instrs* instructions from memory.
+
+        Straight-line code is translated into basic blocks of predecoded
+        handlers that are cached by start PC, so each instruction only pays
+        for its handler call.  Blocks are dropped when memory on one of
+        their pages is stored to, when the page table changes and on
+        ``FENCE.I``.  Execution stops before the instruction at *until_pc*,
+        after *max_instrs* instructions or after an instruction raises an
+        exception, which is left in ``last_exception``.  Returns the number
+        of instructions executed.
+        """
+        executed = 0
+        csrs = self.csrs
+        blocks = self._blocks
+        self.last_exception = None
+        while executed < max_instrs and self.pc != until_pc:
+            ctx = self._fetch_context()
+            block = blocks.get(self.pc)
+            if block is None or block[0] != ctx:
+                block = self._translate_block(self.pc, ctx)
+                if block is None:
+                    break
+            gen = self._block_gen
+            for handler in block[1]:
+                self.last_exception = None
+                csrs[0xC00] = (csrs.get(0xC00, 0) + 1) & 0xFFFFFFFFFFFFFFFF
+                csrs[0xC02] = (csrs.get(0xC02, 0) + 1) & 0xFFFFFFFFFFFFFFFF
+                next_pc = handler(self)
+                self.pc = next_pc
+                executed += 1
+                if self.last_exception is not None:
+                    return executed
+                if (executed >= max_instrs or next_pc == until_pc
+                        or gen != self._block_gen):
+                    break
+        return executed
 
     def execute_bundle(self, instructions):
         for instr in instructions:
@@ -747,10 +1116,11 @@ class GoldenModel:
             if fault:
                 self.last_exception = fault
                 break
-            if self._sev_addr(pa) not in self.mem:
+            enc = self.mem.get(self._sev_addr(pa))
+            if enc is None:
                 self.last_exception = "page"
                 break
-            lane = self._mem_load(pa) & self.MASK64
+            lane = self.sev.decrypt(enc) & self.MASK64
             result |= lane << (64 * i)
         return result & self.MASK512
 
@@ -0,0 +1,205 @@
+import struct
+from collections.abc import MutableMapping
+
+_WORD = struct.Struct("<Q")
+
+
+class PagedMemory(MutableMapping):
+    """Sparse byte-addressed memory made of 4 KiB ``bytearray`` pages.
+
+    The object behaves like the ``dict`` the golden model used to keep in
+    ``GoldenModel.mem``: keys are addresses and values are 64-bit words
+    stored little-endian. A key is only *present* once a word was stored at
+    that exact address, so presence checks (``addr in mem``) and
+    ``get(addr, default)`` behave exactly like the dictionary. Words that
+    start at overlapping unaligned addresses share their bytes, as they
+    would in real memory; ``write_word`` takes the store width so that
+    byte, halfword and word stores only touch their own bytes.
+
+    ``read_bytes``/``write_bytes`` move whole ranges at once and are used
+    for image loading and unit-stride vector accesses. ``clone()`` returns a
+    copy that shares its pages copy-on-write.
+    """
+
+    PAGE_SHIFT = 12
+    PAGE_SIZE = 1 << PAGE_SHIFT
+    PAGE_MASK = PAGE_SIZE - 1
+    ADDR_MASK = 0xFFFFFFFFFFFFFFFF
+
+    def __init__(self, data=None):
+        self._pages = {}
+        # per-byte flags marking addresses where a word was stored
+        self._present = {}
+        self._count = 0
+        # pages also referenced by a clone, copied before the next write
+        self._shared = set()
+        if data is not None:
+            self.update(data)
+
+    # ------------------------------------------------------------------
+    # page helpers
+    # ------------------------------------------------------------------
+    def _page(self, page_no):
+        """Return a writable page, allocating or unsharing it as needed."""
+        page = self._pages.get(page_no)
+        if page is None:
+            page = self._pages[page_no] = bytearray(self.PAGE_SIZE)
+            self._present[page_no] = bytearray(self.PAGE_SIZE)
+        elif page_no in self._shared:
+            page = self._pages[page_no] = bytearray(page)
+            self._present[page_no] = bytearray(self._present[page_no])
+            self._shared.discard(page_no)
+        return page
+
+    def clone(self):
+        """Return an independent copy sharing all pages copy-on-write."""
+        other = PagedMemory()
+        other._pages = dict(self._pages)
+        other._present = dict(self._present)
+        other._count = self._count
+        other._shared = set(self._pages)
+        self._shared.update(self._pages)
+        return other
+
+    def page_count(self):
+        """Return the number of allocated pages."""
+        return len(self._pages)
+
+    # ------------------------------------------------------------------
+    # word access
+    # ------------------------------------------------------------------
+    def read_word(self, addr):
+        """Return the 64-bit word at *addr*, ``0`` for untouched memory."""
+        off = addr & self.PAGE_MASK
+        if off <= self.PAGE_SIZE - 8:
+            page = self._pages.get(addr >> self.PAGE_SHIFT)
+            if page is None:
+                return 0
+            return _WORD.unpack_from(page, off)[0]
+        return int.from_bytes(self.read_bytes(addr, 8), "little")
+
+    def write_word(self, addr, value, size=8):
+        """Store *value* at *addr* and mark the word present.
+
+        Only the low *size* bytes are written, so a narrow store leaves the
+        neighbouring bytes, and any word stored next to it, intact.
+        """
+        addr &= self.ADDR_MASK
+        off = addr & self.PAGE_MASK
+        page_no = addr >> self.PAGE_SHIFT
+        page = self._pages.get(page_no)
+        if page is None or page_no in self._shared:
+            page = self._page(page_no)
+        present = self._present[page_no]
+        if not present[off]:
+            present[off] = 1
+            self._count += 1
+        value &= self.ADDR_MASK
+        if size == 8 and off <= self.PAGE_SIZE - 8:
+            _WORD.pack_into(page, off, value)
+        else:
+            self._copy_in(addr, (value & ((1 << (8 * size)) - 1)).to_bytes(size, "little"))
+
+    # ------------------------------------------------------------------
+    # bulk access
+    # ------------------------------------------------------------------
+    def read_bytes(self, addr, size):
+        """Return *size* bytes starting at *addr* as ``bytes``.
+
+        Untouched memory reads as zero and no pages are allocated.
+        """
+        out = bytearray()
+        addr &= self.ADDR_MASK
+        while size > 0:
+            off = addr & self.PAGE_MASK
+            chunk = min(size, self.PAGE_SIZE - off)
+            page = self._pages.get(addr >> self.PAGE_SHIFT)
+            if page is None:
+                out += bytes(chunk)
+            else:
+                out += page[off:off + chunk]
+            size -= chunk
+            addr = (addr + chunk) & self.ADDR_MASK
+        return bytes(out)
+
+    def write_bytes(self, addr, data, stride=8):
+        """Copy *data* into memory starting at *addr*.
+
+        The range is treated as 64-bit words stored every *stride* bytes
+        from ``addr``, so each of those addresses becomes present just as if
+        the words had been stored one at a time. Program images use a stride
+        of four so every instruction address can be fetched.
+        """
+        data = memoryview(data).cast("B")
+        addr &= self.ADDR_MASK
+        for pos in range(0, len(data), stride):
+            word = (addr + pos) & self.ADDR_MASK
+            page_no = word >> self.PAGE_SHIFT
+            if page_no not in self._present or page_no in self._shared:
+                self._page(page_no)
+            present = self._present[page_no]
+            off = word & self.PAGE_MASK
+            if not present[off]:
+                present[off] = 1
+                self._count += 1
+        self._copy_in(addr, data)
+
+    def _copy_in(self, addr, data):
+        data = memoryview(data)
+        pos = 0
+        while pos < len(data):
+            off = addr & self.PAGE_MASK
+            chunk = min(len(data) - pos, self.PAGE_SIZE - off)
+            page = self._page(addr >> self.PAGE_SHIFT)
+            page[off:off + chunk] = data[pos:pos + chunk]
+            pos += chunk
+            addr = (addr + chunk) & self.ADDR_MASK
+
+    # ------------------------------------------------------------------
+    # mapping interface
+    # ------------------------------------------------------------------
+    def __contains__(self, addr):
+        present = self._present.get(addr >> self.PAGE_SHIFT)
+        return present is not None and present[addr & self.PAGE_MASK] == 1
+
+    def get(self, addr, default=None):
+        present = self._present.get(addr >> self.PAGE_SHIFT)
+        if present is None or not present[addr & self.PAGE_MASK]:
+            return default
+        return self.read_word(addr)
+
+    def __getitem__(self, addr):
+        if addr not in self:
+            raise KeyError(addr)
+        return self.read_word(addr)
+
+    def __setitem__(self, addr, value):
+        self.write_word(addr, value)
+
+    def __delitem__(self, addr):
+        if addr not in self:
+            raise KeyError(addr)
+        self._page(addr >> self.PAGE_SHIFT)
+        self._present[addr >> self.PAGE_SHIFT][addr & self.PAGE_MASK] = 0
+        self._count -= 1
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for page_no in sorted(self._present):
+            present = self._present[page_no]
+            base = page_no << self.PAGE_SHIFT
+            off = present.find(1)
+            while off != -1:
+                yield base | off
+                off = present.find(1, off + 1)
+
+    def clear(self):
+        self._pages.clear()
+        self._present.clear()
+        self._shared.clear()
+        self._count = 0
+
+    def __repr__(self):
+        return f"PagedMemory({len(self)} words, {len(self._pages)} pages)"
@@ -0,0 +1,408 @@
+"""Predecoded instruction handlers for :class:`~rtl.isa.golden_model.GoldenModel`.
+
+Every 32-bit instruction word is decoded once into a handler closure with
+all register indices and immediates already extracted.  Handlers are cached
+by instruction word so hot loops skip field extraction and the opcode
+``if``/``elif`` chain entirely.  A handler takes the model, executes the
+instruction and returns the next program counter, mirroring
+``GoldenModel._execute_interp`` bit for bit.
+"""
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+MASK32 = 0xFFFFFFFF
+
+# decoded handlers keyed by instruction word
+_HANDLERS = {}
+CACHE_LIMIT = 1 << 16
+
+
+def _sext(value, bits):
+    mask = 1 << (bits - 1)
+    return (value & (mask - 1)) - (value & mask)
+
+
+def _signed(val):
+    return val if val < 2**63 else val - 2**64
+
+
+def _w(val):
+    """Sign-extend the low 32 bits of *val* to a 64-bit register value."""
+    return _sext(val & MASK32, 32) & MASK64
+
+
+def handler_for(instr):
+    """Return the cached handler for *instr*, decoding it on first use."""
+    handler = _HANDLERS.get(instr)
+    if handler is None:
+        if len(_HANDLERS) >= CACHE_LIMIT:
+            _HANDLERS.clear()
+        handler = _HANDLERS[instr] = decode(instr)
+    return handler
+
+
+def clear_cache():
+    """Drop all cached handlers."""
+    _HANDLERS.clear()
+
+
+# ----------------------------------------------------------------------
+# Generic handler shapes
+# ----------------------------------------------------------------------
+def _nop(gm):
+    return gm.pc + 4
+
+
+def _illegal(gm):
+    gm.last_exception = "illegal"
+    return gm.pc + 4
+
+
+def _rr(rd, rs1, rs2, fn):
+    def h(gm):
+        r = gm.regs
+        r[rd] = fn(r[rs1], r[rs2])
+        return gm.pc + 4
+    return h
+
+
+def _ri(rd, rs1, fn):
+    def h(gm):
+        r = gm.regs
+        r[rd] = fn(r[rs1])
+        return gm.pc + 4
+    return h
+
+
+# ----------------------------------------------------------------------
+# Per-opcode decoders
+# ----------------------------------------------------------------------
+def _dec_op(instr, rd, funct3, rs1, rs2, funct7):
+    if funct7 == 0x00 and funct3 == 0x0:  # ADD
+        def add(gm):
+            r = gm.regs
+            r[rd] = (r[rs1] + r[rs2]) & MASK64
+            return gm.pc + 4
+        return add
+    if funct7 == 0x20 and funct3 == 0x0:  # SUB
+        def sub(gm):
+            r = gm.regs
+            r[rd] = (r[rs1] - r[rs2]) & MASK64
+            return gm.pc + 4
+        return sub
+    if funct7 == 0x01:  # RV64M extension
+        def muldiv(gm):
+            gm._exec_muldiv(funct3, rd, rs1, rs2)
+            return gm.pc + 4
+        return muldiv
+    fn = _OP_FUNCS.get((funct7, funct3))
+    if fn is None:
+        return _nop  # unmatched R-type encodings retire without effect
+    return _rr(rd, rs1, rs2, fn)
+
+
+_OP_FUNCS = {
+    (0x00, 0x2): lambda a, b: 1 if _signed(a) < _signed(b) else 0,  # SLT
+    (0x00, 0x3): lambda a, b: 1 if a < b else 0,  # SLTU
+    (0x00, 0x7): lambda a, b: a & b,  # AND
+    (0x00, 0x6): lambda a, b: a | b,  # OR
+    (0x00, 0x4): lambda a, b: a ^ b,  # XOR
+    (0x00, 0x1): lambda a, b: (a << (b & 0x3F)) & MASK64,  # SLL
+    (0x00, 0x5): lambda a, b: (a >> (b & 0x3F)) & MASK64,  # SRL
+    (0x20, 0x5): lambda a, b: (_signed(a) >> (b & 0x3F)) & MASK64,  # SRA
+}
+
+_OP32_FUNCS = {
+    (0x00, 0x0): lambda a, b: _w(a + b),  # ADDW
+    (0x20, 0x0): lambda a, b: _w(a - b),  # SUBW
+    (0x00, 0x1): lambda a, b: _w(a << (b & 0x1F)),  # SLLW
+    (0x00, 0x5): lambda a, b: _w(a >> (b & 0x1F)),  # SRLW
+    (0x20, 0x5): lambda a, b: _w(_sext(a & MASK32, 32) >> (b & 0x1F)),  # SRAW
+}
+
+
+def _dec_op32(instr, rd, funct3, rs1, rs2, funct7):
+    fn = _OP32_FUNCS.get((funct7, funct3))
+    if fn is None:
+        return _nop
+    return _rr(rd, rs1, rs2, fn)
+
+
+def _dec_opimm(instr, rd, funct3, rs1, rs2, funct7):
+    imm = _sext(instr >> 20, 12)
+    imm_u = imm & MASK64
+    shamt = (instr >> 20) & 0x3F
+    if funct3 == 0x0:  # ADDI
+        def addi(gm):
+            r = gm.regs
+            r[rd] = (r[rs1] + imm) & MASK64
+            return gm.pc + 4
+        return addi
+    if funct3 == 0x7:  # ANDI
+        return _ri(rd, rs1, lambda a: a & imm_u)
+    if funct3 == 0x6:  # ORI
+        return _ri(rd, rs1, lambda a: a | imm_u)
+    if funct3 == 0x4:  # XORI
+        return _ri(rd, rs1, lambda a: a ^ imm_u)
+    if funct3 == 0x2:  # SLTI
+        return _ri(rd, rs1, lambda a: 1 if _signed(a) < imm else 0)
+    if funct3 == 0x3:  # SLTIU
+        return _ri(rd, rs1, lambda a: 1 if a < imm_u else 0)
+    if funct3 == 0x1 and funct7 == 0x00:  # SLLI
+        return _ri(rd, rs1, lambda a: (a << shamt) & MASK64)
+    if funct3 == 0x5 and funct7 == 0x00:  # SRLI
+        return _ri(rd, rs1, lambda a: a >> shamt)
+    if funct3 == 0x5 and funct7 == 0x20:  # SRAI
+        return _ri(rd, rs1, lambda a: (_signed(a) >> shamt) & MASK64)
+    return _illegal
+
+
+def _dec_opimm32(instr, rd, funct3, rs1, rs2, funct7):
+    imm = _sext(instr >> 20, 12)
+    shamt = (instr >> 20) & 0x1F
+    if funct3 == 0x0:  # ADDIW
+        return _ri(rd, rs1, lambda a: _w(a + imm))
+    if funct3 == 0x1 and funct7 == 0x00:  # SLLIW
+        return _ri(rd, rs1, lambda a: _w(a << shamt))
+    if funct3 == 0x5 and funct7 == 0x00:  # SRLIW
+        return _ri(rd, rs1, lambda a: _w(a >> shamt))
+    if funct3 == 0x5 and funct7 == 0x20:  # SRAIW
+        return _ri(rd, rs1, lambda a: _w(_sext(a & MASK32, 32) >> shamt))
+    return _illegal
+
+
+def _dec_load(instr, rd, funct3, rs1, rs2, funct7):
+    imm = _sext(instr >> 20, 12)
+
+    def load(gm):
+        gm._exec_load(funct3, rd, rs1, imm)
+        return gm.pc + 4
+    return load
+
+
+def _dec_store(instr, rd, funct3, rs1, rs2, funct7):
+    imm = _sext(((instr >> 7) & 0x1F) | (((instr >> 25) & 0x7F) << 5), 12)
+
+    def store(gm):
+        gm._exec_store(funct3, rs1, rs2, imm)
+        return gm.pc + 4
+    return store
+
+
+_BRANCH_CONDS = {
+    0x0: lambda a, b: a == b,  # BEQ
+    0x1: lambda a, b: a != b,  # BNE
+    0x4: lambda a, b: _signed(a) < _signed(b),  # BLT
+    0x5: lambda a, b: _signed(a) >= _signed(b),  # BGE
+    0x6: lambda a, b: a < b,  # BLTU
+    0x7: lambda a, b: a >= b,  # BGEU
+}
+
+
+def _dec_branch(instr, rd, funct3, rs1, rs2, funct7):
+    imm = ((instr >> 7) & 0x1E) | ((instr >> 20) & 0x7E0)
+    imm |= ((instr >> 7) & 0x1) << 11
+    imm |= (instr >> 31) << 12
+    imm = _sext(imm, 13)
+    cond = _BRANCH_CONDS.get(funct3)
+    if cond is None:
+        def never(gm):
+            gm.spec_fence.retire_branch()
+            return gm.pc + 4
+        return never
+
+    def branch(gm):
+        r = gm.regs
+        pc = gm.pc
+        gm.spec_fence.retire_branch()
+        if cond(r[rs1], r[rs2]):
+            return (pc + imm) & MASK64
+        return pc + 4
+    return branch
+
+
+def _dec_jal(instr, rd, funct3, rs1, rs2, funct7):
+    imm = ((instr >> 21) & 0x3FF) | ((instr >> 20) & 0x1) << 10
+    imm |= ((instr >> 12) & 0xFF) << 11
+    imm |= (instr >> 31) << 19
+    imm = _sext(imm << 1, 21)
+
+    def jal(gm):
+        pc = gm.pc
+        gm.regs[rd] = (pc + 4) & MASK64
+        gm.spec_fence.retire_branch()
+        return (pc + imm) & MASK64
+    return jal
+
+
+def _dec_jalr(instr, rd, funct3, rs1, rs2, funct7):
+    imm = _sext(instr >> 20, 12)
+
+    def jalr(gm):
+        r = gm.regs
+        r[rd] = (gm.pc + 4) & MASK64
+        # rs1 is read after the link write, matching the interpreter
+        next_pc = (r[rs1] + imm) & 0xFFFFFFFFFFFFFFFE
+        gm.spec_fence.retire_branch()
+        return next_pc
+    return jalr
+
+
+def _dec_lui(instr, rd, funct3, rs1, rs2, funct7):
+    imm = instr & 0xFFFFF000
+
+    def lui(gm):
+        gm.regs[rd] = imm
+        return gm.pc + 4
+    return lui
+
+
+def _dec_auipc(instr, rd, funct3, rs1, rs2, funct7):
+    imm = instr & 0xFFFFF000
+
+    def auipc(gm):
+        pc = gm.pc
+        gm.regs[rd] = (pc + imm) & MASK64
+        return pc + 4
+    return auipc
+
+
+def _fence_i(gm):
+    gm.flush_blocks()
+    return gm.pc + 4
+
+
+def _dec_fence(instr, rd, funct3, rs1, rs2, funct7):
+    if funct3 == 0x0:  # FENCE
+        return _nop
+    if funct3 == 0x1:  # FENCE.I
+        return _fence_i
+    if funct3 == 0x2:  # SpecFetchFence
+        def spec_fence(gm):
+            gm.spec_fence.fence()
+            return gm.pc + 4
+        return spec_fence
+    return _illegal
+
+
+def _dec_system(instr, rd, funct3, rs1, rs2, funct7):
+    def system(gm):
+        gm._exec_system(instr, funct3, rd, rs1)
+        return gm.pc + 4
+    return system
+
+
+def _dec_fp(instr, rd, funct3, rs1, rs2, funct7):
+    def fp(gm):
+        gm._exec_fp(instr, funct3, funct7, rd, rs1, rs2)
+        return gm.pc + 4
+    return fp
+
+
+def _dec_fma(instr, rd, funct3, rs1, rs2, funct7):
+    opcode = instr & 0x7F
+    fmt = (instr >> 25) & 0x3
+    rs3 = (instr >> 27) & 0x1F
+    if fmt != 0x1 or funct3 != 0x0:
+        return _illegal
+
+    def fma(gm):
+        gm._exec_fma(opcode, fmt, funct3, rd, rs1, rs2, rs3)
+        return gm.pc + 4
+    return fma
+
+
+def _dec_vload(instr, rd, funct3, rs1, rs2, funct7):
+    if funct3 == 0x0:  # VLE64.V
+        imm = _sext(instr >> 20, 12)
+
+        def vle64(gm):
+            gm._exec_vle64(rd, rs1, imm)
+            return gm.pc + 4
+        return vle64
+    if funct3 == 0x1:  # VLUXEI64.V
+        scale = (instr >> 29) & 0x7
+
+        def vluxei64(gm):
+            gm._exec_vluxei64(rd, rs1, rs2, scale)
+            return gm.pc + 4
+        return vluxei64
+    return _illegal
+
+
+def _dec_vstore(instr, rd, funct3, rs1, rs2, funct7):
+    if funct3 == 0x0:  # VSE64.V
+        imm = _sext(((instr >> 7) & 0x1F) | (((instr >> 25) & 0x7F) << 5), 12)
+
+        def vse64(gm):
+            gm._exec_vse64(rs1, rs2, imm)
+            return gm.pc + 4
+        return vse64
+    if funct3 == 0x1:  # VSUXEI64.V
+        scale = (instr >> 29) & 0x7
+
+        def vsuxei64(gm):
+            gm._exec_vsuxei64(rs1, rs2, rd, scale)
+            return gm.pc + 4
+        return vsuxei64
+    return _illegal
+
+
+def _dec_varith(instr, rd, funct3, rs1, rs2, funct7):
+    funct6 = (instr >> 26) & 0x3F
+    if funct3 != 0x0 or funct6 > 0x02:
+        return _illegal
+
+    def varith(gm):
+        gm._exec_varith(funct6, funct3, rd, rs1, rs2)
+        return gm.pc + 4
+    return varith
+
+
+def _dec_amo(instr, rd, funct3, rs1, rs2, funct7):
+    funct5 = (instr >> 27) & 0x1F
+
+    def amo(gm):
+        gm._exec_amo(funct5, rd, rs1, rs2)
+        return gm.pc + 4
+    return amo
+
+
+_DECODERS = {
+    0x33: _dec_op,
+    0x3B: _dec_op32,
+    0x13: _dec_opimm,
+    0x1B: _dec_opimm32,
+    0x03: _dec_load,
+    0x23: _dec_store,
+    0x63: _dec_branch,
+    0x6F: _dec_jal,
+    0x67: _dec_jalr,
+    0x37: _dec_lui,
+    0x17: _dec_auipc,
+    0x0F: _dec_fence,
+    0x73: _dec_system,
+    0x53: _dec_fp,
+    0x43: _dec_fma,
+    0x47: _dec_fma,
+    0x4B: _dec_fma,
+    0x4F: _dec_fma,
+    0x07: _dec_vload,
+    0x27: _dec_vstore,
+    0x57: _dec_varith,
+    0x2F: _dec_amo,
+}
+
+
+def decode(instr):
+    """Return a fresh handler for the 32-bit instruction word *instr*."""
+    dec = _DECODERS.get(instr & 0x7F)
+    if dec is None:
+        return _illegal
+    return dec(
+        instr,
+        (instr >> 7) & 0x1F,
+        (instr >> 12) & 0x7,
+        (instr >> 15) & 0x1F,
+        (instr >> 20) & 0x1F,
+        (instr >> 25) & 0x7F,
+    )
@@ -23,7 +23,7 @@ class LSU:
             return pa, fault, latency
 
         pa, fault = self.walker.walk(va, perm=perm)
-        latency += 30  # approximate page walk latency
+        latency += getattr(self.walker, "last_latency", 30)
         if not fault:
             self.tlb_l2.refill(va, pa, perm='rwx')
             self.tlb_l1.refill(va, pa, perm='rwx')
@@ -1,4 +1,6 @@
 from .tlb_l1 import TlbL1
 from .tlb_l2 import TlbL2
+from .set_assoc_tlb import SetAssocTlb, SetAssocTlbL1, SetAssocTlbL2
 from .page_walker import PageWalker
 from .page_walker8 import PageWalker8
+from .radix_walker import RadixPageWalker
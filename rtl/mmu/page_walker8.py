@@ -1,21 +1,119 @@
+import heapq
+
+
 class PageWalker8:
     """Simple page walker model that maps virtual addresses to physical addresses.
-    A dictionary is used for all entries and lookups complete immediately."""
+    A dictionary is used for all entries and lookups complete immediately.
+
+    With ``radix`` set to a :class:`RadixPageWalker` the translations come
+    from its page tables instead and every walk takes the latency that
+    walker reports.  Without it each walk takes ``latency`` cycles.
+
+    ``walk`` returns the result at once.  ``issue``/``tick`` model the
+    hardware interface instead: up to ``max_outstanding`` walks are in
+    flight and each completes ``last_latency`` cycles after it was issued,
+    in order of completion cycle and then issue order.  The latency is
+    fixed when the walk is issued, but the translation is read from the
+    tables when it completes, so an entry changed while the walk is in
+    flight is seen.
+    """
 
-    def __init__(self, *, coverage=None):
+    def __init__(self, *, coverage=None, radix=None, latency=30, max_outstanding=8):
         self.table = {}
         self.coverage = coverage
+        self.radix = radix
+        self.latency = latency
+        self.max_outstanding = max_outstanding
+        self.last_latency = 0
+        self.last_depth = 0
+        self.now = 0
+        # (completion cycle, issue number, tag, va, perm)
+        self._inflight = []
+        self._issued = 0
 
     def set_entry(self, va, pa, perm='rw'):
-        self.table[va] = (pa, perm)
+        if self.radix is not None:
+            self.radix.set_entry(va, pa, perm=perm)
+        else:
+            self.table[va] = (pa, perm)
 
     def walk(self, va, perm='r'):
-        if va not in self.table:
-            fault = True
-            pa = 0
+        if self.radix is not None:
+            pa, fault = self.radix.walk(va, perm=perm)
+            self.last_latency = self.radix.last_latency
+            self.last_depth = self.radix.last_depth
         else:
-            pa, permissions = self.table[va]
-            fault = perm not in permissions
+            pa, fault = self._resolve(va, perm)
+            self.last_latency = self.latency
+            self.last_depth = 1
         if self.coverage:
             self.coverage.record_page_walk(fault)
         return pa, fault
+
+    def _resolve(self, va, perm):
+        """Return ``(pa, fault)`` from the current entries for *va*."""
+        if self.radix is not None:
+            return self.radix.resolve(va, perm=perm)
+        entry = self.table.get(va)
+        if entry is None:
+            return 0, True
+        pa, permissions = entry
+        return pa, perm not in permissions
+
+    # ------------------------------------------------------------------
+    # outstanding walks
+    # ------------------------------------------------------------------
+    @property
+    def outstanding(self):
+        """Number of walks issued but not yet completed."""
+        return len(self._inflight)
+
+    def ready(self):
+        """Return ``True`` when another walk can be issued this cycle."""
+        return len(self._inflight) < self.max_outstanding
+
+    def issue(self, va, perm='r', tag=None):
+        """Start a walk of *va* and return its tag.
+
+        The tag defaults to a running issue number.  ``None`` is returned,
+        and nothing is issued, when ``max_outstanding`` walks are in flight.
+        """
+        if not self.ready():
+            return None
+        if self.radix is not None:
+            # the walk itself sets the latency and fills the page-walk cache
+            self.radix.walk(va, perm=perm)
+            self.last_latency = self.radix.last_latency
+            self.last_depth = self.radix.last_depth
+        else:
+            self.last_latency = self.latency
+            self.last_depth = 1
+        seq = self._issued
+        self._issued += 1
+        tag = seq if tag is None else tag
+        done = self.now + max(1, self.last_latency)
+        heapq.heappush(self._inflight, (done, seq, tag, va, perm))
+        return tag
+
+    def tick(self, cycles=1):
+        """Advance *cycles* clock cycles and return the walks completed.
+
+        The result lists ``(tag, pa, fault)`` in completion order, each
+        resolved against the entries as they are now.
+        """
+        self.now += cycles
+        done = []
+        while self._inflight and self._inflight[0][0] <= self.now:
+            _, _, tag, va, perm = heapq.heappop(self._inflight)
+            pa, fault = self._resolve(va, perm)
+            if self.coverage:
+                self.coverage.record_page_walk(fault)
+            done.append((tag, pa, fault))
+        return done
+
+    def drain(self):
+        """Run until every outstanding walk completed and return them all."""
+        done = []
+        while self._inflight:
+            done.extend(self.tick(self._inflight[0][0] - self.now))
+        return done
@@ -0,0 +1,263 @@
+from collections import OrderedDict
+from functools import partial
+
+# PTE bits as defined by the RISC-V privileged specification
+PTE_V = 1 << 0
+PTE_R = 1 << 1
+PTE_W = 1 << 2
+PTE_X = 1 << 3
+PTE_U = 1 << 4
+PTE_G = 1 << 5
+PTE_A = 1 << 6
+PTE_D = 1 << 7
+
+_PERM_BITS = {"r": PTE_R, "w": PTE_W, "x": PTE_X, "u": PTE_U}
+_PPN_MASK = (1 << 44) - 1
+
+
+def _read_mapping(memory, addr):
+    return memory.get(addr, 0)
+
+MODES = {"sv39": 3, "sv48": 4}
+PAGE_4K = 1 << 12
+PAGE_2M = 1 << 21
+PAGE_1G = 1 << 30
+
+
+class RadixPageWalker:
+    """Sv39/Sv48 page table walker reading PTEs from a memory model.
+
+    Page tables live in *memory*, any object with ``read_word``/``write_word``
+    (such as :class:`PagedMemory` or ``GoldenModel.mem``) or a plain
+    mapping of addresses to 64-bit words.  :py:meth:`map` builds the tables,
+    allocating table pages upwards from ``table_base``, and supports 4 KiB
+    pages as well as 2 MiB and 1 GiB superpages (and 512 GiB ones in Sv48),
+    so a 1 GiB region needs a single leaf PTE.
+
+    The walker keeps a page-walk cache of ``pwc_entries`` intermediate
+    table pointers keyed by level and VA prefix, replaced in LRU order.  A
+    walk starts from the deepest cached table, so a hit on the last level
+    pointer reads a single PTE.  Each walk costs ``pwc_latency`` cycles for
+    the cache lookup (when enabled) plus ``mem_latency`` per PTE read; the
+    figures for the latest walk are kept in ``last_latency``,
+    ``last_depth`` (PTEs read) and ``last_page_size``.
+
+    ``walk`` and ``set_entry`` match :class:`PageWalker8`, so the class can
+    be passed wherever a walker is expected.
+    """
+
+    def __init__(
+        self,
+        memory=None,
+        *,
+        mode="sv39",
+        root=None,
+        table_base=1 << 40,
+        pwc_entries=16,
+        pwc_latency=1,
+        mem_latency=10,
+        coverage=None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"unknown translation mode {mode!r}")
+        if memory is None:
+            from rtl.isa.paged_memory import PagedMemory
+            memory = PagedMemory()
+        self.memory = memory
+        if hasattr(memory, "read_word"):
+            self._read = memory.read_word
+            self._write = memory.write_word
+        else:
+            # a partial rather than a lambda so deepcopy follows the memory
+            self._read = partial(_read_mapping, memory)
+            self._write = memory.__setitem__
+        self.mode = mode
+        self.levels = MODES[mode]
+        self.va_bits = 12 + 9 * self.levels
+        self.pwc_entries = pwc_entries
+        self.pwc_latency = pwc_latency
+        self.mem_latency = mem_latency
+        self.coverage = coverage
+        self._next_table = table_base
+        self.root = root if root is not None else self._alloc_table()
+        self.pwc = OrderedDict()
+        self.last_latency = 0
+        self.last_depth = 0
+        self.last_page_size = 0
+        self.walks = 0
+        self.pte_reads = 0
+        self.pwc_hits = 0
+        self.pwc_misses = 0
+        self.total_latency = 0
+
+    # ------------------------------------------------------------------
+    # page table construction
+    # ------------------------------------------------------------------
+    def _alloc_table(self):
+        addr = self._next_table
+        self._next_table += PAGE_4K
+        for off in range(0, PAGE_4K, 8):
+            self._write(addr + off, 0)
+        return addr
+
+    @staticmethod
+    def _vpn(va, level):
+        return (va >> (12 + 9 * level)) & 0x1FF
+
+    def page_sizes(self):
+        """Return the supported page sizes, smallest first."""
+        return [1 << (12 + 9 * level) for level in range(self.levels)]
+
+    def map(self, va, pa, perm="rw", page_size=PAGE_4K, *, global_page=False):
+        """Map the page of *page_size* bytes at *va* to *pa*.
+
+        Both addresses must be aligned to the page size.  Missing
+        intermediate tables are allocated.  Mapping over an existing
+        mapping of the same size replaces it; overlapping a superpage with a
+        smaller page or vice versa raises ``ValueError``.
+        """
+        sizes = self.page_sizes()
+        if page_size not in sizes:
+            raise ValueError(f"unsupported page size {page_size:#x} for {self.mode}")
+        if (va | pa) & (page_size - 1):
+            raise ValueError("addresses must be aligned to the page size")
+        self._check_canonical(va)
+        leaf_level = sizes.index(page_size)
+        table = self.root
+        for level in range(self.levels - 1, leaf_level, -1):
+            addr = table + 8 * self._vpn(va, level)
+            pte = self._read(addr)
+            if not pte & PTE_V:
+                child = self._alloc_table()
+                self._write(addr, (child >> 12) << 10 | PTE_V)
+                table = child
+            elif pte & (PTE_R | PTE_W | PTE_X):
+                raise ValueError(f"{va:#x} is already mapped by a larger page")
+            else:
+                table = ((pte >> 10) & _PPN_MASK) << 12
+        addr = table + 8 * self._vpn(va, leaf_level)
+        old = self._read(addr)
+        if old & PTE_V and not old & (PTE_R | PTE_W | PTE_X):
+            raise ValueError(f"{va:#x} already holds smaller pages")
+        bits = PTE_V | PTE_A | PTE_D | (PTE_G if global_page else 0)
+        for p in perm:
+            bits |= _PERM_BITS.get(p, 0)
+        self._write(addr, (pa >> 12) << 10 | bits)
+
+    def set_entry(self, va, pa, perm='rw'):
+        """Map the 4 KiB page holding *va*, like :meth:`PageWalker8.set_entry`."""
+        self.map(va & ~(PAGE_4K - 1), pa & ~(PAGE_4K - 1), perm=perm)
+
+    def is_canonical(self, va):
+        """Return True if *va* sign-extends from bit ``va_bits - 1``."""
+        top = (va & 0xFFFFFFFFFFFFFFFF) >> (self.va_bits - 1)
+        return top in (0, (1 << (65 - self.va_bits)) - 1)
+
+    def _check_canonical(self, va):
+        if not self.is_canonical(va):
+            raise ValueError(f"{va:#x} is not a canonical {self.mode} address")
+
+    # ------------------------------------------------------------------
+    # page-walk cache
+    # ------------------------------------------------------------------
+    def _pwc_lookup(self, va):
+        """Return ``(level, table)`` for the deepest cached table or ``None``."""
+        for level in range(self.levels - 1):
+            key = (level, va >> (21 + 9 * level))
+            table = self.pwc.get(key)
+            if table is not None:
+                self.pwc.move_to_end(key)
+                return level, table
+        return None
+
+    def _pwc_fill(self, level, va, table):
+        key = (level, va >> (21 + 9 * level))
+        self.pwc[key] = table
+        self.pwc.move_to_end(key)
+        if len(self.pwc) > self.pwc_entries:
+            self.pwc.popitem(last=False)
+
+    def flush_pwc(self):
+        """Drop every cached table pointer, e.g. after editing the tables."""
+        self.pwc.clear()
+
+    # ------------------------------------------------------------------
+    # walking
+    # ------------------------------------------------------------------
+    def walk(self, va, perm='r'):
+        """Translate *va* returning ``(pa, fault)`` like :class:`PageWalker8`."""
+        pa, fault, self.last_latency, self.last_depth, self.last_page_size = (
+            self._walk(va, perm, self.pwc_entries > 0))
+        self.walks += 1
+        self.pte_reads += self.last_depth
+        self.total_latency += self.last_latency
+        if self.coverage:
+            self.coverage.record_page_walk(fault)
+        return pa, fault
+
+    def resolve(self, va, perm='r'):
+        """Translate *va* from the tables in memory alone.
+
+        Unlike :py:meth:`walk` this bypasses the page-walk cache and records
+        no statistics, latency or coverage, so a model can look at the
+        current PTEs without disturbing the walker.
+        """
+        return self._walk(va, perm, False)[:2]
+
+    def _walk(self, va, perm, use_pwc):
+        """Return ``(pa, fault, latency, depth, page_size)`` for *va*."""
+        depth = 0
+        latency = 0
+        va &= 0xFFFFFFFFFFFFFFFF
+        if not self.is_canonical(va):
+            return 0, True, latency, depth, 0
+
+        level = self.levels - 1
+        table = self.root
+        if use_pwc:
+            latency += self.pwc_latency
+            cached = self._pwc_lookup(va)
+            if cached is None:
+                self.pwc_misses += 1
+            else:
+                self.pwc_hits += 1
+                level, table = cached
+
+        while True:
+            pte = self._read(table + 8 * self._vpn(va, level))
+            depth += 1
+            latency += self.mem_latency
+            if not pte & PTE_V or (pte & PTE_W and not pte & PTE_R):
+                break
+            ppn = (pte >> 10) & _PPN_MASK
+            if pte & (PTE_R | PTE_X):
+                size = 1 << (12 + 9 * level)
+                # a superpage must be aligned to its size
+                if (ppn << 12) & (size - 1):
+                    break
+                fault = any(not pte & _PERM_BITS.get(p, 0) for p in perm)
+                return (ppn << 12) | (va & (size - 1)), fault, latency, depth, size
+            if level == 0:
+                break
+            level -= 1
+            table = ppn << 12
+            if use_pwc:
+                self._pwc_fill(level, va, table)
+        return 0, True, latency, depth, 0
+
+    # ------------------------------------------------------------------
+    def pwc_hit_rate(self):
+        """Return the fraction of walks that hit in the page-walk cache."""
+        total = self.pwc_hits + self.pwc_misses
+        return self.pwc_hits / total if total else 0.0
+
+    def stats(self):
+        """Return walk, PTE read and page-walk cache counters."""
+        return {
+            "walks": self.walks,
+            "pte_reads": self.pte_reads,
+            "pwc_hits": self.pwc_hits,
+            "pwc_misses": self.pwc_misses,
+            "mean_depth": self.pte_reads / self.walks if self.walks else 0.0,
+            "mean_latency": self.total_latency / self.walks if self.walks else 0.0,
+        }
@@ -0,0 +1,227 @@
+from collections import OrderedDict
+
+
+class SetAssocTlb:
+    """Set-associative TLB with ASID/VMID tags and O(1) replacement.
+
+    Entries are indexed by virtual page number: ``vpn % sets`` selects the
+    set and the tag is ``(vpn, asid, vmid)``.  Global pages are stored with
+    an ASID of ``None`` and match every ASID of their VMID.
+
+    ``replacement`` selects true LRU, kept as a per-set ``OrderedDict`` in
+    recency order, or ``"plru"`` for the bit-PLRU (MRU bit) scheme used by
+    hardware, where each set keeps one bit per way.
+
+    ``lookup``/``refill``/``peek`` take the same arguments as
+    :class:`TlbL1`, so the class can replace it wherever a TLB object is
+    passed in, including ``GoldenModel.tlb_l1``.
+    """
+
+    def __init__(
+        self,
+        entries=64,
+        ways=8,
+        *,
+        level="L1",
+        hit_latency=1,
+        miss_latency=5,
+        replacement="lru",
+        coverage=None,
+    ):
+        if ways <= 0 or entries % ways:
+            raise ValueError("entries must be a positive multiple of ways")
+        sets = entries // ways
+        if sets & (sets - 1):
+            raise ValueError("number of sets must be a power of two")
+        if replacement not in ("lru", "plru"):
+            raise ValueError(f"unknown replacement policy {replacement!r}")
+        self.entries_max = entries
+        self.ways = ways
+        self.sets = sets
+        self.level = level
+        self.hit_latency = hit_latency
+        self.miss_latency = miss_latency
+        self.replacement = replacement
+        self.bind_coverage(coverage)
+        self.last_latency = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._set_mask = sets - 1
+        self._full = (1 << ways) - 1
+        self.flush()
+
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
+        self.coverage = coverage
+        self._record_lookup = coverage.recorder("tlb_lookup", self.level) if coverage else None
+
+    # ------------------------------------------------------------------
+    # set helpers
+    # ------------------------------------------------------------------
+    def _find(self, vpn, asid, vmid):
+        """Return ``(set, key, entry)`` for a matching entry or ``None``."""
+        tags = self._tags[vpn & self._set_mask]
+        key = (vpn, asid, vmid)
+        entry = tags.get(key)
+        if entry is None:
+            key = (vpn, None, vmid)
+            entry = tags.get(key)
+            if entry is None:
+                return None
+        return tags, key, entry
+
+    def _touch(self, index, tags, key, entry):
+        if self.replacement == "lru":
+            tags.move_to_end(key)
+        else:
+            mru = self._mru[index] | (1 << entry[2])
+            # once every way is recent, start a new epoch with just this one
+            self._mru[index] = mru if mru != self._full else 1 << entry[2]
+
+    # ------------------------------------------------------------------
+    def lookup(self, va, perm='r', *, asid=0, vmid=0):
+        """Translate *va* returning ``(hit, pa, fault)`` like :class:`TlbL1`."""
+        vpn = va >> 12
+        found = self._find(vpn, asid, vmid)
+        if found is not None:
+            tags, key, entry = found
+            self._touch(vpn & self._set_mask, tags, key, entry)
+            pa = (entry[0] << 12) | (va & 0xFFF)
+            fault = perm not in entry[1]
+            hit = True
+            self.hits += 1
+        else:
+            pa = None
+            fault = False
+            hit = False
+            self.misses += 1
+
+        self.last_latency = self.hit_latency if hit else self.miss_latency
+        if self._record_lookup is not None:
+            self._record_lookup(hit, self.last_latency, fault)
+
+        if hit:
+            return True, pa, fault
+        return False, None, False
+
+    def peek(self, va, *, asid=0, vmid=0):
+        """Return the entry for the page holding *va*, or ``None``.
+
+        Like :py:meth:`TlbL1.peek`, this leaves the replacement state and
+        statistics alone and a refill replaces the entry object.
+        """
+        found = self._find(va >> 12, asid, vmid)
+        return None if found is None else found[2]
+
+    def refill(self, va, pa, perm='rwx', *, asid=0, vmid=0, global_page=False):
+        """Insert a translation, evicting a victim from a full set."""
+        vpn = va >> 12
+        index = vpn & self._set_mask
+        tags = self._tags[index]
+        key = (vpn, None if global_page else asid, vmid)
+        entry = tags.get(key)
+        if entry is not None:
+            way = entry[2]
+        elif len(tags) < self.ways:
+            way = self._free_way(index)
+        elif self.replacement == "lru":
+            _, victim = tags.popitem(last=False)
+            way = victim[2]
+            self.evictions += 1
+        else:
+            mru = self._mru[index]
+            way = (~mru & (mru + 1)).bit_length() - 1
+            del tags[self._slots[index][way]]
+            self.evictions += 1
+        entry = (pa >> 12, perm, way)
+        tags[key] = entry
+        if self.replacement == "plru":
+            self._slots[index][way] = key
+        self._touch(index, tags, key, entry)
+
+    def _free_way(self, index):
+        if self.replacement == "lru":
+            used = {entry[2] for entry in self._tags[index].values()}
+        else:
+            used = {way for way, key in enumerate(self._slots[index]) if key is not None}
+        for way in range(self.ways):
+            if way not in used:
+                return way
+        raise AssertionError("set reported free space but has no free way")
+
+    # ------------------------------------------------------------------
+    # flushes
+    # ------------------------------------------------------------------
+    def flush(self):
+        """Invalidate every entry."""
+        self._tags = [OrderedDict() for _ in range(self.sets)]
+        self._slots = [[None] * self.ways for _ in range(self.sets)]
+        self._mru = [0] * self.sets
+
+    def _drop(self, index, keys):
+        tags = self._tags[index]
+        for key in keys:
+            way = tags.pop(key)[2]
+            if self.replacement == "plru":
+                self._slots[index][way] = None
+                self._mru[index] &= ~(1 << way)
+
+    def flush_asid(self, asid, vmid=0):
+        """Invalidate the non-global entries of *asid* within *vmid*."""
+        for index, tags in enumerate(self._tags):
+            keys = [k for k in tags if k[1] == asid and k[2] == vmid]
+            if keys:
+                self._drop(index, keys)
+
+    def flush_vmid(self, vmid):
+        """Invalidate every entry belonging to *vmid*, global ones included."""
+        for index, tags in enumerate(self._tags):
+            keys = [k for k in tags if k[2] == vmid]
+            if keys:
+                self._drop(index, keys)
+
+    def flush_va(self, va, asid=None, vmid=0):
+        """Invalidate the page holding *va*.
+
+        With ``asid=None`` the page is dropped for every ASID, otherwise only
+        the entry tagged with *asid*; global entries are kept in that case,
+        as with ``SFENCE.VMA`` given both an address and an ASID.
+        """
+        vpn = va >> 12
+        index = vpn & self._set_mask
+        keys = [
+            k for k in self._tags[index]
+            if k[0] == vpn and k[2] == vmid and (asid is None or k[1] == asid)
+        ]
+        if keys:
+            self._drop(index, keys)
+
+    # ------------------------------------------------------------------
+    def __len__(self):
+        return sum(len(tags) for tags in self._tags)
+
+    def __contains__(self, va):
+        vpn = va >> 12
+        return any(k[0] == vpn for k in self._tags[vpn & self._set_mask])
+
+    def hit_rate(self):
+        """Return the fraction of lookups that hit, ``0.0`` before any."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SetAssocTlbL1(SetAssocTlb):
+    """Python model matching the geometry of ``tlb_l1_64e_8w``."""
+
+    def __init__(self, entries=64, ways=8, *, hit_latency=1, miss_latency=5, **kwargs):
+        super().__init__(entries, ways, level="L1", hit_latency=hit_latency,
+                         miss_latency=miss_latency, **kwargs)
+
+
+class SetAssocTlbL2(SetAssocTlb):
+    """Python model matching the geometry of ``tlb_l2_512e_8w``."""
+
+    def __init__(self, entries=512, ways=8, *, hit_latency=8, miss_latency=20, **kwargs):
+        super().__init__(entries, ways, level="L2", hit_latency=hit_latency,
+                         miss_latency=miss_latency, **kwargs)
@@ -7,9 +7,15 @@ class TlbL1:
         self.entries_max = entries
         self.hit_latency = hit_latency
         self.miss_latency = miss_latency
-        self.coverage = coverage
+        self.bind_coverage(coverage)
         self.last_latency = 0
 
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
+        self.coverage = coverage
+        # bound once so every lookup costs a single coverage call
+        self._record_lookup = coverage.recorder("tlb_lookup", "L1") if coverage else None
+
     def lookup(self, va, perm='r'):
         vpn = va >> 12
         if vpn in self.entries:
@@ -23,16 +29,21 @@ class TlbL1:
             hit = False
 
         self.last_latency = self.hit_latency if hit else self.miss_latency
-        if self.coverage:
-            self.coverage.record_tlb('L1', hit)
-            self.coverage.record_tlb_latency('L1', self.last_latency)
-            if fault:
-                self.coverage.record_tlb_fault('L1')
+        if self._record_lookup is not None:
+            self._record_lookup(hit, self.last_latency, fault)
 
         if hit:
             return True, pa, fault
         return False, None, False
 
+    def peek(self, va):
+        """Return the entry for the page holding *va*, or ``None``.
+
+        Unlike :py:meth:`lookup` this records nothing.  A refill replaces
+        the entry object, so callers may compare entries by identity.
+        """
+        return self.entries.get(va >> 12)
+
     def refill(self, va, pa, perm='rwx'):
         vpn = va >> 12
         if vpn in self.entries:
@@ -6,9 +6,15 @@ class TlbL2:
         self.table = {}
         self.hit_latency = hit_latency
         self.miss_latency = miss_latency
-        self.coverage = coverage
+        self.bind_coverage(coverage)
         self.last_latency = 0
 
+    def bind_coverage(self, coverage):
+        """Attach *coverage*, or ``None``, and bind its recorders."""
+        self.coverage = coverage
+        # bound once so every lookup costs a single coverage call
+        self._record_lookup = coverage.recorder("tlb_lookup", "L2") if coverage else None
+
     def lookup(self, va, perm='r'):
         if va in self.table:
             pa, permissions = self.table[va]
@@ -21,11 +27,8 @@ class TlbL2:
             hit = False
 
         self.last_latency = self.hit_latency if hit else self.miss_latency
-        if self.coverage:
-            self.coverage.record_tlb('L2', hit)
-            self.coverage.record_tlb_latency('L2', self.last_latency)
-            if fault:
-                self.coverage.record_tlb_fault('L2')
+        if self._record_lookup is not None:
+            self._record_lookup(hit, self.last_latency, fault)
 
         if hit:
             return True, pa, fault
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Compare per-instance GoldenModel stepping with BatchGoldenModel."""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from rtl.isa.batch_model import BatchGoldenModel, np  # noqa: E402
+from rtl.isa.golden_model import GoldenModel  # noqa: E402
+
+ALU_OPS = [
+    lambda rd, a, b: b << 20 | a << 15 | rd << 7 | 0x33,  # add
+    lambda rd, a, b: 0x20 << 25 | b << 20 | a << 15 | rd << 7 | 0x33,  # sub
+    lambda rd, a, b: b << 20 | a << 15 | 0x4 << 12 | rd << 7 | 0x33,  # xor
+    lambda rd, a, b: b << 20 | a << 15 | 0x2 << 12 | rd << 7 | 0x33,  # slt
+    lambda rd, a, b: 0x7 << 20 | a << 15 | 0x1 << 12 | rd << 7 | 0x13,  # slli
+    lambda rd, a, b: 0x123 << 20 | a << 15 | rd << 7 | 0x13,  # addi
+    lambda rd, a, b: b << 20 | a << 15 | 0x1 << 12 | 0x8 << 7 | 0x63,  # bne
+]
+
+
+def program(length, seed=1):
+    rng = random.Random(seed)
+    return [
+        rng.choice(ALU_OPS)(rng.randrange(1, 32), rng.randrange(32), rng.randrange(32))
+        for _ in range(length)
+    ]
+
+
+def run_scalar(harts, prog):
+    models = [GoldenModel() for _ in range(harts)]
+    start = time.perf_counter()
+    for instr in prog:
+        for gm in models:
+            gm.step(instr)
+    return harts * len(prog) / (time.perf_counter() - start)
+
+
+def run_batch(harts, prog, use_numpy):
+    batch = BatchGoldenModel(harts, use_numpy=use_numpy)
+    start = time.perf_counter()
+    for instr in prog:
+        batch.step(instr)
+    return harts * len(prog) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--harts", type=int, default=4096)
+    parser.add_argument("-n", "--count", type=int, default=200,
+                        help="instructions per hart")
+    args = parser.parse_args()
+    prog = program(args.count)
+    scalar = run_scalar(args.harts, prog)
+    print(f"scalar models : {scalar:14.0f} instr/s")
+    lists = run_batch(args.harts, prog, False)
+    print(f"batch (lists) : {lists:14.0f} instr/s ({lists / scalar:.1f}x)")
+    if np is not None:
+        arrays = run_batch(args.harts, prog, True)
+        print(f"batch (numpy) : {arrays:14.0f} instr/s ({arrays / scalar:.1f}x)")
+    else:
+        print("batch (numpy) : NumPy not installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Report branch prediction MPKI and accuracy for a trace."""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from rtl.bp.branch_predictor_top import BranchPredictorTop  # noqa: E402
+from rtl.bp.branch_trace import KINDS, BranchEvaluator, save_branch_trace  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("trace", help="binary scoreboard trace or branch trace")
+    parser.add_argument("-e", "--btb-entries", type=int, default=32,
+                        help="BTB entries of the BranchPredictorTop")
+    parser.add_argument("--indirect", choices=("ibp", "ittage"), default="ibp",
+                        help="indirect target predictor of the BranchPredictorTop")
+    parser.add_argument("--spec-rsb", action="store_true",
+                        help="update the RSB speculatively and repair it on mispredicts")
+    parser.add_argument("--wrong-path", type=int, default=0, metavar="N",
+                        help="branches predicted down the wrong path per mispredict")
+    parser.add_argument("--save-branches", metavar="PATH",
+                        help="only extract the branches into a branch trace at PATH")
+    parser.add_argument("--compression", choices=("zlib",), default=None,
+                        help="compression of the branch trace written")
+    args = parser.parse_args()
+
+    if args.save_branches:
+        count = save_branch_trace(args.trace, args.save_branches, args.compression)
+        print(f"{count} records written to {args.save_branches}")
+        return 0
+
+    predictor = BranchPredictorTop(entries=args.btb_entries, indirect=args.indirect,
+                                   spec_rsb=args.spec_rsb)
+    report = BranchEvaluator(predictor, wrong_path=args.wrong_path).run(args.trace)
+    print(f"{report['instructions']} instructions, {report['branches']} branches")
+    print(f"MPKI {report['mpki']:.3f}, accuracy {report['accuracy']:.4f}")
+    print(f"{'class':>9} {'branches':>10} {'mispred':>9} {'accuracy':>9} {'mpki':>8}")
+    for name in KINDS:
+        c = report["classes"][name]
+        print(f"{name:>9} {c['branches']:10d} {c['mispredicts']:9d} "
+              f"{c['accuracy']:9.4f} {c['mpki']:8.3f}")
+    rsb = report["rsb"]
+    print(f"BTB target mispredicts {report['btb_target_mispredicts']}, "
+          f"indirect target mispredicts {report['indirect_target_mispredicts']}")
+    print(f"RSB overflow rate {rsb['overflow_rate']:.4f}, "
+          f"underflow rate {rsb['underflow_rate']:.4f}")
+    print(f"return mispredicts {rsb['return_mispredicts']}, RSB repairs {rsb['repairs']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
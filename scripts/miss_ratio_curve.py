@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Print LRU miss ratios for a range of cache sizes from a binary trace."""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from rtl.cache.trace_engine import TraceEngine  # noqa: E402
+
+
+def parse_size(text):
+    """Parse a size such as ``256K``, ``4M`` or ``65536``."""
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    text = text.strip().upper().rstrip("B")
+    if text and text[-1] in units:
+        return int(text[:-1]) * units[text[-1]]
+    return int(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("trace", help="binary trace written by TraceWriter")
+    parser.add_argument("-s", "--sizes", default="256K,512K,1M,2M,4M,8M,16M",
+                        help="comma separated cache sizes")
+    parser.add_argument("-w", "--ways", type=int, default=8, help="associativity")
+    parser.add_argument("-l", "--line", type=int, default=64, help="line size in bytes")
+    parser.add_argument("--kinds", default="load,store",
+                        help="reference kinds to include: load, store or both")
+    args = parser.parse_args()
+
+    configs = [(parse_size(s), args.ways) for s in args.sizes.split(",") if s]
+    engine = TraceEngine(configs, line_bytes=args.line)
+    engine.run(args.trace, kinds=tuple(args.kinds.split(",")))
+    bound = "" if engine.cold_exact else "at least "
+    print(f"{engine.accesses} references, {bound}{engine.cold_misses} distinct lines")
+    print(f"{'size':>10} {'ways':>5} {'misses':>10} {'miss ratio':>11}")
+    for res in engine.results():
+        print(f"{res['size']:10d} {res['ways']:5d} {res['misses']:10d} "
+              f"{res['miss_ratio']:11.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""Run a coverage regression in parallel and merge the per-shard results."""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from tb.uvm_components.regression import DEFAULT_TEST, run_regression  # noqa: E402
+
+
+def parse_seeds(text):
+    """Parse ``"start:stop"`` or a comma separated list of seeds."""
+    if ":" in text:
+        start, stop = text.split(":", 1)
+        return range(int(start), int(stop))
+    return [int(s) for s in text.split(",") if s]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-t", "--test", action="append", dest="tests",
+                        help="test as module:function (repeatable), "
+                             f"default {DEFAULT_TEST}")
+    parser.add_argument("-s", "--seeds", default="0:64",
+                        help="seed range start:stop or list a,b,c")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--shards", type=int, default=None,
+                        help="number of shards (default: 4 per worker)")
+    parser.add_argument("-o", "--out-dir", default=None,
+                        help="save shard results here and resume from them")
+    parser.add_argument("--fast", action="store_true",
+                        help="collect coverage with FastCoverageModel")
+    parser.add_argument("--summary", default=None,
+                        help="write the merged coverage summary to this JSON file")
+    args = parser.parse_args()
+
+    result = run_regression(
+        args.tests or [DEFAULT_TEST],
+        parse_seeds(args.seeds),
+        workers=args.workers,
+        shards=args.shards,
+        out_dir=args.out_dir,
+        fast=args.fast,
+    )
+    print(f"{'shard':>5} {'jobs':>6} {'fail':>5} {'seconds':>9}")
+    for row in result["shards"]:
+        note = " (resumed)" if row["resumed"] else ""
+        print(f"{row['shard']:5d} {row['jobs']:6d} {row['failures']:5d} "
+              f"{row['seconds']:9.2f}{note}")
+    busy = sum(row["seconds"] for row in result["shards"] if not row["resumed"])
+    print(f"wall {result['seconds']:.2f}s, worker time {busy:.2f}s")
+    for test, seed in result["failures"]:
+        print(f"FAIL {test} seed={seed}")
+    summary = result["coverage"].summary()
+    print(f"opcodes {summary['opcodes']}, immediates {summary['immediates']}, "
+          f"branches {summary['branches']}")
+    if args.summary:
+        result["coverage"].save_summary(args.summary)
+    return 1 if result["failures"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.isa import batch_model
+from rtl.isa.batch_model import BatchGoldenModel
+from rtl.isa.golden_model import GoldenModel
+
+HARTS = 24
+DATA = 0x2000
+
+
+def random_instr(rng):
+    """Return a random word, mostly vectorizable with some scalar ops."""
+    kind = rng.random()
+    rd, rs1, rs2 = (rng.randrange(32) for _ in range(3))
+    if kind < 0.08:  # LD/SD on the data region through x31
+        off = 8 * rng.randrange(8)
+        if rng.random() < 0.5:
+            return off << 20 | 31 << 15 | 0x3 << 12 | rd << 7 | 0x03
+        return (off >> 5) << 25 | rs2 << 20 | 31 << 15 | 0x3 << 12 | (off & 0x1F) << 7 | 0x23
+    if kind < 0.12:  # MUL/DIV and CSR reads of the counters
+        if rng.random() < 0.5:
+            return 0x01 << 25 | rs2 << 20 | rs1 << 15 | rng.randrange(8) << 12 | rd << 7 | 0x33
+        return rng.choice([0xC00, 0xC02]) << 20 | 0x2 << 12 | rd << 7 | 0x73
+    if kind < 0.14:
+        return rng.choice([0x0000200F, 0x00000073, rng.getrandbits(32)])
+    opcode = rng.choice([0x33, 0x3B, 0x13, 0x1B, 0x63, 0x6F, 0x67, 0x37, 0x17])
+    funct7 = rng.choice([0x00, 0x20, rng.getrandbits(7)])
+    return (
+        funct7 << 25 | rs2 << 20 | rs1 << 15 | rng.randrange(8) << 12
+        | rd << 7 | opcode
+    )
+
+
+def run_pair(seed, use_numpy, steps=200):
+    rng = random.Random(seed)
+    batch = BatchGoldenModel(HARTS, pc=DATA - 16, use_numpy=use_numpy)
+    refs = [GoldenModel(pc=DATA - 16) for _ in range(HARTS)]
+    for i in range(8):
+        batch.load_memory(DATA + 8 * i, i * 0x01010101)
+        for gm in refs:
+            gm.load_memory(DATA + 8 * i, i * 0x01010101)
+    for h, gm in enumerate(refs):
+        for r in range(1, 32):
+            val = rng.choice([0, 1, rng.getrandbits(64), rng.getrandbits(12)])
+            gm.regs[r] = val
+            batch.regs[r][h] = val
+        gm.regs[31] = DATA
+        batch.regs[31][h] = DATA
+    for _ in range(steps):
+        if rng.random() < 0.3:
+            instrs = random_instr(rng)
+            words = [instrs] * HARTS
+        else:
+            shared = [random_instr(rng) for _ in range(3)]
+            words = instrs = [rng.choice(shared) for _ in range(HARTS)]
+        batch.step(instrs)
+        for gm, word in zip(refs, words):
+            gm.step(word)
+            # keep both sides on the same base register for memory ops
+            gm.regs[31] = DATA
+        for h in range(HARTS):
+            batch.regs[31][h] = DATA
+    return batch, refs
+
+
+class BatchGoldenModelTest(unittest.TestCase):
+    def _check(self, use_numpy):
+        for seed in range(6):
+            batch, refs = run_pair(seed, use_numpy)
+            for h, gm in enumerate(refs):
+                state = batch.to_model(h)
+                self.assertEqual(state.regs, gm.regs, f"seed {seed} hart {h}")
+                self.assertEqual(state.pc, gm.pc & 0xFFFFFFFFFFFFFFFF)
+                self.assertEqual(state.csrs, gm.csrs)
+                self.assertEqual(dict(state.mem), dict(gm.mem))
+                self.assertEqual(batch.last_exception[h], gm.last_exception)
+            self.assertGreater(batch.vector_retired, batch.scalar_retired)
+
+    def test_matches_scalar_models(self):
+        self._check(use_numpy=False)
+
+    @unittest.skipIf(batch_model.np is None, "NumPy not installed")
+    def test_matches_scalar_models_numpy(self):
+        self._check(use_numpy=True)
+
+    def test_lockstep_loop(self):
+        batch = BatchGoldenModel(4, pc=0x100, use_numpy=False)
+        for h in range(4):
+            batch.regs[1][h] = h
+        batch.step(0x00A08093)  # addi x1,x1,10
+        batch.step([0x00108463, 0x00108463, 0x0000006F, 0x00000013])
+        self.assertEqual([batch.regs[1][h] for h in range(4)], [10, 11, 12, 13])
+        # beq x1,x1,8 is taken, jal x0,0 stays put and nop falls through
+        self.assertEqual(list(batch.pc), [0x10C, 0x10C, 0x104, 0x108])
+        self.assertEqual(batch.scalar_retired, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
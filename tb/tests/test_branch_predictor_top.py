@@ -4,6 +4,8 @@ import unittest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from rtl.bp.branch_predictor_top import BranchPredictorTop
+from rtl.ex_units.branch_unit import BranchUnit
+from rtl.rob_rs_iq.rob import ROB
 
 
 class BranchPredictorTopTest(unittest.TestCase):
@@ -34,6 +36,55 @@ class BranchPredictorTopTest(unittest.TestCase):
         self.assertTrue(taken)
         self.assertEqual(tgt, 0x500)
 
+    def test_speculative_rsb_repair(self):
+        bp = BranchPredictorTop(spec_rsb=True)
+        bp.predict(0x100, is_call=True, is_uncond_branch=True)
+        bp.update(0x100, True, 0x200, is_branch=True)
+        # a branch predicted not taken, then a wrong-path return and call
+        taken, _ = bp.predict(0x200, is_cond_branch=True)
+        checkpoint = bp.last_checkpoint
+        self.assertEqual(bp.predict(0x300, is_ret=True), (True, 0x104))
+        bp.predict(0x400, is_call=True, is_uncond_branch=True)
+        # the branch unit resolves the branch as taken
+        result = BranchUnit().compute(BranchUnit.BEQ, 1, 1, 0x200, 0x40,
+                                      predicted_taken=taken)
+        self.assertTrue(result["mispredict"])
+        self.assertTrue(bp.resolve(result, checkpoint))
+        self.assertEqual(bp.rsb.top(), 0x104)
+        self.assertEqual(bp.rsb.repairs, 1)
+
+    def test_branch_unit_result_carries_checkpoint(self):
+        bp = BranchPredictorTop(spec_rsb=True)
+        bp.predict(0x100, is_call=True, is_uncond_branch=True)
+        taken, _ = bp.predict(0x200, is_cond_branch=True)
+        checkpoint = bp.last_checkpoint
+        bp.predict(0x300, is_ret=True)
+        unit = BranchUnit()
+        result = unit.compute(BranchUnit.BEQ, 1, 1, 0x200, 0x40,
+                              predicted_taken=taken, rsb_checkpoint=checkpoint)
+        self.assertIs(result["rsb_checkpoint"], checkpoint)
+        self.assertTrue(bp.resolve(result))
+        self.assertEqual(bp.rsb.top(), 0x104)
+        # a mispredict that lost its checkpoint is an error, not a no-op
+        result = unit.compute(BranchUnit.BEQ, 1, 1, 0x200, 0x40, predicted_taken=taken)
+        with self.assertRaises(ValueError):
+            bp.resolve(result)
+
+    def test_repair_from_rob_entry(self):
+        bp = BranchPredictorTop(spec_rsb=True)
+        rob = ROB(entries=4)
+        bp.predict(0x100, is_call=True, is_uncond_branch=True)
+        bp.predict(0x200, is_cond_branch=True)
+        idx, = rob.alloc([{"dest": 0, "old": 0, "rsb_checkpoint": bp.last_checkpoint}])
+        bp.predict(0x300, is_ret=True)
+        rob.writeback(idx, mispredict=True, target=0x240)
+        self.assertTrue(bp.resolve(rob.commit()))
+        self.assertEqual(bp.rsb.top(), 0x104)
+        # without speculative management there is nothing to repair
+        plain = BranchPredictorTop()
+        self.assertFalse(plain.resolve({"mispredict": True}))
+        self.assertIsNone(plain.last_checkpoint)
+
 
 if __name__ == '__main__':
     unittest.main()
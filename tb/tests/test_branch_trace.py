@@ -0,0 +1,176 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.bp.branch_predictor_top import BranchPredictorTop
+from rtl.bp.branch_trace import (
+    CALL,
+    COND,
+    ICALL,
+    INDIRECT,
+    JUMP,
+    OTHER,
+    RET,
+    BranchEvaluator,
+    BranchTraceReader,
+    BranchTraceWriter,
+    branch_records,
+    classify,
+    evaluate,
+    pack_flags,
+    save_branch_trace,
+)
+from tb.uvm_components.trace_utils import save_trace_binary
+
+BEQ_BACK_16 = 0xFE0008E3   # beq x0, x0, -16
+JAL_CALL_64 = 0x040000EF   # jal x1, 64
+JAL_J_8 = 0x0080006F       # jal x0, 8
+RET_INSN = 0x00008067      # jalr x0, 0(x1)
+JALR_CALL = 0x000500E7     # jalr x1, 0(x10)
+JR_A0 = 0x00050067         # jalr x0, 0(x10)
+ADDI = 0x00000013
+
+
+def _entry(pc, instr, taken=False, next_pc=None):
+    return {"pc": pc, "instr": instr, "branch_taken": taken,
+            "next_pc": next_pc if next_pc is not None else pc + 4}
+
+
+class BranchTraceTest(unittest.TestCase):
+    def test_classify(self):
+        self.assertEqual(classify(BEQ_BACK_16), COND)
+        self.assertEqual(classify(JAL_CALL_64), CALL)
+        self.assertEqual(classify(JAL_J_8), JUMP)
+        self.assertEqual(classify(RET_INSN), RET)
+        self.assertEqual(classify(JALR_CALL), ICALL)
+        self.assertEqual(classify(JR_A0), INDIRECT)
+        self.assertIsNone(classify(ADDI))
+
+    def test_records_from_entries(self):
+        entries = [
+            _entry(0x100, ADDI),
+            _entry(0x104, BEQ_BACK_16, taken=False),
+            _entry(0x108, JAL_CALL_64, taken=True, next_pc=0x148),
+            _entry(0x148, RET_INSN, taken=True, next_pc=0x10C),
+            _entry(0x10C, ADDI),
+        ]
+        records = list(branch_records(entries))
+        self.assertEqual(records, [
+            # a not-taken branch still carries its taken target
+            (0x104, 0xF4, 2, pack_flags(COND, False)),
+            (0x108, 0x148, 1, pack_flags(CALL, True)),
+            (0x148, 0x10C, 1, pack_flags(RET, True)),
+            (0, 0, 1, OTHER),
+        ])
+        report = evaluate(entries)
+        self.assertEqual(report["instructions"], 5)
+        self.assertEqual(report["branches"], 3)
+        self.assertEqual(report["classes"]["ret"]["mispredicts"], 0)
+
+    def test_jumps_to_next_pc_are_taken(self):
+        jal_4 = 0x0040006F  # jal x0, 4
+        entries = [
+            _entry(0x200, jal_4, taken=False),
+            _entry(0x204, JR_A0, taken=False, next_pc=0x208),
+            _entry(0x208, BEQ_BACK_16, taken=False),
+        ]
+        expected = [
+            (0x200, 0x204, 1, pack_flags(JUMP, True)),
+            (0x204, 0x208, 1, pack_flags(INDIRECT, True)),
+            (0x208, 0x1F8, 1, pack_flags(COND, False)),
+        ]
+        self.assertEqual(list(branch_records(entries)), expected)
+        with tempfile.TemporaryDirectory() as tmp:
+            trace = os.path.join(tmp, "trace.bin")
+            save_trace_binary(entries, trace)
+            self.assertEqual(list(branch_records(trace)), expected)
+
+    def test_binary_round_trip(self):
+        records = [(0x1000 + 4 * i, 0x2000, 3, pack_flags(COND, i % 3 == 0))
+                   for i in range(1000)]
+        with tempfile.TemporaryDirectory() as tmp:
+            for compression in (None, "zlib"):
+                path = os.path.join(tmp, f"b_{compression}.brt")
+                with BranchTraceWriter(path, compression=compression,
+                                       chunk_records=128) as writer:
+                    writer.write_many(records)
+                with BranchTraceReader(path) as reader:
+                    self.assertEqual(list(reader), records)
+                self.assertEqual(evaluate(path), evaluate(records))
+            with self.assertRaises(ValueError):
+                BranchTraceReader(__file__)
+
+    def test_scoreboard_binary_trace(self):
+        entries = []
+        for i in range(20):
+            entries.append({"pc": 0x100, "instr": ADDI, "next_pc": 0x104})
+            taken = i < 19
+            entries.append({"pc": 0x104, "instr": BEQ_BACK_16, "branch_taken": taken,
+                            "branch_target": 0xF4 if taken else None,
+                            "next_pc": 0xF4 if taken else 0x108})
+        with tempfile.TemporaryDirectory() as tmp:
+            trace = os.path.join(tmp, "trace.bin")
+            branches = os.path.join(tmp, "trace.brt")
+            save_trace_binary(entries, trace)
+            self.assertEqual(list(branch_records(trace)), list(branch_records(entries)))
+            self.assertEqual(save_branch_trace(trace, branches), 20)
+            report = evaluate(branches)
+        self.assertEqual(report["instructions"], 40)
+        self.assertEqual(report["classes"]["cond"]["branches"], 20)
+        self.assertAlmostEqual(report["mpki"], report["mispredicts"] * 1000 / 40)
+
+    def test_rsb_overflow_and_underflow(self):
+        depth = 40
+        records = []
+        for i in range(depth):
+            records.append((0x1000 + 8 * i, 0x1000 + 8 * (i + 1), 1, pack_flags(CALL, True)))
+        for i in reversed(range(depth)):
+            records.append((0x5000, 0x1004 + 8 * i, 1, pack_flags(RET, True)))
+        report = evaluate(records)
+        rsb = report["rsb"]
+        self.assertEqual(rsb["overflows"], depth - 32)
+        self.assertEqual(rsb["underflows"], depth - 32)
+        self.assertEqual(rsb["return_mispredicts"], depth - 32)
+        self.assertAlmostEqual(rsb["overflow_rate"], (depth - 32) / depth)
+
+    def test_target_mispredicts_and_reuse(self):
+        bp = BranchPredictorTop(entries=4)
+        ev = BranchEvaluator(bp)
+        records = [(0x3000, 0x9000 if i % 2 else 0xA000, 1, pack_flags(INDIRECT, True))
+                   for i in range(10)]
+        records += [(0x4000 + 4 * i, 0x8000, 1, pack_flags(JUMP, True)) for i in range(8)] * 2
+        report = ev.run(records)
+        self.assertEqual(report["indirect_target_mispredicts"],
+                         report["classes"]["indirect"]["mispredicts"])
+        # eight jumps thrash the four-entry BTB
+        self.assertEqual(report["btb_target_mispredicts"], 16)
+        ev.reset_stats()
+        self.assertEqual(ev.report()["branches"], 0)
+
+    def test_wrong_path_rsb_repair(self):
+        # nested calls whose returns follow unpredictable conditional branches
+        records = []
+        for i in range(200):
+            records.append((0x100, 0x1000, 3, pack_flags(CALL, True)))
+            records.append((0x1000, 0x2000, 3, pack_flags(CALL, True)))
+            records.append((0x2000, 0x2040, 2, pack_flags(COND, (i * 7919) % 5 < 2)))
+            records.append((0x2044, 0x1004, 1, pack_flags(RET, True)))
+            records.append((0x1004, 0x1040, 2, pack_flags(COND, (i * 104729) % 3 == 0)))
+            records.append((0x1044, 0x104, 1, pack_flags(RET, True)))
+        plain = evaluate(records)
+        self.assertEqual(plain["rsb"]["return_mispredicts"], 0)
+        self.assertEqual(evaluate(records, BranchPredictorTop(spec_rsb=True)), plain)
+        corrupted = evaluate(records, wrong_path=4)
+        repaired = evaluate(records, BranchPredictorTop(spec_rsb=True), wrong_path=4)
+        self.assertGreater(corrupted["rsb"]["return_mispredicts"], 20)
+        self.assertEqual(corrupted["rsb"]["repairs"], 0)
+        self.assertEqual(repaired["rsb"]["repairs"], repaired["mispredicts"])
+        self.assertLess(repaired["rsb"]["return_mispredicts"],
+                        corrupted["rsb"]["return_mispredicts"] // 4)
+        self.assertGreater(repaired["wrong_path_branches"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
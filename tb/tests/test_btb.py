@@ -3,7 +3,9 @@ import sys
 import unittest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
-from rtl.bp.btb import BTB
+from rtl.bp.branch_predictor_top import BranchPredictorTop
+from rtl.bp.branch_trace import CALL, COND, JUMP, RET, evaluate, pack_flags
+from rtl.bp.btb import BTB, SetAssocBTB
 from tb.uvm_components.coverage import CoverageModel
 
 class BTBTest(unittest.TestCase):
@@ -30,5 +32,121 @@ class BTBTest(unittest.TestCase):
         summary = cov.summary()
         self.assertEqual(summary["btb_entries"], 1)
 
+
+class SetAssocBTBTest(unittest.TestCase):
+    def _cycle(self, btb, pcs, rounds=3):
+        for _ in range(rounds):
+            for pc in pcs:
+                btb.predict(pc)
+                btb.update(pc, pc + 0x1000, True)
+
+    def test_full_size_predict_update(self):
+        btb = SetAssocBTB()
+        self.assertEqual((btb.sets, btb.ways), (512, 8))
+        self.assertEqual(btb.lookup(0x8000), (False, 0x8004, None))
+        btb.update(0x8000, 0x9000, False)
+        self.assertFalse(btb.predict(0x8000)[0])
+        btb.update(0x8000, 0x9000, True, RET)
+        self.assertEqual(btb.lookup(0x8000), (True, 0x9000, RET))
+        # a later update keeps the entry and takes the new target
+        btb.update(0x8000, 0x9100, False)
+        self.assertEqual(btb.predict(0x8000), (True, 0x9100))
+
+    def test_lookup_block(self):
+        btb = SetAssocBTB()
+        btb.update(0x1018, 0x3000, True, JUMP)
+        btb.update(0x1004, 0x2000, True, COND)
+        btb.update(0x100C, 0x2800, True, CALL)
+        btb.update(0x1020, 0x4000, True, COND)   # next fetch block
+        self.assertEqual(btb.lookup_block(0x1000), [
+            (0x1004, 0x2000, COND), (0x100C, 0x2800, CALL), (0x1018, 0x3000, JUMP)])
+        self.assertEqual(btb.lookup_block(0x1008), [
+            (0x100C, 0x2800, CALL), (0x1018, 0x3000, JUMP)])
+        self.assertEqual(btb.stats()["branches_per_block"], 2.5)
+
+    def test_partial_tag_aliasing(self):
+        btb = SetAssocBTB(entries=16, ways=2, tag_bits=4)
+        # the block addresses above the set bits fold to the same 4-bit tag
+        a, b = 0x0004, (0b10001 << 8) | 0x4
+        btb.update(a, 0x40, True)
+        self.assertEqual(btb.predict(b), (True, 0x40))
+        self.assertEqual(btb.alias_hits, 1)
+        self.assertEqual(btb.stats()["alias_rate"], 1.0)
+
+    def test_conflict_and_capacity_misses(self):
+        btb = SetAssocBTB(entries=4, ways=2)
+        # three branches in set 0 of a two-way table
+        self._cycle(btb, [0x000, 0x040, 0x080])
+        stats = btb.stats()
+        self.assertEqual(stats["compulsory_misses"], 3)
+        self.assertEqual(stats["conflict_misses"], 6)
+        self.assertEqual(stats["capacity_misses"], 0)
+        self.assertEqual(btb.hot_sets(), [(0, 7)])
+        btb.reset()
+        # six branches spread over both sets exceed four entries
+        self._cycle(btb, [0x20 * i for i in range(6)])
+        stats = btb.stats()
+        self.assertEqual(stats["capacity_misses"], 12)
+        self.assertEqual(stats["conflict_misses"], 0)
+
+    def test_lru_replacement(self):
+        btb = SetAssocBTB(entries=4, ways=4, replacement="lru")
+        for pc in (0x00, 0x20, 0x40, 0x60):
+            btb.update(pc, pc + 8, True)
+        btb.predict(0x00)
+        btb.update(0x80, 0x88, True)
+        self.assertTrue(btb.predict(0x00)[0])
+        self.assertFalse(btb.predict(0x20)[0])
+        with self.assertRaises(ValueError):
+            SetAssocBTB(entries=24, ways=8)
+        with self.assertRaises(ValueError):
+            SetAssocBTB(replacement="fifo")
+
+    def test_replaces_top_level_btb(self):
+        jumps = [(0x4000 + 0x40 * i, 0x8000, 1, pack_flags(JUMP, True)) for i in range(8)] * 2
+        bp = BranchPredictorTop(entries=4)
+        bp.btb = SetAssocBTB(coverage=CoverageModel())
+        report = evaluate(jumps, bp)
+        self.assertEqual(report["btb_target_mispredicts"], 8)
+        self.assertEqual(bp.btb.coverage.summary()["btb_entries"], 8)
+
+
+    def test_evaluator_stores_branch_class(self):
+        bp = BranchPredictorTop()
+        bp.btb = SetAssocBTB(entries=64, ways=4)
+        records = [
+            (0x100, 0x200, 1, pack_flags(CALL, True)),
+            (0x200, 0x240, 1, pack_flags(JUMP, True)),
+            (0x244, 0x104, 1, pack_flags(RET, True)),
+            (0x104, 0x0F0, 1, pack_flags(COND, True)),
+        ]
+        evaluate(records, bp)
+        kinds = {pc: bp.btb.lookup(pc)[2] for pc in (0x100, 0x200, 0x104)}
+        self.assertEqual(kinds, {0x100: CALL, 0x200: JUMP, 0x104: COND})
+
+    def test_never_taken_branch_is_one_compulsory_miss(self):
+        btb = SetAssocBTB(entries=16, ways=2)
+        for _ in range(4):
+            btb.predict(0x300)
+            btb.update(0x300, 0x400, False, COND)
+        self.assertEqual(btb.misses, 4)
+        self.assertEqual(btb.compulsory_misses, 1)
+        self.assertEqual(btb.unallocated_misses, 3)
+        self.assertEqual(btb.capacity_misses, 0)
+
+    def test_never_taken_branch_is_not_a_capacity_miss(self):
+        btb = SetAssocBTB()
+        for _ in range(100):
+            btb.predict(0x1000)
+            btb.update(0x1000, 0x2000, True, COND)
+            btb.predict(0x1040)
+            btb.update(0x1040, 0x2040, False, COND)
+        stats = btb.stats()
+        self.assertEqual(stats["hits"], 99)
+        self.assertEqual(stats["compulsory_misses"], 2)
+        self.assertEqual(stats["capacity_misses"], 0)
+        self.assertEqual(stats["conflict_misses"], 0)
+        self.assertEqual(stats["unallocated_misses"], 99)
+
 if __name__ == '__main__':
     unittest.main()
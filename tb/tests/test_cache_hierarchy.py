@@ -0,0 +1,115 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.cache.hierarchy import CacheHierarchy
+from rtl.cache.set_assoc_cache import SetAssocCache
+from tb.uvm_components.coverage import CoverageModel
+
+
+def _small(inclusion="nine", mshrs=None, coverage=None, l2_size=512):
+    """Direct-mapped 2-line L1s over a 2-way L2 and DRAM."""
+    l1d = SetAssocCache(128, 1, 64, level="L1", hit_latency=2)
+    l1i = SetAssocCache(128, 1, 64, level="L1", hit_latency=2)
+    l2 = SetAssocCache(l2_size, 2, 64, level="L2", hit_latency=10, replacement="lru")
+    return CacheHierarchy(l1d, [l2], l1i=l1i, inclusion=inclusion, memory_latency=100,
+                          mshrs=mshrs, coverage=coverage)
+
+
+class CacheHierarchyTest(unittest.TestCase):
+    def test_latency_and_source(self):
+        h = _small()
+        self.assertEqual(h.access(0x0), (112, "DRAM"))
+        self.assertEqual(h.access(0x8, cycle=200), (2, "L1"))
+        h.access(0x80, cycle=300)  # conflicts with line 0 in the L1
+        self.assertEqual(h.access(0x0, cycle=400), (12, "L2"))
+        self.assertEqual(h.serviced, {"DRAM": 2, "L1": 1, "L2": 1})
+        self.assertEqual(h.amat(), (112 + 2 + 112 + 12) / 4)
+
+    def test_instruction_side(self):
+        h = _small()
+        h.access(0x0, instr=True)
+        self.assertEqual(h.access(0x0, cycle=200)[1], "L2")
+        self.assertEqual(h.access(0x0, instr=True, cycle=300)[1], "L1")
+
+    def test_inclusive_back_invalidates(self):
+        # an L2 of one 2-way set evicts lines the L1s still hold
+        h = _small("inclusive", l2_size=128)
+        h.access(0x0)
+        h.access(0x40, instr=True)
+        h.access(0x1000, instr=True)
+        self.assertFalse(h.l1d.contains(0x0))
+        self.assertEqual(h.back_invalidations, 1)
+        nine = _small("nine", l2_size=128)
+        for addr, instr in ((0x0, False), (0x40, True), (0x1000, True)):
+            nine.access(addr, instr=instr)
+        self.assertTrue(nine.l1d.contains(0x0))
+
+    def test_exclusive_moves_lines(self):
+        h = _small("exclusive")
+        h.access(0x0)
+        self.assertFalse(h.lower[0].contains(0x0))
+        h.access(0x80)  # L1 victim 0x0 moves to L2
+        self.assertTrue(h.lower[0].contains(0x0))
+        self.assertEqual(h.access(0x0)[1], "L2")
+        self.assertFalse(h.lower[0].contains(0x0))
+        self.assertTrue(h.lower[0].contains(0x80))
+
+    def test_dirty_lines_reach_memory(self):
+        h = _small()
+        h.access(0x0, is_write=True)
+        for addr in (0x80, 0x100, 0x180, 0x200, 0x280):
+            h.access(addr)
+        self.assertEqual(h.l1d.writebacks, 1)
+        self.assertEqual(h.memory_writes, 1)
+
+    def test_mshrs(self):
+        h = _small(mshrs=1)
+        self.assertEqual(h.access(0x0, cycle=0)[0], 112)
+        # secondary miss to the same line completes with the first fill
+        self.assertEqual(h.access(0x8, cycle=1), (111, "DRAM"))
+        # a different line waits for the only MSHR
+        self.assertEqual(h.access(0x40, cycle=2)[0], 220)
+        self.assertEqual(h.mshr_stalls, 1)
+        unlimited = _small(mshrs=None)
+        unlimited.access(0x0, cycle=0)
+        self.assertEqual(unlimited.access(0x40, cycle=2)[0], 112)
+
+    def test_mshrs_per_l1(self):
+        # one instruction-side MSHR, unlimited data-side ones
+        h = _small(mshrs={"L1I": 1, "L1": None})
+        h.access(0x0, cycle=0)
+        self.assertEqual(h.access(0x40, cycle=2)[0], 112)
+        h.access(0x1000, instr=True, cycle=300)
+        self.assertEqual(h.access(0x1040, instr=True, cycle=302)[0], 220)
+        self.assertEqual(h.mshr_stalls, 1)
+        h = _small(mshrs={"L1D": 1})
+        self.assertEqual(h.mshrs, {"L1D": 1})
+        h.access(0x0, cycle=0)
+        self.assertEqual(h.access(0x40, cycle=2)[0], 220)
+        h.access(0x1000, instr=True, cycle=300)
+        self.assertEqual(h.access(0x1040, instr=True, cycle=302)[0], 112)
+
+    def test_access_many_and_coverage(self):
+        cov = CoverageModel()
+        h = _small(coverage=cov)
+        lat = h.access_many([0x0, 0x8, 0x40, 0x0], [False, True, False, False])
+        self.assertEqual(len(lat), 4)
+        self.assertEqual(sum(lat) / 4, h.amat())
+        summary = cov.summary()
+        self.assertEqual(summary["cache_hits"]["L1"], 2)
+        self.assertEqual(summary["cache_misses"]["L1"], 2)
+        self.assertEqual(summary["cache_misses"]["L2"], 2)
+        self.assertEqual(h.stats()["levels"]["L1D"]["hits"], 2)
+        with self.assertRaises(ValueError):
+            CacheHierarchy(inclusion="strict")
+
+    def test_default_geometry(self):
+        h = CacheHierarchy()
+        self.assertEqual([c.level for c in h.lower], ["L2", "L3"])
+        self.assertEqual(h.access(0x1234), (4 + 14 + 40 + 200, "DRAM"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -33,8 +33,8 @@ class CoverageModelTest(unittest.TestCase):
         self.assertEqual(summary['tlb_misses']['L2'], 1)
         self.assertEqual(summary['tlb_faults']['L1'], 1)
         self.assertEqual(summary['tlb_faults']['L2'], 1)
-        self.assertEqual(summary['tlb_latency']['L1'], [2])
-        self.assertEqual(summary['tlb_latency']['L2'], [5])
+        self.assertEqual(summary['tlb_latency']['L1']['buckets'], [[2, 1]])
+        self.assertEqual(summary['tlb_latency']['L2']['mean'], 5)
         self.assertEqual(summary['immediates'], 2)
 
     def test_reset(self):
@@ -44,7 +44,7 @@ class CoverageModelTest(unittest.TestCase):
         cov.record_immediate(0x5)
         cov.reset()
         self.assertEqual(cov.summary()['opcodes'], 0)
-        self.assertEqual(cov.summary()['tlb_latency']['L1'], [])
+        self.assertEqual(cov.summary()['tlb_latency']['L1']['count'], 0)
         self.assertEqual(cov.summary()['immediates'], 0)
 
     def test_exceptions(self):
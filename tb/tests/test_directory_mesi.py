@@ -1,21 +1,117 @@
 import os
 import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from rtl.interconnect.directory_mesi import DirectoryMESI
+import pytest
+
+from rtl.cache.set_assoc_cache import SetAssocCache
+from rtl.interconnect.directory_mesi import DirectoryMESI, interleave_traces
 
 def test_directory_basic():
     d = DirectoryMESI()
-    # core0 read -> state S
+    # core0 read -> exclusive
     resp = d.access(0x1000, src=0, write=False)
-    assert resp['state'] == 'S'
+    assert resp['state'] == 'E'
     assert resp['mask'] == 1
+    assert resp['memory_read']
     assert not resp['need_inval']
-    # core1 read -> still S with both cores
+    # core1 read -> forwarded by core0, both share
     resp = d.access(0x1000, src=1, write=False)
     assert resp['state'] == 'S'
     assert resp['mask'] == 3
+    assert resp['forwards'] == 1
     # core0 write -> need inval of core1
     resp = d.access(0x1000, src=0, write=True)
     assert resp['state'] == 'M'
     assert resp['mask'] == 1
     assert resp['need_inval']
+    assert resp['invalidations'] == 1
+    assert not resp['memory_read']
+
+def test_owned_state():
+    d = DirectoryMESI()
+    d.access(0x40, src=0, write=True)
+    resp = d.access(0x40, src=1)
+    assert (resp['state'], resp['owner'], resp['writebacks']) == ('O', 0, 0)
+    resp = d.access(0x40, src=2)
+    assert resp['forwards'] == 1 and resp['mask'] == 0b111
+    # the owner drops the line and writes the dirty data back
+    assert d.evict(0x40, 0) == 1
+    assert d.lookup(0x40) == ('S', 0b110, None)
+    # a write by a sharer upgrades without data
+    resp = d.access(0x40, src=1, write=True)
+    assert resp['invalidations'] == 1 and resp['forwards'] == 0
+    assert d.lookup(0x40) == ('M', 0b10, 1)
+
+def test_plain_mesi_writes_back_on_read():
+    d = DirectoryMESI(owned=False)
+    d.access(0x40, src=0, write=True)
+    resp = d.access(0x40, src=1)
+    assert (resp['state'], resp['writebacks'], resp['forwards']) == ('S', 1, 1)
+
+def test_write_forwards_from_owner():
+    d = DirectoryMESI()
+    d.access(0x80, src=0, write=True)
+    d.access(0x80, src=1)
+    d.access(0x80, src=2)
+    resp = d.access(0x80, src=3, write=True)
+    # owner core0 forwards the data, cores 1 and 2 are invalidated
+    assert resp['forwards'] == 1
+    assert resp['invalidations'] == 2
+    assert resp['inval_mask'] == 0b111
+    stats = d.stats()
+    assert stats['requests'] == 4 and stats['writes'] == 2
+    assert stats['forwards'] == 3 and stats['invalidations'] == 2
+
+def test_capacity_back_invalidates():
+    d = DirectoryMESI(capacity=4, ways=2)
+    assert len(d._sets) == 2
+    # lines 0x000, 0x080 and 0x100 all map to set 0
+    d.access(0x000, src=0, write=True)
+    d.access(0x080, src=1)
+    d.access(0x080, src=2)
+    resp = d.access(0x100, src=3)
+    assert resp['evicted'] == 0x000
+    assert resp['evicted_mask'] == 1
+    assert resp['writebacks'] == 1
+    resp = d.access(0x180, src=0)
+    assert resp['evicted'] == 0x080 and resp['evicted_mask'] == 0b110
+    stats = d.stats()
+    assert stats['evictions'] == 2
+    assert stats['back_invalidations'] == 3
+    assert stats['writebacks'] == 1
+    assert stats['entries'] == 2
+    with pytest.raises(ValueError):
+        DirectoryMESI(capacity=24, ways=8)
+
+def test_replay_without_caches_counts_coherence_misses():
+    d = DirectoryMESI()
+    # two cores ping-pong writes to one line
+    trace = [(i % 2, 0x2000, True) for i in range(10)]
+    stats = d.replay(trace)
+    assert stats['requests'] == 10
+    assert stats['forwards'] == 9
+    assert stats['memory_reads'] == 1
+
+def test_replay_with_private_caches():
+    caches = [SetAssocCache(1024, 2, 64, level='L2') for _ in range(2)]
+    d = DirectoryMESI()
+    trace = [(0, 0x0, False), (0, 0x0, True), (1, 0x0, False), (1, 0x0, False)]
+    stats = d.replay(trace, caches)
+    # the second access is a silent E -> M upgrade, the last one a hit
+    assert stats['requests'] == 2
+    assert d.lookup(0x0) == ('O', 0b11, 0)
+    d.replay([(1, 0x0, True)], caches)
+    assert not caches[0].contains(0x0)
+    assert stats['invalidations'] == 0 and d.stats()['invalidations'] == 1
+    # private evictions are reported to the directory
+    d.replay([(1, 0x400 * i, False) for i in range(1, 3)], caches)
+    assert not caches[1].contains(0x0)
+    assert d.lookup(0x0) == ('I', 0, None)
+    assert d.stats()['writebacks'] == 1
+
+def test_interleave_traces():
+    core0 = [{'cycle': 1, 'load_addr': 0x10, 'store_addr': None},
+             {'cycle': 5, 'load_addr': None, 'store_addr': 0x20}]
+    core1 = [{'cycle': 1, 'load_addr': 0x30, 'store_addr': 0x30}]
+    assert list(interleave_traces([core0, core1])) == [
+        (0, 0x10, False), (1, 0x30, False), (1, 0x30, True), (0, 0x20, True)]
@@ -0,0 +1,107 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.isa.golden_model import GoldenModel
+from tb.uvm_components import Scoreboard
+from tb.uvm_components.coverage import CoverageModel
+from tb.uvm_components.fast_coverage import FastCoverageModel
+
+
+def _random_events(cov, seed):
+    """Drive every recording hook of *cov* with a seeded event stream."""
+    rng = random.Random(seed)
+    for _ in range(3000):
+        kind = rng.randrange(12)
+        level = rng.choice(["L1", "L2"])
+        if kind == 0:
+            cov.record_instruction(rng.getrandbits(32))
+        elif kind == 1:
+            cov.record_immediate(rng.choice([rng.randrange(-4096, 4096), rng.getrandbits(64)]))
+        elif kind == 2:
+            cov.record_cache(rng.choice(["L1", "L2", "L3"]), rng.random() < 0.5)
+        elif kind == 3:
+            cov.record_tlb_lookup(level, rng.random() < 0.5, rng.choice([1, 5, 8, 20, 400]),
+                                  rng.random() < 0.1)
+        elif kind == 4:
+            cov.record_tlb(level, rng.random() < 0.5)
+            cov.record_tlb_latency(level, rng.randrange(300))
+            cov.record_tlb_fault(level)
+        elif kind == 5:
+            cov.record_branch(rng.random() < 0.3)
+        elif kind == 6:
+            cov.record_page_walk(rng.random() < 0.2)
+        elif kind == 7:
+            cov.record_exception(rng.choice(["illegal", "page", "smap"]))
+        elif kind == 8:
+            cov.record_btb_event(rng.randrange(8), rng.randrange(4))
+            cov.record_tage_event(rng.randrange(3), rng.randrange(8), rng.randrange(4))
+            cov.record_ibp_event(rng.randrange(8), rng.randrange(4))
+        elif kind == 9:
+            rng.choice([cov.record_rsb_underflow, cov.record_rsb_overflow])()
+        elif kind == 10:
+            rng.choice([cov.record_vector_load, cov.record_vector_store,
+                        cov.record_vector_gather, cov.record_vector_scatter])()
+        else:
+            cov.record_opcode(rng.randrange(256))
+
+
+class FastCoverageModelTest(unittest.TestCase):
+    def test_summary_matches_coverage_model(self):
+        slow, fast = CoverageModel(), FastCoverageModel()
+        _random_events(slow, 5)
+        _random_events(fast, 5)
+        self.assertEqual(fast.summary(), slow.summary())
+        self.assertEqual(fast.opcodes, slow.opcodes)
+        self.assertEqual(fast.immediates, slow.immediates)
+
+    def test_merge_in_both_directions(self):
+        expected = CoverageModel()
+        _random_events(expected, 1)
+        _random_events(expected, 2)
+        for first, second in ((FastCoverageModel, FastCoverageModel),
+                              (FastCoverageModel, CoverageModel),
+                              (CoverageModel, FastCoverageModel)):
+            a, b = first(), second()
+            _random_events(a, 1)
+            _random_events(b, 2)
+            a.merge(b)
+            self.assertEqual(a.summary(), expected.summary())
+
+    def test_reset(self):
+        cov = FastCoverageModel()
+        _random_events(cov, 3)
+        cov.reset()
+        self.assertEqual(cov.summary(), CoverageModel().summary())
+
+    def test_scoreboard_and_golden_model(self):
+        program = [0x00500093, 0x10000113, 0x00313023, 0x00013203,
+                   0x00208463, 0xFFFFFFFF, 0x00000073]
+        results = []
+        for cls in (CoverageModel, FastCoverageModel):
+            cov = cls()
+            sb = Scoreboard(coverage=cov)
+            for _ in range(20):
+                for instr in program:
+                    sb.commit(instr)
+            results.append(cov.summary())
+        self.assertEqual(results[0], results[1])
+
+    def test_recorders_follow_restored_model(self):
+        cov1, cov2 = FastCoverageModel(), FastCoverageModel()
+        gm1 = GoldenModel(coverage=cov1)
+        gm1.translate(0x1000, "r")
+        gm2 = GoldenModel(coverage=cov2)
+        gm2.restore(gm1.snapshot())
+        before = cov1.summary()
+        gm2.translate(0x1000, "r")
+        gm2.translate(0x2000, "r")
+        self.assertEqual(cov1.summary(), before)
+        self.assertEqual(cov2.tlb_hits["L1"], 1)
+        self.assertEqual(cov2.tlb_misses["L1"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
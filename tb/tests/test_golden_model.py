@@ -1,9 +1,11 @@
 import os
+import random
 import sys
 import unittest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 from rtl.isa.golden_model import GoldenModel
+from tb.tests.reference_model import GoldenModel as ReferenceModel
 from tb.uvm_components.coverage import CoverageModel
 
 
@@ -1046,5 +1048,355 @@ class GoldenModelTest(unittest.TestCase):
         self.assertEqual(gm.get_last_exception(), 'smap')
         self.assertEqual(gm.regs[2], 0)
 
+    def _load_program(self, gm, base, program):
+        for i, instr in enumerate(program):
+            gm.load_memory(base + 4 * i, instr, perm="rwx")
+
+    def test_run_loop_matches_step(self):
+        program = [
+            0x00a00093,  # addi x1,x0,10
+            0x00000113,  # addi x2,x0,0
+            0x00110133,  # add x2,x2,x1
+            0xfff08093,  # addi x1,x1,-1
+            encode_branch(0x1, 1, 0, -8),  # bne x1,x0,-8
+            0x00100193,  # addi x3,x0,1
+        ]
+        gm = GoldenModel(pc=0x1000)
+        self._load_program(gm, 0x1000, program)
+        count = gm.run(1000, until_pc=0x1018)
+        self.assertEqual(gm.pc, 0x1018)
+        self.assertEqual(gm.regs[2], 55)
+        self.assertEqual(gm.regs[3], 1)
+
+        ref = GoldenModel(pc=0x1000)
+        self._load_program(ref, 0x1000, program)
+        steps = 0
+        while ref.pc != 0x1018:
+            ref.step(ref.fetch(ref.pc) & 0xFFFFFFFF)
+            steps += 1
+        self.assertEqual(count, steps)
+        self.assertEqual(gm.regs, ref.regs)
+        self.assertEqual(gm.csrs, ref.csrs)
+
+    def test_run_max_instrs_and_block_cache(self):
+        gm = GoldenModel(pc=0x1000)
+        self._load_program(gm, 0x1000, [
+            0x00108093,  # addi x1,x1,1
+            encode_jal(0, -4),  # j -4
+        ])
+        self.assertEqual(gm.run(7), 7)
+        self.assertEqual(gm.regs[1], 4)
+        # the loop body and its jump form a single cached block
+        self.assertEqual(list(gm._blocks), [0x1000])
+        self.assertEqual(len(gm._blocks[0x1000][1]), 2)
+
+    def test_run_stops_on_exception(self):
+        gm = GoldenModel(pc=0x1000)
+        self._load_program(gm, 0x1000, [0x00500093, 0x00000073, 0x00600093])
+        self.assertEqual(gm.run(10), 2)
+        self.assertEqual(gm.get_last_exception(), "ecall")
+        self.assertEqual(gm.pc, 0x1008)
+        # fetching from memory that was never loaded raises a page fault
+        gm.pc = 0x8000
+        self.assertEqual(gm.run(10), 0)
+        self.assertEqual(gm.get_last_exception(), "page")
+        self.assertEqual(gm.pc, 0x8004)
+
+    def test_run_fetch_fault_matches_step(self):
+        models = []
+        for _ in range(2):
+            gm = GoldenModel(pc=0x3000)
+            # mapped without execute permission
+            gm.map_page(0x3000, 0x3000, perm="rw")
+            gm.load_memory(0x3000, 0x00100093)
+            models.append(gm)
+        run, ref = models
+        self.assertEqual(run.run(1), 0)
+        ref.step(ref.fetch(ref.pc) & 0xFFFFFFFF)
+        self.assertEqual(run.get_last_exception(), "nx")
+        self.assertEqual(ref.get_last_exception(), "nx")
+        self.assertEqual(run.pc, ref.pc)
+        self.assertEqual(run.regs, ref.regs)
+
+    def test_paging_translates_through_radix_tables(self):
+        gm = GoldenModel(paging="sv39")
+        gm.map_page(0x5000, 0x9000, perm="rw")
+        self.assertEqual(gm.translate(0x5008, "r"), (0x9008, None))
+        self.assertEqual(gm.walker.radix.stats()["walks"], 1)
+        self.assertEqual(gm.walker.radix.last_depth, 3)
+        self.assertEqual(gm.translate(0x5ff8, "w"), (0x9ff8, None))
+        self.assertEqual(gm.walker.radix.stats()["walks"], 1)
+        self.assertEqual(gm.translate(0x5010, "x")[1], "page")
+        # fetches go through the radix tables as well
+        gm.load_memory(0x7100, 0x00100093, map_va=0x6100, perm="rwx")
+        gm.pc = 0x6100
+        self.assertEqual(gm.run(1), 1)
+        self.assertEqual(gm.regs[1], 1)
+
+    def test_paging_non_canonical_load_page_faults(self):
+        for predecode in (True, False):
+            gm = GoldenModel(paging="sv39", predecode=predecode)
+            gm.regs[2] = 0x8000_0000_0000
+            gm.step(encode_load(3, 1, 2, 0))  # ld x1,0(x2)
+            self.assertEqual(gm.get_last_exception(), "page")
+            self.assertEqual(gm.regs[1], 0)
+            self.assertEqual(gm.translate(0x8000_0000_0000, "r")[1], "page")
+            self.assertNotIn(0x8000_0000_0000, gm.page_table)
+
+    def test_paging_fork_keeps_tables_private(self):
+        gm = GoldenModel(paging="sv48")
+        gm.map_page(0x5000, 0x9000)
+        child = gm.fork()
+        self.assertEqual(child.paging, "sv48")
+        child.map_page(0x5000, 0xA000)
+        self.assertEqual(child.translate(0x5008, "r"), (0xA008, None))
+        self.assertEqual(gm.translate(0x5008, "r"), (0x9008, None))
+        plain = GoldenModel()
+        plain.restore(gm.snapshot())
+        self.assertEqual(plain.translate(0x5010, "r"), (0x9010, None))
+
+    def test_run_self_modifying_code(self):
+        gm = GoldenModel(pc=0x1000)
+        # x5 holds the replacement "addi x3,x0,7" and x6 the code address
+        gm.regs[5] = 0x00700193
+        gm.regs[6] = 0x1010
+        self._load_program(gm, 0x1000, [
+            0x00000013,  # nop
+            0x00533023,  # sd x5,0(x6)
+            0x0000100f,  # fence.i
+            0x00000013,  # nop
+            0x00100193,  # addi x3,x0,1 (overwritten)
+        ])
+        gm.run(5)
+        self.assertEqual(gm.regs[3], 7)
+        # rerunning the now cached code sees the stored instruction as well
+        gm.regs[3] = 0
+        gm.pc = 0x1010
+        gm.run(1)
+        self.assertEqual(gm.regs[3], 7)
+
+    def test_store_invalidates_cached_block(self):
+        gm = GoldenModel(pc=0x1000)
+        self._load_program(gm, 0x1000, [0x00100193, 0x00000073])
+        gm.run(2)
+        self.assertEqual(gm.regs[3], 1)
+        self.assertIn(0x1000, gm._blocks)
+        gm.load_memory(0x1000, 0x00200193)  # addi x3,x0,2
+        self.assertNotIn(0x1000, gm._blocks)
+        gm.pc = 0x1000
+        gm.run(2)
+        self.assertEqual(gm.regs[3], 2)
+
+    def test_translate_fast_path_matches_full_walk(self):
+        import random
+        rng = random.Random(11)
+        fast = GoldenModel()
+        covered = GoldenModel(coverage=CoverageModel())
+        full = GoldenModel(coverage=CoverageModel())
+        # the reference always takes the complete TLB/walker path
+        full.translate = lambda va, perm, is_exec=False, override=False: \
+            full._translate_walk(va, perm, is_exec, override)
+        models = (fast, covered, full)
+        vas = [0x1000 * p + 8 * w for p in range(1, 90) for w in range(2)]
+        for _ in range(3000):
+            op = rng.random()
+            va = rng.choice(vas)
+            if op < 0.05:
+                pa = rng.choice([va, va + 0x10000, (va + 0x123) & ~0x7])
+                perm = rng.choice(["rw", "r", "rwx", "rwxu", "x"])
+                for gm in models:
+                    gm.map_page(va, pa, perm=perm)
+            elif op < 0.08:
+                attr, val = rng.choice([
+                    ("priv_level", rng.randrange(2)), ("smep", rng.randrange(2)),
+                    ("smap", rng.randrange(2)),
+                ])
+                for gm in models:
+                    setattr(gm, attr, val)
+            elif op < 0.10:
+                vmid = rng.randrange(3)
+                for gm in models:
+                    gm.vmcs.vm_on(vmid) if vmid else gm.vmcs.vm_off()
+            elif op < 0.12:
+                for gm in models:
+                    gm.sgx.eadd(va, 0)
+                    gm.sgx.eexit() if gm.sgx.active else gm.sgx.eenter()
+            else:
+                perm = rng.choice("rwx")
+                override = rng.random() < 0.2
+                expected = full.translate(va, perm, is_exec=perm == "x", override=override)
+                for gm in (fast, covered):
+                    self.assertEqual(
+                        gm.translate(va, perm, is_exec=perm == "x", override=override),
+                        expected,
+                    )
+        for gm in (fast, covered):
+            self.assertEqual(gm.tlb_l1.entries, full.tlb_l1.entries)
+            self.assertEqual(gm.tlb_l2.table, full.tlb_l2.table)
+        self.maxDiff = None
+        # memoized lookups record the same events as full ones
+        self.assertEqual(covered.coverage.summary(), full.coverage.summary())
+
+    def test_translate_fast_path_is_per_page_with_paging(self):
+        rng = random.Random(5)
+        fast = GoldenModel(paging="sv39", coverage=CoverageModel())
+        full = GoldenModel(paging="sv39", coverage=CoverageModel())
+        full.translate = lambda va, perm, is_exec=False, override=False: \
+            full._translate_walk(va, perm, is_exec, override)
+        for gm in (fast, full):
+            gm.vmcs.vm_on(1)
+            # the enclave check works on 256-byte blocks
+            for addr in range(0, 0x10000, 0x200):
+                gm.sgx.eadd(addr, 0)
+            gm.sgx.eenter()
+        for _ in range(2000):
+            va = 0x1000 * rng.randrange(1, 8) + rng.randrange(0x1000)
+            perm = rng.choice("rw")
+            self.assertEqual(fast.translate(va, perm), full.translate(va, perm))
+        # one memoized result per page and access type
+        self.assertEqual(len(fast._xlate), 7 * 2)
+        self.assertEqual(fast.coverage.summary(), full.coverage.summary())
+
+    def test_translate_memo_is_bounded(self):
+        gm = GoldenModel()
+        gm.XLATE_ENTRIES = 16
+        for _ in range(2):
+            for va in range(0x1000, 0x1000 + 8 * 100, 8):
+                self.assertEqual(gm.translate(va, "r"), (va, None))
+                self.assertLessEqual(len(gm._xlate), 16)
+        self.assertLessEqual(sum(map(len, gm._xlate_pages.values())), 16)
+
+    def test_translate_fast_path_sees_map_page(self):
+        gm = GoldenModel()
+        gm.map_page(0x4000, 0x4000, perm="r")
+        self.assertEqual(gm.translate(0x4000, "w")[1], "page")
+        gm.map_page(0x4000, 0x4000, perm="rw")
+        self.assertIsNone(gm.translate(0x4000, "w")[1])
+        gm.priv_level = 0
+        gm.smap = 1
+        gm.map_page(0x4000, 0x4000, perm="rwu")
+        self.assertEqual(gm.translate(0x4000, "r")[1], "smap")
+        gm.smap = 0
+        self.assertIsNone(gm.translate(0x4000, "r")[1])
+
+    def test_snapshot_restore(self):
+        gm = GoldenModel()
+        gm.load_memory(0x100, 0x1111)
+        gm.regs[1] = 0x100
+        gm.vmcs.vm_on(2)
+        gm.sgx.ecreate(0x2000)
+        gm.translate(0x100, "r")
+        snap = gm.snapshot()
+        gm.step(0x0000b103)  # ld x2,0(x1)
+        gm.load_memory(0x100, 0x2222)
+        gm.map_page(0x3000, 0x4000)
+        gm.vmcs.vm_off()
+        gm.sgx.eenter()
+        for _ in range(2):
+            gm.restore(snap)
+            self.assertEqual(gm.regs[2], 0)
+            self.assertEqual(gm.mem[0x100], 0x1111)
+            self.assertEqual(gm.csrs[0xC02], 0)
+            self.assertNotIn(0x3000, gm.page_table)
+            self.assertEqual(gm.vmcs.current_vmid(), 2)
+            self.assertFalse(gm.sgx.active)
+            self.assertIn(0x100 >> 12, gm.tlb_l1.entries)
+            gm.load_memory(0x100, 0x3333)
+
+    def test_fork_is_independent(self):
+        cov = CoverageModel()
+        gm = GoldenModel(coverage=cov)
+        for i in range(4):
+            gm.load_memory(0x200 + 8 * i, i)
+        child = gm.fork()
+        self.assertIs(child.coverage, cov)
+        self.assertIs(child.tlb_l1.coverage, cov)
+        child.load_memory(0x200, 0xAA)
+        gm.load_memory(0x208, 0xBB)
+        self.assertEqual((gm.mem[0x200], gm.mem[0x208]), (0, 0xBB))
+        self.assertEqual((child.mem[0x200], child.mem[0x208]), (0xAA, 1))
+        child.regs[5] = 1
+        child.map_page(0x9000, 0x9000)
+        self.assertEqual(gm.regs[5], 0)
+        self.assertNotIn(0x9000, gm.page_table)
+        self.assertNotIn(0x9000, gm.walker.table)
+
+    def test_restore_snapshot_without_coverage(self):
+        plain = GoldenModel()
+        plain.translate(0x1000, "r")
+        cov = CoverageModel()
+        gm = GoldenModel(coverage=cov)
+        gm.restore(plain.snapshot())
+        self.assertIsNone(gm.last_exception)
+        self.assertIs(gm.tlb_l1.coverage, cov)
+        self.assertIs(gm.walker.coverage, cov)
+        self.assertEqual(gm.translate(0x1000, "r"), (0x1000, None))
+        self.assertEqual(cov.tlb_hits["L1"], 1)
+
+    def test_restore_covered_snapshot_into_plain_model(self):
+        covered = GoldenModel(coverage=CoverageModel())
+        covered.translate(0x1000, "r")
+        gm = GoldenModel()
+        gm.restore(covered.snapshot())
+        self.assertIsNone(gm.tlb_l1.coverage)
+        self.assertIsNone(gm.tlb_l2.coverage)
+        self.assertEqual(gm.translate(0x1000, "r"), (0x1000, None))
+        self.assertEqual(gm.translate(0x5000, "r"), (0x5000, None))
+        self.assertEqual(covered.coverage.tlb_hits["L1"], 0)
+
+
+class ReferenceMemoryTest(unittest.TestCase):
+    """Differential checks of the default memory against the original model."""
+
+    AMOS = (encode_amoadd, encode_amoswap, encode_amoxor, encode_amoor,
+            encode_amoand, encode_amomin, encode_amomax, encode_amominu,
+            encode_amomaxu, encode_lr, encode_sc)
+
+    def random_mem_instr(self, rng):
+        kind = rng.random()
+        rd = rng.randrange(5, 10)
+        base = rng.choice((1, 2))
+        if kind < 0.35:
+            return encode_load(rng.choice((0, 1, 2, 3, 4, 5, 6)), rd, base, rng.randrange(0, 64, 4))
+        if kind < 0.7:
+            return encode_store(rng.randrange(4), base, rd, rng.randrange(0, 64, 4))
+        amo = rng.choice(self.AMOS)
+        if amo is encode_lr:
+            return amo(rd, base)
+        return amo(rd, base, rng.randrange(5, 10))
+
+    def state(self, gm):
+        return (list(gm.regs), {a: gm._mem_load(a) for a in range(0x1000, 0x1080, 4)},
+                gm.pc, gm.last_exception, gm._reservation)
+
+    def test_overlapping_load_memory_keeps_words(self):
+        for gm in (GoldenModel(), GoldenModel(predecode=False), ReferenceModel()):
+            gm.load_memory(0x100, 0x1122334455667788)
+            gm.load_memory(0x104, 0)
+            self.assertEqual(gm._mem_load(0x100), 0x1122334455667788)
+            gm.load_memory(4, 0x13)
+            gm.load_memory(8, 0)
+            self.assertEqual(gm._mem_load(4), 0x13)
+
+    def test_random_memory_ops_match_reference(self):
+        for seed in range(20):
+            rng = random.Random(seed)
+            models = [ReferenceModel(), GoldenModel(), GoldenModel(predecode=False)]
+            words = [(0x1000 + 4 * i, rng.getrandbits(64)) for i in range(32)]
+            regs = [rng.getrandbits(64) for _ in range(32)]
+            for gm in models:
+                for addr, value in words:
+                    gm.load_memory(addr, value)
+                gm.regs[5:10] = regs[5:10]
+                gm.regs[1] = 0x1000
+                gm.regs[2] = 0x1020
+            for _ in range(200):
+                instr = self.random_mem_instr(rng)
+                for gm in models:
+                    gm.step(instr)
+                ref = self.state(models[0])
+                for gm in models[1:]:
+                    self.assertEqual(self.state(gm), ref, f"seed {seed} instr {instr:#010x}")
+
 if __name__ == '__main__':
     unittest.main()
@@ -3,7 +3,10 @@ import sys
 import unittest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.bp.branch_predictor_top import BranchPredictorTop
+from rtl.bp.branch_trace import COND, INDIRECT, evaluate, pack_flags
 from rtl.bp.ibp import IBPPredictor
+from rtl.bp.ittage import ITTAGEPredictor
 
 class IBPPredictorTest(unittest.TestCase):
     def test_basic_predict_update(self):
@@ -24,5 +27,60 @@ class IBPPredictorTest(unittest.TestCase):
         summary = cov.summary()
         self.assertEqual(summary["ibp_entries"], 1)
 
+
+def _interpreter_trace(rounds=200):
+    """Records of a switch-dispatch interpreter running a fixed loop."""
+    handlers = [0x10000 + 0x400 * i for i in range(8)]
+    program = [3, 1, 4, 1, 5, 2, 6, 5, 3, 5, 0, 7, 2, 7, 1, 6]
+    records = []
+    for _ in range(rounds):
+        for op in program:
+            h = handlers[op]
+            records.append((0x1000, h, 5, pack_flags(INDIRECT, True)))
+            records.append((h + 8, h + 0x40, 3, pack_flags(COND, op & 1)))
+    return records
+
+
+class ITTAGEPredictorTest(unittest.TestCase):
+    def test_path_history_selects_target(self):
+        it = ITTAGEPredictor()
+        self.assertEqual(it.lengths, [4, 13, 40, 128])
+        pc = 0x80
+        # the target follows the direction of the preceding branch
+        for i in range(200):
+            taken = bool(i % 3)
+            it.track(0x40, taken, 0x60)
+            target = 0x1000 if taken else 0x2000
+            if i >= 100:
+                self.assertEqual(it.predict(pc, 0), target)
+            if i == 198:
+                # the base table holds the common target, a tagged entry the other
+                self.assertGreater(it.provider(pc), 0)
+                self.assertEqual(it.confidence(pc), 3)
+            it.update(pc, 0, target)
+
+    def test_interpreter_dispatch(self):
+        records = _interpreter_trace()
+        simple = evaluate(records, BranchPredictorTop())
+        ittage = evaluate(records, BranchPredictorTop(indirect="ittage"))
+        self.assertLess(simple["classes"]["indirect"]["accuracy"], 0.5)
+        self.assertGreater(ittage["classes"]["indirect"]["accuracy"], 0.95)
+        self.assertLess(ittage["indirect_target_mispredicts"],
+                        simple["indirect_target_mispredicts"] // 5)
+        with self.assertRaises(ValueError):
+            BranchPredictorTop(indirect="btb")
+
+    def test_coverage_and_reset(self):
+        from tb.uvm_components.coverage import CoverageModel
+        cov = CoverageModel()
+        it = ITTAGEPredictor(tables=3, entries=16, base_entries=16, coverage=cov)
+        it.update(0x40, 0, 0x44)
+        self.assertEqual(cov.summary()["ibp_entries"], 1)
+        it.reset()
+        self.assertEqual(it.predict(0x40), 0)
+        with self.assertRaises(ValueError):
+            ITTAGEPredictor(entries=100)
+
+
 if __name__ == '__main__':
     unittest.main()
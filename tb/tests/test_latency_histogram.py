@@ -0,0 +1,78 @@
+import json
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from tb.uvm_components.coverage import CoverageModel
+from tb.uvm_components.latency_histogram import LatencyHistogram
+
+
+class LatencyHistogramTest(unittest.TestCase):
+    def test_small_values_are_exact(self):
+        hist = LatencyHistogram()
+        for v in [1, 1, 5, 8, 8, 8, 20]:
+            hist.record(v)
+        self.assertEqual(list(hist), [(1, 2), (5, 1), (8, 3), (20, 1)])
+        self.assertEqual((hist.min, hist.max, hist.count), (1, 20, 7))
+        self.assertAlmostEqual(hist.mean(), 51 / 7)
+        self.assertEqual(hist.percentile(50), 8)
+        self.assertEqual(hist.percentile(0), 1)
+        self.assertEqual(hist.percentile(100), 20)
+
+    def test_percentiles_within_precision(self):
+        rng = random.Random(11)
+        values = [int(rng.lognormvariate(5, 1.5)) for _ in range(20000)]
+        hist = LatencyHistogram()
+        for v in values:
+            hist.record(v)
+        values.sort()
+        for pct in (50, 90, 99, 99.9):
+            exact = values[max(0, int(-(-len(values) * pct // 100)) - 1)]
+            self.assertLessEqual(abs(hist.percentile(pct) - exact), exact / 64 + 1)
+        # bucket count stays small regardless of the number of samples
+        self.assertLess(len(hist.buckets), 1000)
+
+    def test_merge_matches_combined(self):
+        a, b, both = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for v in range(0, 5000, 7):
+            a.record(v)
+            both.record(v)
+        for v in range(3, 90000, 301):
+            b.record(v)
+            both.record(v)
+        a.merge(b)
+        self.assertEqual(a, both)
+        with self.assertRaises(ValueError):
+            a.merge(LatencyHistogram(sub_bits=4))
+
+    def test_summary_round_trip(self):
+        hist = LatencyHistogram()
+        for v in (3, 300, 30000, 3000000):
+            hist.record(v, count=2)
+        data = json.loads(json.dumps(hist.summary()))
+        self.assertEqual(data, hist.summary())
+        self.assertEqual(LatencyHistogram.from_summary(data), hist)
+        empty = LatencyHistogram().summary()
+        self.assertEqual(empty["count"], 0)
+        self.assertIsNone(empty["p99"])
+
+    def test_coverage_tlb_latency(self):
+        cov1, cov2 = CoverageModel(), CoverageModel()
+        for i in range(1000):
+            cov1.record_tlb_latency("L1", 1 + i % 3)
+            cov2.record_tlb_latency("L2", 20)
+        cov1.merge(cov2)
+        summary = cov1.summary()
+        self.assertEqual(summary["tlb_latency"]["L1"]["buckets"], [[1, 334], [2, 333], [3, 333]])
+        self.assertEqual(summary["tlb_latency"]["L2"]["p99"], 20)
+        path = os.path.join(os.path.dirname(__file__), "cov_hist_tmp.json")
+        cov1.save_summary(path)
+        loaded = CoverageModel.load_summary(path)
+        os.remove(path)
+        self.assertEqual(loaded, summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
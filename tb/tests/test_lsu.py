@@ -23,7 +23,7 @@ class LsuTest(unittest.TestCase):
         self.assertEqual(res1[0], None)
         self.assertEqual(cov.summary()['tlb_misses']['L1'], 1)
         self.assertEqual(cov.summary()['tlb_misses']['L2'], 1)
-        self.assertEqual(cov.summary()['tlb_latency']['L2'][0], 20)
+        self.assertEqual(cov.summary()['tlb_latency']['L2']['min'], 20)
         # load back
         res = lsu.cycle([
             {"is_store": False, "addr": 0x1000, "size": 8, "dest": 5, "rob": 1},
@@ -4,6 +4,7 @@ import unittest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 from rtl.mmu.page_walker8 import PageWalker8
+from rtl.mmu.radix_walker import RadixPageWalker
 from tb.uvm_components.coverage import CoverageModel
 
 class PageWalker8Test(unittest.TestCase):
@@ -23,5 +24,55 @@ class PageWalker8Test(unittest.TestCase):
         self.assertEqual(summary["page_walks"], 3)
         self.assertEqual(summary["page_walk_faults"], 1)
 
+    def test_outstanding_walks(self):
+        pw = PageWalker8(latency=4)
+        pw.set_entry(0x1000, 0x5000)
+        tags = [pw.issue(0x1000) for _ in range(8)]
+        self.assertEqual(tags, list(range(8)))
+        self.assertIsNone(pw.issue(0x1000))
+        self.assertEqual(pw.tick(3), [])
+        done = pw.tick()
+        self.assertEqual([d[0] for d in done], tags)
+        self.assertEqual(done[0], (0, 0x5000, False))
+        self.assertTrue(pw.ready())
+
+    def test_completion_order_follows_latency(self):
+        radix = RadixPageWalker(mem_latency=10, pwc_latency=0)
+        radix.map(0x0000, 0x8000)
+        radix.map(0x1000, 0x9000)
+        radix.map(1 << 30, 0xA000)
+        pw = PageWalker8(radix=radix)
+        pw.issue(0x0000, tag="cold")   # three PTE reads
+        pw.tick()
+        pw.issue(0x1000, tag="warm")   # page-walk cache hit, one read
+        pw.issue(1 << 30, tag="other") # misses the cached table
+        self.assertEqual(pw.outstanding, 3)
+        self.assertEqual(pw.tick(11), [("warm", 0x9000, False)])
+        self.assertEqual(pw.drain(), [("cold", 0x8000, False), ("other", 0xA000, False)])
+        self.assertEqual(pw.now, 31)
+
+    def test_walk_resolves_at_completion(self):
+        cov = CoverageModel()
+        pw = PageWalker8(latency=4, coverage=cov)
+        pw.set_entry(0x1000, 0x5000, perm="r")
+        pw.issue(0x1000, perm="w", tag="a")
+        pw.issue(0x2000, tag="b")
+        pw.set_entry(0x1000, 0x6000, perm="rw")
+        pw.set_entry(0x2000, 0x7000)
+        self.assertEqual(cov.summary()["page_walks"], 0)
+        self.assertEqual(pw.drain(), [("a", 0x6000, False), ("b", 0x7000, False)])
+        self.assertEqual(cov.summary()["page_walks"], 2)
+
+    def test_radix_walk_sees_pte_changed_in_flight(self):
+        radix = RadixPageWalker(mem_latency=10)
+        radix.map(0x1000, 0x8000)
+        pw = PageWalker8(radix=radix)
+        pw.issue(0x1000, tag="remap")
+        pw.issue(0x1000, tag="cached")
+        radix.map(0x1000, 0x9000, perm="r")
+        self.assertEqual(pw.tick(pw.last_latency), [("cached", 0x9000, False)])
+        self.assertEqual(pw.drain(), [("remap", 0x9000, False)])
+        self.assertEqual(radix.stats()["walks"], 2)
+
 if __name__ == '__main__':
     unittest.main()
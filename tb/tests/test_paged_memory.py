@@ -0,0 +1,140 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.isa.golden_model import GoldenModel
+from rtl.isa.paged_memory import PagedMemory
+from tb.tests.test_golden_model import encode_vle64, encode_vse64
+
+
+class PagedMemoryTest(unittest.TestCase):
+    def test_behaves_like_dict_for_words(self):
+        rng = random.Random(3)
+        mem = PagedMemory()
+        ref = {}
+        for _ in range(500):
+            addr = rng.choice([0x1000 + 8 * rng.randrange(64), rng.getrandbits(48) & ~0x7])
+            if rng.random() < 0.7:
+                val = rng.getrandbits(64)
+                mem[addr] = val
+                ref[addr] = val
+            else:
+                self.assertEqual(addr in mem, addr in ref)
+                self.assertEqual(mem.get(addr, 0), ref.get(addr, 0))
+        self.assertEqual(len(mem), len(ref))
+        self.assertEqual(dict(mem), ref)
+        self.assertEqual(mem, ref)
+
+    def test_presence_is_per_word_start(self):
+        mem = PagedMemory()
+        mem[0x100] = 0x1122334455667788
+        self.assertIn(0x100, mem)
+        self.assertNotIn(0x104, mem)
+        self.assertIsNone(mem.get(0x104))
+        with self.assertRaises(KeyError):
+            mem[0x108]
+        del mem[0x100]
+        self.assertNotIn(0x100, mem)
+        self.assertEqual(len(mem), 0)
+
+    def test_word_crossing_page_boundary(self):
+        mem = PagedMemory()
+        mem[0xFFC] = 0x0102030405060708
+        self.assertEqual(mem[0xFFC], 0x0102030405060708)
+        self.assertEqual(mem.page_count(), 2)
+        self.assertEqual(mem.read_bytes(0x1000, 4), bytes([4, 3, 2, 1]))
+
+    def test_bulk_bytes(self):
+        mem = PagedMemory()
+        image = bytes(range(256)) * 40
+        mem.write_bytes(0x2F00, image)
+        self.assertEqual(mem.read_bytes(0x2F00, len(image)), image)
+        self.assertEqual(len(mem), len(image) // 8)
+        self.assertIn(0x2F08, mem)
+        self.assertNotIn(0x2F04, mem)
+        self.assertEqual(mem[0x2F08], int.from_bytes(image[8:16], "little"))
+        # reads of untouched memory are zero and allocate nothing
+        pages = mem.page_count()
+        self.assertEqual(mem.read_bytes(0x100000, 16), bytes(16))
+        self.assertEqual(mem.page_count(), pages)
+
+    def test_clone_is_copy_on_write(self):
+        mem = PagedMemory()
+        mem[0x100] = 1
+        mem[0x2000] = 2
+        copy = mem.clone()
+        self.assertIs(copy._pages[0], mem._pages[0])
+        copy[0x100] = 3
+        mem[0x2008] = 4
+        self.assertEqual(dict(mem), {0x100: 1, 0x2000: 2, 0x2008: 4})
+        self.assertEqual(dict(copy), {0x100: 3, 0x2000: 2})
+        # the first write to a shared page gives the writer its own copy
+        self.assertIsNot(copy._pages[0], mem._pages[0])
+        del copy[0x2000]
+        self.assertIn(0x2000, mem)
+
+
+class GoldenModelMemoryBackendTest(unittest.TestCase):
+    def _vector_roundtrip(self, gm):
+        for i in range(8):
+            gm.load_memory(0xFE0 + i * 8, (i + 1) * 0x0101010101010101)
+        gm.regs[1] = 0xFE0
+        gm.step(encode_vle64(2, 1, 0))
+        gm.step(encode_vse64(2, 1, 0x100))
+        return gm.vregs[2], {k: gm.mem[k] for k in gm.mem}
+
+    def test_vector_paths_match_dict_backend(self):
+        for key in (0, 0x5A5A):
+            paged = GoldenModel(memory=PagedMemory())
+            plain = GoldenModel(memory={})
+            paged.set_sev_key(key)
+            plain.set_sev_key(key)
+            self.assertEqual(self._vector_roundtrip(paged), self._vector_roundtrip(plain))
+
+    def test_adjacent_narrow_stores_match_dict_backend(self):
+        results = []
+        for memory in (PagedMemory(), {}):
+            gm = GoldenModel(memory=memory)
+            for addr in (0x1000, 0x1004):
+                gm.load_memory(addr, 0)
+            gm.regs[1] = 0x1000
+            gm.regs[2] = 0x22222222
+            gm.regs[3] = 0x11111111
+            gm.step(0x0020A223)  # sw x2,4(x1)
+            gm.step(0x0030A023)  # sw x3,0(x1)
+            gm.step(0x0040A203)  # lw x4,4(x1)
+            gm.step(0x0000A283)  # lw x5,0(x1)
+            gm.regs[6] = 0x33
+            gm.step(0x00608023)  # sb x6,0(x1)
+            gm.step(0x0040A383)  # lw x7,4(x1)
+            results.append((gm.regs[4], gm.regs[5], gm.regs[7]))
+        self.assertEqual(results[0], (0x22222222, 0x11111111, 0x22222222))
+        self.assertEqual(results[0], results[1])
+
+    def test_reset_keeps_backend_type(self):
+        gm = GoldenModel(memory={})
+        gm.load_memory(0x100, 1)
+        gm.reset()
+        self.assertEqual(gm.mem, {})
+        self.assertIs(type(gm.mem), dict)
+        self.assertIs(type(GoldenModel().mem), dict)
+        gm = GoldenModel(memory=PagedMemory())
+        gm.reset()
+        self.assertIsInstance(gm.mem, PagedMemory)
+
+    def test_load_image(self):
+        gm = GoldenModel(memory=PagedMemory())
+        words = [0x00500093, 0x00300113, 0x002081B3, 0x0000006F]
+        image = b"".join(w.to_bytes(4, "little") for w in words)
+        gm.load_image(0x1000, image, perm="rwx")
+        self.assertEqual(gm.mem.read_bytes(0x1000, len(image)), image)
+        self.assertIn(0x1004, gm.mem)
+        gm.pc = 0x1000
+        gm.run(3)
+        self.assertEqual(gm.regs[3], 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.isa.golden_model import GoldenModel
+from rtl.isa import predecode
+from tb.tests.reference_model import GoldenModel as ReferenceModel
+
+OPCODES = [
+    0x33, 0x3B, 0x13, 0x1B, 0x03, 0x23, 0x63, 0x6F, 0x67, 0x37, 0x17,
+    0x0F, 0x73, 0x53, 0x43, 0x47, 0x4B, 0x4F, 0x07, 0x27, 0x57, 0x2F,
+]
+
+# registers that make_models points into the loaded data; random
+# instructions never write them
+POINTER_REGS = (28, 29, 30, 31)
+
+
+def random_instr(rng):
+    """Return a random instruction word biased towards implemented opcodes."""
+    if rng.random() < 0.05:
+        return rng.getrandbits(32)
+    opcode = rng.choice(OPCODES)
+    funct7 = rng.choice([0x00, 0x20, 0x01, 0x05, 0x09, 0x0D, 0x15, rng.getrandbits(7)])
+    if opcode == 0x73 and rng.random() < 0.3:
+        return rng.choice([0x00000073, 0x00100073, 0x00200073])
+    if opcode == 0x0F and rng.random() < 0.5:
+        return 0x0000100F  # fence.i
+    instr = (
+        funct7 << 25
+        | rng.getrandbits(5) << 20
+        | rng.getrandbits(5) << 15
+        | rng.getrandbits(3) << 12
+        | rng.randrange(POINTER_REGS[0]) << 7
+        | opcode
+    )
+    if opcode in (0x03, 0x23, 0x2F) and rng.random() < 0.7:
+        # address the loaded data through one of the pointer registers
+        instr &= ~(0x1F << 15)
+        instr |= rng.choice(POINTER_REGS) << 15
+        if opcode != 0x2F:
+            instr &= 0x000FFFFF if opcode == 0x03 else ~0xFE000F80
+            offset = rng.randrange(0, 64, 8)
+            if opcode == 0x03:
+                instr |= offset << 20
+            else:
+                instr |= (offset & 0x1F) << 7 | (offset >> 5) << 25
+            instr &= 0xFFFFFFFF
+    return instr
+
+
+def make_models(seed):
+    """Return the RNG and the frozen reference, interpreter and predecoded models."""
+    rng = random.Random(seed)
+    models = [ReferenceModel(), GoldenModel(predecode=False), GoldenModel(predecode=True)]
+    regs = [rng.choice([0, rng.getrandbits(64), 0x1000 + 8 * rng.randrange(32)])
+            for _ in range(32)]
+    fregs = [rng.getrandbits(64) for _ in range(32)]
+    vregs = [rng.getrandbits(512) for _ in range(32)]
+    for r in POINTER_REGS:
+        regs[r] = 0x1000 + 8 * rng.randrange(48)
+    for gm in models:
+        gm.regs = list(regs)
+        gm.fregs = list(fregs)
+        gm.vregs = list(vregs)
+    for i in range(64):
+        val = rng.getrandbits(64)
+        for gm in models:
+            gm.load_memory(0x1000 + i * 8, val)
+    return rng, models
+
+
+def state(gm):
+    return (
+        list(gm.regs), list(gm.fregs), list(gm.vregs), dict(gm.csrs),
+        dict(gm.mem), gm.pc, gm.last_exception, gm._reservation,
+        gm.spec_fence.pending,
+    )
+
+
+class PredecodeTest(unittest.TestCase):
+    def test_handlers_are_cached(self):
+        predecode.clear_cache()
+        h1 = predecode.handler_for(0x00500093)
+        h2 = predecode.handler_for(0x00500093)
+        self.assertIs(h1, h2)
+
+    def test_matches_interpreter(self):
+        for seed in range(20):
+            rng, models = make_models(seed)
+            for _ in range(300):
+                instr = random_instr(rng)
+                results = [gm.step(instr) for gm in models]
+                ref = state(models[0])
+                for gm, result in zip(models[1:], results[1:]):
+                    self.assertEqual(result, results[0], hex(instr))
+                    self.assertEqual(state(gm), ref, hex(instr))
+
+    def test_reset_keeps_mode(self):
+        gm = GoldenModel(predecode=False)
+        gm.reset(pc=8)
+        self.assertFalse(gm.predecode)
+        self.assertEqual(gm.pc, 8)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.cache.l1_dcache import L1DCache
+from rtl.cache.prefetch import (
+    NextLinePrefetcher,
+    SpatialRegionPrefetcher,
+    StreamBufferPrefetcher,
+    StridePrefetcher,
+)
+from rtl.cache.set_assoc_cache import SetAssocCache
+from tb.uvm_components import CoverageModel, FastCoverageModel
+
+
+def _run(prefetcher, accesses, **kwargs):
+    cov = CoverageModel()
+    l2 = SetAssocCache(256 * 1024, 8, 64, level="L2", hit_latency=14)
+    cache = SetAssocCache(
+        8 * 1024, 4, 64, next_level=l2, prefetcher=prefetcher, coverage=cov, **kwargs
+    )
+    for pc, addr in accesses:
+        cache.read(addr, pc)
+    return cache, cov
+
+
+def _sequential(n, pc=0x100, base=0x10000):
+    return [(pc, base + 8 * i) for i in range(n)]
+
+
+class PrefetcherTest(unittest.TestCase):
+    def test_next_line_covers_sequential_stream(self):
+        cache, cov = _run(NextLinePrefetcher(), _sequential(8000))
+        stats = cache.prefetch_stats()
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(stats["useful"], 999)
+        self.assertGreater(stats["accuracy"], 0.99)
+        self.assertGreater(stats["coverage"], 0.99)
+        self.assertEqual(cov.summary()["prefetch"]["L1"]["useful"], 999)
+        self.assertEqual(cov.prefetch["L1"]["bytes"], stats["bytes"])
+
+    def test_useless_prefetches_on_large_strides(self):
+        accesses = [(0x200, 0x40000 + 256 * i) for i in range(2000)]
+        cache, cov = _run(NextLinePrefetcher(), accesses)
+        stats = cache.prefetch_stats()
+        self.assertEqual(stats["useful"], 0)
+        self.assertEqual(stats["accuracy"], 0.0)
+        self.assertGreater(stats["useless"], 1900)
+        self.assertAlmostEqual(stats["bandwidth_overhead"], 1.0, places=2)
+        self.assertEqual(cov.prefetch["L1"]["useless"], stats["useless"])
+
+    def test_stride_is_keyed_by_pc(self):
+        # two interleaved loads with their own large strides
+        accesses = []
+        for i in range(1000):
+            accesses.append((0x200, 0x40000 + 256 * i))
+            accesses.append((0x204, 0x80000 + 512 * i))
+        cache, _ = _run(StridePrefetcher(), accesses)
+        self.assertGreater(cache.prefetch_stats()["coverage"], 0.99)
+        # without a PC the table is never trained
+        cache, _ = _run(StridePrefetcher(), [(None, a) for _, a in accesses])
+        self.assertEqual(cache.pf_issued, 0)
+
+    def test_late_prefetches(self):
+        # one access per line leaves no time for the prefetch to arrive
+        accesses = [(0x100, 0x10000 + 64 * i) for i in range(100)]
+        cache, cov = _run(NextLinePrefetcher(), accesses, prefetch_delay=4)
+        self.assertEqual(cache.pf_late, 99)
+        self.assertEqual(cache.pf_useful, 0)
+        self.assertGreater(cache.prefetch_stats()["accuracy"], 0.98)
+        self.assertEqual(cov.prefetch["L1"]["late"], 99)
+        cache, _ = _run(NextLinePrefetcher(), accesses, prefetch_delay=1)
+        self.assertEqual(cache.pf_late, 0)
+        self.assertEqual(cache.pf_useful, 99)
+
+    def test_stream_buffer(self):
+        streams = []
+        for i in range(4000):
+            streams.append((0x100, 0x100000 + 8 * i))
+            streams.append((0x104, 0x200000 + 8 * i))
+        cache, _ = _run(StreamBufferPrefetcher(buffers=2, depth=4), streams)
+        self.assertLess(cache.misses, 4)
+        self.assertGreater(cache.prefetch_stats()["accuracy"], 0.99)
+
+    def test_spatial_region_replays_footprint(self):
+        pattern = (0, 3, 5, 9, 12)
+        accesses = []
+        for region in range(200):
+            base = (region * 7919 % 4096) * 2048 + (1 << 30)
+            for off in pattern:
+                for word in range(4):
+                    accesses.append((0x300, base + 64 * off + 8 * word))
+        cache, _ = _run(SpatialRegionPrefetcher(active=4), accesses)
+        stats = cache.prefetch_stats()
+        self.assertEqual(stats["useless"], 0)
+        self.assertGreater(stats["coverage"], 0.75)
+        # only the trigger miss is left in most regions
+        self.assertLess(cache.misses, 200 + 4 * len(pattern))
+
+    def test_queue_limit_and_reset(self):
+        cache, _ = _run(
+            NextLinePrefetcher(degree=8), _sequential(8), prefetch_queue=4, prefetch_delay=100
+        )
+        self.assertEqual(cache.pf_issued, 4)
+        self.assertEqual(cache.pf_dropped, 4)
+        cache.reset_stats()
+        self.assertEqual(cache.prefetch_stats()["issued"], 0)
+        with self.assertRaises(ValueError):
+            StridePrefetcher(entries=48)
+
+    def test_l2_prefetcher_sees_load_pc(self):
+        l2 = SetAssocCache(
+            256 * 1024, 8, 64, level="L2", hit_latency=14, prefetcher=StridePrefetcher(degree=8)
+        )
+        l1 = L1DCache(8 * 1024, 4, next_level=l2)
+        trace = [{"pc": 0x400, "load_addr": 0x40000 + 256 * i} for i in range(500)]
+        l1.run_trace(trace)
+        self.assertGreater(l2.pf_useful, 490)
+        self.assertEqual(l1.pf_issued, 0)
+
+    def test_fast_coverage_prefetch_parity(self):
+        fast = FastCoverageModel()
+        slow = CoverageModel()
+        for cov in (fast, slow):
+            cov.record_prefetch("L1", "issued", 3)
+            cov.record_prefetch("L2", "useless")
+        self.assertEqual(fast.summary(), slow.summary())
+        restored = CoverageModel.from_state(slow.to_state())
+        self.assertEqual(restored.prefetch, slow.prefetch)
+        fast.merge(slow)
+        self.assertEqual(fast.prefetch["L1"]["issued"], 6)
+        fast.reset()
+        self.assertEqual(fast.summary()["prefetch"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
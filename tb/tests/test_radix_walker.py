@@ -0,0 +1,114 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.isa.paged_memory import PagedMemory
+from rtl.lsu.lsu import LSU
+from rtl.mmu import PageWalker8, RadixPageWalker
+from rtl.mmu.radix_walker import PAGE_1G, PAGE_2M, PTE_V
+from tb.uvm_components.coverage import CoverageModel
+
+
+class RadixPageWalkerTest(unittest.TestCase):
+    def test_page_sizes(self):
+        pw = RadixPageWalker()
+        pw.map(0x1000, 0x80001000, perm="rw")
+        pw.map(0x40200000, 0x90000000, perm="rx", page_size=PAGE_2M)
+        pw.map(0x80000000, 0x100000000, perm="r", page_size=PAGE_1G)
+
+        self.assertEqual(pw.walk(0x1234), (0x80001234, False))
+        self.assertEqual((pw.last_depth, pw.last_page_size), (3, 0x1000))
+        self.assertEqual(pw.walk(0x403FFFF0, perm="x"), (0x901FFFF0, False))
+        self.assertEqual(pw.last_page_size, PAGE_2M)
+        self.assertEqual(pw.walk(0xBFFFFFF8), (0x13FFFFFF8, False))
+        self.assertEqual(pw.last_page_size, PAGE_1G)
+        self.assertEqual(pw.walk(0xBFFFFFF8, perm="w"), (0x13FFFFFF8, True))
+        self.assertEqual(pw.walk(0x2000), (0, True))
+        # root, two level-1 tables and one level-0 table; the 1 GiB page
+        # is a single leaf PTE in the root
+        self.assertEqual(pw._next_table - (1 << 40), 4 * 0x1000)
+
+    def test_map_errors(self):
+        pw = RadixPageWalker()
+        with self.assertRaises(ValueError):
+            pw.map(0x1000, 0x2000, page_size=0x4000)
+        with self.assertRaises(ValueError):
+            pw.map(0x201000, 0, page_size=PAGE_2M)
+        with self.assertRaises(ValueError):
+            pw.map(1 << 40, 0)
+        pw.map(0, 0, page_size=PAGE_2M)
+        with self.assertRaises(ValueError):
+            pw.map(0x1000, 0x1000)
+        with self.assertRaises(ValueError):
+            RadixPageWalker(mode="sv57")
+
+    def test_misaligned_superpage_faults(self):
+        mem = PagedMemory()
+        pw = RadixPageWalker(mem)
+        pw.map(0, 0, page_size=PAGE_2M)
+        l1_table = ((mem.read_word(pw.root) >> 10) << 12)
+        mem.write_word(l1_table, (0x1000 >> 12) << 10 | 0xCF)
+        pw.flush_pwc()
+        self.assertEqual(pw.walk(0x10), (0, True))
+
+    def test_page_walk_cache(self):
+        pw = RadixPageWalker(pwc_entries=2, pwc_latency=1, mem_latency=10)
+        for page in range(4):
+            pw.map(page << 12, 0x80000000 + (page << 12))
+        pw.map(1 << 30, 0x90000000)
+        pw.walk(0)
+        self.assertEqual((pw.last_depth, pw.last_latency), (3, 31))
+        pw.walk(0x3000)
+        self.assertEqual((pw.last_depth, pw.last_latency), (1, 11))
+        pw.walk(1 << 30)
+        self.assertEqual(pw.last_depth, 3)
+        self.assertEqual(pw.stats()["pwc_hits"], 1)
+        self.assertEqual(len(pw.pwc), 2)
+
+        cold = RadixPageWalker(pwc_entries=0)
+        cold.map(0, 0)
+        cold.walk(0)
+        cold.walk(0)
+        self.assertEqual((cold.last_depth, cold.last_latency), (3, 30))
+        self.assertEqual(cold.pwc_hit_rate(), 0.0)
+
+    def test_sv48(self):
+        pw = RadixPageWalker(mode="sv48")
+        va = 0x7F12_3456_7000
+        pw.map(va, 0x5000, perm="rw")
+        self.assertEqual(pw.walk(va | 0x18), (0x5018, False))
+        self.assertEqual(pw.last_depth, 4)
+        self.assertEqual(len(pw.page_sizes()), 4)
+        self.assertEqual(pw.walk(1 << 50), (0, True))
+        self.assertEqual(pw.last_depth, 0)
+
+    def test_dict_memory_and_golden_model_memory(self):
+        from rtl.isa.golden_model import GoldenModel
+
+        mem = {}
+        pw = RadixPageWalker(mem, table_base=0x10000)
+        pw.map(0x3000, 0x7000)
+        self.assertEqual(pw.walk(0x3008), (0x7008, False))
+        self.assertIn(0x10000, mem)
+
+        gm = GoldenModel(memory=PagedMemory())
+        walker = RadixPageWalker(gm.mem)
+        walker.map(0, 0, page_size=PAGE_1G)
+        self.assertTrue(gm.mem.read_word(walker.root) & PTE_V)
+        self.assertEqual(walker.walk(0x1234_5678), (0x1234_5678, False))
+
+    def test_lsu_with_radix_walker(self):
+        cov = CoverageModel()
+        radix = RadixPageWalker()
+        radix.map(0x40000000, 0x80000000, perm="rw", page_size=PAGE_1G)
+        lsu = LSU(walker=PageWalker8(radix=radix, coverage=cov), coverage=cov)
+        lsu.cycle([{"is_store": True, "addr": 0x40001000, "data": 7, "size": 8}, None])
+        res = lsu.cycle([{"is_store": False, "addr": 0x40001000, "size": 8, "dest": 1, "rob": 0}, None])
+        self.assertEqual(res[0]["data"], 7)
+        self.assertEqual(cov.summary()["page_walks"], 1)
+        self.assertEqual(lsu.mem.load(0x80001000), 7)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from tb.uvm_components import Scoreboard
+from tb.uvm_components.coverage import CoverageModel
+from tb.uvm_components.fast_coverage import FastCoverageModel
+from tb.uvm_components.regression import (
+    DEFAULT_TEST,
+    random_instruction_test,
+    run_regression,
+    shard_jobs,
+    tree_merge,
+)
+from tb.tests.test_fast_coverage import _random_events
+
+
+def failing_test(sb, seed):
+    """Regression test that fails for odd seeds."""
+    sb.commit(0x00500093, rd_arch=1, rd_val=5 + seed % 2)
+    return seed % 2 == 0
+
+
+class RegressionTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def _serial_summary(self, seeds):
+        cov = CoverageModel()
+        for seed in seeds:
+            self.assertTrue(random_instruction_test(Scoreboard(coverage=cov), seed))
+        return cov.summary()
+
+    def test_state_round_trip(self):
+        for cls in (CoverageModel, FastCoverageModel):
+            cov = cls()
+            _random_events(cov, 9)
+            state = json.loads(json.dumps(cov.to_state()))
+            for target in (CoverageModel, FastCoverageModel):
+                rebuilt = target.from_state(state)
+                self.assertIsInstance(rebuilt, target)
+                self.assertEqual(rebuilt.summary(), cov.summary())
+                self.assertEqual(rebuilt.to_state(), state)
+
+    def test_tree_merge_matches_sequential(self):
+        expected = CoverageModel()
+        models = []
+        for seed in range(7):
+            _random_events(expected, seed)
+            cov = FastCoverageModel()
+            _random_events(cov, seed)
+            models.append(cov)
+        self.assertEqual(tree_merge(models).summary(), expected.summary())
+        self.assertIsNone(tree_merge([]))
+
+    def test_shard_jobs(self):
+        plan = shard_jobs(["a", "b"], range(5), 3)
+        self.assertEqual(len(plan), 3)
+        self.assertEqual(sorted(job for shard in plan for job in shard),
+                         sorted((t, s) for t in "ab" for s in range(5)))
+        self.assertEqual(len(shard_jobs(["a"], [1], 8)), 1)
+
+    def test_parallel_matches_serial(self):
+        result = run_regression([DEFAULT_TEST], range(12), workers=2, shards=5)
+        self.assertEqual(result["failures"], [])
+        self.assertEqual(len(result["shards"]), 5)
+        self.assertEqual(sum(r["jobs"] for r in result["shards"]), 12)
+        self.assertTrue(all(r["seconds"] >= 0 for r in result["shards"]))
+        self.assertEqual(result["coverage"].summary(), self._serial_summary(range(12)))
+
+    def test_resume_from_partial_results(self):
+        first = run_regression([DEFAULT_TEST], range(8), workers=1, shards=4,
+                               out_dir=self.tmp, fast=True)
+        self.assertFalse(any(r["resumed"] for r in first["shards"]))
+        os.remove(os.path.join(self.tmp, "shard_0002.json"))
+        second = run_regression([DEFAULT_TEST], range(8), workers=1, shards=4,
+                                out_dir=self.tmp, fast=True)
+        self.assertEqual([r["resumed"] for r in second["shards"]], [True, True, False, True])
+        self.assertIsInstance(second["coverage"], FastCoverageModel)
+        self.assertEqual(second["coverage"].summary(), first["coverage"].summary())
+        # only shards whose job list is unchanged are reused
+        third = run_regression([DEFAULT_TEST], range(9), workers=1, shards=4, out_dir=self.tmp)
+        self.assertEqual([r["resumed"] for r in third["shards"]], [False, True, True, True])
+        self.assertEqual(third["coverage"].summary(), self._serial_summary(range(9)))
+
+    def test_failures_are_reported(self):
+        result = run_regression([__name__ + ":failing_test"], range(4), workers=1)
+        self.assertEqual(sorted(result["failures"]), [[__name__ + ":failing_test", 1],
+                                                      [__name__ + ":failing_test", 3]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -41,6 +41,29 @@ class RSBTest(unittest.TestCase):
         self.assertEqual(summary["rsb_overflow"], 1)
         self.assertEqual(summary["rsb_underflow"], 1)
 
+    def test_checkpoint_restore(self):
+        rsb = ReturnStackBuffer(depth=4)
+        rsb.push(0x100)
+        rsb.push(0x200)
+        cp = rsb.checkpoint()
+        # wrong path: a return pops 0x200 and a call overwrites its slot
+        rsb.pop()
+        rsb.push(0x999)
+        rsb.restore(cp)
+        self.assertEqual(rsb.pop(), 0x200)
+        self.assertEqual(rsb.pop(), 0x100)
+        # two wrong-path pops and a push reach below the saved top entry
+        rsb.push(0x100)
+        rsb.push(0x200)
+        cp = rsb.checkpoint()
+        rsb.pop()
+        rsb.pop()
+        rsb.push(0x999)
+        rsb.restore(cp)
+        self.assertEqual(rsb.pop(), 0x200)
+        self.assertEqual(rsb.pop(), 0x999)
+        self.assertEqual(rsb.repairs, 2)
+
 
 if __name__ == "__main__":
     unittest.main()
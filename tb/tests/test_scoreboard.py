@@ -5,7 +5,7 @@ import json
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 from tb.uvm_components import Scoreboard
-from tb.uvm_components.trace_utils import load_trace, load_trace_json
+from tb.uvm_components.trace_utils import load_trace, load_trace_json, load_trace_binary
 from tb.uvm_components.coverage import CoverageModel
 from rtl.isa.golden_model import GoldenModel
 
@@ -476,6 +476,74 @@ class ScoreboardTest(unittest.TestCase):
         for i, entry in enumerate(trace):
             self.assertEqual(entry["cycle"], i)
 
+    def _replay_log(self):
+        """Return a small retirement log as columns."""
+        return {
+            "instrs": [0x00500093, 0x10000113, 0x002081b3, 0x00312023,
+                       0x00013203, encode_branch(0, 1, 1, 8), 0xFFFFFFFF],
+            "pc": [0, 4, 8, 12, 16, 20, 28],
+            "rd": [1, 2, 3, -1, 4, -1, -1],
+            "rd_val": [5, 0x100, 0x105, 0, 0x105, 0, 0],
+            "mem_addr": [-1, -1, -1, 0x100, 0x100, -1, -1],
+            "mem_data": [0, 0, 0, 0x105, 0x105, 0, 0],
+            "exception": [None, None, None, None, None, None, "illegal"],
+        }
+
+    def test_replay_columns(self):
+        from array import array
+        log = self._replay_log()
+        sb = Scoreboard()
+        sb.gm.mem[0x100] = 0
+        # plain lists and array columns are accepted alike
+        log["rd_val"] = array("Q", log["rd_val"])
+        result = sb.replay(**log)
+        self.assertIsNone(result["first_mismatch"])
+        self.assertEqual(result["checked"], 7)
+        self.assertEqual(result["mismatches"], 0)
+        self.assertEqual((result["loads"], result["stores"]), (1, 1))
+        self.assertEqual((result["branches"], result["taken_branches"]), (1, 1))
+        self.assertEqual(result["exceptions"], {"illegal": 1})
+        self.assertEqual(sb.get_trace(), [])
+        self.assertEqual(sb.cycle, 7)
+
+    def test_replay_first_mismatch(self):
+        log = self._replay_log()
+        log["rd_val"][2] = 0x999
+        log["mem_data"][4] = 0x1
+        sb = Scoreboard()
+        sb.gm.mem[0x100] = 0
+        result = sb.replay(**log)
+        self.assertEqual(result["checked"], 3)
+        self.assertEqual(result["first_mismatch"], {
+            "index": 2, "pc": 8, "instr": 0x002081b3, "field": "rd_val",
+            "expected": 0x999, "actual": 0x105,
+        })
+        sb = Scoreboard()
+        sb.gm.mem[0x100] = 0
+        result = sb.replay(**log, stop_on_mismatch=False)
+        self.assertEqual(result["checked"], 7)
+        self.assertEqual(result["mismatches"], 2)
+        self.assertEqual(result["first_mismatch"]["index"], 2)
+
+    def test_replay_matches_commit(self):
+        log = self._replay_log()
+        log["exception"][6] = None
+        sb = Scoreboard()
+        sb.gm.mem[0x100] = 0
+        result = sb.replay(log["instrs"], exception=log["exception"])
+        self.assertEqual(result["first_mismatch"]["field"], "exception")
+        self.assertEqual(result["first_mismatch"]["actual"], "illegal")
+        cov_replay, cov_commit = CoverageModel(), CoverageModel()
+        sb = Scoreboard(coverage=cov_replay)
+        sb.gm.mem[0x100] = 0
+        sb.replay(log["instrs"])
+        ref = Scoreboard(coverage=cov_commit)
+        ref.gm.mem[0x100] = 0
+        for instr in log["instrs"]:
+            ref.commit(instr)
+        self.assertEqual(cov_replay.summary(), cov_commit.summary())
+        self.assertEqual(sb.gm.regs, ref.gm.regs)
+
     def test_branch_pc(self):
         sb = Scoreboard()
         sb.gm.mem[0x200] = 0
@@ -675,6 +743,66 @@ class ScoreboardTest(unittest.TestCase):
         os.remove(tmp)
         self.assertEqual(loaded, ret)
 
+    def _commit_addis(self, sb, count, bad=()):
+        """Commit ``addi x1,x0,i`` for each i, checking a wrong value at *bad*."""
+        for i in range(count):
+            instr = ((i & 0x7FF) << 20) | (1 << 7) | 0x13
+            sb.commit(instr, rd_arch=1, rd_val=i + (i in bad))
+
+    def test_trace_policy_last(self):
+        sb = Scoreboard(trace_policy="last", trace_depth=4)
+        self._commit_addis(sb, 10)
+        trace = sb.get_trace()
+        self.assertEqual([e["rd_val"] for e in trace], [6, 7, 8, 9])
+        self.assertEqual(trace[0]["cycle"], 6)
+        self.assertEqual(sb.trace_count, 10)
+        sb.reset()
+        self.assertEqual((sb.get_trace(), sb.trace_count), ([], 0))
+
+    def test_trace_policy_mismatch_window(self):
+        sb = Scoreboard(trace_policy="mismatch", trace_depth=3)
+        self._commit_addis(sb, 20, bad=(8, 12))
+        self.assertEqual(sb.first_mismatch, 8)
+        self.assertEqual([e["rd_val"] for e in sb.get_trace()], [6, 7, 8, 9, 10, 11])
+        # without a mismatch the policy behaves like a ring buffer
+        sb.reset()
+        self._commit_addis(sb, 5)
+        self.assertIsNone(sb.first_mismatch)
+        self.assertEqual([e["rd_val"] for e in sb.get_trace()], [2, 3, 4])
+
+    def test_trace_policy_spill(self):
+        path = os.path.join(os.path.dirname(__file__), "trace_spill.bin")
+        ref = Scoreboard()
+        self._commit_addis(ref, 10)
+        sb = Scoreboard(trace_policy="spill", trace_depth=4, spill_path=path)
+        self._commit_addis(sb, 10)
+        self.assertEqual(len(sb.trace), 2)
+        sb.close_trace()
+        loaded = load_trace_binary(path)
+        os.remove(path)
+        self.assertEqual(loaded, ref.get_trace())
+        self.assertEqual(sb.get_trace(), [])
+
+    def test_trace_policy_spill_across_reset(self):
+        path = os.path.join(os.path.dirname(__file__), "trace_spill_reset.bin")
+        sb = Scoreboard(trace_policy="spill", trace_depth=4, spill_path=path)
+        self._commit_addis(sb, 6)
+        self.assertEqual(len(sb.trace), 2)
+        sb.reset()
+        self._commit_addis(sb, 3)
+        sb.close_trace()
+        loaded = load_trace_binary(path)
+        os.remove(path)
+        self.assertEqual(len(loaded), 9)
+
+    def test_trace_policy_validation(self):
+        with self.assertRaises(ValueError):
+            Scoreboard(trace_policy="sometimes")
+        with self.assertRaises(ValueError):
+            Scoreboard(trace_policy="last")
+        with self.assertRaises(ValueError):
+            Scoreboard(trace_policy="spill", trace_depth=8)
+
     def test_dump_coverage(self):
         cov = CoverageModel()
         sb = Scoreboard(coverage=cov)
@@ -0,0 +1,116 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.cache.l1_dcache import L1DCache
+from rtl.cache.set_assoc_cache import LineMemory, SetAssocCache
+
+
+def _reference_lru(addresses, sets, ways, line_bytes):
+    """Return the hit/miss sequence of a list-based true-LRU cache."""
+    lines = [[] for _ in range(sets)]
+    result = []
+    for addr in addresses:
+        line = addr // line_bytes
+        s = lines[line % sets]
+        hit = line in s
+        if hit:
+            s.remove(line)
+        elif len(s) == ways:
+            s.pop(0)
+        s.append(line)
+        result.append(hit)
+    return result
+
+
+class SetAssocCacheTest(unittest.TestCase):
+    def test_geometry(self):
+        c = L1DCache()
+        self.assertEqual((c.sets, c.ways, c.line_bytes), (128, 8, 64))
+        with self.assertRaises(ValueError):
+            SetAssocCache(size=3000)
+        with self.assertRaises(ValueError):
+            SetAssocCache(replacement="fifo")
+
+    def test_lru_matches_reference(self):
+        rng = random.Random(1)
+        addrs = [rng.randrange(1 << 14) for _ in range(4000)]
+        c = SetAssocCache(4096, 4, 64, replacement="lru")
+        hits = []
+        for a in addrs:
+            before = c.hits
+            c.read(a)
+            hits.append(c.hits > before)
+        self.assertEqual(hits, _reference_lru(addrs, 16, 4, 64))
+
+    def test_plru_victim(self):
+        c = SetAssocCache(256, 4, 64, replacement="plru")
+        for line in range(4):
+            c.read(line * 64)
+        c.read(0)
+        c.read(64)
+        # tree PLRU protects the recently used pair and evicts from 2/3
+        c.read(4 * 64)
+        self.assertTrue(c.contains(0) and c.contains(64))
+        self.assertEqual(c.evictions, 1)
+        self.assertEqual(c.last_victim, 2 * 64)
+
+    def test_data_and_write_back(self):
+        rng = random.Random(7)
+        for policy in ("lru", "plru", "random"):
+            memory = LineMemory(latency=50)
+            c = SetAssocCache(1024, 2, 32, replacement=policy, next_level=memory, seed=3)
+            shadow = {}
+            for _ in range(3000):
+                addr = rng.randrange(1 << 13) & ~7
+                if rng.random() < 0.4:
+                    data = rng.getrandbits(64)
+                    wstrb = rng.choice([0xFF, 0x0F, 0x81, 0x3C])
+                    c.write(addr, data, wstrb=wstrb)
+                    old = shadow.get(addr, 0)
+                    for i in range(8):
+                        if (wstrb >> i) & 1:
+                            mask = 0xFF << (8 * i)
+                            old = (old & ~mask) | (data & mask)
+                    shadow[addr] = old
+                else:
+                    self.assertEqual(c.read(addr), shadow.get(addr, 0))
+            self.assertGreater(c.writebacks, 0)
+            c.flush()
+            for addr, val in shadow.items():
+                line = memory.lines[addr & ~31]
+                self.assertEqual(int.from_bytes(line[addr & 31:(addr & 31) + 8], "little"), val)
+
+    def test_two_levels_and_latency(self):
+        memory = LineMemory(latency=100)
+        l2 = SetAssocCache(1024, 4, 64, level="L2", hit_latency=12, next_level=memory)
+        l1 = SetAssocCache(256, 2, 64, hit_latency=4, next_level=l2)
+        l1.write(0x0, 0x1234)
+        self.assertEqual(l1.last_latency, 116)
+        self.assertEqual(l1.read(0x0), 0x1234)
+        self.assertEqual(l1.last_latency, 4)
+        # three more lines in set 0 push the dirty line down to L2
+        for addr in (0x80, 0x100, 0x180):
+            l1.read(addr)
+        self.assertFalse(l1.contains(0x0))
+        self.assertEqual(l1.writebacks, 1)
+        self.assertEqual(l1.read(0x0), 0x1234)
+        self.assertEqual(l1.last_latency, 16)
+        self.assertEqual(memory.writes, 0)
+
+    def test_coverage_and_strobe_compatibility(self):
+        from tb.uvm_components.coverage import CoverageModel
+
+        cov = CoverageModel()
+        c = L1DCache(coverage=cov, replacement="random")
+        c.write(0x100, 0x1122334455667788)
+        c.write(0x104, 0xAB << 32, wstrb=0x10)
+        self.assertEqual(c.read(0x100), 0x112233AB55667788)
+        self.assertEqual(cov.summary()["cache_misses"]["L1"], 1)
+        self.assertEqual(c.stats()["hits"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
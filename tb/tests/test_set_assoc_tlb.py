@@ -0,0 +1,153 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.lsu.lsu import LSU
+from rtl.mmu import PageWalker8, SetAssocTlb, SetAssocTlbL1, SetAssocTlbL2
+from tb.uvm_components.coverage import CoverageModel
+
+
+class ReferenceLru:
+    """List-based true LRU per set used as a differential reference."""
+
+    def __init__(self, sets, ways):
+        self.sets = [[] for _ in range(sets)]
+        self.ways = ways
+
+    def lookup(self, vpn):
+        lines = self.sets[vpn % len(self.sets)]
+        if vpn in lines:
+            lines.remove(vpn)
+            lines.append(vpn)
+            return True
+        return False
+
+    def refill(self, vpn):
+        lines = self.sets[vpn % len(self.sets)]
+        if vpn in lines:
+            lines.remove(vpn)
+        elif len(lines) == self.ways:
+            lines.pop(0)
+        lines.append(vpn)
+
+
+class SetAssocTlbTest(unittest.TestCase):
+    def test_geometry(self):
+        l1, l2 = SetAssocTlbL1(), SetAssocTlbL2()
+        self.assertEqual((l1.sets, l1.ways, l1.level), (8, 8, "L1"))
+        self.assertEqual((l2.sets, l2.ways, l2.level), (64, 8, "L2"))
+        with self.assertRaises(ValueError):
+            SetAssocTlb(entries=48, ways=8)
+        with self.assertRaises(ValueError):
+            SetAssocTlb(replacement="random")
+
+    def test_lookup_refill_and_fault(self):
+        tlb = SetAssocTlbL1()
+        self.assertEqual(tlb.lookup(0x1234), (False, None, False))
+        self.assertEqual(tlb.last_latency, 5)
+        tlb.refill(0x1234, 0x80001000, perm="r")
+        self.assertEqual(tlb.lookup(0x1FF8), (True, 0x80001FF8, False))
+        self.assertEqual(tlb.lookup(0x1000, perm="w"), (True, 0x80001000, True))
+        self.assertEqual(tlb.last_latency, 1)
+        self.assertIn(0x1000, tlb)
+        self.assertAlmostEqual(tlb.hit_rate(), 2 / 3)
+
+    def test_lru_matches_reference(self):
+        rng = random.Random(4)
+        tlb = SetAssocTlb(entries=32, ways=4)
+        ref = ReferenceLru(8, 4)
+        for _ in range(5000):
+            vpn = rng.randrange(96)
+            if rng.random() < 0.6:
+                self.assertEqual(tlb.lookup(vpn << 12)[0], ref.lookup(vpn))
+            else:
+                tlb.refill(vpn << 12, vpn << 12)
+                ref.refill(vpn)
+        self.assertEqual(len(tlb), sum(len(s) for s in ref.sets))
+
+    def test_plru_victim(self):
+        tlb = SetAssocTlb(entries=4, ways=4, replacement="plru")
+        for vpn in range(4):
+            tlb.refill(vpn << 12, 0)
+        # filling the set started a new epoch with way 3 as the only recent way
+        tlb.lookup(0x1000)
+        tlb.refill(0x9000, 0)
+        self.assertNotIn(0x0000, tlb)
+        for vpn in (1, 3, 9):
+            self.assertIn(vpn << 12, tlb)
+        self.assertEqual(tlb.evictions, 1)
+        rng = random.Random(2)
+        for _ in range(2000):
+            vpn = rng.randrange(12)
+            if not tlb.lookup(vpn << 12)[0]:
+                tlb.refill(vpn << 12, vpn << 12)
+            self.assertLessEqual(len(tlb), 4)
+        self.assertEqual(tlb.hits + tlb.misses, 2001)
+
+    def test_asid_vmid_and_flushes(self):
+        tlb = SetAssocTlbL2()
+        tlb.refill(0x4000, 0x10000, asid=1)
+        tlb.refill(0x4000, 0x20000, asid=2)
+        tlb.refill(0x5000, 0x30000, asid=1, global_page=True)
+        tlb.refill(0x4000, 0x40000, asid=1, vmid=3)
+        self.assertEqual(tlb.lookup(0x4000, asid=1)[1], 0x10000)
+        self.assertEqual(tlb.lookup(0x4000, asid=2)[1], 0x20000)
+        self.assertFalse(tlb.lookup(0x4000, asid=3)[0])
+        self.assertEqual(tlb.lookup(0x5000, asid=7)[1], 0x30000)
+        self.assertEqual(tlb.lookup(0x4000, asid=1, vmid=3)[1], 0x40000)
+
+        tlb.flush_asid(1)
+        self.assertFalse(tlb.lookup(0x4000, asid=1)[0])
+        self.assertTrue(tlb.lookup(0x5000, asid=1)[0])
+        self.assertTrue(tlb.lookup(0x4000, asid=1, vmid=3)[0])
+        tlb.flush_va(0x4FFF, asid=2)
+        self.assertFalse(tlb.lookup(0x4000, asid=2)[0])
+        tlb.flush_va(0x5000, asid=2)
+        self.assertTrue(tlb.lookup(0x5000, asid=2)[0])
+        tlb.flush_va(0x5000)
+        self.assertFalse(tlb.lookup(0x5000, asid=2)[0])
+        tlb.flush_vmid(3)
+        self.assertEqual(len(tlb), 0)
+        tlb.refill(0x6000, 0x6000)
+        tlb.flush()
+        self.assertEqual(len(tlb), 0)
+
+    def test_drop_in_for_lsu_with_coverage(self):
+        cov = CoverageModel()
+        walker = PageWalker8(coverage=cov)
+        walker.set_entry(0x1000, 0x80001000, perm="rw")
+        lsu = LSU(tlb_l1=SetAssocTlbL1(coverage=cov), tlb_l2=SetAssocTlbL2(coverage=cov),
+                  walker=walker, coverage=cov)
+        lsu.cycle([{"is_store": True, "addr": 0x1000, "data": 0x55, "size": 8}, None])
+        res = lsu.cycle([{"is_store": False, "addr": 0x1000, "size": 8, "dest": 1, "rob": 0}, None])
+        self.assertEqual(res[0]["data"], 0x55)
+        summary = cov.summary()
+        self.assertEqual(summary["tlb_misses"], {"L1": 1, "L2": 1})
+        self.assertEqual(summary["tlb_hits"]["L1"], 1)
+        self.assertEqual(summary["tlb_latency"]["L2"]["max"], 20)
+
+
+    def test_golden_model_with_set_assoc_tlb(self):
+        from rtl.isa.golden_model import GoldenModel
+
+        cov = CoverageModel()
+        gm = GoldenModel(coverage=cov)
+        gm.tlb_l1 = SetAssocTlbL1(coverage=cov)
+        gm.map_page(0x5000, 0x9000, perm="rw")
+        self.assertIsNone(gm.tlb_l1.peek(0x5000))
+        self.assertEqual(gm.translate(0x5000, "r"), (0x9000, None))
+        entry = gm.tlb_l1.peek(0x5000)
+        self.assertIsNotNone(entry)
+        self.assertEqual(gm.tlb_l1.hits + gm.tlb_l1.misses, 1)
+        # the memoized translation still counts as an L1 hit
+        for _ in range(3):
+            self.assertEqual(gm.translate(0x5000, "r"), (0x9000, None))
+        self.assertEqual(gm.tlb_l1.hits, 3)
+        self.assertEqual(cov.summary()["tlb_hits"]["L1"], 3)
+        self.assertIs(gm.tlb_l1.peek(0x5000), entry)
+        self.assertEqual(gm.tlb_l1.hits, 3)
+
+if __name__ == "__main__":
+    unittest.main()
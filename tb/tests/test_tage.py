@@ -1,9 +1,10 @@
 import os
+import random
 import sys
 import unittest
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
-from rtl.bp.tage import TAGEPredictor
+from rtl.bp.tage import TAGEPredictor, history_lengths
 
 class TAGEPredictorTest(unittest.TestCase):
     def test_basic_predict_update(self):
@@ -25,5 +26,71 @@ class TAGEPredictorTest(unittest.TestCase):
         summary = cov.summary()
         self.assertEqual(summary["tage_entries"].get(0, 0), 1)
 
+    def test_folded_history_matches_direct_fold(self):
+        tage = TAGEPredictor(max_history=200)
+        rng = random.Random(3)
+        for _ in range(1000):
+            tage.update(0x1000 + 4 * rng.randrange(50), rng.random() < 0.6)
+        hist = tage.history(256)
+        for t, length in enumerate(tage.lengths):
+            for width, folds in ((tage._index_bits, tage._fold_index),
+                                 (tage.tag_bits, tage._fold_tag0),
+                                 (tage.tag_bits - 1, tage._fold_tag1)):
+                direct = 0
+                for age in range(length):
+                    direct ^= ((hist >> age) & 1) << (age % width)
+                self.assertEqual(folds[t], direct)
+
+    def test_geometric_lengths_and_storage(self):
+        tage = TAGEPredictor()
+        self.assertEqual(tage.lengths, [8, 34, 149, 640])
+        self.assertEqual(len(tage.ctr), 4 * 1024)
+        self.assertEqual(len(tage.base), 4096)
+        self.assertEqual(history_lengths(1, 12, 100), [12])
+        with self.assertRaises(ValueError):
+            TAGEPredictor(tables=1)
+        with self.assertRaises(ValueError):
+            TAGEPredictor(entries=1000)
+
+    def test_learns_long_loop(self):
+        # a loop that exits every 40 iterations needs more than 5 bits
+        tage = TAGEPredictor()
+        misses = 0
+        for i in range(7999):
+            taken = i % 40 != 39
+            if i >= 4000 and tage.predict(0x400) != taken:
+                misses += 1
+            tage.update(0x400, taken)
+        self.assertLess(misses, 10)
+        # the next iteration exits; a tagged table must know it
+        self.assertFalse(tage.predict(0x400))
+        self.assertGreater(tage.provider(0x400), 0)
+
+    def test_correlated_branches(self):
+        tage = TAGEPredictor()
+        rng = random.Random(1)
+        misses = 0
+        for i in range(6000):
+            first = rng.random() < 0.5
+            tage.update(0x100, first)
+            # the second branch repeats the first
+            if i >= 3000 and tage.predict(0x200) != first:
+                misses += 1
+            tage.update(0x200, first)
+        self.assertLess(misses, 30)
+
+    def test_allocation_events(self):
+        from tb.uvm_components.coverage import CoverageModel
+        cov = CoverageModel()
+        tage = TAGEPredictor(tables=3, entries=64, coverage=cov)
+        for i in range(200):
+            tage.update(0x80, i % 3 == 0)
+        entries = cov.summary()["tage_entries"]
+        self.assertEqual(entries[0], 1)
+        self.assertGreater(entries.get(1, 0) + entries.get(2, 0), 0)
+        tage.reset()
+        self.assertEqual(tage.history(), 0)
+        self.assertFalse(any(tage.valid))
+
 if __name__ == '__main__':
     unittest.main()
@@ -15,7 +15,8 @@ class TlbL1Test(unittest.TestCase):
         self.assertFalse(hit)
         self.assertFalse(fault)
         self.assertEqual(cov.summary()['tlb_misses']['L1'], 1)
-        self.assertEqual(cov.summary()['tlb_latency']['L1'], [5])
+        self.assertEqual(cov.summary()['tlb_latency']['L1']['count'], 1)
+        self.assertEqual(cov.summary()['tlb_latency']['L1']['max'], 5)
 
         tlb.refill(va, 0x80001000, perm='rw')
         hit, pa, fault = tlb.lookup(va, perm='r')
@@ -23,7 +24,7 @@ class TlbL1Test(unittest.TestCase):
         self.assertEqual(pa, 0x80001000)
         self.assertFalse(fault)
         self.assertEqual(cov.summary()['tlb_hits']['L1'], 1)
-        self.assertEqual(cov.summary()['tlb_latency']['L1'][-1], 1)
+        self.assertEqual(cov.summary()['tlb_latency']['L1']['min'], 1)
 
         hit, pa, fault = tlb.lookup(va, perm='x')
         self.assertTrue(hit)
@@ -14,7 +14,8 @@ class TlbL2Test(unittest.TestCase):
         hit, pa, fault = tlb.lookup(va)
         self.assertFalse(hit)
         self.assertEqual(cov.summary()['tlb_misses']['L2'], 1)
-        self.assertEqual(cov.summary()['tlb_latency']['L2'], [20])
+        self.assertEqual(cov.summary()['tlb_latency']['L2']['count'], 1)
+        self.assertEqual(cov.summary()['tlb_latency']['L2']['max'], 20)
 
         tlb.refill(va, 0x80001000, perm='rw')
         hit, pa, fault = tlb.lookup(va, perm='r')
@@ -22,7 +23,7 @@ class TlbL2Test(unittest.TestCase):
         self.assertEqual(pa, 0x80001000)
         self.assertFalse(fault)
         self.assertEqual(cov.summary()['tlb_hits']['L2'], 1)
-        self.assertEqual(cov.summary()['tlb_latency']['L2'][-1], 8)
+        self.assertEqual(cov.summary()['tlb_latency']['L2']['min'], 8)
 
         hit, pa, fault = tlb.lookup(va, perm='x')
         self.assertTrue(fault)
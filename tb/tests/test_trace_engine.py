@@ -0,0 +1,97 @@
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.cache.set_assoc_cache import SetAssocCache
+from rtl.cache.trace_engine import TraceEngine, address_chunks
+from tb.uvm_components.trace_utils import save_trace_binary
+
+
+def _workload(seed, n=6000):
+    """Mix of a hot array, a streaming sweep and random references."""
+    rng = random.Random(seed)
+    addrs = []
+    for i in range(n):
+        r = rng.random()
+        if r < 0.5:
+            addrs.append(0x10000 + 8 * rng.randrange(1024))
+        elif r < 0.8:
+            addrs.append(0x400000 + 16 * i)
+        else:
+            addrs.append(rng.randrange(1 << 20))
+    return addrs
+
+
+class TraceEngineTest(unittest.TestCase):
+    CONFIGS = [(1024, 1), (1024, 4), (4096, 4), (4096, 8), (8192, 8), (16384, 16)]
+
+    def test_matches_lru_simulation(self):
+        addrs = _workload(1)
+        engine = TraceEngine(self.CONFIGS).run(addrs, chunk=1000)
+        for res in engine.results():
+            cache = SetAssocCache(res["size"], res["ways"], 64, replacement="lru")
+            for a in addrs:
+                cache.probe(a) or cache.insert(a)
+            self.assertEqual(res["misses"], cache.misses, res)
+        self.assertEqual(sorted(engine.profiles), [4, 8, 16])
+        self.assertLessEqual(engine.cold_misses, engine.results()[0]["misses"])
+
+    def test_curve_is_monotonic_per_set_count(self):
+        engine = TraceEngine([(64 * 64 * 8, 8)]).run(_workload(2))
+        curve = engine.curve()
+        self.assertEqual([p[1] for p in curve], list(range(1, 9)))
+        ratios = [p[3] for p in curve]
+        self.assertEqual(ratios, sorted(ratios, reverse=True))
+        self.assertEqual(ratios[-1], engine.results()[0]["miss_ratio"])
+
+    def test_trace_entries_and_binary_file(self):
+        entries = []
+        for i, addr in enumerate(_workload(3, 2000)):
+            entry = {"cycle": i, "pc": 4 * i, "load_addr": None, "store_addr": None}
+            entry["store_addr" if i % 3 == 0 else "load_addr"] = addr
+            entries.append(entry)
+        entries.append({"load_addr": 0x40, "store_addr": 0x80})
+        expected = [e.get("load_addr") if e.get("load_addr") is not None else e["store_addr"]
+                    for e in entries[:-1]] + [0x40, 0x80]
+        chunks = list(address_chunks(entries, chunk=512))
+        self.assertEqual([int(a) for c in chunks for a in c], expected)
+        self.assertEqual(len(chunks), 4)
+        loads = [int(a) for c in address_chunks(entries, kinds=("load",)) for a in c]
+        self.assertEqual(len(loads), sum(1 for e in entries if e.get("load_addr") is not None))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.bin")
+            save_trace_binary(entries, path)
+            from_file = [int(a) for c in address_chunks(path) for a in c]
+            self.assertEqual(from_file, expected)
+            a = TraceEngine(self.CONFIGS).run(path).results()
+        b = TraceEngine(self.CONFIGS).run(entries).results()
+        self.assertEqual(a, b)
+
+    def test_kinds_and_seen_limit(self):
+        with self.assertRaises(ValueError):
+            address_chunks([0x40], kinds=())
+        with self.assertRaises(ValueError):
+            TraceEngine(self.CONFIGS).run([0x40], kinds=("loads",))
+        addrs = _workload(4, 3000)
+        full = TraceEngine(self.CONFIGS).run(addrs, chunk=500)
+        capped = TraceEngine(self.CONFIGS, max_seen=100).run(addrs, chunk=500)
+        self.assertTrue(full.cold_exact)
+        self.assertFalse(capped.cold_exact)
+        self.assertIsNone(capped._seen)
+        self.assertLess(capped.cold_misses, full.cold_misses)
+        self.assertGreaterEqual(capped.cold_misses, 100)
+        self.assertEqual(capped.results(), full.results())
+
+    def test_bad_config(self):
+        with self.assertRaises(ValueError):
+            TraceEngine([(3000, 4)])
+        with self.assertRaises(ValueError):
+            TraceEngine([(1024, 4)], line_bytes=48)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -3,8 +3,18 @@ from tb.uvm_components.trace_utils import (
     load_trace,
     save_trace_json,
     load_trace_json,
+    save_trace_binary,
+    load_trace_binary,
+    TraceWriter,
+    TraceReader,
+    csv_to_binary,
+    binary_to_csv,
+    json_to_binary,
+    binary_to_json,
 )
+from tb.uvm_components.scoreboard import Scoreboard
 import os
+import pytest
 
 
 def test_save_and_load_trace(tmp_path):
@@ -61,3 +71,121 @@ def test_save_and_load_trace_json(tmp_path):
     save_trace_json(entries, path)
     loaded = load_trace_json(path)
     assert loaded == entries
+
+
+def _sample_entries(n=50):
+    entries = []
+    for i in range(n):
+        entries.append({
+            "cycle": i,
+            "pc": 4 * i,
+            "instr": 0x00500093 + i,
+            "next_pc": 4 * i + 4,
+            "rd_arch": i % 32 if i % 3 else None,
+            "rd_val": (i * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF,
+            "store_addr": 0x100 + i if i % 5 == 0 else None,
+            "store_data": i if i % 5 == 0 else None,
+            "load_addr": None,
+            "load_data": None,
+            "exception": ["page", None, "illegal", None][i % 4],
+            "branch_taken": bool(i & 1),
+            "branch_target": 0x40 if i & 1 else None,
+            "pred_taken": False,
+            "pred_target": None,
+            "mispredict": bool(i & 1),
+            "rob_idx": i if i % 7 else None,
+        })
+    return entries
+
+
+@pytest.mark.parametrize("compression", [None, "zlib", "lzma"])
+def test_binary_trace_roundtrip(tmp_path, compression):
+    entries = _sample_entries()
+    path = tmp_path / "trace.bin"
+    save_trace_binary(entries, path, compression=compression)
+    assert load_trace_binary(path) == entries
+    with TraceReader(path) as reader:
+        assert reader.compression == compression
+        assert len(reader) == len(entries)
+        assert list(reader) == entries
+
+
+def test_binary_trace_streaming_and_seek(tmp_path):
+    entries = _sample_entries(1000)
+    path = tmp_path / "trace.bin"
+    with TraceWriter(path, chunk_records=64) as writer:
+        for e in entries:
+            writer.write(e)
+    with TraceReader(path) as reader:
+        assert len(reader) == 1000
+        for i in (0, 63, 64, 500, 999, -1):
+            assert reader[i] == entries[i]
+        with pytest.raises(IndexError):
+            reader[1000]
+    # new exception names introduced mid-chunk are visible to later records
+    with TraceWriter(path, compression="zlib", chunk_records=4) as writer:
+        writer.write({"pc": 0, "exception": None})
+        writer.write({"pc": 4, "exception": "ecall"})
+        writer.write({"pc": 8, "exception": "ebreak"})
+    with TraceReader(path) as reader:
+        assert [e["exception"] for e in reader] == [None, "ecall", "ebreak"]
+        assert reader[0]["instr"] is None
+
+
+def test_binary_trace_rejects_other_files(tmp_path):
+    path = tmp_path / "trace.csv"
+    save_trace(_sample_entries(1), path)
+    with pytest.raises(ValueError):
+        TraceReader(path)
+
+
+def test_binary_trace_converters(tmp_path):
+    entries = _sample_entries()
+    csv_path = tmp_path / "trace.csv"
+    json_path = tmp_path / "trace.json"
+    bin_path = tmp_path / "trace.bin"
+    save_trace(entries, csv_path)
+    assert csv_to_binary(csv_path, bin_path, compression="zlib") == len(entries)
+    assert load_trace_binary(bin_path) == entries
+    out_csv = tmp_path / "out.csv"
+    binary_to_csv(bin_path, out_csv)
+    assert out_csv.read_text() == csv_path.read_text()
+
+    save_trace_json(entries, json_path)
+    assert json_to_binary(json_path, bin_path) == len(entries)
+    out_json = tmp_path / "out.json"
+    binary_to_json(bin_path, out_json)
+    assert out_json.read_text() == json_path.read_text()
+    save_trace_binary([], bin_path)
+    binary_to_json(bin_path, out_json)
+    assert load_trace_json(out_json) == []
+
+
+def test_scoreboard_streams_to_trace_writer(tmp_path):
+    path = tmp_path / "trace.bin"
+    with TraceWriter(path, chunk_records=2) as writer:
+        sb = Scoreboard(trace_writer=writer)
+        sb.commit(0x00500093, rd_arch=1, rd_val=5)
+        sb.commit_bundle([0x00300113, 0x002081B3], rd_arch_list=[2, 3], rd_val_list=[3, 8])
+        sb.commit(0xFFFFFFFF, exception="illegal")
+    assert load_trace_binary(path) == sb.get_trace()
+    other = tmp_path / "dump.bin"
+    assert sb.dump_trace_binary(other, compression="lzma") == sb.get_trace()
+    assert load_trace_binary(other) == sb.get_trace()
+
+
+def test_binary_trace_close_with_live_generators(tmp_path):
+    path = tmp_path / "trace.bin"
+    save_trace_binary(_sample_entries(100), path)
+    reader = TraceReader(path)
+    records = reader.records()
+    entries = iter(reader)
+    columns = reader.column_chunks("pc")
+    next(records)
+    next(entries)
+    next(columns)
+    # the generators hold views into the mapping; closing finishes them
+    reader.close()
+    assert next(records, None) is None
+    assert next(entries, None) is None
+    assert next(columns, None) is None
@@ -0,0 +1,62 @@
+import os
+import random
+import sys
+import unittest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from rtl.ex_units import vector_lanes
+from rtl.ex_units.vector_lanes import from_array, merge, pack, to_array, unpack, vadd, vfma, vmul
+
+M64 = (1 << 64) - 1
+
+
+def lanewise(fn, *vecs):
+    res = 0
+    for lane in range(8):
+        args = [(v >> (64 * lane)) & M64 for v in vecs]
+        res |= (fn(*args) & M64) << (64 * lane)
+    return res
+
+
+class VectorLanesTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(5)
+        edge = [0, 1, M64, 1 << 63, (1 << 63) - 1]
+        self.vecs = [
+            sum(rng.choice(edge + [rng.getrandbits(64)]) << (64 * i) for i in range(8))
+            for _ in range(200)
+        ]
+        self.rng = rng
+
+    def test_pack_unpack(self):
+        for vec in self.vecs:
+            lanes = unpack(vec)
+            self.assertEqual(lanes, tuple((vec >> (64 * i)) & M64 for i in range(8)))
+            self.assertEqual(pack(lanes), vec)
+            self.assertEqual(from_array(to_array(vec)), vec)
+        # bits above 512 are ignored
+        self.assertEqual(unpack(1 << 512 | 3)[0], 3)
+
+    def test_ops_match_lane_loops(self):
+        for a, b, c in zip(self.vecs, self.vecs[1:], self.vecs[2:]):
+            self.assertEqual(vadd(a, b), lanewise(lambda x, y: x + y, a, b))
+            self.assertEqual(vmul(a, b), lanewise(lambda x, y: x * y, a, b))
+            self.assertEqual(vfma(a, b, c), lanewise(lambda x, y, z: x * y + z, a, b, c))
+
+    def test_merge(self):
+        new, old = self.vecs[0], self.vecs[1]
+        for mask in (0x00, 0x01, 0x5A, 0xFF, 0x1FF):
+            expected = 0
+            for lane in range(8):
+                src = new if (mask >> lane) & 1 else old
+                expected |= ((src >> (64 * lane)) & M64) << (64 * lane)
+            self.assertEqual(merge(mask, new, old), expected)
+
+    def test_array_backend(self):
+        arr = to_array(self.vecs[3])
+        self.assertEqual(len(arr), vector_lanes.LANES)
+        self.assertEqual(int(arr[0]), self.vecs[3] & M64)
+
+
+if __name__ == "__main__":
+    unittest.main()
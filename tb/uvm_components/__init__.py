@@ -5,11 +5,17 @@ from .data_memory_model import DataMemoryModel
 from .reset_generator import ResetGenerator
 from .dvfs_bfm import DVFSBFM
 from .coverage import CoverageModel
+from .fast_coverage import FastCoverageModel
+from .latency_histogram import LatencyHistogram
 from .trace_utils import (
     save_trace,
     load_trace,
     save_trace_json,
     load_trace_json,
+    save_trace_binary,
+    load_trace_binary,
+    TraceWriter,
+    TraceReader,
 )
 from rtl.lsu.lsu import LSU
 from rtl.lsu.vector_lsu import VectorLSU
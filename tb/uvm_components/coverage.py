@@ -1,3 +1,39 @@
+from functools import partial
+
+from .latency_histogram import LatencyHistogram
+
+# events counted per level by CoverageModel.record_prefetch()
+PREFETCH_EVENTS = ("issued", "useful", "late", "useless", "bytes")
+
+
+def instruction_immediate(instr):
+    """Return the sign-extended I/S/B/J immediate of *instr*, else ``0``."""
+    opcode = instr & 0x7F
+    imm = 0
+    if opcode in (0x13, 0x03, 0x67):
+        imm = ((instr >> 20) & 0xFFF)
+        sign = 1 << 11
+        imm = (imm & (sign - 1)) - (imm & sign)
+    elif opcode == 0x23:
+        imm = ((instr >> 7) & 0x1F) | (((instr >> 25) & 0x7F) << 5)
+        sign = 1 << 11
+        imm = (imm & (sign - 1)) - (imm & sign)
+    elif opcode == 0x63:
+        imm = ((instr >> 7) & 0x1E) | ((instr >> 20) & 0x7E0)
+        imm |= ((instr >> 7) & 0x1) << 11
+        imm |= (instr >> 31) << 12
+        sign = 1 << 12
+        imm = (imm & (sign - 1)) - (imm & sign)
+    elif opcode == 0x6F:
+        imm = ((instr >> 21) & 0x3FF) | ((instr >> 20) & 0x1) << 10
+        imm |= ((instr >> 12) & 0xFF) << 11
+        imm |= (instr >> 31) << 19
+        imm = ((imm << 1) & 0x1FFFFF)
+        sign = 1 << 20
+        imm = (imm & (sign - 1)) - (imm & sign)
+    return imm
+
+
 class CoverageModel:
     """Collects simple functional coverage statistics."""
     def __init__(self):
@@ -10,12 +46,14 @@ class CoverageModel:
         self.tlb_hits = {"L1": 0, "L2": 0}
         self.tlb_misses = {"L1": 0, "L2": 0}
         self.tlb_faults = {"L1": 0, "L2": 0}
-        # store a list of observed lookup latencies per TLB level
-        self.tlb_latency = {"L1": [], "L2": []}
+        # histogram of observed lookup latencies per TLB level
+        self.tlb_latency = {"L1": LatencyHistogram(), "L2": LatencyHistogram()}
         self.immediates = set()
         self.rsb_underflow = 0
         self.rsb_overflow = 0
         self.exceptions = {}
+        # prefetch events per cache level, see record_prefetch()
+        self.prefetch = {}
         self.branches = 0
         self.mispredicts = 0
         self.page_walks = 0
@@ -40,6 +78,7 @@ class CoverageModel:
             self.tlb_faults[lvl] = 0
             self.tlb_latency[lvl].clear()
         self.exceptions.clear()
+        self.prefetch.clear()
         self.immediates.clear()
         self.rsb_underflow = 0
         self.rsb_overflow = 0
@@ -47,6 +86,10 @@ class CoverageModel:
         self.mispredicts = 0
         self.page_walks = 0
         self.page_walk_faults = 0
+        self.vector_loads = 0
+        self.vector_stores = 0
+        self.vector_gathers = 0
+        self.vector_scatters = 0
 
     def record_opcode(self, opcode: int):
         """Record execution of an opcode (7-bit value)."""
@@ -82,12 +125,29 @@ class CoverageModel:
 
     def record_tlb_latency(self, level: str, cycles: int):
         """Record the observed lookup latency for *level* ('L1','L2')."""
-        self.tlb_latency[level].append(int(cycles))
+        self.tlb_latency[level].record(cycles)
+
+    def record_tlb_lookup(self, level: str, hit: bool, cycles: int, fault: bool):
+        """Record a complete TLB lookup: outcome, latency and any fault."""
+        self.record_tlb(level, hit)
+        self.record_tlb_latency(level, cycles)
+        if fault:
+            self.record_tlb_fault(level)
 
     def record_tlb_fault(self, level: str):
         """Record a TLB permission fault for *level* ('L1','L2')."""
         self.tlb_faults[level] += 1
 
+    def record_instruction(self, instr: int):
+        """Record the opcode, immediate and vector memory use of *instr*."""
+        opcode = instr & 0x7F
+        self.record_opcode(opcode)
+        self.record_immediate(instruction_immediate(instr))
+        if opcode == 0x07:
+            self.record_vector_load()
+        elif opcode == 0x27:
+            self.record_vector_store()
+
     def record_immediate(self, imm: int):
         """Record an immediate value used by an instruction."""
         self.immediates.add(imm & 0xFFFFFFFFFFFFFFFF)
@@ -104,6 +164,17 @@ class CoverageModel:
         """Record an exception code such as 'illegal' or 'page'."""
         self.exceptions[exc] = self.exceptions.get(exc, 0) + 1
 
+    def record_prefetch(self, level: str, event: str, count: int = 1):
+        """Record *count* prefetch *event* at cache *level*.
+
+        Events are ``"issued"``, ``"useful"``, ``"late"``, ``"useless"``
+        and ``"bytes"`` (bytes fetched by prefetches).
+        """
+        events = self.prefetch.get(level)
+        if events is None:
+            events = self.prefetch[level] = dict.fromkeys(PREFETCH_EVENTS, 0)
+        events[event] += count
+
     def record_branch(self, mispredict: bool):
         """Record a branch outcome and whether it was mispredicted."""
         self.branches += 1
@@ -132,6 +203,16 @@ class CoverageModel:
         """Record a vector scatter operation."""
         self.vector_scatters += 1
 
+    def recorder(self, event: str, *args):
+        """Return a callable recording *event* with leading *args* bound.
+
+        ``recorder("tlb_lookup", "L1")`` returns a callable equivalent to
+        ``lambda *a: self.record_tlb_lookup("L1", *a)``.  Components fetch
+        their recorders once at construction so each event costs a single
+        call on the hot path.
+        """
+        return partial(getattr(self, "record_" + event), *args)
+
     def opcode_coverage(self):
         """Return the set of unique opcodes seen."""
         return set(self.opcodes)
@@ -148,11 +229,12 @@ class CoverageModel:
             "tlb_hits": dict(self.tlb_hits),
             "tlb_misses": dict(self.tlb_misses),
             "tlb_faults": dict(self.tlb_faults),
-            "tlb_latency": {lvl: list(self.tlb_latency[lvl]) for lvl in self.tlb_latency},
+            "tlb_latency": {lvl: h.summary() for lvl, h in self.tlb_latency.items()},
             "immediates": len(self.immediates),
             "rsb_underflow": self.rsb_underflow,
             "rsb_overflow": self.rsb_overflow,
             "exceptions": dict(self.exceptions),
+            "prefetch": {lvl: dict(e) for lvl, e in self.prefetch.items()},
             "branches": self.branches,
             "mispredicts": self.mispredicts,
             "page_walks": self.page_walks,
@@ -163,6 +245,66 @@ class CoverageModel:
             "vector_scatters": self.vector_scatters,
         }
 
+    # counters copied verbatim by to_state()/from_state()
+    _STATE_COUNTERS = (
+        "rsb_underflow", "rsb_overflow", "branches", "mispredicts",
+        "page_walks", "page_walk_faults", "vector_loads", "vector_stores",
+        "vector_gathers", "vector_scatters",
+    )
+    _STATE_LEVELS = ("cache_hits", "cache_misses", "tlb_hits", "tlb_misses", "tlb_faults")
+
+    def to_state(self):
+        """Return the complete coverage state as a JSON-friendly dictionary.
+
+        Unlike :py:meth:`summary`, the state keeps the sets of opcodes,
+        immediates and predictor events, so models rebuilt with
+        :py:meth:`from_state` can still be merged exactly.
+        """
+        state = {
+            "opcodes": sorted(self.opcodes),
+            "immediates": sorted(self.immediates),
+            "btb_events": sorted([i, t] for i, t in self.btb_events),
+            "tage_events": {
+                str(table): sorted([i, t] for i, t in events)
+                for table, events in self.tage_events.items()
+            },
+            "ibp_events": sorted([i, t] for i, t in self.ibp_events),
+            "tlb_latency": {lvl: h.summary() for lvl, h in self.tlb_latency.items()},
+            "exceptions": dict(self.exceptions),
+            "prefetch": {lvl: dict(e) for lvl, e in self.prefetch.items()},
+        }
+        for name in self._STATE_LEVELS:
+            state[name] = dict(getattr(self, name))
+        for name in self._STATE_COUNTERS:
+            state[name] = getattr(self, name)
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        """Return a new model holding the coverage in *state*."""
+        plain = CoverageModel()
+        plain.opcodes.update(state["opcodes"])
+        plain.immediates.update(state["immediates"])
+        plain.btb_events.update((i, t) for i, t in state["btb_events"])
+        for table, events in state["tage_events"].items():
+            plain.tage_events[int(table)] = {(i, t) for i, t in events}
+        plain.ibp_events.update((i, t) for i, t in state["ibp_events"])
+        for lvl, hist in state["tlb_latency"].items():
+            plain.tlb_latency[lvl] = LatencyHistogram.from_summary(hist)
+        plain.exceptions.update(state["exceptions"])
+        for lvl, events in state.get("prefetch", {}).items():
+            for event, cnt in events.items():
+                plain.record_prefetch(lvl, event, cnt)
+        for name in cls._STATE_LEVELS:
+            getattr(plain, name).update(state[name])
+        for name in cls._STATE_COUNTERS:
+            setattr(plain, name, state[name])
+        if cls is CoverageModel:
+            return plain
+        model = cls()
+        model.merge(plain)
+        return model
+
     def save_summary(self, path: str):
         """Write the coverage summary to *path* as JSON."""
 
@@ -197,12 +339,15 @@ class CoverageModel:
             self.tlb_hits[lvl] += other.tlb_hits[lvl]
             self.tlb_misses[lvl] += other.tlb_misses[lvl]
             self.tlb_faults[lvl] += other.tlb_faults[lvl]
-            self.tlb_latency[lvl].extend(other.tlb_latency[lvl])
+            self.tlb_latency[lvl].merge(other.tlb_latency[lvl])
         self.immediates |= other.immediates
         self.rsb_underflow += other.rsb_underflow
         self.rsb_overflow += other.rsb_overflow
         for exc, cnt in other.exceptions.items():
             self.exceptions[exc] = self.exceptions.get(exc, 0) + cnt
+        for lvl, events in other.prefetch.items():
+            for event, cnt in events.items():
+                self.record_prefetch(lvl, event, cnt)
         self.branches += other.branches
         self.mispredicts += other.mispredicts
         self.page_walks += other.page_walks
@@ -0,0 +1,327 @@
+from array import array
+
+from .coverage import CoverageModel, instruction_immediate
+from .latency_histogram import LatencyHistogram
+
+MASK64 = 0xFFFFFFFFFFFFFFFF
+
+# counter slots; slot 0 is unused so an index of 0 can mean "no event"
+_SLOTS = [
+    None,
+    ("cache_hits", "L1"), ("cache_hits", "L2"), ("cache_hits", "L3"),
+    ("cache_misses", "L1"), ("cache_misses", "L2"), ("cache_misses", "L3"),
+    ("tlb_hits", "L1"), ("tlb_hits", "L2"),
+    ("tlb_misses", "L1"), ("tlb_misses", "L2"),
+    ("tlb_faults", "L1"), ("tlb_faults", "L2"),
+    "rsb_underflow", "rsb_overflow", "branches", "mispredicts",
+    "page_walks", "page_walk_faults", "vector_loads", "vector_stores",
+    "vector_gathers", "vector_scatters",
+]
+EVENT_IDS = {slot: idx for idx, slot in enumerate(_SLOTS) if slot is not None}
+_LEVEL_GROUPS = ("cache_hits", "cache_misses", "tlb_hits", "tlb_misses", "tlb_faults")
+_SCALARS = tuple(s for s in _SLOTS if isinstance(s, str))
+
+# immediates in [-IMM_BIAS, IMM_BIAS) are tracked in a bitmap, which covers
+# every I/S/B/J-type immediate
+IMM_BIAS = 1 << 20
+# latencies below this get their own counter before reaching the histogram
+LATENCY_SLOTS = 128
+
+
+class FastCoverageModel(CoverageModel):
+    """Drop-in :class:`CoverageModel` built on preallocated counters.
+
+    Event counts live in one ``array('Q')`` indexed by the integer IDs in
+    :data:`EVENT_IDS`, executed opcodes and immediates are bit-vectors and
+    small TLB latencies are counted in fixed arrays that are only folded
+    into :class:`LatencyHistogram` objects when a summary is taken.
+    ``record_instruction`` decodes each distinct instruction word once.
+
+    The ``record_*`` methods, :py:meth:`recorder` hooks, :py:meth:`summary`
+    and :py:meth:`merge` behave exactly like the base class, and the
+    attributes of the base class (``opcodes``, ``cache_hits``,
+    ``tlb_latency`` and so on) are available as read-only views so the two
+    models can be merged in either direction.
+    """
+
+    def __init__(self):
+        self.counts = array("Q", bytes(8 * len(_SLOTS)))
+        self._opcode_bits = bytearray(128)
+        self._imm_bits = bytearray(IMM_BIAS >> 2)
+        self._imm_count = 0
+        # immediates outside the bitmap range
+        self._imm_other = set()
+        self._latency = {lvl: array("Q", bytes(8 * LATENCY_SLOTS)) for lvl in ("L1", "L2")}
+        self._latency_hist = {"L1": LatencyHistogram(), "L2": LatencyHistogram()}
+        # vector counter slot (or 0) for every instruction word seen so far
+        self._instrs = {}
+        self.btb_events = set()
+        self.tage_events = {}
+        self.ibp_events = set()
+        self.exceptions = {}
+        self.prefetch = {}
+
+    def reset(self):
+        """Clear all collected coverage statistics."""
+        counts = self.counts
+        for i in range(len(counts)):
+            counts[i] = 0
+        self._opcode_bits[:] = bytes(len(self._opcode_bits))
+        self._imm_bits[:] = bytes(len(self._imm_bits))
+        self._imm_count = 0
+        self._imm_other.clear()
+        for lvl, lat in self._latency.items():
+            lat[:] = array("Q", bytes(8 * LATENCY_SLOTS))
+            self._latency_hist[lvl].clear()
+        self._instrs.clear()
+        self.btb_events.clear()
+        self.tage_events.clear()
+        self.ibp_events.clear()
+        self.exceptions.clear()
+        self.prefetch.clear()
+
+    # ------------------------------------------------------------------
+    # recording
+    # ------------------------------------------------------------------
+    def record_opcode(self, opcode: int):
+        self._opcode_bits[opcode & 0x7F] = 1
+
+    def record_immediate(self, imm: int):
+        imm &= MASK64
+        if imm >> 63:
+            imm -= 1 << 64
+        idx = imm + IMM_BIAS
+        if 0 <= idx < IMM_BIAS << 1:
+            bits = self._imm_bits
+            bit = 1 << (idx & 7)
+            byte = bits[idx >> 3]
+            if not byte & bit:
+                bits[idx >> 3] = byte | bit
+                self._imm_count += 1
+        else:
+            self._imm_other.add(imm & MASK64)
+
+    def record_instruction(self, instr: int):
+        slot = self._instrs.get(instr)
+        if slot is None:
+            # opcodes and immediates are sets, so only the first sighting of
+            # an instruction word can change them
+            opcode = instr & 0x7F
+            self.record_opcode(opcode)
+            self.record_immediate(instruction_immediate(instr))
+            slot = self._instrs[instr] = (
+                _VECTOR_LOADS if opcode == 0x07 else
+                _VECTOR_STORES if opcode == 0x27 else 0
+            )
+        if slot:
+            self.counts[slot] += 1
+
+    def record_cache(self, level: str, hit: bool):
+        self.counts[(_CACHE_HIT if hit else _CACHE_MISS)[level]] += 1
+
+    def record_tlb(self, level: str, hit: bool):
+        self.counts[(_TLB_HIT if hit else _TLB_MISS)[level]] += 1
+
+    def record_tlb_latency(self, level: str, cycles: int):
+        if 0 <= cycles < LATENCY_SLOTS:
+            self._latency[level][cycles] += 1
+        else:
+            self._latency_hist[level].record(cycles)
+
+    def record_tlb_fault(self, level: str):
+        self.counts[_TLB_FAULT[level]] += 1
+
+    def record_tlb_lookup(self, level: str, hit: bool, cycles: int, fault: bool):
+        counts = self.counts
+        counts[(_TLB_HIT if hit else _TLB_MISS)[level]] += 1
+        if 0 <= cycles < LATENCY_SLOTS:
+            self._latency[level][cycles] += 1
+        else:
+            self._latency_hist[level].record(cycles)
+        if fault:
+            counts[_TLB_FAULT[level]] += 1
+
+    def record_rsb_underflow(self):
+        self.counts[_RSB_UNDERFLOW] += 1
+
+    def record_rsb_overflow(self):
+        self.counts[_RSB_OVERFLOW] += 1
+
+    def record_branch(self, mispredict: bool):
+        counts = self.counts
+        counts[_BRANCHES] += 1
+        if mispredict:
+            counts[_MISPREDICTS] += 1
+
+    def record_page_walk(self, fault: bool):
+        counts = self.counts
+        counts[_PAGE_WALKS] += 1
+        if fault:
+            counts[_PAGE_WALK_FAULTS] += 1
+
+    def record_vector_load(self):
+        self.counts[_VECTOR_LOADS] += 1
+
+    def record_vector_store(self):
+        self.counts[_VECTOR_STORES] += 1
+
+    def record_vector_gather(self):
+        self.counts[_VECTOR_GATHERS] += 1
+
+    def record_vector_scatter(self):
+        self.counts[_VECTOR_SCATTERS] += 1
+
+    # ------------------------------------------------------------------
+    # views matching the CoverageModel attributes
+    # ------------------------------------------------------------------
+    @property
+    def opcodes(self):
+        bits = self._opcode_bits
+        return {op for op in range(len(bits)) if bits[op]}
+
+    @property
+    def immediates(self):
+        found = set(self._imm_other)
+        bits = self._imm_bits
+        for pos in range(len(bits)):
+            byte = bits[pos]
+            while byte:
+                low = byte & -byte
+                found.add((pos * 8 + low.bit_length() - 1 - IMM_BIAS) & MASK64)
+                byte ^= low
+        return found
+
+    @property
+    def tlb_latency(self):
+        result = {}
+        for lvl, lat in self._latency.items():
+            hist = LatencyHistogram()
+            for cycles, cnt in enumerate(lat):
+                if cnt:
+                    hist.record(cycles, cnt)
+            hist.merge(self._latency_hist[lvl])
+            result[lvl] = hist
+        return result
+
+    def opcode_coverage(self):
+        return self.opcodes
+
+    def summary(self):
+        """Return the same dictionary :py:meth:`CoverageModel.summary` does."""
+        return {
+            "opcodes": sum(self._opcode_bits),
+            "btb_entries": len(self.btb_events),
+            "tage_entries": {t: len(e) for t, e in self.tage_events.items()},
+            "ibp_entries": len(self.ibp_events),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "tlb_hits": self.tlb_hits,
+            "tlb_misses": self.tlb_misses,
+            "tlb_faults": self.tlb_faults,
+            "tlb_latency": {lvl: h.summary() for lvl, h in self.tlb_latency.items()},
+            "immediates": self._imm_count + len(self._imm_other),
+            "rsb_underflow": self.rsb_underflow,
+            "rsb_overflow": self.rsb_overflow,
+            "exceptions": dict(self.exceptions),
+            "prefetch": {lvl: dict(e) for lvl, e in self.prefetch.items()},
+            "branches": self.branches,
+            "mispredicts": self.mispredicts,
+            "page_walks": self.page_walks,
+            "page_walk_faults": self.page_walk_faults,
+            "vector_loads": self.vector_loads,
+            "vector_stores": self.vector_stores,
+            "vector_gathers": self.vector_gathers,
+            "vector_scatters": self.vector_scatters,
+        }
+
+    def merge(self, other):
+        """Merge counters from another coverage model ``other``.
+
+        *other* may be a :class:`CoverageModel` or a
+        :class:`FastCoverageModel`.
+        """
+        counts = self.counts
+        if isinstance(other, FastCoverageModel):
+            for i, cnt in enumerate(other.counts):
+                counts[i] += cnt
+            for i, bit in enumerate(other._opcode_bits):
+                if bit:
+                    self._opcode_bits[i] = 1
+            merged = (int.from_bytes(self._imm_bits, "little")
+                      | int.from_bytes(other._imm_bits, "little"))
+            self._imm_bits[:] = merged.to_bytes(len(self._imm_bits), "little")
+            self._imm_count = merged.bit_count()
+            for imm in other._imm_other:
+                self.record_immediate(imm)
+            for lvl, lat in self._latency.items():
+                for i, cnt in enumerate(other._latency[lvl]):
+                    lat[i] += cnt
+                self._latency_hist[lvl].merge(other._latency_hist[lvl])
+        else:
+            for group in _LEVEL_GROUPS:
+                ids = _GROUP_IDS[group]
+                for lvl, cnt in getattr(other, group).items():
+                    counts[ids[lvl]] += cnt
+            for name in _SCALARS:
+                counts[EVENT_IDS[name]] += getattr(other, name)
+            for op in other.opcodes:
+                self.record_opcode(op)
+            for imm in other.immediates:
+                self.record_immediate(imm)
+            for lvl, hist in other.tlb_latency.items():
+                self._latency_hist[lvl].merge(hist)
+        self.btb_events |= other.btb_events
+        for t, entries in other.tage_events.items():
+            self.tage_events.setdefault(t, set()).update(entries)
+        self.ibp_events |= other.ibp_events
+        for exc, cnt in other.exceptions.items():
+            self.exceptions[exc] = self.exceptions.get(exc, 0) + cnt
+        for lvl, events in other.prefetch.items():
+            for event, cnt in events.items():
+                self.record_prefetch(lvl, event, cnt)
+
+
+_GROUP_IDS = {group: {} for group in _LEVEL_GROUPS}
+for _slot, _idx in EVENT_IDS.items():
+    if isinstance(_slot, tuple):
+        _GROUP_IDS[_slot[0]][_slot[1]] = _idx
+_CACHE_HIT = _GROUP_IDS["cache_hits"]
+_CACHE_MISS = _GROUP_IDS["cache_misses"]
+_TLB_HIT = _GROUP_IDS["tlb_hits"]
+_TLB_MISS = _GROUP_IDS["tlb_misses"]
+_TLB_FAULT = _GROUP_IDS["tlb_faults"]
+_RSB_UNDERFLOW = EVENT_IDS["rsb_underflow"]
+_RSB_OVERFLOW = EVENT_IDS["rsb_overflow"]
+_BRANCHES = EVENT_IDS["branches"]
+_MISPREDICTS = EVENT_IDS["mispredicts"]
+_PAGE_WALKS = EVENT_IDS["page_walks"]
+_PAGE_WALK_FAULTS = EVENT_IDS["page_walk_faults"]
+_VECTOR_LOADS = EVENT_IDS["vector_loads"]
+_VECTOR_STORES = EVENT_IDS["vector_stores"]
+_VECTOR_GATHERS = EVENT_IDS["vector_gathers"]
+_VECTOR_SCATTERS = EVENT_IDS["vector_scatters"]
+
+
+def _group_view(group):
+    ids = _GROUP_IDS[group]
+
+    def view(self):
+        return {lvl: self.counts[idx] for lvl, idx in ids.items()}
+    view.__doc__ = f"``{group}`` counts per level."
+    return property(view)
+
+
+def _scalar_view(name):
+    idx = EVENT_IDS[name]
+
+    def view(self):
+        return self.counts[idx]
+    view.__doc__ = f"``{name}`` counter."
+    return property(view)
+
+
+for _group in _LEVEL_GROUPS:
+    setattr(FastCoverageModel, _group, _group_view(_group))
+for _name in _SCALARS:
+    setattr(FastCoverageModel, _name, _scalar_view(_name))
+del _slot, _idx, _group, _name
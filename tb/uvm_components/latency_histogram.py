@@ -0,0 +1,140 @@
+class LatencyHistogram:
+    """Fixed-size histogram of non-negative integer latencies.
+
+    Values below ``2 * 2**sub_bits`` get a bucket of their own.  Larger
+    values share log-linear buckets in the style of HDR histograms: every
+    power-of-two range is split into ``2**sub_bits`` equal buckets, so any
+    reported percentile is within ``1 / 2**sub_bits`` of the true value.
+    Memory use depends on the number of distinct buckets touched, not on the
+    number of samples, and merging two histograms costs one pass over the
+    buckets.  ``count``, ``min``, ``max`` and ``mean`` are exact.
+    """
+
+    def __init__(self, sub_bits: int = 6):
+        self.sub_bits = sub_bits
+        self._sub = 1 << sub_bits
+        self._exact = self._sub << 1
+        self.buckets = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    # ------------------------------------------------------------------
+    # bucket helpers
+    # ------------------------------------------------------------------
+    def _index(self, value):
+        if value < self._exact:
+            return value
+        shift = value.bit_length() - self.sub_bits - 1
+        return self._sub * (shift + 1) + (value >> shift) - self._sub
+
+    def _bounds(self, index):
+        """Return the lowest and highest value counted in bucket *index*."""
+        if index < self._exact:
+            return index, index
+        shift = index // self._sub - 1
+        mant = index % self._sub + self._sub
+        return mant << shift, ((mant + 1) << shift) - 1
+
+    # ------------------------------------------------------------------
+    def record(self, value: int, count: int = 1):
+        """Add *count* samples of *value*."""
+        value = int(value)
+        if value < 0:
+            raise ValueError("latency must be non-negative")
+        idx = value if value < self._exact else self._index(value)
+        self.buckets[idx] = self.buckets.get(idx, 0) + count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def clear(self):
+        self.buckets.clear()
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def merge(self, other):
+        """Add the samples of *other* to this histogram."""
+        if other.sub_bits != self.sub_bits:
+            raise ValueError("cannot merge histograms with different precision")
+        for idx, cnt in other.buckets.items():
+            self.buckets[idx] = self.buckets.get(idx, 0) + cnt
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def mean(self):
+        """Return the exact mean or ``None`` when empty."""
+        return self.total / self.count if self.count else None
+
+    def percentile(self, pct: float):
+        """Return the value at percentile *pct* (0-100), ``None`` when empty.
+
+        The result is the highest value of the bucket holding the requested
+        rank, clamped to the recorded minimum and maximum.
+        """
+        if not self.count:
+            return None
+        rank = max(1, -(-pct * self.count // 100))
+        seen = 0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen >= rank:
+                return min(max(self._bounds(idx)[1], self.min), self.max)
+        return self.max
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yield ``(lowest value, count)`` for every non-empty bucket."""
+        for idx in sorted(self.buckets):
+            yield self._bounds(idx)[0], self.buckets[idx]
+
+    # ------------------------------------------------------------------
+    # serialization
+    # ------------------------------------------------------------------
+    def summary(self):
+        """Return a JSON-friendly dictionary of statistics and buckets."""
+        return {
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "mean": self.mean(),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "sum": self.total,
+            "sub_bits": self.sub_bits,
+            "buckets": [[low, cnt] for low, cnt in self],
+        }
+
+    @classmethod
+    def from_summary(cls, data):
+        """Rebuild a histogram from a dictionary made by :py:meth:`summary`."""
+        hist = cls(sub_bits=data.get("sub_bits", 6))
+        for low, cnt in data.get("buckets", []):
+            idx = hist._index(int(low))
+            hist.buckets[idx] = hist.buckets.get(idx, 0) + cnt
+        hist.count = data.get("count", 0)
+        hist.total = data.get("sum", 0)
+        hist.min = data.get("min")
+        hist.max = data.get("max")
+        return hist
+
+    def __eq__(self, other):
+        if not isinstance(other, LatencyHistogram):
+            return NotImplemented
+        return self.summary() == other.summary()
+
+    def __repr__(self):
+        return f"LatencyHistogram(count={self.count}, min={self.min}, max={self.max})"
@@ -0,0 +1,227 @@
+"""Parallel coverage regressions.
+
+A regression is a list of *tests* run once per *seed*.  The ``(test, seed)``
+jobs are split into shards that run in separate processes, each with its own
+:class:`Scoreboard` per job and one coverage model per shard.  Workers send
+back the serialized coverage state (:py:meth:`CoverageModel.to_state`),
+which the parent rebuilds and merges pairwise as a tree.
+
+Tests are plain functions ``test(scoreboard, seed) -> bool`` named as
+``"package.module:function"`` so worker processes can import them.  When an
+output directory is given every finished shard is written there as JSON and
+a later run with the same shards skips the ones already present.
+"""
+
+import importlib
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .coverage import CoverageModel
+from .fast_coverage import FastCoverageModel
+from .scoreboard import Scoreboard
+
+DEFAULT_TEST = "tb.uvm_components.regression:random_instruction_test"
+
+# (funct3, funct7) pairs of register-register ALU instructions
+_R_OPS = [(0, 0), (0, 0x20), (1, 0), (2, 0), (3, 0), (4, 0), (5, 0), (5, 0x20),
+          (6, 0), (7, 0), (0, 1)]
+_I_OPS = [0, 2, 3, 4, 6, 7]
+
+
+def random_instruction_test(sb, seed, length=200):
+    """Retire *length* random ALU, load/store and branch instructions.
+
+    A second golden model provides the expected register values, standing
+    in for the RTL, so the test exercises the scoreboard checks and coverage
+    hooks for a seeded random program.
+    """
+    from rtl.isa.golden_model import GoldenModel
+
+    rng = random.Random(seed)
+    ref = GoldenModel(pc=sb.gm.pc)
+    ok = True
+    for _ in range(length):
+        rd = rng.randrange(1, 32)
+        rs1 = rng.randrange(32)
+        rs2 = rng.randrange(32)
+        kind = rng.random()
+        if kind < 0.4:
+            f3, f7 = rng.choice(_R_OPS)
+            instr = f7 << 25 | rs2 << 20 | rs1 << 15 | f3 << 12 | rd << 7 | 0x33
+        elif kind < 0.75:
+            imm = rng.randrange(-2048, 2048) & 0xFFF
+            instr = imm << 20 | rs1 << 15 | rng.choice(_I_OPS) << 12 | rd << 7 | 0x13
+        elif kind < 0.85:
+            # x0-relative loads and stores stay inside a small data window
+            off = 8 * rng.randrange(64) + 0x400
+            if rng.random() < 0.5:
+                instr = off << 20 | 3 << 12 | rd << 7 | 0x03
+            else:
+                instr = ((off >> 5) << 25 | rs2 << 20 | 3 << 12
+                         | (off & 0x1F) << 7 | 0x23)
+                rd = None
+        else:
+            # never-taken compare of a register with itself
+            instr = rs1 << 20 | rs1 << 15 | 1 << 12 | 8 << 7 | 0x63
+            rd = None
+        ref.step(instr)
+        expected = ref.regs[rd] if rd is not None else None
+        ok &= sb.commit(instr, rd_arch=rd, rd_val=expected, next_pc=ref.pc)
+    return ok
+
+
+def resolve_test(name):
+    """Return the test function named ``"module:function"``."""
+    module, _, func = name.partition(":")
+    if not func:
+        raise ValueError(f"test name {name!r} must look like 'module:function'")
+    return getattr(importlib.import_module(module), func)
+
+
+def shard_jobs(tests, seeds, shards):
+    """Split every ``(test, seed)`` pair round-robin into *shards* lists."""
+    jobs = [(test, seed) for seed in seeds for test in tests]
+    shards = max(1, min(shards, len(jobs)))
+    return [jobs[i::shards] for i in range(shards)]
+
+
+def run_shard(shard_id, jobs, fast=False):
+    """Run *jobs* in this process and return a JSON-friendly result."""
+    cov = FastCoverageModel() if fast else CoverageModel()
+    start = time.perf_counter()
+    failures = []
+    for name, seed in jobs:
+        test = resolve_test(name)
+        sb = Scoreboard(coverage=cov, trace_policy="last", trace_depth=1)
+        if not test(sb, seed):
+            failures.append([name, seed])
+    return {
+        "shard": shard_id,
+        "jobs": [list(job) for job in jobs],
+        "failures": failures,
+        "seconds": time.perf_counter() - start,
+        "coverage": cov.to_state(),
+    }
+
+
+def tree_merge(models):
+    """Merge *models* pairwise in rounds and return the combined model.
+
+    The models are merged in place; the first one ends up holding the
+    result.  ``None`` is returned for an empty list.
+    """
+    models = list(models)
+    while len(models) > 1:
+        merged = []
+        for i in range(0, len(models) - 1, 2):
+            models[i].merge(models[i + 1])
+            merged.append(models[i])
+        if len(models) % 2:
+            merged.append(models[-1])
+        models = merged
+    return models[0] if models else None
+
+
+def _shard_path(out_dir, shard_id):
+    return os.path.join(out_dir, f"shard_{shard_id:04d}.json")
+
+
+def _load_shard(out_dir, shard_id, jobs):
+    """Return a saved shard result matching *jobs*, or ``None``."""
+    path = _shard_path(out_dir, shard_id)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            result = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if result.get("jobs") != [list(job) for job in jobs]:
+        return None
+    return result
+
+
+def _save_shard(out_dir, result):
+    path = _shard_path(out_dir, result["shard"])
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    # a killed run leaves either the old file or the complete new one
+    os.replace(tmp, path)
+
+
+def run_regression(tests, seeds, *, workers=None, shards=None, out_dir=None, fast=False):
+    """Run every test for every seed across worker processes.
+
+    Parameters
+    ----------
+    tests : list[str]
+        Test names in ``"module:function"`` form.
+    seeds : iterable of int
+        Seeds passed to every test.
+    workers : int or None
+        Number of worker processes, ``os.cpu_count()`` by default.  With
+        ``workers=1`` the shards run in the calling process.
+    shards : int or None
+        Number of shards, four per worker by default so faster workers
+        pick up more of the work.
+    out_dir : str or None
+        Directory for per-shard results.  Shards already saved there with
+        the same job list are loaded instead of being run again.
+    fast : bool
+        Use :class:`FastCoverageModel` in the workers.
+
+    Returns
+    -------
+    dict
+        ``coverage`` (the merged model), ``shards`` (one row per shard with
+        ``shard``, ``jobs``, ``failures``, ``seconds`` and ``resumed``),
+        ``failures`` (``[test, seed]`` pairs) and ``seconds`` (wall time).
+    """
+    start = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    plan = shard_jobs(list(tests), list(seeds), shards or 4 * workers)
+    results = {}
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+        for shard_id, jobs in enumerate(plan):
+            result = _load_shard(out_dir, shard_id, jobs)
+            if result is not None:
+                result["resumed"] = True
+                results[shard_id] = result
+    pending = [i for i in range(len(plan)) if i not in results and plan[i]]
+
+    def finish(result):
+        result["resumed"] = False
+        if out_dir is not None:
+            _save_shard(out_dir, result)
+        results[result["shard"]] = result
+
+    if workers == 1:
+        for shard_id in pending:
+            finish(run_shard(shard_id, plan[shard_id], fast))
+    elif pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_shard, i, plan[i], fast) for i in pending]
+            for future in as_completed(futures):
+                finish(future.result())
+
+    cls = FastCoverageModel if fast else CoverageModel
+    ordered = [results[i] for i in sorted(results)]
+    coverage = tree_merge(cls.from_state(r["coverage"]) for r in ordered) or cls()
+    return {
+        "coverage": coverage,
+        "shards": [
+            {
+                "shard": r["shard"],
+                "jobs": len(r["jobs"]),
+                "failures": len(r["failures"]),
+                "seconds": r["seconds"],
+                "resumed": r["resumed"],
+            }
+            for r in ordered
+        ],
+        "failures": [f for r in ordered for f in r["failures"]],
+        "seconds": time.perf_counter() - start,
+    }
@@ -1,11 +1,28 @@
+from collections import deque
+
+from .trace_utils import HEADER
+from .trace_utils import TraceWriter
 from .trace_utils import save_trace
 from .trace_utils import save_trace_json
+from .trace_utils import save_trace_binary
+
+TRACE_POLICIES = ("all", "last", "mismatch", "spill")
 
 
 class Scoreboard:
     """Reference checker using the :class:`GoldenModel`."""
 
-    def __init__(self, start_pc: int = 0, start_rob_idx: int = 0, coverage=None):
+    def __init__(
+        self,
+        start_pc: int = 0,
+        start_rob_idx: int = 0,
+        coverage=None,
+        trace_writer=None,
+        trace_policy: str = "all",
+        trace_depth=None,
+        spill_path=None,
+        spill_compression=None,
+    ):
         """Create a scoreboard.
 
         Parameters
@@ -16,15 +33,45 @@ class Scoreboard:
             Starting reorder buffer index for commit order checks.
         coverage : CoverageModel or ``None``
             Optional coverage collector.
+        trace_writer : TraceWriter or ``None``
+            Optional binary trace writer every committed entry is streamed
+            to as it retires.
+        trace_policy : str
+            Which commits stay in memory: ``"all"`` keeps every entry,
+            ``"last"`` only the newest ``trace_depth`` entries,
+            ``"mismatch"`` the ``trace_depth`` entries up to and including
+            the first mismatch plus ``trace_depth`` entries after it, and
+            ``"spill"`` writes every ``trace_depth`` entries to
+            ``spill_path`` in the binary format and drops them from memory.
+        trace_depth : int or None
+            Entry count used by every policy except ``"all"``.
+        spill_path : str or None
+            Output file for the ``"spill"`` policy.
+        spill_compression : str or None
+            Chunk compression used for the spill file.
         """
 
         from rtl.isa.golden_model import GoldenModel
 
         self.gm = GoldenModel(pc=start_pc, coverage=coverage)
-        self.trace = []
+        if trace_policy not in TRACE_POLICIES:
+            raise ValueError(f"unknown trace policy {trace_policy!r}")
+        if trace_policy != "all" and (trace_depth is None or trace_depth <= 0):
+            raise ValueError(f"trace policy {trace_policy!r} needs a positive trace_depth")
+        if trace_policy == "spill" and spill_path is None:
+            raise ValueError("trace policy 'spill' needs a spill_path")
+        self.trace_policy = trace_policy
+        self.trace_depth = trace_depth
+        self.spill_writer = None
+        if trace_policy == "spill":
+            self.spill_writer = TraceWriter(
+                spill_path, compression=spill_compression, chunk_records=trace_depth
+            )
+        self._new_trace()
         self.cycle = 0
         self.expected_rob_idx = start_rob_idx
         self.coverage = coverage
+        self.trace_writer = trace_writer
 
         # simple expected/actual lists used by some unit tests
         self.expected = []
@@ -49,7 +96,10 @@ class Scoreboard:
         from rtl.isa.golden_model import GoldenModel
 
         self.gm = GoldenModel(pc=pc)
-        self.trace.clear()
+        if self.spill_writer is not None:
+            # entries retained so far still belong in the spill file
+            self._spill()
+        self._new_trace()
         self.cycle = 0
         self.expected_rob_idx = rob_idx
         self.expected.clear()
@@ -57,6 +107,55 @@ class Scoreboard:
         if self.coverage:
             self.coverage.reset()
 
+    # ------------------------------------------------------------------
+    # Trace retention
+    # ------------------------------------------------------------------
+    def _new_trace(self):
+        """Start an empty trace for the configured retention policy."""
+        if self.trace_policy in ("last", "mismatch"):
+            self.trace = deque(maxlen=self.trace_depth)
+        else:
+            self.trace = []
+        # commits recorded since the last reset, including dropped ones
+        self.trace_count = 0
+        self.first_mismatch = None
+        self._window_left = None
+
+    def _retain(self, record, ok):
+        """Keep *record* (a tuple in ``HEADER`` order) as the policy allows."""
+        index = self.trace_count
+        self.trace_count += 1
+        if self.trace_policy == "mismatch":
+            if self._window_left is None:
+                self.trace.append(record)
+                if not ok:
+                    self.first_mismatch = index
+                    # the entries before the mismatch are frozen from here on
+                    self.trace = list(self.trace)
+                    self._window_left = self.trace_depth
+            elif self._window_left:
+                self.trace.append(record)
+                self._window_left -= 1
+            return
+        if not ok and self.first_mismatch is None:
+            self.first_mismatch = index
+        self.trace.append(record)
+        if self.spill_writer is not None and len(self.trace) >= self.trace_depth:
+            self._spill()
+
+    def _spill(self):
+        write = self.spill_writer.write_record
+        for record in self.trace:
+            write(record)
+        self.trace.clear()
+
+    def close_trace(self):
+        """Spill any remaining entries and close the spill file."""
+        if self.spill_writer is not None:
+            self._spill()
+            self.spill_writer.close()
+            self.spill_writer = None
+
     # ------------------------------------------------------------------
     # Vector gather/scatter helpers
     # ------------------------------------------------------------------
@@ -182,35 +281,7 @@ class Scoreboard:
         pc_before = self.gm.pc
         opcode = instr & 0x7F
         if self.coverage:
-            self.coverage.record_opcode(opcode)
-            # decode immediate for coverage purposes (I/S/B/J types only)
-            imm = 0
-            if opcode in (0x13, 0x03, 0x67):
-                imm = ((instr >> 20) & 0xFFF)
-                sign = 1 << 11
-                imm = (imm & (sign - 1)) - (imm & sign)
-            elif opcode == 0x23:
-                imm = ((instr >> 7) & 0x1F) | (((instr >> 25) & 0x7F) << 5)
-                sign = 1 << 11
-                imm = (imm & (sign - 1)) - (imm & sign)
-            elif opcode == 0x63:
-                imm = ((instr >> 7) & 0x1E) | ((instr >> 20) & 0x7E0)
-                imm |= ((instr >> 7) & 0x1) << 11
-                imm |= (instr >> 31) << 12
-                sign = 1 << 12
-                imm = (imm & (sign - 1)) - (imm & sign)
-            elif opcode == 0x6F:
-                imm = ((instr >> 21) & 0x3FF) | ((instr >> 20) & 0x1) << 10
-                imm |= ((instr >> 12) & 0xFF) << 11
-                imm |= (instr >> 31) << 19
-                imm = ((imm << 1) & 0x1FFFFF)
-                sign = 1 << 20
-                imm = (imm & (sign - 1)) - (imm & sign)
-            self.coverage.record_immediate(imm)
-            if opcode == 0x07:
-                self.coverage.record_vector_load()
-            elif opcode == 0x27:
-                self.coverage.record_vector_store()
+            self.coverage.record_instruction(instr)
         self.gm.step(instr)
         gm_exc = self.gm.get_last_exception()
         if self.coverage and gm_exc is not None:
@@ -260,30 +331,36 @@ class Scoreboard:
             if rob_idx != self.expected_rob_idx:
                 ok = False
             self.expected_rob_idx = (rob_idx + 1) & 0xFFFFFFFF
-        self.trace.append({
-            "cycle": current_cycle,
-            "pc": pc_before,
-            "instr": instr,
-            "next_pc": self.gm.pc,
-            "rd_arch": rd_arch,
-            "rd_val": self.gm.regs[rd_arch] if rd_arch is not None else None,
-            "store_addr": store_addr if is_store else None,
-            "store_data": store_data if is_store else None,
-            "load_addr": load_addr if is_load else None,
-            "load_data": load_data if is_load else None,
-            "exception": gm_exc,
-            "branch_taken": branch_taken_gm,
-            "branch_target": branch_target_gm,
-            "pred_taken": pred_taken,
-            "pred_target": pred_target,
-            "mispredict": mispred_flag,
-            "rob_idx": rob_idx,
-        })
+        record = (
+            current_cycle,
+            pc_before,
+            instr,
+            self.gm.pc,
+            rd_arch,
+            self.gm.regs[rd_arch] if rd_arch is not None else None,
+            store_addr if is_store else None,
+            store_data if is_store else None,
+            load_addr if is_load else None,
+            load_data if is_load else None,
+            gm_exc,
+            branch_taken_gm,
+            branch_target_gm,
+            pred_taken,
+            pred_target,
+            mispred_flag,
+            rob_idx,
+        )
+        self._retain(record, ok)
+        if self.trace_writer is not None:
+            self.trace_writer.write_record(record)
         return ok
 
     def get_trace(self):
-        """Return the collected reference trace."""
-        return list(self.trace)
+        """Return the retained reference trace as a list of dictionaries.
+
+        Entries already written to the spill file are not included.
+        """
+        return [dict(zip(HEADER, record)) for record in self.trace]
 
     def dump_trace(self, path):
         """Write the trace to *path* in CSV format.
@@ -293,13 +370,24 @@ class Scoreboard:
         path : str
             Output file path.
         """
-        save_trace(self.trace, path)
-        return list(self.trace)
+        trace = self.get_trace()
+        save_trace(trace, path)
+        return trace
 
     def dump_trace_json(self, path):
         """Write the trace to *path* in JSON format and return it."""
-        save_trace_json(self.trace, path)
-        return list(self.trace)
+        trace = self.get_trace()
+        save_trace_json(trace, path)
+        return trace
+
+    def dump_trace_binary(self, path, compression=None):
+        """Write the trace to *path* in the binary format and return it.
+
+        ``compression`` may be ``None``, ``"zlib"`` or ``"lzma"``.
+        """
+        trace = self.get_trace()
+        save_trace_binary(trace, path, compression=compression)
+        return trace
 
     def commit_bundle(
         self,
@@ -361,7 +449,8 @@ class Scoreboard:
         mispredict_list = mispredict_list or [None] * n
         rob_idx_list = rob_idx_list or [None] * n
 
-        current_cycle = self.cycle
+        # the cycle only advances after the bundle, so every entry records
+        # the same cycle number
         results = []
         for i in range(n):
             ok = self.commit(
@@ -384,13 +473,138 @@ class Scoreboard:
                 rob_idx=rob_idx_list[i],
                 increment_cycle=False,
             )
-            # fix up the cycle for this trace entry to match the bundle cycle
-            self.trace[-1]["cycle"] = current_cycle
             results.append(ok)
 
         self.cycle += 1
         return results
 
+    def replay(
+        self,
+        instrs,
+        *,
+        pc=None,
+        rd=None,
+        rd_val=None,
+        mem_addr=None,
+        mem_data=None,
+        exception=None,
+        stop_on_mismatch=True,
+    ):
+        """Check a whole RTL retirement log given as columns.
+
+        Parameters
+        ----------
+        instrs : sequence of int
+            Retired instruction words, one per log entry.
+        pc : sequence of int or None
+            PC of each retired instruction.
+        rd, rd_val : sequence or None
+            Destination register and the value the RTL wrote. Entries where
+            ``rd`` is ``None`` or negative are not checked.
+        mem_addr, mem_data : sequence or None
+            Address and data of the load or store performed by each entry.
+            Entries where ``mem_addr`` is ``None`` or negative are skipped.
+        exception : sequence or None
+            Exception reported by the RTL for each entry, ``None`` or an
+            empty string when there was none.
+        stop_on_mismatch : bool
+            Stop at the first mismatching entry instead of checking the
+            whole log.
+
+        Columns may be lists, ``array.array`` objects or NumPy arrays; only
+        the ones provided are compared. The golden model executes each entry
+        exactly like :py:meth:`commit`, but no trace entries are recorded.
+
+        Returns
+        -------
+        dict
+            ``checked`` entries, ``mismatches`` found, the ``first_mismatch``
+            (``None`` or a dict with ``index``, ``pc``, ``instr``, ``field``,
+            ``expected`` and ``actual``) and counts of ``loads``, ``stores``,
+            ``branches``, ``taken_branches`` and ``exceptions`` by name.
+        """
+        from itertools import repeat
+
+        gm = self.gm
+        step = gm.step
+        coverage = self.coverage
+        nothing = repeat(None)
+        columns = zip(
+            instrs,
+            nothing if pc is None else pc,
+            nothing if rd is None else rd,
+            nothing if rd_val is None else rd_val,
+            nothing if mem_addr is None else mem_addr,
+            nothing if mem_data is None else mem_data,
+            nothing if exception is None else exception,
+        )
+        check_exc = exception is not None
+        first = None
+        mismatches = 0
+        checked = loads = stores = branches = taken = 0
+        exceptions = {}
+
+        for index, (instr, exp_pc, rd_i, rd_v, addr, data, exp_exc) in enumerate(columns):
+            instr = int(instr)
+            pc_before = gm.pc
+            opcode = instr & 0x7F
+            if coverage:
+                coverage.record_instruction(instr)
+            step(instr)
+            gm_exc = gm.last_exception
+            checked += 1
+            if gm_exc is not None:
+                exceptions[gm_exc] = exceptions.get(gm_exc, 0) + 1
+                if coverage:
+                    coverage.record_exception(gm_exc)
+            if opcode in (0x63, 0x6F, 0x67):
+                branches += 1
+                if gm.pc != pc_before + 4:
+                    taken += 1
+                if coverage:
+                    coverage.record_branch(False)
+            elif opcode in (0x03, 0x07):
+                loads += 1
+            elif opcode in (0x23, 0x27):
+                stores += 1
+
+            field = None
+            if exp_pc is not None and exp_pc != pc_before:
+                field, expected, actual = "pc", exp_pc, pc_before
+            elif rd_i is not None and rd_i >= 0 and gm.regs[rd_i] != rd_v:
+                field, expected, actual = "rd_val", rd_v, gm.regs[rd_i]
+            elif addr is not None and addr >= 0:
+                mem_val = gm._mem_load(int(addr))
+                if mem_val != data:
+                    field, expected, actual = "mem_data", data, mem_val
+            if field is None and check_exc and (exp_exc or None) != gm_exc:
+                field, expected, actual = "exception", exp_exc or None, gm_exc
+            if field is not None:
+                mismatches += 1
+                if first is None:
+                    first = {
+                        "index": index,
+                        "pc": pc_before,
+                        "instr": instr,
+                        "field": field,
+                        "expected": expected,
+                        "actual": actual,
+                    }
+                if stop_on_mismatch:
+                    break
+
+        self.cycle += checked
+        return {
+            "checked": checked,
+            "mismatches": mismatches,
+            "first_mismatch": first,
+            "loads": loads,
+            "stores": stores,
+            "branches": branches,
+            "taken_branches": taken,
+            "exceptions": exceptions,
+        }
+
     def dump_coverage(self, path):
         """Write coverage summary to *path* in JSON format and return it.
 
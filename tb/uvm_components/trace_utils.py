@@ -1,5 +1,16 @@
 import csv
 import json
+import lzma
+import mmap
+import struct
+import weakref
+import zlib
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when NumPy is missing
+    np = None
 
 HEADER = [
     "cycle",
@@ -65,3 +76,415 @@ def load_trace_json(path):
     """Load a JSON trace file from *path* and return a list of entries."""
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
+
+
+# ----------------------------------------------------------------------
+# Binary trace format
+# ----------------------------------------------------------------------
+#
+# A binary trace starts with a fixed header followed by a sequence of
+# chunks.  Every chunk has a small header giving its kind, the number of
+# items it holds and the size of its (possibly compressed) payload:
+#
+#   ``R`` chunks hold fixed-width little-endian records, one per entry;
+#   ``N`` chunks append names to the exception table and always precede the
+#   first record that refers to them.
+#
+# Records store the ``exception`` column as an index into that table
+# (``0`` for none) and carry a presence mask so ``None`` survives a round
+# trip.  Integer fields are stored modulo their field width.
+
+TRACE_MAGIC = b"TRCB"
+TRACE_VERSION = 1
+
+COMPRESSION = {None: 0, "zlib": 1, "lzma": 2}
+_COMPRESSION_NAMES = {v: k for k, v in COMPRESSION.items()}
+
+_FILE_HEADER = struct.Struct("<4sHBBHI")
+_CHUNK_HEADER = struct.Struct("<cII")
+_NAME_LEN = struct.Struct("<H")
+
+# struct codes for each HEADER column, in HEADER order
+_FIELD_CODES = {
+    "cycle": "Q",
+    "pc": "Q",
+    "instr": "I",
+    "next_pc": "Q",
+    "rd_arch": "B",
+    "rd_val": "Q",
+    "store_addr": "Q",
+    "store_data": "Q",
+    "load_addr": "Q",
+    "load_data": "Q",
+    "exception": "H",
+    "branch_taken": "?",
+    "branch_target": "Q",
+    "pred_taken": "?",
+    "pred_target": "Q",
+    "mispredict": "?",
+    "rob_idx": "I",
+}
+_RECORD = struct.Struct("<" + "".join(_FIELD_CODES[k] for k in HEADER) + "I")
+_EXC_COL = HEADER.index("exception")
+_FIELD_MASKS = tuple(
+    None if _FIELD_CODES[k] == "?" else (1 << (8 * struct.calcsize(_FIELD_CODES[k]))) - 1
+    for k in HEADER
+)
+_MAX_NAMES = 0xFFFF
+_NUMPY_CODES = {"Q": "<u8", "I": "<u4", "H": "<u2", "B": "u1", "?": "?"}
+_RECORD_DTYPE = None if np is None else np.dtype(
+    [(k, _NUMPY_CODES[_FIELD_CODES[k]]) for k in HEADER] + [("_present", "<u4")]
+)
+
+
+class TraceWriter:
+    """Stream trace entries to a binary trace file.
+
+    Parameters
+    ----------
+    path : str or path-like
+        Output file.
+    compression : ``None``, ``"zlib"`` or ``"lzma"``
+        Compression applied to each chunk.
+    chunk_records : int
+        Number of records buffered before a chunk is written.
+
+    Entries are the dictionaries produced by :py:meth:`Scoreboard.get_trace`
+    and are packed as soon as they are written, so memory use is bounded by
+    one chunk regardless of the trace length.  The writer can be used as a
+    context manager; :py:meth:`close` flushes the last partial chunk.
+    """
+
+    def __init__(self, path, compression=None, chunk_records=4096):
+        if compression not in COMPRESSION:
+            raise ValueError(f"unknown compression {compression!r}")
+        if chunk_records <= 0:
+            raise ValueError("chunk_records must be positive")
+        self.compression = compression
+        self.chunk_records = chunk_records
+        self.count = 0
+        self._names = {}
+        self._buf = bytearray()
+        self._pending = 0
+        self._f = open(path, "wb")
+        self._f.write(_FILE_HEADER.pack(
+            TRACE_MAGIC, TRACE_VERSION, COMPRESSION[compression], 0,
+            _RECORD.size, chunk_records,
+        ))
+
+    def _compress(self, data):
+        if self.compression == "zlib":
+            return zlib.compress(data)
+        if self.compression == "lzma":
+            return lzma.compress(data)
+        return data
+
+    def _write_chunk(self, kind, count, payload):
+        payload = self._compress(bytes(payload))
+        self._f.write(_CHUNK_HEADER.pack(kind, count, len(payload)))
+        self._f.write(payload)
+
+    def _exception_index(self, name):
+        idx = self._names.get(name)
+        if idx is None:
+            if len(self._names) >= _MAX_NAMES:
+                raise ValueError("too many distinct exception names")
+            # records already buffered must not see the new name first
+            self.flush()
+            raw = str(name).encode("utf-8")
+            idx = self._names[name] = len(self._names) + 1
+            self._write_chunk(b"N", 1, _NAME_LEN.pack(len(raw)) + raw)
+        return idx
+
+    def write(self, entry):
+        """Append one trace *entry* (a dictionary keyed by ``HEADER``)."""
+        self.write_record([entry.get(key) for key in HEADER])
+
+    def write_record(self, record):
+        """Append one entry given as a sequence of values in ``HEADER`` order."""
+        values = []
+        present = 0
+        for i, val in enumerate(record):
+            if i == _EXC_COL:
+                val = 0 if val is None else self._exception_index(val)
+            elif val is None:
+                val = 0
+            else:
+                present |= 1 << i
+                mask = _FIELD_MASKS[i]
+                val = bool(val) if mask is None else int(val) & mask
+            values.append(val)
+        values.append(present)
+        self._buf += _RECORD.pack(*values)
+        self._pending += 1
+        self.count += 1
+        if self._pending >= self.chunk_records:
+            self.flush()
+
+    def write_many(self, entries):
+        """Append every entry of the iterable *entries*."""
+        for entry in entries:
+            self.write(entry)
+
+    def flush(self):
+        """Write the buffered records as a chunk."""
+        if self._pending:
+            self._write_chunk(b"R", self._pending, self._buf)
+            self._buf.clear()
+            self._pending = 0
+        self._f.flush()
+
+    def close(self):
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TraceReader:
+    """Read a binary trace written by :class:`TraceWriter`.
+
+    Iterating over the reader yields entry dictionaries lazily, chunk by
+    chunk.  ``len(reader)`` and ``reader[i]`` are supported as well; only the
+    chunk headers are scanned when the file is opened.  Uncompressed traces
+    are memory-mapped when *use_mmap* is true so records are unpacked
+    straight from the mapping.  :py:meth:`close` finishes any record or
+    column generator that is still running, since those hold views into
+    the mapping.
+    """
+
+    def __init__(self, path, use_mmap=True):
+        self._f = open(path, "rb")
+        header = self._f.read(_FILE_HEADER.size)
+        if len(header) < _FILE_HEADER.size:
+            self._f.close()
+            raise ValueError("truncated trace header")
+        magic, version, comp, _, rec_size, chunk_records = _FILE_HEADER.unpack(header)
+        if magic != TRACE_MAGIC:
+            self._f.close()
+            raise ValueError("not a binary trace file")
+        if version != TRACE_VERSION or rec_size != _RECORD.size:
+            self._f.close()
+            raise ValueError(f"unsupported trace version {version}")
+        if comp not in _COMPRESSION_NAMES:
+            self._f.close()
+            raise ValueError(f"unknown compression id {comp}")
+        self.version = version
+        self.compression = _COMPRESSION_NAMES[comp]
+        self.chunk_records = chunk_records
+        self._mm = None
+        if use_mmap and self.compression is None:
+            try:
+                self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file cannot be mapped
+                self._mm = None
+        # exception table as seen after each record chunk
+        self._names = [None]
+        self._chunks = []  # (first record index, payload offset, size, count)
+        self._starts = []
+        self._cached = (None, None)
+        # generators that may hold views into the mapping
+        self._live = weakref.WeakSet()
+        self._scan()
+
+    def _scan(self):
+        f = self._f
+        offset = _FILE_HEADER.size
+        total = 0
+        f.seek(offset)
+        while True:
+            raw = f.read(_CHUNK_HEADER.size)
+            if not raw:
+                break
+            if len(raw) < _CHUNK_HEADER.size:
+                raise ValueError("truncated chunk header")
+            kind, count, size = _CHUNK_HEADER.unpack(raw)
+            offset += _CHUNK_HEADER.size
+            if kind == b"N":
+                f.seek(offset)
+                payload = self._decompress(f.read(size))
+                pos = 0
+                for _ in range(count):
+                    (n,) = _NAME_LEN.unpack_from(payload, pos)
+                    pos += _NAME_LEN.size
+                    self._names.append(payload[pos:pos + n].decode("utf-8"))
+                    pos += n
+            elif kind == b"R":
+                self._chunks.append((total, offset, size, count))
+                self._starts.append(total)
+                total += count
+            else:
+                raise ValueError(f"unknown chunk kind {kind!r}")
+            offset += size
+            f.seek(offset)
+        self._count = total
+
+    def _decompress(self, data):
+        if self.compression == "zlib":
+            return zlib.decompress(data)
+        if self.compression == "lzma":
+            return lzma.decompress(data)
+        return data
+
+    def _payload(self, chunk_no):
+        if self._cached[0] == chunk_no:
+            return self._cached[1]
+        _, offset, size, _ = self._chunks[chunk_no]
+        if self._mm is not None:
+            data = memoryview(self._mm)[offset:offset + size]
+        else:
+            self._f.seek(offset)
+            data = self._decompress(self._f.read(size))
+        self._cached = (chunk_no, data)
+        return data
+
+    def _to_entry(self, values):
+        entry = {}
+        present = values[-1]
+        for i, key in enumerate(HEADER):
+            if i == _EXC_COL:
+                entry[key] = self._names[values[i]]
+            elif present >> i & 1:
+                entry[key] = values[i]
+            else:
+                entry[key] = None
+        return entry
+
+    def _track(self, gen):
+        self._live.add(gen)
+        return gen
+
+    def records(self):
+        """Yield raw record tuples (fields in ``HEADER`` order plus mask)."""
+        return self._track(self._records())
+
+    def _records(self):
+        for chunk_no in range(len(self._chunks)):
+            yield from _RECORD.iter_unpack(self._payload(chunk_no))
+
+    def column_chunks(self, *names):
+        """Yield ``(columns, present)`` for every record chunk.
+
+        ``columns`` holds the values of the requested *names* and
+        ``present`` a matching boolean mask per column that is false where
+        the entry had ``None``.  With NumPy installed both are arrays
+        sliced out of the chunk in one step, otherwise lists.  Exception
+        columns hold name indices, ``0`` meaning none.
+        """
+        return self._track(self._column_chunks(names))
+
+    def _column_chunks(self, names):
+        cols = [HEADER.index(name) for name in names]
+        for chunk_no in range(len(self._chunks)):
+            payload = self._payload(chunk_no)
+            if np is not None:
+                rec = np.frombuffer(bytes(payload), dtype=_RECORD_DTYPE)
+                present = rec["_present"]
+                yield ([rec[name] for name in names],
+                       [(present >> i) & 1 == 1 for i in cols])
+            else:
+                rows = list(_RECORD.iter_unpack(payload))
+                yield ([[r[i] for r in rows] for i in cols],
+                       [[bool(r[-1] >> i & 1) for r in rows] for i in cols])
+
+    def __iter__(self):
+        to_entry = self._to_entry
+        for values in self.records():
+            yield to_entry(values)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("trace index out of range")
+        chunk_no = bisect_right(self._starts, index) - 1
+        first = self._chunks[chunk_no][0]
+        values = _RECORD.unpack_from(self._payload(chunk_no), (index - first) * _RECORD.size)
+        return self._to_entry(values)
+
+    def close(self):
+        for gen in list(self._live):
+            gen.close()
+        if isinstance(self._cached[1], memoryview):
+            self._cached[1].release()
+        self._cached = (None, None)
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_trace_binary(entries, path, compression=None):
+    """Save *entries* to *path* in the binary trace format."""
+    with TraceWriter(path, compression=compression) as writer:
+        writer.write_many(entries)
+
+
+def load_trace_binary(path):
+    """Load a binary trace file from *path* and return a list of entries."""
+    with TraceReader(path, use_mmap=False) as reader:
+        return list(reader)
+
+
+def _iter_csv(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield {k: _parse_value(row.get(k, "")) for k in HEADER}
+
+
+def csv_to_binary(csv_path, bin_path, compression=None):
+    """Convert a CSV trace to the binary format without loading it whole."""
+    with TraceWriter(bin_path, compression=compression) as writer:
+        writer.write_many(_iter_csv(csv_path))
+        return writer.count
+
+
+def binary_to_csv(bin_path, csv_path):
+    """Convert a binary trace to the CSV format written by :func:`save_trace`."""
+    with TraceReader(bin_path) as reader, \
+            open(csv_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=HEADER)
+        writer.writeheader()
+        writer.writerows(reader)
+        return len(reader)
+
+
+def json_to_binary(json_path, bin_path, compression=None):
+    """Convert a JSON trace to the binary format."""
+    with TraceWriter(bin_path, compression=compression) as writer:
+        writer.write_many(load_trace_json(json_path))
+        return writer.count
+
+
+def binary_to_json(bin_path, json_path):
+    """Convert a binary trace to JSON, one entry at a time.
+
+    The output is identical to what :func:`save_trace_json` writes for the
+    same entries.
+    """
+    with TraceReader(bin_path) as reader, open(json_path, "w", encoding="utf-8") as f:
+        if not len(reader):
+            f.write("[]")
+            return 0
+        f.write("[")
+        sep = "\n"
+        for entry in reader:
+            f.write(sep)
+            f.write("\n".join("  " + line for line in json.dumps(entry, indent=2).split("\n")))
+            sep = ",\n"
+        f.write("\n]")
+        return len(reader)